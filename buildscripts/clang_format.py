@@ -29,6 +29,7 @@ from multiprocessing import cpu_count
 if __name__ == "__main__" and __package__ is None:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(os.path.realpath(__file__)))))
 
+from buildscripts.linter import cache
 from buildscripts.linter import git
 from buildscripts.linter import parallel
 
@@ -257,6 +258,25 @@ class ClangFormat(object):
         """
         return self._lint(file_name, print_diff=True)
 
+    def lint_batch(self, file_names):
+        """Check several files with one clang-format process, and return the files that have the
+        correct format
+        """
+        # clang-format prints an XML document listing the changes it would make to each file, in
+        # the order the files are given. Only the files that would be changed are formatted again
+        # to print their diffs.
+        try:
+            output = callo([self.path, "--style=file", "-output-replacements-xml"] + file_names)
+        except subprocess.CalledProcessError:
+            output = ""
+
+        documents = output.split("<?xml")[1:]
+        if len(documents) != len(file_names):
+            return [file_name for file_name in file_names if self.lint(file_name)]
+
+        return [file_name for (file_name, document) in zip(file_names, documents)
+                if "<replacement " not in document or self.lint(file_name)]
+
     def format(self, file_name):
         """Update the format of the specified file
         """
@@ -299,7 +319,10 @@ def _lint_files(clang_format, files):
     """
     clang_format = ClangFormat(clang_format, _get_build_dir())
 
-    lint_clean = parallel.parallel_process([os.path.abspath(f) for f in files], clang_format.lint)
+    # Only lint the files that changed since clang-format last found no errors in them.
+    lint_cache = cache.LintCache(_get_build_dir(), CLANG_FORMAT_PROGNAME, CLANG_FORMAT_VERSION,
+                                 [".clang-format", "_clang-format"], git.get_base_dir())
+    lint_clean = cache.lint_file_batches(lint_cache, files, clang_format.lint_batch)
 
     if not lint_clean:
         print("ERROR: Code Style does not match coding style")
@@ -7,8 +7,6 @@ Combines JSON report files used in Evergreen
 from __future__ import absolute_import
 from __future__ import print_function
 
-import errno
-import json
 import os
 import sys
 from optparse import OptionParser
@@ -17,26 +15,17 @@ from optparse import OptionParser
 if __name__ == "__main__" and __package__ is None:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from buildscripts.resmokelib.testing import report
+from buildscripts.resmokelib import reportfile
 from buildscripts.resmokelib import utils
 
 
-def read_json_file(json_file):
-    with open(json_file) as json_data:
-        return json.load(json_data)
-
-
 def report_exit(combined_test_report):
     """The exit code of this script is based on the following:
         0:  All tests have status "pass", or only non-dynamic tests have status "silentfail".
         31: At least one test has status "fail" or "timeout".
        Note: A test can be considered dynamic if its name contains a ":" character."""
 
-    ret = 0
-    for test in combined_test_report.test_infos:
-        if test.status in ["fail", "timeout"]:
-            return 31
-    return ret
+    return reportfile.exit_code(combined_test_report)
 
 
 def check_error(input_count, output_count):
@@ -70,23 +59,8 @@ def main():
     if not args:
         sys.exit("No report files were specified")
 
-    report_files = args
-    report_files_count = len(report_files)
-    test_reports = []
-
-    for report_file in report_files:
-        try:
-            report_file_json = read_json_file(report_file)
-            test_reports.append(report.TestReport.from_dict(report_file_json))
-        except IOError as e:
-            # errno.ENOENT is the error code for "No such file or directory".
-            if e.errno == errno.ENOENT:
-                report_files_count -= 1
-                continue
-            raise
-
-    combined_test_report = report.TestReport.combine(*test_reports)
-    combined_report = combined_test_report.as_dict()
+    (combined_test_report, report_files_count) = reportfile.combine_files(args,
+                                                                           ignore_missing=True)
 
     if options.outfile == "-":
         outfile_exists = False  # Nothing will be overridden when writing to stdout.
@@ -97,7 +71,7 @@ def main():
 
     if not outfile_exists:
         with utils.open_or_use_stdout(options.outfile) as fh:
-            json.dump(combined_report, fh)
+            combined_test_report.write_json(fh)
 
     if options.report_exit:
         sys.exit(report_exit(combined_test_report))
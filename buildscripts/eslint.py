@@ -28,6 +28,7 @@ if __name__ == "__main__" and __package__ is None:
 
 from buildscripts.resmokelib.utils import globstar
 
+from buildscripts.linter import cache
 from buildscripts.linter import git
 from buildscripts.linter import parallel
 
@@ -184,6 +185,20 @@ class ESLint(object):
         """
         return self._lint(file_name, print_diff=True)
 
+    def lint_batch(self, file_names):
+        """Check several files with one ESLint process, and return the files without linting
+        errors
+        """
+        try:
+            callo([self.path, "-f", "unix"] + file_names)
+            return file_names
+        except subprocess.CalledProcessError:
+            # Check each file on its own so the errors are printed for the right file.
+            return [file_name for file_name in file_names if self.lint(file_name)]
+        except:
+            print("ERROR: ESLint process threw unexpected error", sys.exc_info()[0])
+            return []
+
     def autofix(self, file_name):
         """ Run ESLint in fix mode.
         """
@@ -205,7 +220,12 @@ def _lint_files(eslint, files):
     """
     eslint = ESLint(eslint, _get_build_dir())
 
-    lint_clean = parallel.parallel_process([os.path.abspath(f) for f in files], eslint.lint)
+    # Only lint the files that changed since ESLint last found no errors in them.
+    lint_cache = cache.LintCache(_get_build_dir(), ESLINT_PROGNAME, ESLINT_VERSION,
+                                 [".eslintrc", ".eslintrc.js", ".eslintrc.json", ".eslintrc.yaml",
+                                  ".eslintrc.yml", ".eslintignore", "package.json"],
+                                 git.get_base_dir())
+    lint_clean = cache.lint_file_batches(lint_cache, files, eslint.lint_batch)
 
     if not lint_clean:
         print("ERROR: ESLint found errors. Run ESLint manually to see errors in "\
@@ -17,6 +17,7 @@ import csv
 import glob
 import itertools
 import logging
+import multiprocessing.pool
 import os
 import platform
 import re
@@ -24,6 +25,7 @@ import signal
 import subprocess
 import sys
 import tempfile
+import threading
 import traceback
 import time
 from distutils import spawn
@@ -135,10 +137,7 @@ class WindowsDumper(object):
 
         dump_command = ""
         if take_dump:
-            # Dump to file, dump_<process name>.<pid>.mdmp
-            dump_file = "dump_%s.%d.%s" % (os.path.splitext(process_name)[0],
-                                           pid,
-                                           self.get_dump_ext())
+            dump_file = self.get_dump_file(pid, process_name)
             dump_command = ".dump /ma %s" % dump_file
             root_logger.info("Dumping core to %s" % dump_file)
 
@@ -159,6 +158,34 @@ class WindowsDumper(object):
 
         root_logger.info("Done analyzing %s process with PID %d" % (process_name, pid))
 
+    def dump_core(self, root_logger, logger, pid, process_name):
+        """Dump the memory of the process to a file, without collecting any other information"""
+        debugger = "cdb.exe"
+        dbg = self.__find_debugger(root_logger, debugger)
+
+        if dbg is None:
+            root_logger.warning("Debugger %s not found, skipping dumping of %d" % (debugger, pid))
+            return
+
+        dump_file = self.get_dump_file(pid, process_name)
+        root_logger.info("Dumping core of %s process with PID %d to %s" % (process_name,
+                                                                          pid,
+                                                                          dump_file))
+
+        cmds = [
+            ".dump /ma %s" % dump_file,
+            ".detach",  # Detach
+            "q"         # Quit
+            ]
+
+        call([dbg, '-c', ";".join(cmds), '-p', str(pid)], logger)
+
+        root_logger.info("Done dumping core of %s process with PID %d" % (process_name, pid))
+
+    def get_dump_file(self, pid, process_name):
+        """Dump to file, dump_<process name>.<pid>.mdmp"""
+        return "dump_%s.%d.%s" % (os.path.splitext(process_name)[0], pid, self.get_dump_ext())
+
     def get_dump_ext(self):
         return "mdmp"
 
@@ -224,8 +251,7 @@ class LLDBDumper(object):
 
         dump_command = ""
         if take_dump:
-            # Dump to file, dump_<process name>.<pid>.core
-            dump_file = "dump_%s.%d.%s" % (process_name, pid, self.get_dump_ext())
+            dump_file = self.get_dump_file(pid, process_name)
             dump_command = "process save-core %s" % dump_file
             root_logger.info("Dumping core to %s" % dump_file)
 
@@ -252,6 +278,42 @@ class LLDBDumper(object):
 
         root_logger.info("Done analyzing %s process with PID %d" % (process_name, pid))
 
+    def dump_core(self, root_logger, logger, pid, process_name):
+        """Dump the memory of the process to a file, without collecting any other information"""
+        debugger = "lldb"
+        dbg = self.__find_debugger(debugger)
+
+        if dbg is None:
+            root_logger.warning("Debugger %s not found, skipping dumping of %d" % (debugger, pid))
+            return
+
+        dump_file = self.get_dump_file(pid, process_name)
+        root_logger.info("Dumping core of %s process with PID %d to %s" % (process_name,
+                                                                          pid,
+                                                                          dump_file))
+
+        cmds = [
+            "attach -p %d" % pid,
+            "process save-core %s" % dump_file,
+            "settings set interpreter.prompt-on-quit false",
+            "quit",
+            ]
+
+        tf = tempfile.NamedTemporaryFile()
+
+        for c in cmds:
+            tf.write(c + "\n")
+
+        tf.flush()
+
+        call([dbg, '--source', tf.name], logger)
+
+        root_logger.info("Done dumping core of %s process with PID %d" % (process_name, pid))
+
+    def get_dump_file(self, pid, process_name):
+        """Dump to file, dump_<process name>.<pid>.core"""
+        return "dump_%s.%d.%s" % (process_name, pid, self.get_dump_ext())
+
     def get_dump_ext(self):
         return "core"
 
@@ -299,8 +361,7 @@ class GDBDumper(object):
 
         dump_command = ""
         if take_dump:
-            # Dump to file, dump_<process name>.<pid>.core
-            dump_file = "dump_%s.%d.%s" % (process_name, pid, self.get_dump_ext())
+            dump_file = self.get_dump_file(pid, process_name)
             dump_command = "gcore %s" % dump_file
             root_logger.info("Dumping core to %s" % dump_file)
 
@@ -383,6 +444,40 @@ class GDBDumper(object):
 
         root_logger.info("Done analyzing %s process with PID %d" % (process_name, pid))
 
+    def dump_core(self, root_logger, logger, pid, process_name):
+        """Dump the memory of the process to a file, without collecting any other information"""
+        debugger = "gdb"
+        dbg = self.__find_debugger(debugger)
+
+        if dbg is None:
+            root_logger.warning("Debugger %s not found, skipping dumping of %d" % (debugger, pid))
+            return
+
+        dump_file = self.get_dump_file(pid, process_name)
+        root_logger.info("Dumping core of %s process with PID %d to %s" % (process_name,
+                                                                          pid,
+                                                                          dump_file))
+
+        cmds = [
+            "set interactive-mode off",
+            "set print thread-events off",
+            "file %s" % process_name,       # Solaris must load the process to read the symbols.
+            "attach %d" % pid,
+            "gcore %s" % dump_file,
+            "set confirm off",
+            "quit",
+            ]
+
+        call([dbg, "--quiet", "--nx"] +
+             list(itertools.chain.from_iterable([['-ex', b] for b in cmds])),
+             logger)
+
+        root_logger.info("Done dumping core of %s process with PID %d" % (process_name, pid))
+
+    def get_dump_file(self, pid, process_name):
+        """Dump to file, dump_<process name>.<pid>.core"""
+        return "dump_%s.%d.%s" % (process_name, pid, self.get_dump_ext())
+
     def get_dump_ext(self):
         return "core"
 
@@ -499,16 +594,118 @@ def get_hang_analyzers():
     return [ps, dbg, jstack]
 
 
-def check_dump_quota(quota, ext):
-    """Check if sum of the files with ext is within the specified quota in megabytes"""
+def get_process_size(pid):
+    """Returns the resident size of the process in bytes, or None if it can't be determined"""
+    try:
+        with open("/proc/%d/status" % pid) as status_file:
+            for line in status_file:
+                if line.startswith("VmRSS:"):
+                    # The size is reported in kilobytes, e.g. "VmRSS:	  123456 kB".
+                    return int(line.split()[1]) * 1024
+    except (IOError, OSError, ValueError):
+        pass
+
+    return None
+
+
+def get_free_disk_space(path):
+    """Returns the free space in bytes of the disk containing path, or None if it is unknown"""
+    try:
+        if _is_windows:
+            import ctypes
+            free_bytes = ctypes.c_ulonglong(0)
+            if not ctypes.windll.kernel32.GetDiskFreeSpaceExW(
+                    ctypes.c_wchar_p(os.path.abspath(path)), None, None,
+                    ctypes.pointer(free_bytes)):
+                return None
+            return free_bytes.value
+
+        stat = os.statvfs(path)
+        return stat.f_bavail * stat.f_frsize
+    except (AttributeError, OSError):
+        return None
+
+
+def get_max_concurrent_dumps(estimated_sizes, free_space):
+    """Returns how many core dumps to take at once.
 
-    files = glob.glob("*." + ext)
+    The number is capped by the number of CPUs, and by how many of the largest estimated core
+    dumps fit in the free disk space, but is always at least 1.
+    """
+    max_dumps = multiprocessing.cpu_count()
 
-    size_sum = 0
-    for file_name in files:
-        size_sum += os.path.getsize(file_name)
+    estimated_sizes = [size for size in estimated_sizes if size]
+    if free_space is not None and estimated_sizes:
+        max_dumps = min(max_dumps, free_space // max(estimated_sizes))
 
-    return (size_sum <= quota)
+    return max(1, max_dumps)
+
+
+class DumpQuota(object):
+    """Checks that core dumps which are taken concurrently stay within the dump size quota.
+
+    A core dump which is still being written reserves its estimated size, so the dumps that are
+    in progress count against the quota and the free disk space before their files are complete.
+    """
+
+    def __init__(self, quota, ext, dump_dir=os.curdir):
+        self._quota = quota
+        self._ext = ext
+        self._dump_dir = dump_dir
+        self._lock = threading.Lock()
+
+        # Map of dump file to its estimated size for the dumps in progress.
+        self._reserved = {}
+
+    def _get_file_size(self, file_name):
+        try:
+            return os.path.getsize(file_name)
+        except OSError:
+            return 0
+
+    def reserve(self, dump_file, estimated_size):
+        """Returns True and reserves space for dump_file if it may be dumped"""
+        estimated_size = estimated_size or 0
+
+        with self._lock:
+            # The sum of the complete dump files and the estimates of the dumps in progress.
+            size_sum = sum(self._reserved.itervalues())
+            for file_name in glob.glob(os.path.join(self._dump_dir, "*." + self._ext)):
+                if os.path.basename(file_name) not in self._reserved:
+                    size_sum += self._get_file_size(file_name)
+
+            if size_sum > self._quota:
+                return False
+
+            free_space = get_free_disk_space(self._dump_dir)
+            if free_space is not None:
+                unwritten = sum(
+                    max(0, size - self._get_file_size(os.path.join(self._dump_dir, file_name)))
+                    for (file_name, size) in self._reserved.iteritems())
+                if estimated_size > free_space - unwritten:
+                    return False
+
+            self._reserved[dump_file] = estimated_size
+            return True
+
+    def release(self, dump_file):
+        """Releases the space reserved for dump_file once it has been dumped"""
+        with self._lock:
+            self._reserved.pop(dump_file, None)
+
+
+def run_concurrently(func, items, max_workers):
+    """Calls func on each item using up to max_workers threads"""
+    if not items:
+        return
+
+    pool = multiprocessing.pool.ThreadPool(min(len(items), max_workers))
+    try:
+        # Calling get() with a timeout keeps the main thread responsive to KeyboardInterrupt.
+        pool.map_async(func, items).get(sys.maxint)
+    finally:
+        pool.close()
+        pool.join()
 
 
 def signal_event_object(logger, pid):
@@ -707,30 +904,61 @@ def main():
 
     trapped_exceptions = []
 
-    # Dump all processes, except python & java.
-    for (pid, process_name) in [(p, pn) for (p, pn) in processes
-                                if not re.match("^(java|python)", pn)]:
-        process_logger = get_process_logger(options.debugger_output, pid, process_name)
-        try:
-            dbg.dump_info(
-                root_logger,
-                process_logger,
-                pid,
-                process_name,
-                options.dump_core and check_dump_quota(max_dump_size_bytes, dbg.get_dump_ext()))
-        except Exception as err:
-            root_logger.info("Error encountered when invoking debugger %s" % err)
-            trapped_exceptions.append(traceback.format_exc())
+    debugged_processes = [(p, pn) for (p, pn) in processes if not re.match("^(java|python)", pn)]
+    java_processes = [(p, pn) for (p, pn) in processes if pn.startswith("java")]
+
+    # Each process has a single logger so the output of both passes goes to the same file. Python
+    # processes only get signaled, so they don't get a logger or an empty log file.
+    process_loggers = {}
+    for (pid, process_name) in debugged_processes + java_processes:
+        process_loggers[pid] = get_process_logger(options.debugger_output, pid, process_name)
 
-    # Dump java processes using jstack.
-    for (pid, process_name) in [(p, pn) for (p, pn) in processes if pn.startswith("java")]:
-        process_logger = get_process_logger(options.debugger_output, pid, process_name)
+    def dump_stacks(process):
+        """Dumps the information about a process that doesn't need a core dump"""
+        (pid, process_name) = process
         try:
-            jstack.dump_info(root_logger, process_logger, pid, process_name)
+            if process_name.startswith("java"):
+                # Dump java processes using jstack.
+                jstack.dump_info(root_logger, process_loggers[pid], pid, process_name)
+            else:
+                dbg.dump_info(root_logger, process_loggers[pid], pid, process_name, False)
         except Exception as err:
             root_logger.info("Error encountered when invoking debugger %s" % err)
             trapped_exceptions.append(traceback.format_exc())
 
+    # Collect the stacks of all processes, except python, before taking any core dumps. The stacks
+    # are the most useful information and take much less time and disk space than the dumps.
+    run_concurrently(dump_stacks, debugged_processes + java_processes,
+                     multiprocessing.cpu_count())
+
+    if options.dump_core and debugged_processes:
+        quota = DumpQuota(max_dump_size_bytes, dbg.get_dump_ext())
+        estimated_sizes = dict((pid, get_process_size(pid)) for (pid, _) in debugged_processes)
+        max_workers = get_max_concurrent_dumps(estimated_sizes.values(),
+                                               get_free_disk_space(os.curdir))
+        root_logger.info("Dumping the cores of %d processes, %d at a time" %
+                         (len(debugged_processes), max_workers))
+
+        def dump_core(process):
+            """Dumps the core of a process if it fits in the quota"""
+            (pid, process_name) = process
+            dump_file = dbg.get_dump_file(pid, process_name)
+            if not quota.reserve(dump_file, estimated_sizes[pid]):
+                root_logger.info("Skipping the core dump of %s process with PID %d, since the"
+                                 " dump quota or the free disk space would be exceeded" %
+                                 (process_name, pid))
+                return
+
+            try:
+                dbg.dump_core(root_logger, process_loggers[pid], pid, process_name)
+            except Exception as err:
+                root_logger.info("Error encountered when invoking debugger %s" % err)
+                trapped_exceptions.append(traceback.format_exc())
+            finally:
+                quota.release(dump_file)
+
+        run_concurrently(dump_core, debugged_processes, max_workers)
+
     # Signal go processes to ensure they print out stack traces, and die on POSIX OSes.
     # On Windows, this will simply kill the process since python emulates SIGABRT as
     # TerminateProcess.
@@ -28,6 +28,17 @@ class LinterBase(object):
         """Get the command to run a linter."""
         pass
 
+    def get_lint_batch_cmd_args(self, file_names):
+        # type: (List[str]) -> Optional[List[str]]
+        # pylint: disable=no-self-use,unused-argument
+        """
+        Get the command to run a linter on several files at once.
+
+        Return None if the linter can only check one file at a time. The command must fail, or
+        produce output for linters that need a file diff, if any of the files has errors.
+        """
+        return None
+
     def get_fix_cmd_args(self, file_name):
         # type: (str) -> Optional[List[str]]
         # pylint: disable=no-self-use,unused-argument
@@ -52,6 +63,28 @@ class LinterBase(object):
         """
         return False
 
+    def get_config_file_names(self):
+        # type: () -> List[str]
+        # pylint: disable=no-self-use
+        """
+        Get the names of the configuration files the linter looks for.
+
+        The lint cache checks a file again if one of these files changes in its directory or in one
+        of its parent directories.
+        """
+        return []
+
+    def checks_other_files(self):
+        # type: () -> bool
+        # pylint: disable=no-self-use
+        """
+        Check if linting a file also depends on the contents of the files it imports.
+
+        The lint cache checks every file again when any of the files that can be linted changes for
+        such linters.
+        """
+        return False
+
     def ignore_interpreter(self):
         # type: () -> bool
         # pylint: disable=no-self-use
@@ -67,8 +100,13 @@ class LinterBase(object):
 class LinterInstance(object):
     """A pair of a Linter and the full path of the linter cmd to run."""
 
-    def __init__(self, linter, cmd_path):
-        # type: (LinterBase, List[str]) -> None
-        """Construct a LinterInstance."""
+    def __init__(self, linter, cmd_path, version=None):
+        # type: (LinterBase, List[str], str) -> None
+        """
+        Construct a LinterInstance.
+
+        version - the output of the linter's version command
+        """
         self.linter = linter
         self.cmd_path = cmd_path
+        self.version = version if version is not None else linter.required_version
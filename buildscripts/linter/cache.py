@@ -0,0 +1,199 @@
+"""Cache of the files that a linter found no errors in, keyed by their contents."""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from . import parallel
+from . import runner
+
+# Maximum number of keys kept for each linter. Once it is exceeded, only the keys of the files
+# checked by the current run are kept.
+_MAX_KEYS = 200000
+
+
+def _hash_file(file_name):
+    # type: (str) -> Optional[str]
+    """Return the SHA-1 digest of the contents of a file, or None if it can't be read."""
+    try:
+        with open(file_name, "rb") as file_handle:
+            return hashlib.sha1(file_handle.read()).hexdigest()
+    except (IOError, OSError):
+        return None
+
+
+class LintCache(object):
+    """
+    Remember which file contents a linter found no errors in.
+
+    A file is skipped if a linter with the same name, version, and configuration files has already
+    found no errors in a file with the same contents. Files with errors are never cached so their
+    errors are reported on every run.
+    """
+
+    def __init__(self, cache_dir, linter_name, linter_version, config_file_names=None,
+                 base_dir=None):
+        # type: (str, str, str, List[str], str) -> None
+        """
+        Create a LintCache stored under cache_dir.
+
+        config_file_names - names of the configuration files of the linter. The contents of each
+            file with one of these names in the directory of a linted file, or in one of its parent
+            directories up to base_dir, are part of the key for the file.
+        """
+        self._linter_name = linter_name
+        self._path = os.path.join(cache_dir, "lint_cache", linter_name + ".txt")
+        self._identity = "%s\0%s" % (linter_name, linter_version)
+        self._config_file_names = config_file_names or []
+        self._base_dir = os.path.abspath(base_dir) if base_dir is not None else None
+
+        self._lock = threading.Lock()
+        self._clean_keys = self._load()  # type: Set[str]
+        self._used_keys = set()  # type: Set[str]
+        self._keys = {}  # type: Dict[str, str]
+
+        # Map of directory to the digest of the configuration files that apply to it.
+        self._config_digests = {}  # type: Dict[str, str]
+
+    def _load(self):
+        # type: () -> Set[str]
+        """Return the keys stored by previous runs."""
+        try:
+            with open(self._path) as cache_file:
+                return set(line.strip() for line in cache_file)
+        except (IOError, OSError):
+            return set()
+
+    def _get_config_digest(self, dir_name):
+        # type: (str) -> str
+        """Return the digest of the configuration files that apply to files in dir_name."""
+        digest = self._config_digests.get(dir_name)
+        if digest is not None:
+            return digest
+
+        parent = os.path.dirname(dir_name)
+        if dir_name == self._base_dir or parent == dir_name:
+            parent_digest = ""
+        else:
+            parent_digest = self._get_config_digest(parent)
+
+        hasher = hashlib.sha1(parent_digest)
+        for config_file_name in self._config_file_names:
+            config_digest = _hash_file(os.path.join(dir_name, config_file_name))
+            if config_digest is not None:
+                hasher.update("\0%s\0%s" % (config_file_name, config_digest))
+        digest = hasher.hexdigest()
+
+        self._config_digests[dir_name] = digest
+        return digest
+
+    def get_files_to_lint(self, file_names, dependency_file_names=None):
+        # type: (Iterable[str], Iterable[str]) -> List[str]
+        """
+        Return the files that need to be linted.
+
+        If dependency_file_names is specified, then the contents of every file in it are part of the
+        key for each of the files. This is needed for linters like pylint and mypy that also check
+        how a file uses the files it imports, which may not be among the files being linted.
+        """
+        digests = {}  # type: Dict[str, Optional[str]]
+        for file_name in file_names:
+            file_name = os.path.abspath(file_name)
+            digests[file_name] = _hash_file(file_name)
+
+        run_digest = ""
+        if dependency_file_names is not None:
+            hasher = hashlib.sha1()
+            for file_name in sorted(set(os.path.abspath(name) for name in dependency_file_names)):
+                digest = digests[file_name] if file_name in digests else _hash_file(file_name)
+                hasher.update("%s\0%s\0" % (file_name, digest))
+            run_digest = hasher.hexdigest()
+
+        files_to_lint = []
+        for (file_name, digest) in digests.iteritems():
+            if digest is None:
+                # Let the linter report why the file can't be read.
+                files_to_lint.append(file_name)
+                continue
+
+            config_digest = self._get_config_digest(os.path.dirname(file_name))
+            key = hashlib.sha1("\0".join([self._identity, config_digest, run_digest,
+                                          digest])).hexdigest()
+            if key in self._clean_keys:
+                self._used_keys.add(key)
+            else:
+                self._keys[file_name] = key
+                files_to_lint.append(file_name)
+
+        logging.info("Skipping %d of %d file(s) that were already checked by %s.",
+                     len(digests) - len(files_to_lint), len(digests), self._linter_name)
+        return sorted(files_to_lint)
+
+    def record_clean(self, file_name):
+        # type: (str) -> None
+        """Remember that the linter found no errors in a file returned by get_files_to_lint()."""
+        key = self._keys.get(os.path.abspath(file_name))
+        if key is not None:
+            with self._lock:
+                self._used_keys.add(key)
+
+    def save(self):
+        # type: () -> None
+        """Store the keys of the files the linter found no errors in for future runs."""
+        with self._lock:
+            keys = self._clean_keys | self._used_keys
+            if len(keys) > _MAX_KEYS:
+                keys = self._used_keys
+
+        dir_name = os.path.dirname(self._path)
+        try:
+            if not os.path.isdir(dir_name):
+                os.makedirs(dir_name)
+
+            # Write to a temporary file and rename it so that concurrent runs never read a partially
+            # written cache.
+            (temp_fd, temp_path) = tempfile.mkstemp(dir=dir_name)
+            try:
+                with os.fdopen(temp_fd, "w") as cache_file:
+                    for key in sorted(keys):
+                        cache_file.write(key + "\n")
+                if os.name == "nt" and os.path.exists(self._path):
+                    os.remove(self._path)
+                os.rename(temp_path, self._path)
+            except:
+                os.remove(temp_path)
+                raise
+        except (IOError, OSError) as err:
+            # The cache only makes linting faster, so failing to write it shouldn't fail the lint.
+            logging.warning("Failed to write the lint cache %s: %s", self._path, err)
+
+
+def lint_file_batches(cache, file_names, lint_batch_func, dependency_file_names=None):
+    # type: (LintCache, List[str], Callable[[List[str]], List[str]], List[str]) -> bool
+    """
+    Run lint_batch_func in parallel on batches of the files that aren't in the cache.
+
+    lint_batch_func returns the files in a batch that have no errors. Return if all passed. See
+    LintCache.get_files_to_lint() for dependency_file_names.
+    """
+    files_to_lint = cache.get_files_to_lint(file_names,
+                                            dependency_file_names=dependency_file_names)
+
+    def lint_batch(batch):
+        # type: (List[str]) -> bool
+        """Lint a batch of files and cache the ones without errors."""
+        clean_files = lint_batch_func(batch)
+        for file_name in clean_files:
+            cache.record_clean(file_name)
+        return len(clean_files) == len(batch)
+
+    try:
+        return parallel.parallel_process(
+            runner.make_batches(files_to_lint, parallel.get_cpu_count()), lint_batch)
+    finally:
+        cache.save()
@@ -35,6 +35,19 @@ class MypyLinter(base.LinterBase):
             "--follow-imports=silent", file_name
         ]
 
+    def get_lint_batch_cmd_args(self, file_names):
+        # type: (List[str]) -> List[str]
+        """Get the command to run a linter on several files at once."""
+        return [
+            "--py2", "--disallow-untyped-defs", "--ignore-missing-imports",
+            "--follow-imports=silent"
+        ] + file_names
+
+    def checks_other_files(self):
+        # type: () -> bool
+        """See comment in base class."""
+        return True
+
     def ignore_interpreter(self):
         # type: () -> bool
         # pylint: disable=no-self-use
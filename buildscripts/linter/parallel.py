@@ -9,13 +9,19 @@ from multiprocessing import cpu_count
 from typing import Any, Callable, List
 
 
+def get_cpu_count():
+    # type: () -> int
+    """Return the number of work items processed at once."""
+    try:
+        return cpu_count()
+    except NotImplementedError:
+        return 1
+
+
 def parallel_process(items, func):
     # type: (List[Any], Callable[[Any], bool]) -> bool
     """Run a set of work items to completion and wait."""
-    try:
-        cpus = cpu_count()
-    except NotImplementedError:
-        cpus = 1
+    cpus = get_cpu_count()
 
     task_queue = Queue.Queue()  # type: Queue.Queue
 
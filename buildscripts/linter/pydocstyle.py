@@ -24,3 +24,13 @@ class PyDocstyleLinter(base.LinterBase):
         # type: (str) -> List[str]
         """Get the command to run a linter."""
         return [file_name]
+
+    def get_lint_batch_cmd_args(self, file_names):
+        # type: (List[str]) -> List[str]
+        """Get the command to run a linter on several files at once."""
+        return file_names
+
+    def get_config_file_names(self):
+        # type: () -> List[str]
+        """See comment in base class."""
+        return [".pydocstyle", ".pydocstylerc", "setup.cfg", "tox.ini"]
@@ -34,3 +34,19 @@ class PyLintLinter(base.LinterBase):
         return [
             "--rcfile=%s" % (self._rc_file), "--output-format", "msvs", "--reports=n", file_name
         ]
+
+    def get_lint_batch_cmd_args(self, file_names):
+        # type: (List[str]) -> List[str]
+        """Get the command to run a linter on several files at once."""
+        return ["--rcfile=%s" % (self._rc_file), "--output-format", "msvs", "--reports=n"
+                ] + file_names
+
+    def get_config_file_names(self):
+        # type: () -> List[str]
+        """See comment in base class."""
+        return [os.path.basename(self._rc_file)]
+
+    def checks_other_files(self):
+        # type: () -> bool
+        """See comment in base class."""
+        return True
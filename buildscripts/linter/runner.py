@@ -15,8 +15,12 @@ from . import base
 
 
 def _check_version(linter, cmd_path, args):
-    # type: (base.LinterBase, List[str], List[str]) -> bool
-    """Check if the given linter has the correct version."""
+    # type: (base.LinterBase, List[str], List[str]) -> Optional[str]
+    """
+    Check if the given linter has the correct version.
+
+    Return the output of the version command if it does, and None otherwise.
+    """
 
     try:
         cmd = cmd_path + args
@@ -36,15 +40,15 @@ def _check_version(linter, cmd_path, args):
             logging.info("Linter %s has wrong version for '%s'. Expected '%s'," +
                          "Standard Output:\n'%s'\nStandard Error:\n%s", linter.cmd_name, cmd,
                          required_version, output, stderr)
-            return False
+            return None
 
     except OSError as os_error:
         # The WindowsError exception is thrown if the command is not found.
         # We catch OSError since WindowsError does not exist on non-Windows platforms.
         logging.info("Version check command [%s] failed: %s", cmd, os_error)
-        return False
+        return None
 
-    return True
+    return output.strip()
 
 
 def _find_linter(linter, config_dict):
@@ -60,8 +64,9 @@ def _find_linter(linter, config_dict):
         cmd = [config_dict[linter.cmd_name]]
 
         # If the user specified a tool location, we do not search any further
-        if _check_version(linter, cmd, linter.get_lint_version_cmd_args()):
-            return base.LinterInstance(linter, cmd)
+        version = _check_version(linter, cmd, linter.get_lint_version_cmd_args())
+        if version is not None:
+            return base.LinterInstance(linter, cmd, version)
         return None
 
     # Search for tool
@@ -94,22 +99,25 @@ def _find_linter(linter, config_dict):
             cmd = [sys.executable, cmd_str]
 
     # Check 1: interpreter location or for linters that ignore current interpreter.
-    if _check_version(linter, cmd, linter.get_lint_version_cmd_args()):
-        return base.LinterInstance(linter, cmd)
+    version = _check_version(linter, cmd, linter.get_lint_version_cmd_args())
+    if version is not None:
+        return base.LinterInstance(linter, cmd, version)
 
     logging.info("First version check failed for linter '%s', trying a different location.",
                  linter.cmd_name)
 
     # Check 2: current path
     cmd = [linter.cmd_name]
-    if _check_version(linter, cmd, linter.get_lint_version_cmd_args()):
-        return base.LinterInstance(linter, cmd)
+    version = _check_version(linter, cmd, linter.get_lint_version_cmd_args())
+    if version is not None:
+        return base.LinterInstance(linter, cmd, version)
 
     # Check 3: When a virtualenv is setup the linter modules are not installed, so we need
     # to use the linters installed in '/opt/mongodbtoolchain/v2/bin'.
     cmd = [sys.executable, os.path.join('/opt/mongodbtoolchain/v2/bin', linter.cmd_name)]
-    if _check_version(linter, cmd, linter.get_lint_version_cmd_args()):
-        return base.LinterInstance(linter, cmd)
+    version = _check_version(linter, cmd, linter.get_lint_version_cmd_args())
+    if version is not None:
+        return base.LinterInstance(linter, cmd, version)
 
     return None
 
@@ -140,6 +148,38 @@ python2-pip, and python3-pip. See your OS documentation for help.
     return linter_instances
 
 
+# Maximum number of files checked by one invocation of a linter. Smaller batches balance the work
+# across the CPUs better, while larger ones spend less time starting the linter.
+_MAX_BATCH_FILES = 100
+
+# Maximum number of characters of file names in one invocation of a linter. Windows limits a command
+# line to 32767 characters.
+_MAX_BATCH_CHARS = 30000
+
+
+def make_batches(file_names, num_cpus):
+    # type: (List[str], int) -> List[List[str]]
+    """Split file names into batches that fit on a command line, with at least one per CPU."""
+    if not file_names:
+        return []
+
+    batch_files = max(1, min(_MAX_BATCH_FILES, -(-len(file_names) // max(1, num_cpus))))
+
+    batches = []  # type: List[List[str]]
+    batch = []  # type: List[str]
+    batch_chars = 0
+    for file_name in file_names:
+        if batch and (len(batch) >= batch_files or
+                      batch_chars + len(file_name) + 1 > _MAX_BATCH_CHARS):
+            batches.append(batch)
+            batch = []
+            batch_chars = 0
+        batch.append(file_name)
+        batch_chars += len(file_name) + 1
+    batches.append(batch)
+    return batches
+
+
 class LintRunner(object):
     """Run a linter and print results in a thread safe manner."""
 
@@ -206,6 +246,36 @@ class LintRunner(object):
 
         return True
 
+    def run_lint_batch(self, linter, file_names):
+        # type: (base.LinterInstance, List[str]) -> List[str]
+        """
+        Run the specified linter on several files at once and return the files without errors.
+
+        If the linter finds errors, then each file is checked again on its own so the errors are
+        attributed to the right file.
+        """
+
+        batch_args = linter.linter.get_lint_batch_cmd_args(file_names)
+        if batch_args is None or len(file_names) == 1:
+            return [file_name for file_name in file_names if self.run_lint(linter, file_name)]
+
+        cmd = linter.cmd_path + batch_args
+        logging.debug(str(cmd))
+
+        try:
+            output = subprocess.check_output(cmd)
+
+            # Linters that need a file diff print the diffs of the files with errors, and mypy.bat
+            # returns 0 on Windows even if there are failures.
+            if not output or not (linter.linter.needs_file_diff() or sys.platform == "win32"):
+                return file_names
+        except subprocess.CalledProcessError:
+            pass
+
+        logging.info("Linter %s found errors in a batch of %d files, checking each of them.",
+                     linter.linter.cmd_name, len(file_names))
+        return [file_name for file_name in file_names if self.run_lint(linter, file_name)]
+
     def run(self, cmd):
         # type: (List[str]) -> bool
         """Check the specified cmd succeeds."""
@@ -30,7 +30,18 @@ class YapfLinter(base.LinterBase):
         """Get the command to run a linter."""
         return [file_name]
 
+    def get_lint_batch_cmd_args(self, file_names):
+        # type: (List[str]) -> List[str]
+        """Get the command to run a linter on several files at once."""
+        # Instead of the formatted files, print a diff for each file that isn't formatted.
+        return ["--diff"] + file_names
+
     def get_fix_cmd_args(self, file_name):
         # type: (str) -> List[str]
         """Get the command to run a linter fix."""
         return ["-i", file_name]
+
+    def get_config_file_names(self):
+        # type: () -> List[str]
+        """See comment in base class."""
+        return [".style.yapf", "setup.cfg"]
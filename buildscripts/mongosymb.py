@@ -15,23 +15,37 @@ mongosymb.py --symbolizer-path=/path/to/llvm-symbolizer /path/to/executable </fi
 
 You can also pass --output-format=json, to get rich json output. It shows some extra information,
 but emits json instead of plain text.
+
+To symbolize all of the backtraces in a file, such as the logs of a test failure, pass
+--backtraces-file=/path/to/file instead. Each distinct address is only symbolized once, by a pool of
+--jobs llvm-symbolizer processes, and --symbol-cache-dir=/path/to/dir caches the symbols of each
+buildId across runs.
+
+Pass --debug-file-resolver=cache with a cache directory, a directory or URL storing
+<buildId>.debug[.gz] files, and optionally a size limit in megabytes, to fetch the debug files by
+buildId into a local cache that evicts the least recently used files. With the default path
+resolver, --build-dir=/path/to/builds finds the debug files by buildId in a directory of builds.
 """
 
 import json
+import multiprocessing
 import optparse
 import os
+import re
+import shutil
+import struct
 import subprocess
 import sys
+import tempfile
+import threading
+import urllib2
+import zlib
 
-def symbolize_frames(trace_doc, dbg_path_resolver, symbolizer_path=None, dsym_hint=None):
-    """Given a trace_doc in MongoDB stack dump format, returns a list of symbolized stack frames.
+def _get_frames(trace_doc, dbg_path_resolver):
+    """Given a trace_doc in MongoDB stack dump format, returns a list of stack frames with the path
+    of the debug file and the address to symbolize.
     """
 
-    if symbolizer_path is None:
-        symbolizer_path = os.environ.get("MONGOSYMB_SYMBOLIZER_PATH", "llvm-symbolizer")
-    if dsym_hint is None:
-        dsym_hint = []
-
     def make_base_addr_map(somap_list):
         """Makes a map from binary load address to description of library from the somap, which is
         a list of dictionaries describing individual loaded libraries.
@@ -62,89 +76,560 @@ def symbolize_frames(trace_doc, dbg_path_resolver, symbolizer_path=None, dsym_hi
                            offset=frame["o"],
                            addr=addr,
                            symbol=frame.get("s", None)))
+    return frames
+
+def _extract_symbols(stdin):
+    """Extracts symbol information from the output of llvm-symbolizer.
+
+    Returns a list of dictionaries, each of which has fn, file, column and line entries.
+
+    The format of llvm-symbolizer output is that for every CODE line of input,
+    it outputs zero or more pairs of lines, and then a blank line. This way, if
+    a CODE line of input maps to several inlined functions, you can use the blank
+    line to find the end of the list of symbols corresponding to the CODE line.
+
+    The first line of each pair contains the function name, and the second contains the file,
+    column and line information.
+    """
+    result = []
+    step = 0
+    while True:
+        line = stdin.readline().decode()
+        if line == "":
+            raise RuntimeError("llvm-symbolizer exited before symbolizing all of the frames")
+        if line == "\n":
+            break
+        if step == 0:
+            result.append({"fn" : line.strip()})
+            step = 1
+        else:
+            file_name, line, column = line.strip().rsplit(':', 3)
+            result[-1].update({"file": file_name, "column": int(column), "line": int(line)})
+            step = 0
+    return result
+
+class symbolizer_pool(object):
+    """A pool of long-lived llvm-symbolizer processes.
 
-    symbolizer_args = [symbolizer_path]
-    for dh in dsym_hint:
-        symbolizer_args.append("-dsym-hint=%s" %dh)
-    symbolizer_process = subprocess.Popen(
-        args=symbolizer_args,
-        close_fds=True,
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=open("/dev/null"))
+    The addresses to symbolize are split between the processes, and all of the requests for a
+    process are written to it without waiting for the replies to the earlier ones.
+    """
 
-    def extract_symbols(stdin):
-        """Extracts symbol information from the output of llvm-symbolizer.
+    _MIN_REQUESTS_PER_PROCESS = 64
 
-        Returns a list of dictionaries, each of which has fn, file, column and line entries.
+    def __init__(self, symbolizer_path=None, dsym_hint=None, num_processes=None):
+        if symbolizer_path is None:
+            symbolizer_path = os.environ.get("MONGOSYMB_SYMBOLIZER_PATH", "llvm-symbolizer")
+        self._args = [symbolizer_path]
+        for dh in dsym_hint or []:
+            self._args.append("-dsym-hint=%s" %dh)
+        if num_processes is None:
+            num_processes = multiprocessing.cpu_count()
+        self._num_processes = max(1, num_processes)
+        self._processes = []
+        self._lock = threading.Lock()
 
-        The format of llvm-symbolizer output is that for every CODE line of input,
-        it outputs zero or more pairs of lines, and then a blank line. This way, if
-        a CODE line of input maps to several inlined functions, you can use the blank
-        line to find the end of the list of symbols corresponding to the CODE line.
+    def _get_processes(self, num_processes):
+        with self._lock:
+            while len(self._processes) < num_processes:
+                with open(os.devnull, "w") as devnull:
+                    process = subprocess.Popen(args=self._args,
+                                               close_fds=True,
+                                               stdin=subprocess.PIPE,
+                                               stdout=subprocess.PIPE,
+                                               stderr=devnull)
+                self._processes.append((process, threading.Lock()))
+            return self._processes[:num_processes]
 
-        The first line of each pair contains the function name, and the second contains the file,
-        column and line information.
+    def symbolize(self, requests):
+        """Given a list of (path, addr) pairs, returns a list with the symbol information of each of
+        them in the format returned by _extract_symbols().
         """
-        result = []
-        step = 0
-        while True:
-            line = stdin.readline().decode()
-            if line == "\n":
-                break
-            if step == 0:
-                result.append({"fn" : line.strip()})
-                step = 1
+        if not requests:
+            return []
+
+        # Each process loads the debug information of the files on its own, so a process is only
+        # started for every _MIN_REQUESTS_PER_PROCESS requests.
+        num_processes = min(self._num_processes,
+                            -(-len(requests) // symbolizer_pool._MIN_REQUESTS_PER_PROCESS))
+        chunk_size = -(-len(requests) // num_processes)
+        results = [None] * len(requests)
+        errors = []
+
+        def symbolize_chunk(process_and_lock, start):
+            try:
+                (process, lock) = process_and_lock
+                with lock:
+                    chunk = requests[start:start + chunk_size]
+                    try:
+                        results[start:start + len(chunk)] = self._symbolize_on(process, chunk)
+                    except Exception:
+                        # The replies of the process no longer match its requests, or it exited.
+                        self._discard(process_and_lock)
+                        raise
+            except Exception:
+                errors.append(sys.exc_info())
+
+        threads = []
+        for (i, process_and_lock) in enumerate(self._get_processes(num_processes)):
+            thread = threading.Thread(target=symbolize_chunk,
+                                      args=(process_and_lock, i * chunk_size))
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise errors[0][0], errors[0][1], errors[0][2]
+        return results
+
+    @staticmethod
+    def _symbolize_on(process, requests):
+        # The requests are written from another thread so that llvm-symbolizer never blocks on
+        # writing a reply that isn't being read.
+        def write_requests():
+            try:
+                for (path, addr) in requests:
+                    process.stdin.write("CODE %s 0x%X\n" % (path, addr))
+                process.stdin.flush()
+            except IOError:
+                # The reader reports that llvm-symbolizer exited.
+                pass
+
+        writer = threading.Thread(target=write_requests)
+        writer.daemon = True
+        writer.start()
+        try:
+            return [_extract_symbols(process.stdout) for _ in requests]
+        finally:
+            writer.join()
+
+    def _discard(self, process_and_lock):
+        """Removes a process from the pool so that a new one is started in its place."""
+        with self._lock:
+            if process_and_lock in self._processes:
+                self._processes.remove(process_and_lock)
+        process = process_and_lock[0]
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+    def close(self):
+        with self._lock:
+            processes = self._processes
+            self._processes = []
+        for (process, _) in processes:
+            process.stdin.close()
+            process.wait()
+
+class symbol_cache(object):
+    """Caches the symbol information of addresses on disk, with a file for each buildId."""
+
+    def __init__(self, cache_dir):
+        self._cache_dir = cache_dir
+        self._symbols = {}
+        self._dirty = set()
+
+    def _path(self, build_id):
+        return os.path.join(self._cache_dir, build_id + ".symbols.json")
+
+    def _get_symbols(self, build_id):
+        build_id = build_id.lower()
+        symbols = self._symbols.get(build_id)
+        if symbols is None:
+            try:
+                with open(self._path(build_id)) as cache_file:
+                    symbols = json.load(cache_file)
+            except (IOError, ValueError):
+                symbols = {}
+            self._symbols[build_id] = symbols
+        return symbols
+
+    def get(self, build_id, addr):
+        return self._get_symbols(build_id).get("%x" % addr)
+
+    def put(self, build_id, addr, symbinfo):
+        self._get_symbols(build_id)["%x" % addr] = symbinfo
+        self._dirty.add(build_id.lower())
+
+    def save(self):
+        if self._dirty and not os.path.isdir(self._cache_dir):
+            os.makedirs(self._cache_dir)
+        for build_id in sorted(self._dirty):
+            # Replace the file atomically so that a concurrent reader never sees a partial file.
+            (fd, temp_path) = tempfile.mkstemp(dir=self._cache_dir)
+            with os.fdopen(fd, "w") as cache_file:
+                json.dump(self._symbols[build_id], cache_file)
+            if os.name == "nt" and os.path.exists(self._path(build_id)):
+                os.remove(self._path(build_id))
+            os.rename(temp_path, self._path(build_id))
+        self._dirty.clear()
+
+def _is_resolved(path, symbinfo):
+    """Returns whether llvm-symbolizer found the symbols of an address in the debug file 'path'.
+    A failed lookup, which may succeed once the right debug file is available, shouldn't be cached.
+    """
+    if not symbinfo or not os.path.exists(path):
+        return False
+    return all(entry["fn"] != "??" for entry in symbinfo)
+
+def symbolize_traces(trace_docs, dbg_path_resolver, symbolizer_path=None, dsym_hint=None,
+                     pool=None, cache_dir=None):
+    """Given a list of trace_docs in MongoDB stack dump format, returns a list with the symbolized
+    stack frames of each of them.
+
+    Each (path, addr) pair is only symbolized once, even if it appears in several traces. If
+    'cache_dir' is specified, then the symbols of the frames with a buildId are read from and saved
+    to it. If 'pool' isn't specified, then a symbolizer_pool is started for the call.
+    """
+
+    traces = [_get_frames(trace_doc, dbg_path_resolver) for trace_doc in trace_docs]
+    cache = symbol_cache(cache_dir) if cache_dir is not None else None
+
+    # Map of (path, addr) pair to the symbol information of the address.
+    symbols = {}
+    # Map of (path, addr) pair to the buildId of the file, for the pairs that aren't cached.
+    to_symbolize = {}
+    for frames in traces:
+        for frame in frames:
+            if frame["path"] is None:
+                continue
+            key = (frame["path"], frame["addr"])
+            if key in symbols or key in to_symbolize:
+                continue
+            symbinfo = None
+            if cache is not None and frame["buildId"] is not None:
+                symbinfo = cache.get(frame["buildId"], frame["addr"])
+            if symbinfo is not None:
+                symbols[key] = symbinfo
             else:
-                file_name, line, column = line.strip().rsplit(':', 3)
-                result[-1].update({"file": file_name, "column": int(column), "line": int(line)})
-                step = 0
-        return result
+                to_symbolize[key] = frame["buildId"]
 
-    for frame in frames:
-        if frame["path"] is None:
-            continue
-        symbolizer_process.stdin.write("CODE %(path)s 0x%(addr)X\n" % frame)
-        symbolizer_process.stdin.flush()
-        frame["symbinfo"] = extract_symbols(symbolizer_process.stdout)
-    symbolizer_process.stdin.close()
-    symbolizer_process.wait()
-    return frames
+    if to_symbolize:
+        requests = sorted(to_symbolize)
+        owns_pool = pool is None
+        if owns_pool:
+            pool = symbolizer_pool(symbolizer_path, dsym_hint)
+        try:
+            results = pool.symbolize(requests)
+        finally:
+            if owns_pool:
+                pool.close()
+
+        for (key, symbinfo) in zip(requests, results):
+            symbols[key] = symbinfo
+            build_id = to_symbolize[key]
+            if cache is not None and build_id is not None and _is_resolved(key[0], symbinfo):
+                cache.put(build_id, key[1], symbinfo)
+        if cache is not None:
+            cache.save()
+
+    for frames in traces:
+        for frame in frames:
+            if frame["path"] is not None:
+                frame["symbinfo"] = symbols[(frame["path"], frame["addr"])]
+    return traces
+
+def symbolize_frames(trace_doc, dbg_path_resolver, symbolizer_path=None, dsym_hint=None):
+    """Given a trace_doc in MongoDB stack dump format, returns a list of symbolized stack frames.
+    """
+
+    return symbolize_traces([trace_doc], dbg_path_resolver, symbolizer_path=symbolizer_path,
+                            dsym_hint=dsym_hint)[0]
+
+# Section header type of the sections containing notes, and note type of the GNU build-id, in ELF
+# files.
+_SHT_NOTE = 7
+_NT_GNU_BUILD_ID = 3
+
+def read_elf_info(path):
+    """Returns a (build-id, has debug info) pair for the ELF file at 'path', where the build-id is
+    a lowercase hex string, or None if it isn't an ELF file or doesn't have a build-id. A file has
+    debug info if it has a .debug_info section, unlike a stripped binary with the same build-id.
+    """
+    with open(path, "rb") as elf_file:
+        ident = elf_file.read(16)
+        if len(ident) < 16 or ident[:4] != "\x7fELF":
+            return (None, False)
+        endian = "<" if ord(ident[5]) == 1 else ">"
+        if ord(ident[4]) == 2:
+            (header_fmt, section_fmt) = ("HHIQQQIHHHHHH", "IIQQQQIIQQ")
+        else:
+            (header_fmt, section_fmt) = ("HHIIIIIHHHHHH", "IIIIIIIIII")
+        header_fmt = endian + header_fmt
+        section_fmt = endian + section_fmt
+
+        header_data = elf_file.read(struct.calcsize(header_fmt))
+        if len(header_data) < struct.calcsize(header_fmt):
+            return (None, False)
+        header = struct.unpack(header_fmt, header_data)
+        (section_offset, section_size, num_sections, names_index) = header[5], header[10], \
+            header[11], header[12]
+
+        sections = []
+        for i in xrange(num_sections):
+            elf_file.seek(section_offset + i * section_size)
+            section_data = elf_file.read(struct.calcsize(section_fmt))
+            if len(section_data) < struct.calcsize(section_fmt):
+                return (None, False)
+            sections.append(struct.unpack(section_fmt, section_data))
+
+        section_names = ""
+        if names_index < len(sections):
+            elf_file.seek(sections[names_index][4])
+            section_names = elf_file.read(sections[names_index][5])
+        has_debug_info = any(
+            section_names[section[0]:section_names.find("\0", section[0])] == ".debug_info"
+            for section in sections)
+
+        for section in sections:
+            if section[1] != _SHT_NOTE:
+                continue
+
+            elf_file.seek(section[4])
+            notes = elf_file.read(section[5])
+            pos = 0
+            while pos + 12 <= len(notes):
+                (name_size, desc_size, note_type) = struct.unpack(endian + "III",
+                                                                  notes[pos:pos + 12])
+                desc_pos = pos + 12 + ((name_size + 3) & ~3)
+                name = notes[pos + 12:pos + 12 + name_size]
+                if note_type == _NT_GNU_BUILD_ID and name.rstrip("\0") == "GNU":
+                    return (notes[desc_pos:desc_pos + desc_size].encode("hex"), has_debug_info)
+                pos = desc_pos + ((desc_size + 3) & ~3)
+    return (None, has_debug_info)
+
+def read_elf_build_id(path):
+    """Returns the GNU build-id of the ELF file at 'path' as a lowercase hex string, or None if it
+    isn't an ELF file or doesn't have a build-id.
+    """
+    return read_elf_info(path)[0]
+
+def _write_atomically(path, write_fn):
+    """Calls 'write_fn' with the path of a temporary file and then renames it to 'path', so that
+    concurrent readers see either the old or the new file, but never a partial one.
+    """
+    dir_name = os.path.dirname(path)
+    (fd, temp_path) = tempfile.mkstemp(dir=dir_name, prefix=os.path.basename(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        write_fn(temp_path)
+        if os.name == "nt" and os.path.exists(path):
+            os.remove(path)
+        os.rename(temp_path, path)
+    except:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+class buildid_index(object):
+    """Maps build-ids to the ELF files with them in directories of builds.
+
+    If 'index_path' is specified, then the index is saved to it so that the files that haven't
+    changed aren't read again.
+    """
+
+    def __init__(self, index_path=None):
+        self._index_path = index_path
+        # Map of path to a [mtime, size, build-id, has debug info] list.
+        self._files = {}
+        if index_path is not None and os.path.exists(index_path):
+            with open(index_path) as index_file:
+                self._files = json.load(index_file)
+            # Entries written by older versions are read again.
+            self._files = {path: entry for (path, entry) in self._files.iteritems()
+                           if len(entry) == 4}
+        self._update_build_ids()
+
+    def _update_build_ids(self):
+        # A stripped binary and its debug file have the same build-id, so prefer the files with
+        # debug info, then the files named *.debug, then the first path.
+        candidates = {}
+        for (path, (_, _, build_id, has_debug_info)) in self._files.iteritems():
+            if build_id is not None:
+                rank = (not has_debug_info, not path.endswith(".debug"), path)
+                candidates[build_id] = min(candidates.get(build_id, rank), rank)
+        self._build_ids = {build_id: rank[2] for (build_id, rank) in candidates.iteritems()}
+
+    def add_dir(self, dir_path):
+        """Reads the build-ids of the files in 'dir_path' and its subdirectories that weren't
+        indexed yet or changed since they were.
+        """
+        dir_path = os.path.abspath(dir_path)
+        prefix = os.path.join(dir_path, "")
+        for path in [path for path in self._files if path.startswith(prefix)]:
+            if not os.path.isfile(path):
+                del self._files[path]
+
+        for (root, _, file_names) in os.walk(dir_path):
+            for file_name in file_names:
+                path = os.path.join(root, file_name)
+                try:
+                    stat_result = os.stat(path)
+                except OSError:
+                    continue
+                entry = self._files.get(path)
+                if entry is not None and entry[:2] == [stat_result.st_mtime, stat_result.st_size]:
+                    continue
+                try:
+                    (build_id, has_debug_info) = read_elf_info(path)
+                except (IOError, struct.error):
+                    (build_id, has_debug_info) = (None, False)
+                self._files[path] = [stat_result.st_mtime, stat_result.st_size, build_id,
+                                     has_debug_info]
+        self._update_build_ids()
+
+    def get_path(self, build_id):
+        return self._build_ids.get(build_id.lower())
+
+    def save(self):
+        if self._index_path is None:
+            return
+        def write_index(temp_path):
+            with open(temp_path, "w") as index_file:
+                json.dump(self._files, index_file)
+        _write_atomically(self._index_path, write_index)
 
 class path_dbg_file_resolver(object):
-    def __init__(self, bin_path_guess):
+    def __init__(self, bin_path_guess, index=None):
         self._bin_path_guess = bin_path_guess
+        self._index = index
 
     def get_dbg_file(self, soinfo):
+        build_id = soinfo.get("buildId", None)
+        if self._index is not None and build_id is not None:
+            path = self._index.get_path(build_id)
+            if path is not None:
+                return path
         return soinfo.get("path", self._bin_path_guess)
 
-class s3_buildid_dbg_file_resolver(object):
-    def __init__(self, cache_dir, s3_bucket):
+def _copy_decompressed(in_file, out_path):
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    with open(out_path, "wb") as out_file:
+        while True:
+            chunk = in_file.read(1024 * 1024)
+            if not chunk:
+                break
+            out_file.write(decompressor.decompress(chunk))
+        out_file.write(decompressor.flush())
+
+# Number of seconds after which a stalled download of a debug file fails.
+_HTTP_TIMEOUT_SECS = 60
+
+def http_debug_file_fetcher(base_url):
+    """Returns a function that downloads <buildId>.debug.gz from 'base_url' and decompresses it to
+    the given path.
+    """
+    def fetch(build_id, dest_path):
+        in_file = urllib2.urlopen("%s/%s.debug.gz" % (base_url.rstrip("/"), build_id),
+                                  timeout=_HTTP_TIMEOUT_SECS)
+        try:
+            _copy_decompressed(in_file, dest_path)
+        finally:
+            in_file.close()
+    return fetch
+
+def dir_debug_file_fetcher(store_dir):
+    """Returns a function that copies <buildId>.debug, or decompresses <buildId>.debug.gz, from
+    'store_dir' to the given path.
+    """
+    def fetch(build_id, dest_path):
+        path = os.path.join(store_dir, build_id + ".debug")
+        if os.path.exists(path):
+            shutil.copyfile(path, dest_path)
+            return
+        with open(path + ".gz", "rb") as in_file:
+            _copy_decompressed(in_file, dest_path)
+    return fetch
+
+class debug_file_cache(object):
+    """Caches debug files by build-id in 'cache_dir', fetching the missing ones with 'fetch'.
+
+    'fetch' is called with the build-id and the path to write the debug file to. Each file is
+    written to a temporary file and renamed into place, so concurrent users of the cache never see
+    a partial file. If 'max_size_bytes' is specified, then the least recently used files are removed
+    once the cache is larger than it.
+    """
+
+    def __init__(self, cache_dir, fetch, max_size_bytes=None):
         self._cache_dir = cache_dir
-        self._s3_bucket = s3_bucket
+        self._fetch = fetch
+        self._max_size_bytes = max_size_bytes
+
+    def get_path(self, build_id):
+        build_id = build_id.lower()
+        path = os.path.join(self._cache_dir, build_id + ".debug")
+        if os.path.exists(path):
+            try:
+                # The modification time orders the files from the least to the most recently used.
+                os.utime(path, None)
+                return path
+            except OSError:
+                # The file was evicted by another process.
+                pass
+
+        if not os.path.isdir(self._cache_dir):
+            try:
+                os.makedirs(self._cache_dir)
+            except OSError:
+                if not os.path.isdir(self._cache_dir):
+                    raise
+        _write_atomically(path, lambda temp_path: self._fetch(build_id, temp_path))
+        self._evict(keep_path=path)
+        return path
+
+    def _evict(self, keep_path):
+        if self._max_size_bytes is None:
+            return
+        entries = []
+        for file_name in os.listdir(self._cache_dir):
+            if not file_name.endswith(".debug"):
+                continue
+            path = os.path.join(self._cache_dir, file_name)
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat_result.st_mtime, stat_result.st_size, path))
+
+        total_size = sum(size for (_, size, _) in entries)
+        for (_, size, path) in sorted(entries):
+            if total_size <= self._max_size_bytes:
+                break
+            if path == keep_path:
+                continue
+            try:
+                os.remove(path)
+                total_size -= size
+            except OSError:
+                pass
 
     def get_dbg_file(self, soinfo):
         buildId = soinfo.get("buildId", None)
         if buildId is None:
             return None
-        buildId = buildId.lower()
-        buildIdPath = os.path.join(self._cache_dir, buildId + ".debug")
-        if not os.path.exists(buildIdPath):
-            try:
-                self._get_from_s3(buildId)
-            except:
-                ex = sys.exc_info()[0]
-                sys.stderr.write("Failed to find debug symbols for %s in s3: %s\n" %(buildId, ex))
-                return None
-        if not os.path.exists(buildIdPath):
+        try:
+            return self.get_path(buildId)
+        except:
+            ex = sys.exc_info()[0]
+            sys.stderr.write("Failed to find debug symbols for %s: %s\n" %(buildId, ex))
             return None
-        return buildIdPath
 
-    def _get_from_s3(self, buildId):
-        subprocess.check_call(
-            ['wget', 'https://s3.amazonaws.com/%s/%s.debug.gz' % (self._s3_bucket, buildId)],
-            cwd=self._cache_dir)
-        subprocess.check_call(['gunzip', buildId + ".debug.gz"], cwd=self._cache_dir)
+def cache_dbg_file_resolver(cache_dir, store, max_size_mb=None):
+    """Returns a debug_file_cache backed by 'store', which is either a URL or a directory."""
+    if store.startswith("http://") or store.startswith("https://"):
+        fetch = http_debug_file_fetcher(store)
+    else:
+        fetch = dir_debug_file_fetcher(store)
+    max_size_bytes = int(float(max_size_mb) * 1024 * 1024) if max_size_mb is not None else None
+    return debug_file_cache(cache_dir, fetch, max_size_bytes)
+
+class s3_buildid_dbg_file_resolver(debug_file_cache):
+    def __init__(self, cache_dir, s3_bucket, max_size_bytes=None):
+        debug_file_cache.__init__(
+            self, cache_dir, http_debug_file_fetcher("https://s3.amazonaws.com/%s" % s3_bucket),
+            max_size_bytes)
 
 def classic_output(frames, outfile, **kwargs):
     for frame in frames:
@@ -155,14 +640,48 @@ def classic_output(frames, outfile, **kwargs):
         else:
             outfile.write(" %(path)s!!!\n" % symbinfo)
 
+_TRACE_DOC_START_RE = re.compile(r'\{\s*"backtrace"\s*:')
+
+def find_trace_docs(text):
+    """Returns the trace_docs in MongoDB stack dump format found in 'text', such as the contents of
+    a log file.
+    """
+    decoder = json.JSONDecoder()
+    trace_docs = []
+    pos = 0
+    while True:
+        match = _TRACE_DOC_START_RE.search(text, pos)
+        if match is None:
+            return trace_docs
+        try:
+            (trace_doc, pos) = decoder.raw_decode(text, match.start())
+        except ValueError:
+            # The backtrace may have been truncated.
+            pos = match.end()
+            continue
+        if "processInfo" in trace_doc:
+            trace_docs.append(trace_doc)
+
 def main(argv):
     parser = optparse.OptionParser()
     parser.add_option("--dsym-hint", action="append", dest="dsym_hint")
     parser.add_option("--symbolizer-path", dest="symbolizer_path", default=None)
     parser.add_option("--debug-file-resolver", dest="debug_file_resolver", default="path")
     parser.add_option("--output-format", dest="output_format", default="classic")
+    parser.add_option("--backtraces-file", dest="backtraces_file", default=None,
+                      help="Symbolize all of the backtraces in a file, such as a log file.")
+    parser.add_option("--jobs", type="int", dest="jobs", default=None,
+                      help="Number of llvm-symbolizer processes to run at once.")
+    parser.add_option("--symbol-cache-dir", dest="symbol_cache_dir", default=None,
+                      help="Directory in which to cache the symbols of each buildId.")
+    parser.add_option("--build-dir", action="append", dest="build_dirs", default=[],
+                      help="Look up the debug files of the path resolver by buildId in a"
+                           " directory of builds. Can be specified multiple times.")
+    parser.add_option("--buildid-index", dest="buildid_index", default=None,
+                      help="File in which to save the buildIds of the files in --build-dir.")
     (options, args) = parser.parse_args(argv)
-    resolver_constructor = dict(path=path_dbg_file_resolver, s3=s3_buildid_dbg_file_resolver).get(
+    resolver_constructor = dict(path=path_dbg_file_resolver, s3=s3_buildid_dbg_file_resolver,
+                                cache=cache_dbg_file_resolver).get(
         options.debug_file_resolver, None)
     if resolver_constructor is None:
         sys.stderr.write("Invalid debug-file-resolver argument: %s\n" % options.debug_file_resolver)
@@ -173,6 +692,36 @@ def main(argv):
         sys.stderr.write("Invalid output-format argument: %s\n" % options.output_format)
         sys.exit(1)
 
+    resolver_kwargs = {}
+    if options.build_dirs:
+        if options.debug_file_resolver != "path":
+            sys.stderr.write("--build-dir can only be used with the path debug-file-resolver\n")
+            sys.exit(1)
+        index = buildid_index(options.buildid_index)
+        for build_dir in options.build_dirs:
+            index.add_dir(build_dir)
+        index.save()
+        resolver_kwargs["index"] = index
+    resolver = resolver_constructor(*args[1:], **resolver_kwargs)
+
+    if options.backtraces_file is not None:
+        with open(options.backtraces_file) as backtraces_file:
+            trace_docs = find_trace_docs(backtraces_file.read())
+        pool = symbolizer_pool(options.symbolizer_path, options.dsym_hint,
+                               num_processes=options.jobs)
+        try:
+            traces = symbolize_traces(trace_docs, resolver, pool=pool,
+                                      cache_dir=options.symbol_cache_dir)
+        finally:
+            pool.close()
+
+        if options.output_format == "json":
+            json.dump(traces, sys.stdout, indent=2)
+        else:
+            for (i, frames) in enumerate(traces):
+                sys.stdout.write("Backtrace %d:\n" % i)
+                output_fn(frames, sys.stdout)
+        return
 
     # Skip over everything before the first '{' since it is likely to be log line prefixes.
     # Additionally, using raw_decode() to ignore extra data after the closing '}' to allow maximal
@@ -181,11 +730,11 @@ def main(argv):
     trace_doc = trace_doc[trace_doc.find('{'):]
     trace_doc = json.JSONDecoder().raw_decode(trace_doc)[0]
 
-    resolver = resolver_constructor(*args[1:])
-    frames = symbolize_frames(trace_doc,
+    frames = symbolize_traces([trace_doc],
                               resolver,
                               symbolizer_path=options.symbolizer_path,
-                              dsym_hint=options.dsym_hint)
+                              dsym_hint=options.dsym_hint,
+                              cache_dir=options.symbol_cache_dir)[0]
     output_fn(frames, sys.stdout, indent=2)
 
 if __name__ == '__main__':
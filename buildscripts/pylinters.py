@@ -16,6 +16,7 @@ if __name__ == "__main__" and __package__ is None:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(os.path.realpath(__file__)))))
 
 from buildscripts.linter import base  # pylint: disable=wrong-import-position
+from buildscripts.linter import cache  # pylint: disable=wrong-import-position
 from buildscripts.linter import git  # pylint: disable=wrong-import-position
 from buildscripts.linter import mypy  # pylint: disable=wrong-import-position
 from buildscripts.linter import parallel  # pylint: disable=wrong-import-position
@@ -79,9 +80,21 @@ def _lint_files(linters, config_dict, file_names):
     if not linter_instances:
         sys.exit(1)
 
+    # A file that is linted can import any of the files that can be linted, so they are all part
+    # of the cache key for linters that check how a file uses the files it imports.
+    all_file_names = None  # type: List[str]
+    if any(linter.linter.checks_other_files() for linter in linter_instances):
+        all_file_names = git.get_files_to_check_working_tree(is_interesting_file)
+
     for linter in linter_instances:
-        run_fix = lambda param1: lint_runner.run_lint(linter, param1)  # pylint: disable=cell-var-from-loop
-        lint_clean = parallel.parallel_process([os.path.abspath(f) for f in file_names], run_fix)
+        # Check several files with each invocation of the linter to avoid paying its startup cost
+        # for every file.
+        run_lint = lambda param1: lint_runner.run_lint_batch(linter, param1)  # pylint: disable=cell-var-from-loop
+        lint_cache = cache.LintCache(_get_build_dir(), linter.linter.cmd_name, linter.version,
+                                     linter.linter.get_config_file_names(), git.get_base_dir())
+        lint_clean = cache.lint_file_batches(
+            lint_cache, file_names, run_lint,
+            dependency_file_names=all_file_names if linter.linter.checks_other_files() else None)
 
         if not lint_clean:
             print("ERROR: Code Style does not match coding style")
@@ -18,7 +18,7 @@ if __name__ == "__main__" and __package__ is None:
 from buildscripts import resmokelib
 
 
-def _execute_suite(suite):
+def _execute_suite(suite, fixture_pool=None):
     """
     Executes the test suite, failing fast if requested.
 
@@ -75,7 +75,7 @@ def _execute_suite(suite):
 
     executor_config = suite.get_executor_config()
     executor = resmokelib.testing.executor.TestSuiteExecutor(
-        logger, suite, archive_instance=archive, **executor_config)
+        logger, suite, archive_instance=archive, fixture_pool=fixture_pool, **executor_config)
 
     try:
         executor.run()
@@ -141,6 +141,64 @@ def find_suites_by_test(suites):
     return memberships
 
 
+def _shard_suites(logger, suites):
+    """
+    Replaces the tests of each suite with the ones in the partition
+    selected by --shard.
+    """
+
+    (shard_index, num_shards) = resmokelib.config.SHARD
+
+    history_store = None
+    if resmokelib.config.TEST_HISTORY_FILE is not None:
+        history_store = resmokelib.testing.history.TestHistoryStore(
+            resmokelib.config.TEST_HISTORY_FILE)
+
+    try:
+        for suite in suites:
+            durations = resmokelib.testing.durations.TestDurations.from_report_files(
+                resmokelib.utils.default_if_none(resmokelib.config.HISTORIC_REPORT_FILES, []),
+                resmokelib.config.DEFAULT_TEST_DURATION_SECS)
+            if history_store is not None:
+                durations.add_history(history_store, suite.get_name())
+            _shard_suite(logger, suite, durations, shard_index, num_shards)
+    finally:
+        if history_store is not None:
+            history_store.close()
+
+
+def _shard_suite(logger, suite, durations, shard_index, num_shards):
+    """
+    Replaces the tests of 'suite' with the ones in the partition
+    'shard_index' of 'num_shards'.
+    """
+
+    num_tests = len(suite.tests)
+    total_secs = sum(durations.estimate(test) for test in suite.tests)
+    suite.tests = durations.partition(suite.tests, num_shards)[shard_index]
+    logger.info("Running shard %d/%d of suite %s: %d of %d tests, estimated to take %0.1f of"
+                " %0.1f seconds.", shard_index, num_shards, suite.get_display_name(),
+                len(suite.tests), num_tests,
+                sum(durations.estimate(test) for test in suite.tests), total_secs)
+
+
+def _merge_reports_and_exit(logger, report_files):
+    """
+    Combines the report.json files in 'report_files' into the file
+    specified by --reportFile and exits.
+    """
+
+    (combined_report, _) = resmokelib.reportfile.combine_files(report_files)
+    with open(resmokelib.config.REPORT_FILE, "w") as fp:
+        combined_report.write_json(fp)
+
+    num_failures = (combined_report.num_failed + combined_report.num_errored +
+                    combined_report.num_interrupted)
+    logger.info("Merged %d report file(s) into %s: %d test(s), %d failure(s).", len(report_files),
+                resmokelib.config.REPORT_FILE, len(combined_report.test_infos), num_failures)
+    sys.exit(resmokelib.reportfile.exit_code(combined_report))
+
+
 def _list_suites_and_exit(logger, exit_code=0):
     suite_names = resmokelib.suitesconfig.get_named_suites()
     logger.info("Suites available to execute:\n%s", "\n".join(suite_names))
@@ -189,6 +247,9 @@ class Main(object):
         if self.__values.list_suites:
             _list_suites_and_exit(resmoke_logger)
 
+        if self.__values.merge_reports:
+            _merge_reports_and_exit(resmoke_logger, self.__args)
+
         # Log the command line arguments specified to resmoke.py to make it easier to re-run the
         # resmoke.py invocation used by an Evergreen task.
         resmoke_logger.info("resmoke.py invocation: %s", " ".join(sys.argv))
@@ -200,6 +261,9 @@ class Main(object):
             resmoke_logger.error("Failed to parse YAML suite definition: %s", str(err))
             _list_suites_and_exit(resmoke_logger, exit_code=1)
 
+        if resmokelib.config.SHARD is not None:
+            _shard_suites(resmoke_logger, suites)
+
         # Register a signal handler or Windows event object so we can write the report file if the
         # task times out.
         resmokelib.sighandler.register(resmoke_logger, suites, self.__start_time)
@@ -213,12 +277,23 @@ class Main(object):
                                     test, suite_names)
             sys.exit(0)
 
+        status_file_writer = None
+        if resmokelib.config.PROGRESS_FILE is not None:
+            status_file_writer = resmokelib.testing.progress.StatusFileWriter(
+                resmokelib.testing.progress.TRACKER, resmokelib.config.PROGRESS_FILE,
+                resmokelib.config.PROGRESS_FILE_INTERVAL_SECS)
+            status_file_writer.start()
+
+        fixture_pool = None
+        if resmokelib.config.REUSE_FIXTURES:
+            fixture_pool = resmokelib.testing.fixtures.pool.FixturePool(exec_logger)
+
         try:
             for suite in suites:
                 resmoke_logger.info(_dump_suite_config(suite, logging_config))
 
                 suite.record_suite_start()
-                interrupted = _execute_suite(suite)
+                interrupted = _execute_suite(suite, fixture_pool)
                 suite.record_suite_end()
 
                 resmoke_logger.info("=" * 80)
@@ -237,7 +312,16 @@ class Main(object):
             exit_code = max(suite.return_code for suite in suites)
             sys.exit(exit_code)
         finally:
+            if fixture_pool is not None and not fixture_pool.teardown_all():
+                resmoke_logger.warning("Not all of the reused fixtures were torn down"
+                                       " successfully.")
+
+            if status_file_writer is not None:
+                status_file_writer.stop()
+
             if not interrupted:
+                # The fixtures have all been torn down, so there is no more output to read.
+                resmokelib.core.pipe.stop_multiplexer()
                 resmokelib.logging.flush.stop_thread()
 
             resmokelib.reportfile.write(suites)
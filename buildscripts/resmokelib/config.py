@@ -49,8 +49,10 @@ DEFAULTS = {
     "continue_on_failure": False,
     "dbpath_prefix": None,
     "dbtest_executable": None,
+    "default_test_duration_secs": 30,
     "dry_run": None,
     "exclude_with_any_tags": None,
+    "historic_report_files": None,
     "include_with_any_tags": None,
     "jobs": 1,
     "mongo_executable": None,
@@ -58,15 +60,19 @@ DEFAULTS = {
     "mongod_set_parameters": None,
     "mongos_executable": None,
     "mongos_set_parameters": None,
+    "multiplex_process_output": False,
     "no_journal": False,
     "num_clients_per_fixture": 1,
     "perf_report_file": None,
     "prealloc_journal": None,  # Default is set on the commandline.
+    "progress_file": None,
     "repeat": 1,
+    "reuse_fixtures": False,
     "report_failure_status": "fail",
     "report_file": None,
     "seed": long(time.time() * 256),  # Taken from random.py code in Python 2.7.
     "service_executor": None,
+    "shard": None,
     "shell_conn_string": None,
     "shell_port": None,
     "shell_read_mode": None,
@@ -76,6 +82,7 @@ DEFAULTS = {
     "storage_engine": None,
     "storage_engine_cache_size_gb": None,
     "tag_file": None,
+    "test_history_file": None,
     "transport_layer": None,
 
     # Evergreen options.
@@ -213,6 +220,10 @@ DBPATH_PREFIX = None
 # The path to the dbtest executable used by resmoke.py.
 DBTEST_EXECUTABLE = None
 
+# The estimated duration of a test that has no recorded history when ordering tests by their
+# historical durations.
+DEFAULT_TEST_DURATION_SECS = None
+
 # If set to "tests", then resmoke.py will output the tests that would be run by each suite (without
 # actually running them).
 DRY_RUN = None
@@ -259,6 +270,10 @@ EXCLUDE_WITH_ANY_TAGS = None
 # If true, then a test failure or error will cause resmoke.py to exit and not run any more tests.
 FAIL_FAST = None
 
+# If set, then the tests are run in order of decreasing duration, as recorded by the specified
+# report.json files from previous executions.
+HISTORIC_REPORT_FILES = None
+
 # If set, then only jstests that have at least one of the specified tags will be run during the
 # jstest portion of the suite(s).
 INCLUDE_WITH_ANY_TAGS = None
@@ -281,6 +296,10 @@ MONGOS_EXECUTABLE = None
 # The --setParameter options passed to mongos.
 MONGOS_SET_PARAMETERS = None
 
+# If true, then the output of all processes started by resmoke.py is read by a single thread rather
+# than by two threads per process.
+MULTIPLEX_PROCESS_OUTPUT = None
+
 # If true, then all mongod's started by resmoke.py and by the mongo shell will not have journaling
 # enabled.
 NO_JOURNAL = None
@@ -295,6 +314,10 @@ NUM_CLIENTS_PER_FIXTURE = None
 # Report file for the Evergreen performance plugin.
 PERF_REPORT_FILE = None
 
+# If set, then resmoke.py periodically rewrites the specified JSON file with the progress of each job
+# and the time spent in tests, hooks, and fixtures.
+PROGRESS_FILE = None
+
 # If set, then the RNG is seeded with the specified value. Otherwise uses a seed based on the time
 # this module was loaded.
 RANDOM_SEED = None
@@ -308,9 +331,17 @@ REPORT_FAILURE_STATUS = None
 # If set, then resmoke.py will write out a report file with the status of each test that ran.
 REPORT_FILE = None
 
+# If true, then the fixtures of a suite are kept running and reused by later suites with the same
+# fixture configuration.
+REUSE_FIXTURES = None
+
 # IF set, then mongod/mongos's started by resmoke.py will use the specified service executor
 SERVICE_EXECUTOR = None
 
+# If set, then a (index, count) pair. The tests of each suite are partitioned into 'count' groups
+# with about the same total historical duration and only the group at 'index' is run.
+SHARD = None
+
 # If set, resmoke will override the default fixture and connect to the fixture specified by this
 # connection string instead.
 SHELL_CONN_STRING = None
@@ -339,6 +370,10 @@ STORAGE_ENGINE_CACHE_SIZE = None
 # The tag file to use that associates tests with tags.
 TAG_FILE = None
 
+# If set, then the status and duration of every test is appended to the specified SQLite database,
+# and the recorded durations are used to run the longest tests first.
+TEST_HISTORY_FILE = None
+
 # If set, then mongod/mongos's started by resmoke.py will use the specified transport layer.
 TRANSPORT_LAYER = None
 
@@ -378,6 +413,15 @@ DEFAULT_BENCHMARK_TEST_LIST = "build/benchmarks.txt"
 DEFAULT_UNIT_TEST_LIST = "build/unittests.txt"
 DEFAULT_INTEGRATION_TEST_LIST = "build/integration_tests.txt"
 
+# Default file name for the local test history database, used by the --testHistory option.
+DEFAULT_TEST_HISTORY_FILE = "build/resmoke_test_history.db"
+
+# Number of seconds between rewrites of the --progressFile.
+PROGRESS_FILE_INTERVAL_SECS = 5
+
+# File in which the tags of the JS tests are cached between executions of resmoke.py.
+TAG_CACHE_FILE = "build/resmoke_tag_cache.json"
+
 # External files or executables, used as suite selectors, that are created during the build and
 # therefore might not be available when creating a test membership map.
 EXTERNAL_SUITE_SELECTORS = (DEFAULT_BENCHMARK_TEST_LIST,
@@ -6,71 +6,232 @@ being waited on.
 
 from __future__ import absolute_import
 
+import errno
+import os
+import re
+import select
 import threading
 
+# Polling pipes with select.poll() isn't supported on Windows.
+if os.name == "posix" and hasattr(select, "poll"):
+    import fcntl
+    _MULTIPLEXER_SUPPORTED = True
+else:
+    _MULTIPLEXER_SUPPORTED = False
 
-class LoggerPipe(threading.Thread):
+
+# Number of bytes to request from the pipe at once. os.read() returns as soon as any output is
+# available, so a larger value only affects how much output can be batched together.
+_READ_SIZE = 64 * 1024
+
+# Total number of lines read by all of the LoggerPipe instances.
+_NUM_LINES_READ = 0
+_NUM_LINES_READ_LOCK = threading.Lock()
+
+
+def num_lines_read():
+    """
+    Returns the total number of lines read from the output of all
+    subprocesses so far.
+    """
+    return _NUM_LINES_READ
+
+
+class LoggerPipe(object):
     """
     Asynchronously reads the output of a subprocess and sends it to a
     logger.
-    """
 
-    # The start() and join() methods are not intended to be called directly on the LoggerPipe
-    # instance. Since we override them for that effect, the super's version are preserved here.
-    __start = threading.Thread.start
-    __join = threading.Thread.join
+    The output is read either by a thread dedicated to the pipe, or by a
+    shared PipeMultiplexer thread.
+    """
 
-    def __init__(self, logger, level, pipe_out):
+    def __init__(self, logger, level, pipe_out, watches=None, multiplexer=None):
         """
         Initializes the LoggerPipe with the specified logger, logging
         level to use, and pipe to read from.
-        """
 
-        threading.Thread.__init__(self)
-        # Main thread should not call join() when exiting
-        self.daemon = True
+        Each OutputWatch in 'watches' is set once a matching line is
+        read from the pipe. If 'multiplexer' is specified, then the pipe
+        is read by it rather than by a new thread.
+        """
 
         self.__logger = logger
         self.__level = level
         self.__pipe_out = pipe_out
+        self.__fd = pipe_out.fileno()
 
         self.__lock = threading.Lock()
         self.__condition = threading.Condition(self.__lock)
 
         self.__started = False
         self.__finished = False
+        self.__num_lines = 0
+
+        # Chunks of output read after the last newline, which are logged once the rest of their line
+        # is read. They are only joined then to avoid copying a long line for every chunk of it.
+        self.__partial = []
+
+        # OutputWatch instances that haven't matched a line yet. The list is replaced rather than
+        # modified in place so that the reader can check whether it is empty without holding the
+        # lock.
+        self.__watches = list(watches) if watches is not None else []
+
+        self.__thread = None
+        if multiplexer is None:
+            self.__thread = threading.Thread(target=self.__run)
+            # Main thread should not call join() when exiting
+            self.__thread.daemon = True
+            self.__thread.start()
+        else:
+            multiplexer.register(self)
 
-        LoggerPipe.__start(self)
+    def fileno(self):
+        """
+        Returns the file descriptor of the pipe being read from.
+        """
+        return self.__fd
 
-    def start(self):
-        raise NotImplementedError("start should not be called directly")
+    @property
+    def logger(self):
+        """
+        Returns the logger the output of the pipe is sent to.
+        """
+        return self.__logger
 
-    def run(self):
+    def __run(self):
         """
         Reads the output from 'pipe_out' and logs each line to 'logger'.
         """
 
+        self._mark_started()
+        try:
+            while self._read_available():
+                pass
+        finally:
+            self._finish()
+
+    def _mark_started(self):
+        """
+        Notifies the waiters that the pipe is now being read from.
+        """
+
         with self.__lock:
             self.__started = True
             self.__condition.notify_all()
 
-        # Close the pipe when finished reading all of the output.
-        with self.__pipe_out:
-            # Avoid buffering the output from the pipe.
-            for line in iter(self.__pipe_out.readline, b""):
-                # Convert the output of the process from a bytestring to a UTF-8 string, and replace
-                # any characters that cannot be decoded with the official Unicode replacement
-                # character, U+FFFD. The log messages of MongoDB processes are not always valid
-                # UTF-8 sequences. See SERVER-7506.
-                line = line.decode("utf-8", "replace")
-                self.__logger.log(self.__level, line.rstrip())
+    def _read_available(self):
+        """
+        Reads the output that is available from the pipe and logs each
+        complete line, blocking if no output is available.
+
+        Returns false once all of the output has been read.
+        """
+
+        # Read the output in large chunks directly from the file descriptor rather than line by line
+        # so that all of the lines that are available can be logged as a single batch.
+        chunk = os.read(self.__fd, _READ_SIZE)
+        if not chunk:
+            return False
+
+        self.__process_chunk(chunk)
+        return True
+
+    def __process_chunk(self, chunk):
+        """
+        Logs the lines completed by 'chunk' and saves the rest of it for
+        later.
+        """
+
+        end = chunk.rfind(b"\n")
+        if end == -1:
+            self.__partial.append(chunk)
+            return
+
+        if self.__partial:
+            self.__partial.append(chunk[:end])
+            complete = b"".join(self.__partial)
+        else:
+            complete = chunk[:end]
+        self.__partial = [chunk[end + 1:]] if end + 1 < len(chunk) else []
+        self.__log_output(complete)
+
+    def _finish(self):
+        """
+        Logs any remaining output, closes the pipe, and notifies the
+        waiters that all of the output has been read.
+        """
+
+        try:
+            if self.__partial:
+                partial = b"".join(self.__partial)
+                self.__partial = []
+                self.__log_output(partial)
+        finally:
+            self.__pipe_out.close()
+            with self.__lock:
+                self.__finished = True
+                self.__condition.notify_all()
+
+    def __log_output(self, output):
+        """
+        Logs each of the newline-separated lines in the bytestring
+        'output' as a single batch.
+        """
+
+        # Convert the output of the process from a bytestring to a UTF-8 string, and replace any
+        # characters that cannot be decoded with the official Unicode replacement character, U+FFFD.
+        # The log messages of MongoDB processes are not always valid UTF-8 sequences. See
+        # SERVER-7506. Decoding the whole batch at once is safe because a newline byte never
+        # appears within a multi-byte UTF-8 sequence.
+        lines = [line.rstrip() for line in output.decode("utf-8", "replace").split(u"\n")]
+        self.__num_lines += len(lines)
+        _count_lines(len(lines))
+        _log_batch(self.__logger, self.__level, lines)
+
+        if self.__watches:
+            for line in lines:
+                self.__check_watches(line)
+                if not self.__watches:
+                    break
+
+    @property
+    def num_lines(self):
+        """
+        Returns the number of lines read from the pipe so far.
+        """
+        return self.__num_lines
+
+    def add_watch(self, watch):
+        """
+        Sets 'watch' once a matching line is read from the pipe. Lines
+        that were read before this method was called are not checked.
+        """
 
         with self.__lock:
-            self.__finished = True
-            self.__condition.notify_all()
+            self.__watches = self.__watches + [watch]
 
-    def join(self, timeout=None):
-        raise NotImplementedError("join should not be called directly")
+    def remove_watch(self, watch):
+        """
+        Stops checking the lines read from the pipe for 'watch'.
+        """
+
+        with self.__lock:
+            self.__watches = [other for other in self.__watches if other is not watch]
+
+    def __check_watches(self, line):
+        """
+        Sets each of the pending watches that match 'line'.
+        """
+
+        with self.__lock:
+            pending = []
+            for watch in self.__watches:
+                if watch.matches(line):
+                    watch.set()
+                else:
+                    pending.append(watch)
+            self.__watches = pending
 
     def wait_until_started(self):
         with self.__lock:
@@ -82,6 +243,298 @@ class LoggerPipe(threading.Thread):
             while not self.__finished:
                 self.__condition.wait()
 
-        # No need to pass a timeout to join() because the thread should already be done after
-        # notifying us it has finished reading output from the pipe.
-        LoggerPipe.__join(self)  # Tidy up the started thread.
+        if self.__thread is not None:
+            # No need to pass a timeout to join() because the thread should already be done after
+            # notifying us it has finished reading output from the pipe.
+            self.__thread.join()  # Tidy up the started thread.
+
+
+class PipeMultiplexer(object):
+    """
+    Reads the output of many LoggerPipe instances from a single thread,
+    rather than starting a thread for each pipe.
+    """
+
+    def __init__(self):
+        """
+        Initializes the PipeMultiplexer and starts its thread.
+        """
+
+        # select.epoll scales better than select.poll with many pipes, but is only available on
+        # Linux.
+        self.__poller = select.epoll() if hasattr(select, "epoll") else select.poll()
+
+        # The thread is woken up by writing to this pipe when new LoggerPipe instances are
+        # registered.
+        (self.__wakeup_read_fd, self.__wakeup_write_fd) = os.pipe()
+        for fd in (self.__wakeup_read_fd, self.__wakeup_write_fd):
+            flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+            fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+        self.__poller.register(self.__wakeup_read_fd, select.POLLIN)
+
+        self.__lock = threading.Lock()
+        self.__pending = []
+        self.__stopping = False
+
+        # Map of file descriptor to the LoggerPipe reading from it. Only accessed by the thread.
+        self.__pipes = {}
+
+        self.__thread = threading.Thread(target=self.__run, name="PipeMultiplexer")
+        # Main thread should not call join() when exiting
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def register(self, logger_pipe):
+        """
+        Starts reading the output of 'logger_pipe'.
+        """
+
+        with self.__lock:
+            if self.__stopping:
+                raise ValueError("Cannot register a LoggerPipe after the PipeMultiplexer has been"
+                                 " stopped")
+            self.__pending.append(logger_pipe)
+
+        self.__wake_up()
+
+    def stop(self):
+        """
+        Stops the thread and closes the wakeup pipe.
+
+        The pipes that are still registered are finished without reading
+        the rest of their output.
+        """
+
+        with self.__lock:
+            if self.__stopping:
+                return
+            self.__stopping = True
+
+        self.__wake_up()
+        # No need to pass a timeout to join() because the thread doesn't block on anything other
+        # than polling the pipes, which the wakeup pipe interrupts.
+        self.__thread.join()
+
+        os.close(self.__wakeup_read_fd)
+        os.close(self.__wakeup_write_fd)
+
+    def __wake_up(self):
+        """
+        Interrupts the thread's call to poll().
+        """
+
+        try:
+            os.write(self.__wakeup_write_fd, b"x")
+        except OSError as err:
+            # The thread already has a wakeup pending if the pipe is full.
+            if err.errno not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                raise
+
+    def __run(self):
+        """
+        Reads the output of each registered LoggerPipe as it becomes
+        available.
+        """
+
+        while True:
+            for (fd, _) in self.__poller.poll():
+                if fd == self.__wakeup_read_fd:
+                    if not self.__add_pending():
+                        self.__finish_all()
+                        return
+                    continue
+
+                logger_pipe = self.__pipes[fd]
+                try:
+                    more_output = logger_pipe._read_available()
+                except:
+                    # Keep reading the output of the other pipes rather than letting the exception
+                    # stop the thread.
+                    logger_pipe.logger.exception("Encountered an error while reading the output of"
+                                                 " the process.")
+                    more_output = False
+
+                if not more_output:
+                    self.__finish(fd)
+
+    def __finish(self, fd):
+        """
+        Stops polling 'fd' and finishes the LoggerPipe reading from it.
+        """
+
+        # Stop polling the file descriptor before the pipe closes it and its number can be reused.
+        self.__poller.unregister(fd)
+        logger_pipe = self.__pipes.pop(fd)
+        try:
+            logger_pipe._finish()
+        except:
+            logger_pipe.logger.exception("Encountered an error while finishing reading the output"
+                                         " of the process.")
+
+    def __finish_all(self):
+        """
+        Finishes all of the registered LoggerPipe instances so that
+        nothing waits on them after the thread exits.
+        """
+
+        for fd in list(self.__pipes):
+            self.__finish(fd)
+        self.__poller.unregister(self.__wakeup_read_fd)
+        if hasattr(self.__poller, "close"):
+            # Only select.epoll objects hold on to a file descriptor.
+            self.__poller.close()
+
+    def __add_pending(self):
+        """
+        Starts polling the file descriptors of the newly registered
+        LoggerPipe instances.
+
+        Returns false if the PipeMultiplexer is being stopped.
+        """
+
+        try:
+            while os.read(self.__wakeup_read_fd, 4096):
+                pass
+        except OSError as err:
+            if err.errno not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                raise
+
+        with self.__lock:
+            pending = self.__pending
+            self.__pending = []
+            stopping = self.__stopping
+
+        for logger_pipe in pending:
+            fd = logger_pipe.fileno()
+            self.__pipes[fd] = logger_pipe
+            self.__poller.register(fd, select.POLLIN)
+            logger_pipe._mark_started()
+
+        return not stopping
+
+
+_MULTIPLEXER = None
+_MULTIPLEXER_LOCK = threading.Lock()
+
+
+def get_multiplexer():
+    """
+    Returns the PipeMultiplexer shared by all processes, or None if the
+    platform doesn't support polling pipes.
+    """
+
+    global _MULTIPLEXER
+
+    if not _MULTIPLEXER_SUPPORTED:
+        return None
+
+    with _MULTIPLEXER_LOCK:
+        if _MULTIPLEXER is None:
+            _MULTIPLEXER = PipeMultiplexer()
+        return _MULTIPLEXER
+
+
+def stop_multiplexer():
+    """
+    Stops the PipeMultiplexer shared by all processes if it was started.
+    """
+
+    global _MULTIPLEXER
+
+    with _MULTIPLEXER_LOCK:
+        multiplexer = _MULTIPLEXER
+        _MULTIPLEXER = None
+
+    if multiplexer is not None:
+        multiplexer.stop()
+
+
+def _count_lines(num_lines):
+    """
+    Adds 'num_lines' to the total returned by num_lines_read().
+    """
+
+    global _NUM_LINES_READ
+    with _NUM_LINES_READ_LOCK:
+        _NUM_LINES_READ += num_lines
+
+
+def _log_batch(logger, level, messages):
+    """
+    Logs each of 'messages' to 'logger' at the specified level.
+
+    Equivalent to calling logger.log(level, message) for each message,
+    except that every handler is locked once for the whole batch rather
+    than once per message. Handlers that define a handle_batch() method
+    are given all of the records at once.
+    """
+
+    if logger.disabled or not logger.isEnabledFor(level):
+        return
+
+    records = [logger.makeRecord(logger.name, level, "(unknown file)", 0, message, None, None)
+               for message in messages]
+    if logger.filters:
+        records = [record for record in records if logger.filter(record)]
+        if not records:
+            return
+
+    current = logger
+    while current is not None:
+        for handler in current.handlers:
+            if level < handler.level:
+                continue
+
+            handle_batch = getattr(handler, "handle_batch", None)
+            if handle_batch is not None:
+                handle_batch(records)
+                continue
+
+            handler.acquire()
+            try:
+                for record in records:
+                    if handler.filter(record):
+                        handler.emit(record)
+            finally:
+                handler.release()
+
+        if not current.propagate:
+            break
+        current = current.parent
+
+
+class OutputWatch(object):
+    """
+    An event that is set once a process outputs a line matching a
+    regular expression.
+    """
+
+    def __init__(self, pattern):
+        """
+        Initializes the OutputWatch with the regular expression to
+        search each line of output for.
+        """
+
+        self.__regex = re.compile(pattern) if isinstance(pattern, basestring) else pattern
+        self.__event = threading.Event()
+
+    def matches(self, line):
+        """
+        Returns true if 'line' matches the watched pattern.
+        """
+        return self.__regex.search(line) is not None
+
+    def set(self):
+        self.__event.set()
+
+    def is_set(self):
+        return self.__event.is_set()
+
+    def wait(self, timeout):
+        """
+        Waits up to 'timeout' seconds for a matching line.
+
+        Returns true if a matching line was output, and false otherwise.
+        """
+        self.__event.wait(timeout)
+        return self.__event.is_set()
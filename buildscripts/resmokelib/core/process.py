@@ -36,6 +36,7 @@ else:
     import subprocess
 
 from . import pipe
+from .. import config
 from .. import utils
 
 # Attempt to avoid race conditions (e.g. hangs caused by a file descriptor being left open) when
@@ -116,6 +117,12 @@ class Process(object):
         self._stdout_pipe = None
         self._stderr_pipe = None
 
+        self._output_watches = []
+
+        # Whether the output of the process is read by the shared PipeMultiplexer rather than by a
+        # thread for each of its pipes.
+        self.multiplex_output = config.MULTIPLEX_PROCESS_OUTPUT
+
     def start(self):
         """
         Starts the process and the logger pipes for its stdout and
@@ -147,8 +154,13 @@ class Process(object):
                                              creationflags=creation_flags)
             self.pid = self._process.pid
 
-        self._stdout_pipe = pipe.LoggerPipe(self.logger, logging.INFO, self._process.stdout)
-        self._stderr_pipe = pipe.LoggerPipe(self.logger, logging.ERROR, self._process.stderr)
+        multiplexer = pipe.get_multiplexer() if self.multiplex_output else None
+        self._stdout_pipe = pipe.LoggerPipe(self.logger, logging.INFO, self._process.stdout,
+                                            watches=self._output_watches, multiplexer=multiplexer)
+        # The pipe drops each watch once it matches, so it is the only one holding on to them.
+        self._output_watches = []
+        self._stderr_pipe = pipe.LoggerPipe(self.logger, logging.ERROR, self._process.stderr,
+                                            multiplexer=multiplexer)
 
         self._stdout_pipe.wait_until_started()
         self._stderr_pipe.wait_until_started()
@@ -164,6 +176,35 @@ class Process(object):
                 if return_code == win32con.STILL_ACTIVE:
                     raise
 
+    def watch_output(self, pattern):
+        """
+        Returns a pipe.OutputWatch that is set once the process writes a
+        line matching the regular expression 'pattern' to its stdout.
+
+        Calling this method before start() ensures no output is missed.
+        """
+
+        watch = pipe.OutputWatch(pattern)
+        if self._stdout_pipe is not None:
+            self._stdout_pipe.add_watch(watch)
+        else:
+            self._output_watches.append(watch)
+        return watch
+
+    def unwatch_output(self, watch):
+        """
+        Stops checking the output of the process for a line matching the
+        pattern of 'watch', which was returned by watch_output().
+
+        Should be called once the watch is no longer waited on, since it
+        is otherwise only dropped once a matching line is written.
+        """
+
+        if self._stdout_pipe is not None:
+            self._stdout_pipe.remove_watch(watch)
+        elif watch in self._output_watches:
+            self._output_watches.remove(watch)
+
     def stop(self, kill=False):
         """Terminate the process."""
         if sys.platform == "win32":
@@ -242,6 +283,15 @@ class Process(object):
 
         return return_code
 
+    def num_output_lines(self):
+        """
+        Returns the number of lines of output read from the process so
+        far.
+        """
+
+        return sum(logger_pipe.num_lines for logger_pipe in (self._stdout_pipe, self._stderr_pipe)
+                   if logger_pipe is not None)
+
     def as_command(self):
         """
         Returns an equivalent command line invocation of the process.
@@ -6,11 +6,14 @@ from __future__ import absolute_import
 
 import functools
 import json
+import threading
+import time
 
 import requests
 
 from . import handlers
 from .. import config as _config
+from ..utils import scheduler
 
 
 CREATE_BUILD_ENDPOINT = "/build"
@@ -23,6 +26,14 @@ _BUILDLOGGER_CONFIG = "mci.buildlogger"
 _SEND_AFTER_LINES = 2000
 _SEND_AFTER_SECS = 10
 
+# Maximum number of log lines a handler holds on to while the buildlogger server isn't accepting
+# them. Once the limit is reached, the oldest lines are written to the fallback logger instead.
+_MAX_RETRY_LINES = 100000
+
+# Bounds on the delay between attempts to resend the log lines the buildlogger server didn't accept.
+_RETRY_INITIAL_DELAY_SECS = 1.0
+_RETRY_MAX_DELAY_SECS = 60.0
+
 # Initialized by resmokelib.logging.loggers.configure_loggers()
 BUILDLOGGER_FALLBACK = None
 
@@ -65,19 +76,13 @@ class _LogsSplitter(object):
         if not max_size:
             return [log_lines]
 
-        def line_size(line):
-            """
-            Computes the encoded JSON size of a log line as part of an array.
-            2 is added to each string size to account for the array representation of the logs,
-            as each line is preceded by a '[' or a space and followed by a ',' or a ']'.
-            """
-            return len(json.dumps(line, encoding="utf-8")) + 2
-
         curr_logs = []
         curr_logs_size = 0
         split_logs = []
         for line in log_lines:
-            size = line_size(line)
+            # 2 is added to each line's size to account for the array representation of the logs, as
+            # each line is preceded by a '[' or a space and followed by a ',' or a ']'.
+            size = _json_size(line) + 2
             if curr_logs_size + size > max_size:
                 split_logs.append(curr_logs)
                 curr_logs = []
@@ -88,6 +93,25 @@ class _LogsSplitter(object):
         return split_logs
 
 
+def _json_size(value):
+    """
+    Returns the size of 'value' when encoded as JSON without building
+    its encoded representation through json.dumps().
+    """
+
+    if isinstance(value, basestring):
+        return len(json.encoder.encode_basestring_ascii(value))
+
+    if isinstance(value, (list, tuple)):
+        # The elements are enclosed in brackets and separated by ", ".
+        return 2 + sum(_json_size(elem) for elem in value) + 2 * max(len(value) - 1, 0)
+
+    if isinstance(value, float):
+        return len(repr(value))
+
+    return len(json.dumps(value, encoding="utf-8"))
+
+
 class _BaseBuildloggerHandler(handlers.BufferedHandler):
     """
     Base class of the buildlogger handler for the global logs and the
@@ -108,12 +132,21 @@ class _BaseBuildloggerHandler(handlers.BufferedHandler):
 
         username = build_config["username"]
         password = build_config["password"]
-        self.http_handler = handlers.HTTPHandler(_config.BUILDLOGGER_URL, username, password)
+        self.http_handler = handlers.HTTPHandler(_config.BUILDLOGGER_URL, username, password,
+                                                 compress=True)
 
         self.endpoint = endpoint
         self.retry_buffer = []
         self.max_size = None
 
+        # Serializes the sending of log lines by the flush thread and the retry thread so that they
+        # are sent in order.
+        self.__send_lock = threading.Lock()
+
+        # The delay before the next attempt to resend the lines in 'self.retry_buffer', or None if
+        # no attempt is scheduled.
+        self.__retry_delay_secs = None
+
     def process_record(self, record):
         """
         Returns a tuple of the time the log record was created, and the
@@ -186,26 +219,103 @@ class _BaseBuildloggerHandler(handlers.BufferedHandler):
         Ensures all logging output has been flushed to the buildlogger
         server.
 
-        If _append_logs() returns false, then the log messages are added
-        to a separate buffer and retried the next time flush() is
-        called.
+        If _append_logs() doesn't send all of the log messages, then the
+        remaining ones are added to a separate buffer and retried in the
+        background by the retry thread.
         """
 
-        self.retry_buffer.extend(buf)
+        with self.__send_lock:
+            self.retry_buffer.extend(buf)
+
+            if self.__retry_delay_secs is not None and not close_called:
+                # Send the log messages after the ones the retry thread is waiting to resend to
+                # keep them in order. Returning without sending them also avoids blocking the flush
+                # thread on a buildlogger server that is failing.
+                self.__limit_retry_buffer()
+                return
+
+            self.__send_retry_buffer()
+
+            if close_called:
+                self.__retry_delay_secs = None
+                if self.retry_buffer:
+                    # Request to the buildlogger server returned an error, so use the fallback
+                    # logger to avoid losing the log messages entirely.
+                    self.__log_to_fallback(self.retry_buffer)
+                    self.retry_buffer = []
+                return
+
+            if not self.retry_buffer:
+                return
+
+            self.__limit_retry_buffer()
+            self.__retry_delay_secs = _RETRY_INITIAL_DELAY_SECS
+            delay_secs = self.__retry_delay_secs
+
+        _get_retry_thread().submit(self._retry, delay_secs)
+
+    def _retry(self):
+        """
+        Resends the log messages the buildlogger server didn't accept.
+        Called by the retry thread.
+        """
+
+        with self.__send_lock:
+            if self.__retry_delay_secs is None:
+                # The handler was closed while the retry was scheduled.
+                return
+
+            self.__send_retry_buffer()
+            if not self.retry_buffer:
+                self.__retry_delay_secs = None
+                return
+
+            self.__retry_delay_secs = min(self.__retry_delay_secs * 2, _RETRY_MAX_DELAY_SECS)
+            delay_secs = self.__retry_delay_secs
+
+        _get_retry_thread().submit(self._retry, delay_secs)
+
+    def __send_retry_buffer(self):
+        """
+        Sends the log messages in 'self.retry_buffer' and removes the
+        ones that were sent successfully.
+        """
 
         nb_sent = self._append_logs(self.retry_buffer)
         if nb_sent:
             self.retry_buffer = self.retry_buffer[nb_sent:]
-        if close_called and self.retry_buffer:
-            # Request to the buildlogger server returned an error, so use the fallback logger to
-            # avoid losing the log messages entirely.
-            for (_, message) in self.retry_buffer:
-                # TODO: construct an LogRecord instance equivalent to the one passed to the
-                #       process_record() method if we ever decide to log the time when the
-                #       LogRecord was created, e.g. using %(asctime)s in
-                #       _fallback_buildlogger_handler().
-                BUILDLOGGER_FALLBACK.info(message)
-            self.retry_buffer = []
+
+    def __limit_retry_buffer(self):
+        """
+        Writes the oldest log messages in 'self.retry_buffer' to the
+        fallback logger if it holds too many of them.
+        """
+
+        num_excess = len(self.retry_buffer) - _MAX_RETRY_LINES
+        if num_excess > 0:
+            self.__log_to_fallback(self.retry_buffer[:num_excess])
+            self.retry_buffer = self.retry_buffer[num_excess:]
+
+    @staticmethod
+    def __log_to_fallback(log_lines):
+        """
+        Writes 'log_lines' to the fallback logger.
+        """
+
+        for (_, message) in log_lines:
+            # TODO: construct an LogRecord instance equivalent to the one passed to the
+            #       process_record() method if we ever decide to log the time when the
+            #       LogRecord was created, e.g. using %(asctime)s in
+            #       _fallback_buildlogger_handler().
+            BUILDLOGGER_FALLBACK.info(message)
+
+    def close(self):
+        """
+        Closes the buildlogger handler.
+        """
+
+        handlers.BufferedHandler.close(self)
+        self.http_handler.close()
 
 
 class BuildloggerTestHandler(_BaseBuildloggerHandler):
@@ -238,10 +348,11 @@ class BuildloggerTestHandler(_BaseBuildloggerHandler):
         Closes the buildlogger handler.
         """
 
-        _BaseBuildloggerHandler.close(self)
+        handlers.BufferedHandler.close(self)
 
         # TODO: pass the test status (success/failure) to this method
         self._finish_test()
+        self.http_handler.close()
 
 
 class BuildloggerGlobalHandler(_BaseBuildloggerHandler):
@@ -256,6 +367,57 @@ class BuildloggerGlobalHandler(_BaseBuildloggerHandler):
         _BaseBuildloggerHandler.__init__(self, build_config, endpoint, capacity, interval_secs)
 
 
+class _RetryThread(threading.Thread):
+    """
+    Resends the log messages the buildlogger server didn't accept in the
+    background so that the flush thread isn't blocked on it.
+    """
+
+    def __init__(self):
+        """
+        Initializes the retry thread.
+        """
+
+        threading.Thread.__init__(self, name="BuildloggerRetryThread")
+        # Do not wait to resend the logs if interrupted by the user.
+        self.daemon = True
+
+        self.__scheduler = scheduler.Scheduler(time.time)
+
+    def run(self):
+        """
+        Continuously runs the scheduled retries.
+        """
+
+        while True:
+            self.__scheduler.run_pending()
+            self.__scheduler.wait()
+
+    def submit(self, action, delay):
+        """
+        Schedules 'action' for 'delay' seconds from now.
+        """
+
+        self.__scheduler.enter(delay, _log_on_error(action))
+
+
+_RETRY_THREAD = None
+_RETRY_THREAD_LOCK = threading.Lock()
+
+
+def _get_retry_thread():
+    """
+    Returns the retry thread, starting it if necessary.
+    """
+
+    global _RETRY_THREAD
+    with _RETRY_THREAD_LOCK:
+        if _RETRY_THREAD is None:
+            _RETRY_THREAD = _RetryThread()
+            _RETRY_THREAD.start()
+        return _RETRY_THREAD
+
+
 class BuildloggerServer(object):
     """A remote server to which build logs can be sent.
 
@@ -294,11 +456,14 @@ class BuildloggerServer(object):
             username=username,
             password=password)
 
-        response = handler.post(CREATE_BUILD_ENDPOINT, data={
-            "builder": builder,
-            "buildnum": build_num,
-            "task_id": _config.EVERGREEN_TASK_ID,
-        })
+        try:
+            response = handler.post(CREATE_BUILD_ENDPOINT, data={
+                "builder": builder,
+                "buildnum": build_num,
+                "task_id": _config.EVERGREEN_TASK_ID,
+            })
+        finally:
+            handler.close()
 
         return response["id"]
 
@@ -313,12 +478,15 @@ class BuildloggerServer(object):
             password=self.config["password"])
 
         endpoint = CREATE_TEST_ENDPOINT % {"build_id": build_id}
-        response = handler.post(endpoint, data={
-            "test_filename": test_filename,
-            "command": test_command,
-            "phase": self.config.get("build_phase", "unknown"),
-            "task_id": _config.EVERGREEN_TASK_ID,
-        })
+        try:
+            response = handler.post(endpoint, data={
+                "test_filename": test_filename,
+                "command": test_command,
+                "phase": self.config.get("build_phase", "unknown"),
+                "task_id": _config.EVERGREEN_TASK_ID,
+            })
+        finally:
+            handler.close()
 
         return response["id"]
 
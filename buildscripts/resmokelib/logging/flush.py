@@ -56,7 +56,9 @@ def flush_after(handler, delay):
     if not isinstance(handler, logging.Handler):
         raise TypeError("handler must be a logging.Handler instance")
 
-    return _FLUSH_THREAD.submit(handler.flush, delay)
+    # Flushes of the same handler are coalesced so that the handler isn't flushed more often than
+    # the earliest of the requested times.
+    return _FLUSH_THREAD.submit(handler.flush, delay, key=handler)
 
 
 def close_later(handler):
@@ -104,20 +106,7 @@ class _FlushThread(threading.Thread):
         # Do not wait to flush the logs if interrupted by the user.
         self.daemon = True
 
-        def interruptible_sleep(secs):
-            """
-            Waits up to 'secs' seconds or for the
-            'self.__schedule_updated' event to be set.
-            """
-
-            # Setting 'self.__schedule_updated' in submit() will cause the scheduler to return early
-            # from its 'delayfunc'. This makes it so that if a new event is scheduled with
-            # delay=0.0, then it will be performed immediately.
-            self.__schedule_updated.wait(secs)
-            self.__schedule_updated.clear()
-
-        self.__scheduler = scheduler.Scheduler(time.time, interruptible_sleep)
-        self.__schedule_updated = threading.Event()
+        self.__scheduler = scheduler.Scheduler(time.time)
         self.__should_stop = threading.Event()
         self.__terminated = threading.Event()
 
@@ -127,22 +116,17 @@ class _FlushThread(threading.Thread):
         """
 
         try:
-            while not (self.__should_stop.is_set() and self.__scheduler.empty()):
-                self.__scheduler.run()
-
-                # Reset 'self.__schedule_updated' here since we've processed all the events
-                # thought to exist. Either the queue won't be empty or 'self.__schedule_updated'
-                # will get set again later.
-                self.__schedule_updated.clear()
-
-                if self.__should_stop.is_set():
-                    # If the main thread has asked the flush thread to stop, then either run
-                    # whatever has been added to the queue since the scheduler last ran, or exit.
-                    continue
-
-                # Otherwise, wait for a new event to be scheduled.
-                if self.__scheduler.empty():
-                    self.__schedule_updated.wait()
+            while True:
+                self.__scheduler.run_pending()
+
+                # If the main thread has asked the flush thread to stop, then exit once there is
+                # nothing left in the queue.
+                if self.__should_stop.is_set() and self.__scheduler.empty():
+                    break
+
+                # Otherwise, wait for the next event to be due. Submitting an event that is due
+                # sooner or signaling the thread to stop ends the wait early.
+                self.__scheduler.wait()
         finally:
             self.__terminated.set()
 
@@ -156,7 +140,7 @@ class _FlushThread(threading.Thread):
 
         # Signal the flush thread to wake up as though there is more work for it to do since we're
         # trying to get it to exit.
-        self.__schedule_updated.set()
+        self.__scheduler.interrupt()
 
     def await_shutdown(self):
         """
@@ -168,7 +152,7 @@ class _FlushThread(threading.Thread):
             # Need to pass a timeout to wait() so that KeyboardInterrupt exceptions are propagated.
             self.__terminated.wait(_FlushThread._TIMEOUT)
 
-    def submit(self, action, delay):
+    def submit(self, action, delay, key=None):
         """
         Schedules 'action' for 'delay' seconds from now.
 
@@ -176,9 +160,7 @@ class _FlushThread(threading.Thread):
         cancelation (see cancel_event()).
         """
 
-        event = self.__scheduler.enter(delay, 0, action, ())
-        self.__schedule_updated.set()
-        return event
+        return self.__scheduler.enter(delay, action, key=key)
 
     def cancel_event(self, event):
         """
@@ -188,10 +170,5 @@ class _FlushThread(threading.Thread):
         false otherwise.
         """
 
-        try:
-            self.__scheduler.cancel(event)
-            return True
-        except ValueError:
-            # We may have failed to cancel the event due to it already being in progress.
-            pass
-        return False
+        # We may fail to cancel the event due to it already being in progress.
+        return self.__scheduler.cancel(event)
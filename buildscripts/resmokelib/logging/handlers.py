@@ -10,6 +10,7 @@ import logging
 import sys
 import threading
 import warnings
+import zlib
 
 import requests
 import requests.auth
@@ -25,6 +26,13 @@ from .. import utils
 
 _TIMEOUT_SECS = 10
 
+# Request bodies smaller than this many bytes are not worth compressing.
+_MIN_COMPRESS_SIZE = 1024
+
+# Statuses of the response to a compressed request body that mean the server doesn't accept its
+# encoding, rather than that the request failed for another reason.
+_ENCODING_REJECTED_STATUSES = (400, 415)
+
 
 class BufferedHandler(logging.Handler):
     """
@@ -96,10 +104,29 @@ class BufferedHandler(logging.Handler):
         immediately process the buffer.
         """
 
-        processed_record = self.process_record(record)
+        self.__append([self.process_record(record)])
+
+    def handle_batch(self, records):
+        """
+        Emits each of 'records' that passes the handler's filters.
+
+        Equivalent to calling handle() for each record, except that the
+        buffer is only locked once for the whole batch.
+        """
+
+        self.__append([self.process_record(record) for record in records if self.filter(record)])
+
+    def __append(self, processed_records):
+        """
+        Appends 'processed_records' to the buffer and schedules the
+        flush() event if needed.
+        """
+
+        if not processed_records:
+            return
 
         with self.__emit_lock:
-            self.__emit_buffer.append(processed_record)
+            self.__emit_buffer.extend(processed_records)
 
             if self.__flush_event is None:
                 # Now that we've added our first record to the buffer, we schedule a call to flush()
@@ -174,15 +201,31 @@ class HTTPHandler(object):
     A class which sends data to a web server using POST requests.
     """
 
-    def __init__(self, url_root, username, password):
+    def __init__(self, url_root, username, password, compress=False):
         """
         Initializes the handler with the necessary authentication
         credentials.
+
+        If 'compress' is true, then the request bodies are sent
+        gzip-compressed until the server rejects the encoding of a
+        compressed request body and accepts the same body uncompressed.
         """
 
         self.auth_handler = requests.auth.HTTPBasicAuth(username, password)
 
         self.url_root = url_root
+        self.compress = compress
+
+        # Reuse the connections to the server across requests rather than opening a new one for each
+        # POST request.
+        self.session = requests.Session()
+        self.session.auth = self.auth_handler
+
+    def close(self):
+        """
+        Closes the connections to the server.
+        """
+        self.session.close()
 
     def _make_url(self, endpoint):
         return "%s/%s/" % (self.url_root.rstrip("/"), endpoint.strip("/"))
@@ -204,6 +247,38 @@ class HTTPHandler(object):
 
         url = self._make_url(endpoint)
 
+        if self.compress and len(data) >= _MIN_COMPRESS_SIZE:
+            compressed_headers = headers.copy()
+            compressed_headers["Content-Encoding"] = "gzip"
+            response = self._post(url, _gzip(data), compressed_headers, timeout_secs)
+            if response.status_code in _ENCODING_REJECTED_STATUSES:
+                # The server may not support compressed request bodies, so try again without
+                # compression. Other errors are left to the caller to retry later.
+                response = self._post(url, data, headers, timeout_secs)
+                if response.ok:
+                    # The server doesn't accept compressed request bodies, so stop sending them.
+                    self.compress = False
+        else:
+            response = self._post(url, data, headers, timeout_secs)
+
+        response.raise_for_status()
+
+        if not response.encoding:
+            response.encoding = "utf-8"
+
+        headers = response.headers
+
+        if headers["Content-Type"].startswith("application/json"):
+            return response.json()
+
+        return response.text
+
+    def _post(self, url, data, headers, timeout_secs):
+        """
+        Sends a POST request with the encoded 'data' and returns the
+        response.
+        """
+
         # Versions of Python earlier than 2.7.9 do not support certificate validation. So we
         # disable certificate validation for older Python versions.
         should_validate_certificates = sys.version_info >= (2, 7, 9)
@@ -225,21 +300,18 @@ class HTTPHandler(object):
                     # that defined InsecureRequestWarning.
                     pass
 
-            response = requests.post(url,
+            return self.session.post(url,
                                      data=data,
                                      headers=headers,
                                      timeout=timeout_secs,
-                                     auth=self.auth_handler,
                                      verify=should_validate_certificates)
 
-        response.raise_for_status()
-
-        if not response.encoding:
-            response.encoding = "utf-8"
-
-        headers = response.headers
 
-        if headers["Content-Type"].startswith("application/json"):
-            return response.json()
+def _gzip(data):
+    """
+    Returns the bytestring 'data' compressed in the gzip format.
+    """
 
-        return response.text
+    # Adding 16 to the window size makes zlib write a gzip header and trailer.
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
@@ -8,6 +8,7 @@ import logging
 import sys
 
 from . import buildlogger
+from . import flush
 from . import formatters
 
 _DEFAULT_FORMAT = "[%(name)s] %(message)s"
@@ -267,6 +268,19 @@ class FixtureLogger(BaseLogger):
                 # falling back to stderr.
                 self.addHandler(_fallback_buildlogger_handler())
 
+    def set_build_id(self, build_id):
+        """Send the logs of the fixture and its nodes to the build with the given build id.
+
+        The nodes' loggers propagate their records to this logger, so the output of processes
+        that are already running follows the new build too.
+        """
+        for handler in list(self.handlers):
+            self.removeHandler(handler)
+            # We ignore the cancellation token returned by close_later() since we always want the
+            # logs of the previous build to eventually get flushed.
+            flush.close_later(handler)
+        self._add_build_logger_handler(build_id)
+
     def new_fixture_node_logger(self, node_name):
         """Create a new child FixtureNodeLogger."""
         return FixtureNodeLogger(self.fixture_class, self.job_num, node_name, self)
@@ -9,6 +9,7 @@ import os.path
 
 import datetime
 import optparse
+import re
 
 from . import config as _config
 from . import utils
@@ -70,6 +71,12 @@ def parse_command_line():
     parser.add_option("--dbtest", dest="dbtest_executable", metavar="PATH",
                       help="The path to the dbtest executable for resmoke to use.")
 
+    parser.add_option("--defaultTestDurationSecs", type="float",
+                      dest="default_test_duration_secs", metavar="SECS",
+                      help=("The estimated duration of a test that doesn't appear in any of the"
+                            " --historicReportFile files. Defaults to %d seconds."
+                            % _config.DEFAULTS["default_test_duration_secs"]))
+
     parser.add_option("--excludeWithAnyTags", action="append", dest="exclude_with_any_tags",
                       metavar="TAG1,TAG2",
                       help=("Comma separated list of tags. Any jstest that contains any of the"
@@ -78,12 +85,25 @@ def parse_command_line():
     parser.add_option("-f", "--findSuites", action="store_true", dest="find_suites",
                       help="Lists the names of the suites that will execute the specified tests.")
 
+    parser.add_option("--historicReportFile", action="append", dest="historic_report_files",
+                      metavar="REPORT",
+                      help=("A report.json file from a previous execution. When specified, the"
+                            " tests with the longest recorded durations are run first so that"
+                            " the jobs finish at around the same time. Can be specified multiple"
+                            " times."))
+
     parser.add_option("--includeWithAnyTags", action="append", dest="include_with_any_tags",
                       metavar="TAG1,TAG2",
                       help=("Comma separated list of tags. For the jstest portion of the suite(s),"
                             " only tests which have at least one of the specified tags will be"
                             " run."))
 
+    parser.add_option("--mergeReports", action="store_true", dest="merge_reports",
+                      help=("Instead of running any tests, combines the report.json files"
+                            " specified as positional arguments into the file specified by"
+                            " --reportFile. Used to merge the reports of the --shard executions"
+                            " of a suite."))
+
     parser.add_option("-n", action="store_const", const="tests", dest="dry_run",
                       help="Outputs the tests that would be run.")
 
@@ -121,6 +141,12 @@ def parse_command_line():
                             " started by resmoke.py. The argument is specified as bracketed YAML -"
                             " i.e. JSON with support for single quoted and unquoted keys."))
 
+    parser.add_option("--multiplexProcessOutput", action="store_true",
+                      dest="multiplex_process_output",
+                      help=("Reads the output of every process started by resmoke.py from a single"
+                            " thread instead of starting two threads for each process. Only"
+                            " supported on platforms that support select.poll()."))
+
     parser.add_option("--nojournal", action="store_true", dest="no_journal",
                       help="Disables journaling for all mongod's.")
 
@@ -138,6 +164,14 @@ def parse_command_line():
                       help=("Enables or disables preallocation of journal files for all mongod"
                             " processes. Defaults to %default."))
 
+    parser.add_option("--progressFile", dest="progress_file", metavar="PATH",
+                      help=("Writes a JSON file every %d seconds with the number of tests each job"
+                            " has run, what each job is currently doing, the time spent in tests,"
+                            " hooks, and fixture setup and teardown, the number of tests waiting"
+                            " to run, and the rate at which output is read from the processes."
+                            " The final progress is also included in the --reportFile."
+                            % _config.PROGRESS_FILE_INTERVAL_SECS))
+
     parser.add_option("--shellConnString", dest="shell_conn_string",
                       metavar="CONN_STRING",
                       help="Overrides the default fixture and connect to an existing MongoDB"
@@ -163,6 +197,12 @@ def parse_command_line():
     parser.add_option("--reportFile", dest="report_file", metavar="REPORT",
                       help="Writes a JSON file with test status and timing information.")
 
+    parser.add_option("--reuseFixtures", action="store_true", dest="reuse_fixtures",
+                      help=("Keeps the fixtures of each suite running after its tests finish so"
+                            " that a later suite with the same fixture configuration can reuse"
+                            " them instead of starting new ones. The non-internal databases are"
+                            " dropped before a fixture is reused."))
+
     parser.add_option("--seed", type="int", dest="seed", metavar="SEED",
                       help=("Seed for the random number generator. Useful in combination with the"
                             " --shuffle option for producing a consistent test execution order."))
@@ -181,6 +221,14 @@ def parse_command_line():
                       choices=("commands", "compatibility", "legacy"), metavar="WRITE_MODE",
                       help="The write mode used by the mongo shell.")
 
+    parser.add_option("--shard", dest="shard", metavar="INDEX/COUNT",
+                      help=("Partitions the tests of each suite into COUNT groups with about the"
+                            " same total duration, as estimated from the --historicReportFile"
+                            " and --testHistoryFile files, and only runs the group at INDEX,"
+                            " where 0 <= INDEX < COUNT. The partitions are the same for the same"
+                            " tests and durations, so each of the COUNT hosts running a suite"
+                            " can be given a different INDEX."))
+
     parser.add_option("--shuffle", action="store_const", const="on", dest="shuffle",
                       help=("Randomizes the order in which tests are executed. This is equivalent"
                             " to specifying --shuffleMode=on."))
@@ -206,6 +254,17 @@ def parse_command_line():
     parser.add_option("--tagFile", dest="tag_file", metavar="OPTIONS",
                       help="A YAML file that associates tests and tags.")
 
+    parser.add_option("--testHistory", action="store_const",
+                      const=_config.DEFAULT_TEST_HISTORY_FILE, dest="test_history_file",
+                      help=("Records the status and duration of each test in a local history"
+                            " database. This is equivalent to specifying"
+                            " --testHistoryFile=%s." % _config.DEFAULT_TEST_HISTORY_FILE))
+
+    parser.add_option("--testHistoryFile", dest="test_history_file", metavar="PATH",
+                      help=("A SQLite database that the status and duration of each test is"
+                            " appended to. The recorded durations are also used to run the tests"
+                            " with the longest durations first."))
+
     parser.add_option("--wiredTigerCollectionConfigString", dest="wt_coll_config", metavar="CONFIG",
                       help="Sets the WiredTiger collection configuration setting for all mongod's.")
 
@@ -304,6 +363,7 @@ def parse_command_line():
                         dry_run="off",
                         find_suites=False,
                         list_suites=False,
+                        merge_reports=False,
                         suite_files="with_server",
                         prealloc_journal="off",
                         shuffle="auto",
@@ -329,6 +389,18 @@ def validate_options(parser, options, args):
                      " test(s) under those suite configuration(s)"
                      .format(options.executor_file, " ".join(args)))
 
+    if options.shard is not None:
+        try:
+            _parse_shard(options.shard)
+        except ValueError as err:
+            parser.error(str(err))
+
+    if options.merge_reports:
+        if options.report_file is None:
+            parser.error("--mergeReports requires --reportFile to be specified")
+        if not args:
+            parser.error("--mergeReports requires at least one report file to be specified")
+
 
 def validate_benchmark_options():
     """
@@ -375,9 +447,11 @@ def update_config_vars(values):
     _config.BUILDLOGGER_URL = config.pop("buildlogger_url")
     _config.DBPATH_PREFIX = _expand_user(config.pop("dbpath_prefix"))
     _config.DBTEST_EXECUTABLE = _expand_user(config.pop("dbtest_executable"))
+    _config.DEFAULT_TEST_DURATION_SECS = config.pop("default_test_duration_secs")
     _config.DRY_RUN = config.pop("dry_run")
     _config.EXCLUDE_WITH_ANY_TAGS = _tags_from_list(config.pop("exclude_with_any_tags"))
     _config.FAIL_FAST = not config.pop("continue_on_failure")
+    _config.HISTORIC_REPORT_FILES = _expand_user_list(config.pop("historic_report_files"))
     _config.INCLUDE_WITH_ANY_TAGS = _tags_from_list(config.pop("include_with_any_tags"))
     _config.JOBS = config.pop("jobs")
     _config.MONGO_EXECUTABLE = _expand_user(config.pop("mongo_executable"))
@@ -385,21 +459,26 @@ def update_config_vars(values):
     _config.MONGOD_SET_PARAMETERS = config.pop("mongod_set_parameters")
     _config.MONGOS_EXECUTABLE = _expand_user(config.pop("mongos_executable"))
     _config.MONGOS_SET_PARAMETERS = config.pop("mongos_set_parameters")
+    _config.MULTIPLEX_PROCESS_OUTPUT = config.pop("multiplex_process_output")
     _config.NO_JOURNAL = config.pop("no_journal")
     _config.NO_PREALLOC_JOURNAL = config.pop("prealloc_journal") == "off"
     _config.NUM_CLIENTS_PER_FIXTURE = config.pop("num_clients_per_fixture")
     _config.PERF_REPORT_FILE = config.pop("perf_report_file")
+    _config.PROGRESS_FILE = _expand_user(config.pop("progress_file"))
     _config.RANDOM_SEED = config.pop("seed")
     _config.REPEAT = config.pop("repeat")
     _config.REPORT_FAILURE_STATUS = config.pop("report_failure_status")
     _config.REPORT_FILE = config.pop("report_file")
+    _config.REUSE_FIXTURES = config.pop("reuse_fixtures")
     _config.SERVICE_EXECUTOR = config.pop("service_executor")
+    _config.SHARD = _parse_shard(config.pop("shard"))
     _config.SHELL_READ_MODE = config.pop("shell_read_mode")
     _config.SHELL_WRITE_MODE = config.pop("shell_write_mode")
     _config.STAGGER_JOBS = config.pop("stagger_jobs") == "on"
     _config.STORAGE_ENGINE = config.pop("storage_engine")
     _config.STORAGE_ENGINE_CACHE_SIZE = config.pop("storage_engine_cache_size_gb")
     _config.TAG_FILE = config.pop("tag_file")
+    _config.TEST_HISTORY_FILE = _expand_user(config.pop("test_history_file"))
     _config.TRANSPORT_LAYER = config.pop("transport_layer")
 
     # Evergreen options.
@@ -450,6 +529,25 @@ def update_config_vars(values):
         raise optparse.OptionValueError("Unknown option(s): %s" % (config.keys()))
 
 
+def _parse_shard(shard):
+    """
+    Converts a string of the form "INDEX/COUNT" to an (index, count)
+    pair. Returns None if 'shard' is None.
+    """
+
+    if shard is None:
+        return None
+
+    match = re.match(r"^(\d+)/(\d+)$", shard.strip())
+    if match is None:
+        raise ValueError("--shard must be of the form INDEX/COUNT, but got '%s'" % (shard))
+
+    (index, count) = (int(match.group(1)), int(match.group(2)))
+    if not 0 <= index < count:
+        raise ValueError("--shard=%d/%d must have 0 <= INDEX < COUNT" % (index, count))
+    return (index, count)
+
+
 def _get_logging_config(pathname):
     """
     Attempts to read a YAML configuration from 'pathname' that describes
@@ -477,6 +575,16 @@ def _expand_user(pathname):
     return os.path.expanduser(pathname)
 
 
+def _expand_user_list(pathnames):
+    """
+    Wrapper around _expand_user() to apply it to each element of a list, and do nothing when
+    given None.
+    """
+    if pathnames is None:
+        return None
+    return [_expand_user(pathname) for pathname in pathnames]
+
+
 def _tags_from_list(tags_list):
     """
     Returns the list of tags from a list of tag parameter values.
@@ -4,9 +4,11 @@ Manages interactions with the report.json file.
 
 from __future__ import absolute_import
 
+import errno
 import json
 
 from . import config
+from .testing import progress as _progress
 from .testing import report as _report
 
 
@@ -23,6 +25,42 @@ def write(suites):
     for suite in suites:
         reports.extend(suite.get_reports())
 
-    combined_report_dict = _report.TestReport.combine(*reports).as_dict()
+    combined_report = _report.TestReport.combine(*reports)
     with open(config.REPORT_FILE, "w") as fp:
-        json.dump(combined_report_dict, fp)
+        combined_report.write_json(fp, extra_fields={"progress": _progress.TRACKER.snapshot()})
+
+
+def combine_files(report_files, ignore_missing=False):
+    """
+    Returns a (TestReport, number of files read) pair combining the
+    report.json files in 'report_files'.
+
+    If 'ignore_missing' is true, then files that don't exist are
+    skipped. Otherwise an IOError is raised for them.
+    """
+
+    reports = []
+    for report_file in report_files:
+        try:
+            with open(report_file) as fp:
+                reports.append(_report.TestReport.from_dict(json.load(fp)))
+        except IOError as err:
+            # errno.ENOENT is the error code for "No such file or directory".
+            if ignore_missing and err.errno == errno.ENOENT:
+                continue
+            raise
+
+    return (_report.TestReport.combine(*reports), len(reports))
+
+
+def exit_code(test_report):
+    """
+    Returns the exit code for a combined report:
+        0:  All tests have status "pass", or only non-dynamic tests have status "silentfail".
+        31: At least one test has status "fail" or "timeout".
+    """
+
+    for test_info in test_report.test_infos:
+        if test_info.status in ("fail", "timeout"):
+            return 31
+    return 0
@@ -19,7 +19,7 @@ from . import config
 from . import errors
 from . import utils
 from .utils import globstar
-from .utils import jscomment
+from .utils import tagcache
 
 
 ########################
@@ -32,6 +32,13 @@ class TestFileExplorer(object):
 
     The file related code has been confined to this class for testability.
     """
+    def __init__(self):
+        """Initializes the TestFileExplorer."""
+        # The glob patterns are expanded once per process since the same patterns are used by
+        # several suites.
+        self._glob_cache = {}
+        self._tag_cache = None
+
     def is_glob_pattern(self, path):
         """Indicates if the provided path is a glob pattern.
 
@@ -46,7 +53,9 @@ class TestFileExplorer(object):
         Returns:
             A list of paths as a list(str).
         """
-        return globstar.iglob(pattern)
+        if pattern not in self._glob_cache:
+            self._glob_cache[pattern] = list(globstar.iglob(pattern))
+        return list(self._glob_cache[pattern])
 
     def jstest_tags(self, file_path):
         """Extracts the tags from a JavaScript test file.
@@ -55,7 +64,20 @@ class TestFileExplorer(object):
         Returns:
             A list of tags.
         """
-        return jscomment.get_tags(file_path)
+        return self._get_tag_cache().get_tags(file_path)
+
+    def load_jstest_tags(self, file_paths):
+        """Extracts the tags from several JavaScript test files in parallel.
+
+        The tags are cached in config.TAG_CACHE_FILE so that they are only extracted again when
+        a test file is modified.
+        """
+        self._get_tag_cache().update(file_paths)
+
+    def _get_tag_cache(self):
+        if self._tag_cache is None:
+            self._tag_cache = tagcache.TagCache(config.TAG_CACHE_FILE)
+        return self._tag_cache
 
     def read_root_file(self, root_file_path):
         """Reads a file containing the list of root test files.
@@ -231,11 +253,14 @@ class _TestList(object):
         """
         tests = []
         excluded = []
+        seen = set()
         for test in self._roots:
+            if test in seen:
+                continue
+            seen.add(test)
             if test in self._filtered:
-                if test not in tests:
-                    tests.append(test)
-            elif test not in excluded:
+                tests.append(test)
+            else:
                 excluded.append(test)
         return tests, excluded
 
@@ -427,12 +452,17 @@ class _Selector(object):
             test_list.exclude_files(selector_config.exclude_files)
         # 4. Apply the tag filters.
         if selector_config.tags_expression:
+            self.load_tags(test_list.get_tests()[0])
             test_list.match_tag_expression(selector_config.tags_expression, self.get_tags)
         # 5. Apply the include files last with force=True to take precedence over the tags.
         if self._tests_are_files and selector_config.include_files:
             test_list.include_files(selector_config.include_files, force=True)
         return test_list.get_tests()
 
+    def load_tags(self, test_files):
+        """Prepares the tags of the given test files before they are retrieved individually."""
+        pass
+
     def get_tags(self, test_file):
         """Retrieves the tags associated with the give test file."""
         return []
@@ -457,6 +487,9 @@ class _JSTestSelector(_Selector):
         _Selector.__init__(self, test_file_explorer)
         self._tags = self._test_file_explorer.parse_tag_file("js_test")
 
+    def load_tags(self, test_files):
+        self._test_file_explorer.load_jstest_tags(test_files)
+
     def get_tags(self, test_file):
         file_tags = self._test_file_explorer.jstest_tags(test_file)
         if test_file in self._tags:
@@ -0,0 +1,135 @@
+"""
+Historical test durations used to schedule the longest tests first.
+"""
+
+from __future__ import absolute_import
+
+import heapq
+import json
+
+
+class TestDurations(object):
+    """
+    Estimates how long each test takes to run based on the elapsed
+    times recorded by previous executions.
+    """
+
+    def __init__(self, default_duration_secs):
+        """
+        Initializes the TestDurations with the estimate to use for tests
+        that have no recorded history.
+        """
+
+        self.default_duration_secs = default_duration_secs
+
+        # Map of test id to a [total elapsed time, number of executions] pair.
+        self._history = {}
+
+    @classmethod
+    def from_report_files(cls, report_files, default_duration_secs):
+        """
+        Returns a TestDurations instance populated with the elapsed
+        times from the report.json files in 'report_files'.
+        """
+
+        durations = cls(default_duration_secs)
+        for report_file in report_files:
+            with open(report_file) as fp:
+                durations.add_report_dict(json.load(fp))
+        return durations
+
+    def add(self, test_id, elapsed_secs):
+        """
+        Records that 'test_id' ran in 'elapsed_secs' seconds.
+        """
+
+        entry = self._history.setdefault(test_id, [0.0, 0])
+        entry[0] += elapsed_secs
+        entry[1] += 1
+
+    def add_report_dict(self, report_dict):
+        """
+        Records the elapsed times from a report.json dictionary. Only
+        tests that passed are considered since a failed test may have
+        exited early.
+        """
+
+        for result in report_dict.get("results", []):
+            if result.get("status") != "pass":
+                continue
+
+            # By convention, dynamic tests are named "<basename>:<hook name>". They are never
+            # scheduled from the test queue, so we don't bother tracking them.
+            if ":" in result["test_file"]:
+                continue
+
+            self.add(result["test_file"], result["elapsed"])
+
+    def add_report(self, report):
+        """
+        Records the elapsed times from a TestReport instance. This lets
+        later repetitions of a suite use the timings from earlier ones.
+        """
+
+        for test_info in report.get_successful():
+            if test_info.dynamic or test_info.end_time is None:
+                continue
+            self.add(test_info.test_id, test_info.end_time - test_info.start_time)
+
+    def add_history(self, history_store, suite):
+        """
+        Records the median duration of each test run by 'suite' in a
+        history.TestHistoryStore instance.
+        """
+
+        for (test_id, median_secs) in history_store.all_percentiles(suite, 50).iteritems():
+            self.add(test_id, median_secs)
+
+    def estimate(self, test_id):
+        """
+        Returns the expected number of seconds 'test_id' takes to run.
+        """
+
+        if test_id not in self._history:
+            return self.default_duration_secs
+
+        (total_secs, num_runs) = self._history[test_id]
+        return total_secs / num_runs
+
+    def sort_longest_first(self, test_cases):
+        """
+        Returns a list of 'test_cases' ordered from the longest to the
+        shortest estimated duration.
+
+        The sort is stable, so tests with the same estimate keep their
+        relative (possibly shuffled) order.
+        """
+
+        return sorted(test_cases, key=lambda test_case: self.estimate(test_case.id()),
+                      reverse=True)
+
+    def partition(self, test_ids, num_partitions):
+        """
+        Splits 'test_ids' into 'num_partitions' lists whose total
+        estimated durations are as close to each other as possible.
+
+        The tests are assigned longest first to the partition with the
+        smallest total so far. Ties are broken by the test id and the
+        partition index, so the same inputs always produce the same
+        partitions regardless of the order of 'test_ids'. Each partition
+        keeps the relative order the tests had in 'test_ids'.
+        """
+
+        estimates = [self.estimate(test_id) for test_id in test_ids]
+        longest_first = sorted(xrange(len(test_ids)),
+                               key=lambda i: (-estimates[i], test_ids[i], i))
+
+        # Heap of (total estimated seconds, partition index) pairs.
+        totals = [(0.0, index) for index in xrange(num_partitions)]
+        assignments = [[] for _ in xrange(num_partitions)]
+        for i in longest_first:
+            (total_secs, index) = heapq.heappop(totals)
+            assignments[index].append(i)
+            heapq.heappush(totals, (total_secs + estimates[i], index))
+
+        return [[test_ids[i] for i in sorted(indices)] for indices in assignments]
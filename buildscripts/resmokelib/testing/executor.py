@@ -4,19 +4,24 @@ Driver of the test execution framework.
 
 from __future__ import absolute_import
 
+import functools
 import threading
 import time
 
+from . import durations as _durations
 from . import fixtures
+from . import history as _history
 from . import hook_test_archival as archival
 from . import hooks as _hooks
 from . import job as _job
+from . import progress
 from . import report as _report
 from . import testcases
 from .. import config as _config
 from .. import errors
 from .. import utils
 from ..core import network
+from ..utils import parallel
 from ..utils import queue as _queue
 
 
@@ -37,9 +42,14 @@ class TestSuiteExecutor(object):
                  fixture=None,
                  hooks=None,
                  archive_instance=None,
-                 archive=None):
+                 archive=None,
+                 fixture_pool=None):
         """
         Initializes the TestSuiteExecutor with the test suite to run.
+
+        If 'fixture_pool' is specified, then running fixtures are taken
+        from it instead of being started, and are returned to it instead
+        of being torn down.
         """
         self.logger = exec_logger
 
@@ -60,6 +70,25 @@ class TestSuiteExecutor(object):
 
         self._suite = suite
 
+        self._fixture_pool = fixture_pool
+        self._fixture_key = None
+        if self._fixture_pool is not None:
+            self._fixture_key = self._fixture_pool.make_key(self.fixture_config)
+        # Jobs whose fixture was taken from 'self._fixture_pool' and is therefore already running.
+        self._reused_jobs = set()
+
+        self._history_store = None
+        if _config.TEST_HISTORY_FILE is not None:
+            self._history_store = _history.TestHistoryStore(_config.TEST_HISTORY_FILE)
+
+        self._durations = None
+        if _config.HISTORIC_REPORT_FILES or self._history_store is not None:
+            self._durations = _durations.TestDurations.from_report_files(
+                utils.default_if_none(_config.HISTORIC_REPORT_FILES, []),
+                _config.DEFAULT_TEST_DURATION_SECS)
+            if self._history_store is not None:
+                self._durations.add_history(self._history_store, self._suite.get_name())
+
         # Only start as many jobs as we need. Note this means that the number of jobs we run may
         # not actually be _config.JOBS or self._suite.options.num_jobs.
         jobs_to_start = self._suite.options.num_jobs
@@ -101,12 +130,18 @@ class TestSuiteExecutor(object):
                 # Have the Job threads destroy their fixture during the final repetition after they
                 # finish running their last test. This avoids having a large number of processes
                 # still running if an Evergreen task were to time out from a hang/deadlock being
-                # triggered.
-                teardown_flag = threading.Event() if num_repeats == 1 else None
+                # triggered. Fixtures that may be reused by a later suite are kept running.
+                teardown_flag = None
+                if num_repeats == 1 and self._fixture_pool is None:
+                    teardown_flag = threading.Event()
                 (report, interrupted) = self._run_tests(test_queue, teardown_flag)
 
                 self._suite.record_test_end(report)
 
+                if self._durations is not None:
+                    # Use the timings of this execution to order the tests of the next one.
+                    self._durations.add_report(report)
+
                 # If the user triggered a KeyboardInterrupt, then we should stop.
                 if interrupted:
                     raise errors.UserInterrupt("Received interrupt from user")
@@ -129,8 +164,10 @@ class TestSuiteExecutor(object):
                 num_repeats -= 1
         finally:
             if not teardown_flag:
-                if not self._teardown_fixtures():
+                if not self._teardown_fixtures(reuse=return_code == 0):
                     return_code = 2
+            if self._history_store is not None:
+                self._history_store.close()
             self._suite.return_code = return_code
 
     def _setup_fixtures(self):
@@ -143,22 +180,65 @@ class TestSuiteExecutor(object):
         # current test suite.
         network.PortAllocator.reset()
 
-        for job in self._jobs:
-            try:
-                job.fixture.setup()
-            except:
-                self.logger.exception(
-                    "Encountered an error while setting up %s.", job.fixture)
-                return False
+        # Fixtures taken from the pool are already running and hold on to the ports they were
+        # assigned, so only the other fixtures need to be set up.
+        jobs_to_setup = [job for job in self._jobs if job.fixture.job_num not in self._reused_jobs]
+
+        if _config.STAGGER_JOBS:
+            # SERVER-24729 Avoid the I/O load of starting the fixtures of many jobs at once. Only
+            # the calls to setup() are staggered; the fixtures then become available concurrently.
+            for job in jobs_to_setup:
+                if not self._start_fixture(job.fixture):
+                    return False
+            await_funcs = [functools.partial(self._await_fixture, job.fixture)
+                           for job in jobs_to_setup]
+            return all(parallel.run_concurrently(await_funcs, name="FixtureAwaitReady"))
+
+        # Each job's fixture is set up on its own thread since a replica set or sharded cluster can
+        # take a while to become available.
+        setup_funcs = [functools.partial(self._setup_fixture, job.fixture) for job in jobs_to_setup]
+        return all(parallel.run_concurrently(setup_funcs, name="FixtureSetup"))
+
+    def _setup_fixture(self, fixture):
+        """
+        Sets up 'fixture' and waits for it to become available.
 
-        # Once they have all been started, wait for them to become available.
-        for job in self._jobs:
-            try:
-                job.fixture.await_ready()
-            except:
-                self.logger.exception(
-                    "Encountered an error while waiting for %s to be ready", job.fixture)
-                return False
+        Returns true if the fixture is ready to run tests against, and
+        false otherwise.
+        """
+
+        return self._start_fixture(fixture) and self._await_fixture(fixture)
+
+    def _start_fixture(self, fixture):
+        """
+        Calls setup() on 'fixture' without waiting for it to become
+        available.
+
+        Returns true if the fixture was started, and false otherwise.
+        """
+
+        try:
+            with progress.TRACKER.timing_fixture(fixture.job_num, "setup"):
+                fixture.setup()
+        except:
+            self.logger.exception("Encountered an error while setting up %s.", fixture)
+            return False
+        return True
+
+    def _await_fixture(self, fixture):
+        """
+        Waits for 'fixture' to become available.
+
+        Returns true if the fixture is ready to run tests against, and
+        false otherwise.
+        """
+
+        try:
+            with progress.TRACKER.timing_fixture(fixture.job_num, "await_ready"):
+                fixture.await_ready()
+        except:
+            self.logger.exception("Encountered an error while waiting for %s to be ready", fixture)
+            return False
         return True
 
     def _run_tests(self, test_queue, teardown_flag):
@@ -174,6 +254,7 @@ class TestSuiteExecutor(object):
         threads = []
         interrupt_flag = threading.Event()
         user_interrupted = False
+        progress.TRACKER.set_test_queue(test_queue, num_sentinels=len(self._jobs))
         try:
             # Run each Job instance in its own thread.
             for job in self._jobs:
@@ -203,6 +284,7 @@ class TestSuiteExecutor(object):
             for t in threads:
                 t.join()
 
+        progress.TRACKER.set_test_queue(None)
         reports = [job.report for job in self._jobs]
         combined_report = _report.TestReport.combine(*reports)
 
@@ -211,17 +293,30 @@ class TestSuiteExecutor(object):
         # StopExecution exception in TestSuiteExecutor.run() if the user triggered the interrupt.
         return (combined_report, user_interrupted)
 
-    def _teardown_fixtures(self):
+    def _teardown_fixtures(self, reuse=False):
         """
         Tears down all of the fixtures.
 
-        Returns true if all fixtures were torn down successfully, and
-        false otherwise.
+        If 'reuse' is true and there is a fixture pool, then the
+        fixtures are returned to the pool instead.
+
+        Returns true if all fixtures were torn down (or pooled)
+        successfully, and false otherwise.
         """
+        if self._fixture_pool is not None:
+            success = True
+            for job in self._jobs:
+                if reuse:
+                    success = self._fixture_pool.release(self._fixture_key, job.fixture) and success
+                else:
+                    success = self._fixture_pool.discard(job.fixture) and success
+            return success
+
         success = True
         for job in self._jobs:
             try:
-                job.fixture.teardown(finished=True)
+                with progress.TRACKER.timing_fixture(job.fixture.job_num, "teardown"):
+                    job.fixture.teardown(finished=True)
             except errors.ServerFailure as err:
                 self.logger.warn("Teardown of %s was not successful: %s", job.fixture, err)
                 success = False
@@ -232,9 +327,17 @@ class TestSuiteExecutor(object):
 
     def _make_fixture(self, job_num, job_logger):
         """
-        Creates a fixture for a job.
+        Creates a fixture for a job, or reuses a running one from the
+        fixture pool.
         """
 
+        if self._fixture_pool is not None:
+            fixture = self._fixture_pool.acquire(self._fixture_key, job_num,
+                                                 build_id=job_logger.build_id)
+            if fixture is not None:
+                self._reused_jobs.add(job_num)
+                return fixture
+
         fixture_config = {}
         fixture_class = fixtures.NOOP_FIXTURE_CLASS
 
@@ -276,7 +379,13 @@ class TestSuiteExecutor(object):
         fixture = self._make_fixture(job_num, job_logger)
         hooks = self._make_hooks(job_num, fixture)
 
-        report = _report.TestReport(job_logger, self._suite.options)
+        history_recorder = None
+        if self._history_store is not None:
+            history_recorder = _history.TestHistoryRecorder(
+                self._history_store, self._suite.get_name(), fixture.__class__.__name__,
+                _config.EVERGREEN_VARIANT_NAME)
+
+        report = _report.TestReport(job_logger, self._suite.options, history_recorder)
 
         return _job.Job(job_logger,
                         fixture,
@@ -291,16 +400,27 @@ class TestSuiteExecutor(object):
 
         Use a multi-consumer queue instead of a unittest.TestSuite so
         that the test cases can be dispatched to multiple threads.
+
+        If historical test durations are available, then the test cases
+        are queued longest first so that a long test doesn't keep one
+        job busy after all the others have gone idle.
         """
 
         test_queue_logger = self.logger.new_testqueue_logger(self._suite.test_kind)
-        # Put all the test cases in a queue.
-        queue = _queue.Queue()
+        test_cases = []
         for test_name in self._suite.tests:
             test_case = testcases.make_test_case(self._suite.test_kind,
                                                  test_queue_logger,
                                                  test_name,
                                                  **self.test_config)
+            test_cases.append(test_case)
+
+        if self._durations is not None:
+            test_cases = self._durations.sort_longest_first(test_cases)
+
+        # Put all the test cases in a queue.
+        queue = _queue.Queue()
+        for test_case in test_cases:
             queue.put(test_case)
 
         # Add sentinel value for each job to indicate when there are no more items to process.
@@ -19,6 +19,9 @@ from ...utils import registry
 
 _FIXTURES = {}
 
+# Databases that are never dropped when cleaning a fixture.
+_INTERNAL_DATABASES = frozenset(("admin", "config", "local"))
+
 
 def make_fixture(class_name, *args, **kwargs):
     """
@@ -148,6 +151,49 @@ class Fixture(object):
                                    read_preference=read_preference,
                                    **kwargs)
 
+    def clean(self, client=None):
+        """
+        Drops all of the non-internal databases so that more tests can
+        be run against the fixture without restarting it.
+
+        If 'client' is specified, then it is used to connect to the
+        fixture instead of a new pymongo.MongoClient.
+
+        Raises:
+            errors.ServerFailure: If a database couldn't be dropped.
+        """
+
+        owns_client = client is None
+        if owns_client:
+            client = self.mongo_client()
+
+        cmd_obj = {"dropDatabase": 1}
+        write_concern = self.get_clean_write_concern()
+        if write_concern is not None:
+            cmd_obj["writeConcern"] = write_concern
+
+        try:
+            for db_name in client.database_names():
+                if db_name in _INTERNAL_DATABASES:
+                    continue
+
+                self.logger.info("Dropping database %s to clean the fixture.", db_name)
+                try:
+                    client[db_name].command(cmd_obj)
+                except pymongo.errors.OperationFailure as err:
+                    raise errors.ServerFailure("Failed to drop database {}: {}".format(db_name,
+                                                                                      err))
+        finally:
+            if owns_client:
+                client.close()
+
+    def get_clean_write_concern(self):
+        """
+        Returns the write concern clean() drops the databases with, or
+        None if the fixture doesn't replicate its data.
+        """
+        return None
+
     def __str__(self):
         return "%s (Job #%d)" % (self.__class__.__name__, self.job_num)
 
@@ -178,6 +224,11 @@ class ReplFixture(Fixture):
         """
         raise NotImplementedError("get_secondaries must be implemented by ReplFixture subclasses")
 
+    def get_clean_write_concern(self):
+        # Wait for the drops to replicate so that secondaries don't still have the data when the
+        # next test starts.
+        return {"w": "majority"}
+
     def retry_until_wtimeout(self, insert_fn):
         """
         Given a callback function representing an insert operation on
@@ -228,6 +279,9 @@ class NoOpFixture(Fixture):
     def get_driver_connection_url(self):
         return None
 
+    def clean(self, client=None):
+        pass
+
 
 class FixtureTeardownHandler(object):
     """A helper class used to teardown nodes inside a cluster and keep track of errors."""
@@ -0,0 +1,165 @@
+"""
+Pool of running fixtures that can be reused by later test suites.
+"""
+
+from __future__ import absolute_import
+
+import json
+import threading
+
+from . import interface
+from .. import progress
+from ... import errors
+
+
+class FixturePool(object):
+    """
+    Holds on to the fixtures of a test suite that finished running so
+    that the next test suite with the same fixture configuration can
+    use them without paying their startup cost again.
+
+    Each job has its own range of ports, so at most one fixture is
+    pooled for each job number.
+    """
+
+    def __init__(self, logger):
+        """
+        Initializes the FixturePool.
+        """
+
+        self.logger = logger
+
+        self._lock = threading.Lock()
+
+        # Map of job number to a (fixture key, fixture) pair.
+        self._fixtures = {}
+
+    @staticmethod
+    def make_key(fixture_config):
+        """
+        Returns a normalized representation of 'fixture_config' such
+        that two fixtures with equal keys are interchangeable.
+        """
+
+        return json.dumps(fixture_config, sort_keys=True, default=str)
+
+    def acquire(self, key, job_num, build_id=None):
+        """
+        Returns a running fixture for 'job_num' with the configuration
+        identified by 'key', or None if there isn't one.
+
+        The logs of the fixture are sent to the buildlogger build
+        'build_id' of the job that acquires it.
+
+        A pooled fixture for 'job_num' with a different configuration is
+        torn down since the new fixture needs its ports.
+        """
+
+        with self._lock:
+            entry = self._fixtures.pop(job_num, None)
+
+        if entry is None:
+            return None
+
+        (pooled_key, fixture) = entry
+        if pooled_key != key:
+            self._teardown(fixture)
+            return None
+
+        if not fixture.is_running():
+            self.logger.info("Not reusing %s because it is no longer running.", fixture)
+            self._teardown(fixture)
+            return None
+
+        fixture.logger.set_build_id(build_id)
+
+        try:
+            self.logger.info("Cleaning %s so it can be reused...", fixture)
+            with progress.TRACKER.timing_fixture(fixture.job_num, "clean"):
+                fixture.clean()
+        except:
+            self.logger.exception("Encountered an error while cleaning %s, so it won't be reused.",
+                                  fixture)
+            self._teardown(fixture)
+            return None
+
+        self.logger.info("Reusing %s.", fixture)
+        return fixture
+
+    def release(self, key, fixture):
+        """
+        Adds 'fixture' to the pool, or tears it down if it can't be
+        reused.
+
+        Returns true if the fixture was pooled or torn down
+        successfully, and false otherwise.
+        """
+
+        if not fixture.is_running() or not _is_reusable(fixture):
+            return self._teardown(fixture)
+
+        with self._lock:
+            previous = self._fixtures.pop(fixture.job_num, None)
+            self._fixtures[fixture.job_num] = (key, fixture)
+
+        if previous is not None and previous[1] is not fixture:
+            return self._teardown(previous[1])
+        return True
+
+    def discard(self, fixture):
+        """
+        Tears down 'fixture' without adding it to the pool.
+
+        Returns true if the fixture was torn down successfully, and
+        false otherwise.
+        """
+
+        with self._lock:
+            entry = self._fixtures.get(fixture.job_num)
+            if entry is not None and entry[1] is fixture:
+                del self._fixtures[fixture.job_num]
+
+        return self._teardown(fixture)
+
+    def teardown_all(self):
+        """
+        Tears down all of the pooled fixtures.
+
+        Returns true if all fixtures were torn down successfully, and
+        false otherwise.
+        """
+
+        with self._lock:
+            fixtures = [fixture for (_, fixture) in self._fixtures.itervalues()]
+            self._fixtures.clear()
+
+        success = True
+        for fixture in fixtures:
+            success = self._teardown(fixture) and success
+        return success
+
+    def _teardown(self, fixture):
+        """
+        Tears down 'fixture', logging rather than raising any errors.
+        """
+
+        try:
+            with progress.TRACKER.timing_fixture(fixture.job_num, "teardown"):
+                fixture.teardown(finished=True)
+        except errors.ServerFailure as err:
+            self.logger.warn("Teardown of %s was not successful: %s", fixture, err)
+            return False
+        except:
+            self.logger.exception("Encountered an error while tearing down %s.", fixture)
+            return False
+        return True
+
+
+def _is_reusable(fixture):
+    """
+    Returns true if 'fixture' starts servers that are worth keeping
+    around for another test suite.
+    """
+
+    return not isinstance(fixture, interface.NoOpFixture)
+
@@ -4,7 +4,9 @@ Replica set fixture for executing JSTests against.
 
 from __future__ import absolute_import
 
+import functools
 import os.path
+import re
 import time
 
 import pymongo
@@ -15,6 +17,16 @@ from . import standalone
 from ... import config
 from ... import errors
 from ... import utils
+from ...utils import parallel
+
+
+# Lines logged by a replica set member when it changes its state.
+_PRIMARY_TRANSITION_PATTERN = re.compile(r"transition to PRIMARY", re.IGNORECASE)
+_SECONDARY_TRANSITION_PATTERN = re.compile(r"transition to SECONDARY", re.IGNORECASE)
+
+# Bounds on the delay between checks of a replica set member's state.
+_STATE_BACKOFF_INITIAL_SECS = 0.05
+_STATE_BACKOFF_MAX_SECS = 1.0
 
 
 class ReplicaSetFixture(interface.ReplFixture):
@@ -92,17 +104,19 @@ class ReplicaSetFixture(interface.ReplFixture):
         for node in self.nodes:
             node.setup()
 
+        nodes_to_await = []
         if self.start_initial_sync_node:
             if not self.initial_sync_node:
                 self.initial_sync_node_idx = len(self.nodes)
                 self.initial_sync_node = self._new_mongod(self.initial_sync_node_idx,
                                                           self.replset_name)
             self.initial_sync_node.setup()
-            self.initial_sync_node.await_ready()
+            nodes_to_await.append(self.initial_sync_node)
 
         # We need only to wait to connect to the first node of the replica set because we first
         # initiate it as a single node replica set.
-        self.nodes[0].await_ready()
+        nodes_to_await.append(self.nodes[0])
+        parallel.run_concurrently([node.await_ready for node in nodes_to_await])
 
         # Initiate the replica set.
         members = []
@@ -169,8 +183,7 @@ class ReplicaSetFixture(interface.ReplFixture):
         if self.nodes[1:]:
             # Wait to connect to each of the secondaries before running the replSetReconfig
             # command.
-            for node in self.nodes[1:]:
-                node.await_ready()
+            parallel.run_concurrently([node.await_ready for node in self.nodes[1:]])
             config["version"] = 2
             config["members"] = members
             self.logger.info("Issuing replSetReconfig command: %s", config)
@@ -213,12 +226,13 @@ class ReplicaSetFixture(interface.ReplFixture):
         # self.all_nodes_electable is True.
         primary = self.nodes[0]
         client = primary.mongo_client()
-        while True:
-            self.logger.info("Waiting for primary on port %d to be elected.", primary.port)
-            is_master = client.admin.command("isMaster")["ismaster"]
-            if is_master:
-                break
-            time.sleep(0.1)  # Wait a little bit before trying again.
+        # Register the watch before checking the node's state so the transition can't be missed.
+        watch = primary.watch_output(_PRIMARY_TRANSITION_PATTERN)
+        self.logger.info("Waiting for primary on port %d to be elected.", primary.port)
+        try:
+            _wait_for_state(watch, lambda: client.admin.command("isMaster")["ismaster"])
+        finally:
+            primary.unwatch_output(watch)
         self.logger.info("Primary on port %d successfully elected.", primary.port)
 
     def _await_secondaries(self):
@@ -229,16 +243,18 @@ class ReplicaSetFixture(interface.ReplFixture):
         if self.initial_sync_node:
             secondaries.append(self.initial_sync_node)
 
-        for secondary in secondaries:
-            client = secondary.mongo_client(read_preference=pymongo.ReadPreference.SECONDARY)
-            while True:
-                self.logger.info("Waiting for secondary on port %d to become available.",
-                                 secondary.port)
-                is_secondary = client.admin.command("isMaster")["secondary"]
-                if is_secondary:
-                    break
-                time.sleep(0.1)  # Wait a little bit before trying again.
-            self.logger.info("Secondary on port %d is now available.", secondary.port)
+        parallel.run_concurrently(
+            [functools.partial(self._await_secondary, secondary) for secondary in secondaries])
+
+    def _await_secondary(self, secondary):
+        client = secondary.mongo_client(read_preference=pymongo.ReadPreference.SECONDARY)
+        watch = secondary.watch_output(_SECONDARY_TRANSITION_PATTERN)
+        self.logger.info("Waiting for secondary on port %d to become available.", secondary.port)
+        try:
+            _wait_for_state(watch, lambda: client.admin.command("isMaster")["secondary"])
+        finally:
+            secondary.unwatch_output(watch)
+        self.logger.info("Secondary on port %d is now available.", secondary.port)
 
     def _do_teardown(self):
         self.logger.info("Stopping all members of the replica set...")
@@ -315,6 +331,14 @@ class ReplicaSetFixture(interface.ReplFixture):
     def get_initial_sync_node(self):
         return self.initial_sync_node
 
+    def get_clean_write_concern(self):
+        # A majority of the nodes isn't enough since a test could read the data that hasn't been
+        # dropped yet from any of the secondaries.
+        num_nodes = len(self.nodes)
+        if self.initial_sync_node:
+            num_nodes += 1
+        return {"w": num_nodes}
+
     def _new_mongod(self, index, replset_name):
         """
         Returns a standalone.MongoDFixture configured to be used as a
@@ -374,3 +398,21 @@ class ReplicaSetFixture(interface.ReplFixture):
             # We return a direct connection to the expected pimary when only the first node is
             # electable because we want the client to error out if a stepdown occurs.
             return self.nodes[0].get_driver_connection_url()
+
+
+def _wait_for_state(watch, check):
+    """
+    Waits until the no-argument function 'check' returns true.
+
+    Between calls to 'check', waits for the pipe.OutputWatch 'watch' to
+    be set by the node logging its state transition, backing off
+    exponentially in case the transition is never logged.
+    """
+
+    backoff_secs = _STATE_BACKOFF_INITIAL_SECS
+    while not check():
+        if watch is not None and not watch.is_set():
+            watch.wait(backoff_secs)
+        else:
+            time.sleep(backoff_secs)
+        backoff_secs = min(backoff_secs * 2, _STATE_BACKOFF_MAX_SECS)
@@ -5,10 +5,6 @@ Sharded cluster fixture for executing JSTests against.
 from __future__ import absolute_import
 
 import os.path
-import time
-
-import pymongo
-import pymongo.errors
 
 from . import interface
 from . import standalone
@@ -17,6 +13,7 @@ from ... import config
 from ... import core
 from ... import errors
 from ... import utils
+from ...utils import parallel
 from ...utils import registry
 
 
@@ -80,7 +77,6 @@ class ShardedClusterFixture(interface.Fixture):
         if self.separate_configsvr:
             if self.configsvr is None:
                 self.configsvr = self._new_configsvr()
-            self.configsvr.setup()
 
         if not self.shards:
             for i in xrange(self.num_shards):
@@ -94,18 +90,13 @@ class ShardedClusterFixture(interface.Fixture):
                     raise TypeError("num_rs_nodes_per_shard must be an integer or None")
                 self.shards.append(shard)
 
-        # Start up each of the shards
-        for shard in self.shards:
-            shard.setup()
+        # Start up the config server and each of the shards concurrently since setting up a replica
+        # set waits for its members to become available.
+        parallel.run_concurrently([fixture.setup for fixture in self._get_mongod_fixtures()])
 
     def await_ready(self):
-        # Wait for the config server
-        if self.configsvr is not None:
-            self.configsvr.await_ready()
-
-        # Wait for each of the shards
-        for shard in self.shards:
-            shard.await_ready()
+        # Wait for the config server and each of the shards
+        parallel.run_concurrently([fixture.await_ready for fixture in self._get_mongod_fixtures()])
 
         if self.mongos is None:
             self.mongos = self._new_mongos()
@@ -178,6 +169,19 @@ class ShardedClusterFixture(interface.Fixture):
                 all(shard.is_running() for shard in self.shards) and
                 self.mongos is not None and self.mongos.is_running())
 
+    def _get_mongod_fixtures(self):
+        """
+        Returns the config server (if there is a separate one) and the
+        shards of the sharded cluster.
+        """
+        if self.configsvr is None:
+            return list(self.shards)
+        return [self.configsvr] + self.shards
+
+    def get_clean_write_concern(self):
+        # The mongos passes the write concern on to the config servers and the shards.
+        return {"w": "majority"}
+
     def get_internal_connection_string(self):
         if self.mongos is None:
             raise ValueError("Must call setup() before calling get_internal_connection_string()")
@@ -336,6 +340,7 @@ class _MongoSFixture(interface.Fixture):
 
         self.mongos = None
         self.port = None
+        self._ready_watch = None
 
     def setup(self):
         if "port" not in self.mongos_options:
@@ -345,6 +350,10 @@ class _MongoSFixture(interface.Fixture):
         mongos = core.programs.mongos_program(self.logger,
                                               executable=self.mongos_executable,
                                               **self.mongos_options)
+        self._ready_watch = None
+        if standalone.logs_to_stdout(self.mongos_options):
+            self._ready_watch = mongos.watch_output(standalone.READY_LOG_PATTERN)
+
         try:
             self.logger.info("Starting mongos on port %d...\n%s", self.port, mongos.as_command())
             mongos.start()
@@ -357,35 +366,7 @@ class _MongoSFixture(interface.Fixture):
         self.mongos = mongos
 
     def await_ready(self):
-        deadline = time.time() + standalone.MongoDFixture.AWAIT_READY_TIMEOUT_SECS
-
-        # Wait until the mongos is accepting connections. The retry logic is necessary to support
-        # versions of PyMongo <3.0 that immediately raise a ConnectionFailure if a connection cannot
-        # be established.
-        while True:
-            # Check whether the mongos exited for some reason.
-            exit_code = self.mongos.poll()
-            if exit_code is not None:
-                raise errors.ServerFailure("Could not connect to mongos on port {}, process ended"
-                                           " unexpectedly with code {}.".format(self.port,
-                                                                                exit_code))
-
-            try:
-                # Use a shorter connection timeout to more closely satisfy the requested deadline.
-                client = self.mongo_client(timeout_millis=500)
-                client.admin.command("ping")
-                break
-            except pymongo.errors.ConnectionFailure:
-                remaining = deadline - time.time()
-                if remaining <= 0.0:
-                    raise errors.ServerFailure(
-                        "Failed to connect to mongos on port {} after {} seconds".format(
-                            self.port, standalone.MongoDFixture.AWAIT_READY_TIMEOUT_SECS))
-
-                self.logger.info("Waiting to connect to mongos on port %d.", self.port)
-                time.sleep(0.1)  # Wait a little bit before trying again.
-
-        self.logger.info("Successfully contacted the mongos on port %d.", self.port)
+        standalone.await_process_ready(self, self.mongos, self._ready_watch, "mongos")
 
     def _do_teardown(self):
         if self.mongos is None:
@@ -6,6 +6,7 @@ from __future__ import absolute_import
 
 import os
 import os.path
+import re
 import shutil
 import time
 
@@ -19,6 +20,14 @@ from ... import errors
 from ... import utils
 
 
+# Line logged by mongod and mongos once they are listening for client connections.
+READY_LOG_PATTERN = re.compile(r"waiting for connections", re.IGNORECASE)
+
+# Bounds on the delay between attempts to connect to a process that hasn't logged that it is ready.
+_CONNECT_BACKOFF_INITIAL_SECS = 0.05
+_CONNECT_BACKOFF_MAX_SECS = 2.0
+
+
 class MongoDFixture(interface.Fixture):
     """
     Fixture which provides JSTests with a standalone mongod to run
@@ -55,6 +64,7 @@ class MongoDFixture(interface.Fixture):
 
         self.mongod = None
         self.port = None
+        self._ready_watch = None
 
     def setup(self):
         if not self.preserve_dbpath:
@@ -73,6 +83,10 @@ class MongoDFixture(interface.Fixture):
         mongod = core.programs.mongod_program(self.logger,
                                               executable=self.mongod_executable,
                                               **self.mongod_options)
+        self._ready_watch = None
+        if logs_to_stdout(self.mongod_options):
+            self._ready_watch = mongod.watch_output(READY_LOG_PATTERN)
+
         try:
             self.logger.info("Starting mongod on port %d...\n%s", self.port, mongod.as_command())
             mongod.start()
@@ -85,35 +99,25 @@ class MongoDFixture(interface.Fixture):
         self.mongod = mongod
 
     def await_ready(self):
-        deadline = time.time() + MongoDFixture.AWAIT_READY_TIMEOUT_SECS
-
-        # Wait until the mongod is accepting connections. The retry logic is necessary to support
-        # versions of PyMongo <3.0 that immediately raise a ConnectionFailure if a connection cannot
-        # be established.
-        while True:
-            # Check whether the mongod exited for some reason.
-            exit_code = self.mongod.poll()
-            if exit_code is not None:
-                raise errors.ServerFailure("Could not connect to mongod on port {}, process ended"
-                                           " unexpectedly with code {}.".format(
-                                               self.port, exit_code))
-
-            try:
-                # Use a shorter connection timeout to more closely satisfy the requested deadline.
-                client = self.mongo_client(timeout_millis=500)
-                client.admin.command("ping")
-                break
-            except pymongo.errors.ConnectionFailure:
-                remaining = deadline - time.time()
-                if remaining <= 0.0:
-                    raise errors.ServerFailure(
-                        "Failed to connect to mongod on port {} after {} seconds".format(
-                            self.port, MongoDFixture.AWAIT_READY_TIMEOUT_SECS))
-
-                self.logger.info("Waiting to connect to mongod on port %d.", self.port)
-                time.sleep(0.1)  # Wait a little bit before trying again.
-
-        self.logger.info("Successfully contacted the mongod on port %d.", self.port)
+        await_process_ready(self, self.mongod, self._ready_watch, "mongod")
+
+    def watch_output(self, pattern):
+        """
+        Returns a pipe.OutputWatch that is set once the mongod logs a
+        line matching 'pattern', or None if the mongod doesn't log to
+        stdout.
+        """
+        if self.mongod is None or not logs_to_stdout(self.mongod_options):
+            return None
+        return self.mongod.watch_output(pattern)
+
+    def unwatch_output(self, watch):
+        """
+        Stops checking the output of the mongod for 'watch', which was
+        returned by watch_output().
+        """
+        if self.mongod is not None and watch is not None:
+            self.mongod.unwatch_output(watch)
 
     def _do_teardown(self):
         if self.mongod is None:
@@ -155,3 +159,74 @@ class MongoDFixture(interface.Fixture):
 
     def get_driver_connection_url(self):
         return "mongodb://" + self.get_internal_connection_string()
+
+
+def logs_to_stdout(process_options):
+    """
+    Returns true if a mongod or mongos started with 'process_options'
+    writes its log messages to stdout.
+    """
+    return "logpath" not in process_options and "syslog" not in process_options
+
+
+def await_process_ready(fixture, process, ready_watch, process_name):
+    """
+    Waits until 'process', which was started by 'fixture', is accepting
+    connections.
+
+    Rather than repeatedly trying to connect to the process, waits for
+    'ready_watch' to be set by the process logging that it is listening
+    for connections. The readiness is then confirmed using a single
+    client, which is retried with exponential backoff in case the log
+    message was never seen.
+    """
+
+    timeout_secs = MongoDFixture.AWAIT_READY_TIMEOUT_SECS
+    deadline = time.time() + timeout_secs
+
+    def check_exited():
+        exit_code = process.poll()
+        if exit_code is not None:
+            raise errors.ServerFailure("Could not connect to {} on port {}, process ended"
+                                       " unexpectedly with code {}.".format(
+                                           process_name, fixture.port, exit_code))
+
+    if ready_watch is not None:
+        fixture.logger.info("Waiting for %s on port %d to accept connections.", process_name,
+                            fixture.port)
+        try:
+            # The timeout only bounds how long it takes to notice that the process has exited.
+            while not ready_watch.wait(1.0):
+                check_exited()
+                if time.time() >= deadline:
+                    break
+        finally:
+            process.unwatch_output(ready_watch)
+
+    # Use a shorter connection timeout to more closely satisfy the requested deadline. The retry
+    # logic is necessary to support versions of PyMongo <3.0 that immediately raise a
+    # ConnectionFailure if a connection cannot be established.
+    client = fixture.mongo_client(timeout_millis=500)
+    backoff_secs = _CONNECT_BACKOFF_INITIAL_SECS
+    try:
+        while True:
+            check_exited()
+
+            try:
+                client.admin.command("ping")
+                break
+            except pymongo.errors.ConnectionFailure:
+                remaining = deadline - time.time()
+                if remaining <= 0.0:
+                    raise errors.ServerFailure(
+                        "Failed to connect to {} on port {} after {} seconds".format(
+                            process_name, fixture.port, timeout_secs))
+
+                fixture.logger.info("Waiting to connect to %s on port %d.", process_name,
+                                    fixture.port)
+                time.sleep(min(backoff_secs, remaining))
+                backoff_secs = min(backoff_secs * 2, _CONNECT_BACKOFF_MAX_SECS)
+    finally:
+        client.close()
+
+    fixture.logger.info("Successfully contacted the %s on port %d.", process_name, fixture.port)
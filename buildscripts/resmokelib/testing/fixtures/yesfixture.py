@@ -5,6 +5,7 @@ Fixture for generating lots of log messages.
 from __future__ import absolute_import
 
 import signal
+import time
 
 from . import interface
 from ...core import programs
@@ -20,8 +21,10 @@ class YesFixture(interface.Fixture):
 
         self.__processes = [None] * num_instances
         self.__message = "y" * message_length
+        self.__start_time = None
 
     def setup(self):
+        self.__start_time = time.time()
         for (i, process) in enumerate(self.__processes):
             process = self._make_process(i)
 
@@ -62,7 +65,25 @@ class YesFixture(interface.Fixture):
         if running_at_start:
             self.logger.info("Successfully stopped all yes processes.")
 
+        self._log_throughput()
+
         return success
 
+    def _log_throughput(self):
+        """
+        Logs the rate at which the output of the yes processes was
+        consumed, for measuring the performance of the logging pipeline.
+        """
+
+        if self.__start_time is None:
+            return
+
+        elapsed_secs = time.time() - self.__start_time
+        num_lines = sum(process.num_output_lines() for process in self.__processes
+                        if process is not None)
+        self.logger.info("Logged %d lines from %d yes process(es) in %0.2f seconds for job %d"
+                         " (%0.0f lines/sec).", num_lines, len(self.__processes), elapsed_secs,
+                         self.job_num, num_lines / elapsed_secs if elapsed_secs > 0 else 0.0)
+
     def is_running(self):
         return all(process is not None and process.poll() is None for process in self.__processes)
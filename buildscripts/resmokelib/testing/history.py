@@ -0,0 +1,172 @@
+"""
+Persistent local store of test durations recorded by previous executions of resmoke.py.
+"""
+
+from __future__ import absolute_import
+
+import os
+import os.path
+import sqlite3
+import threading
+
+
+class TestHistoryStore(object):
+    """
+    A SQLite database of the status and duration of every test that was
+    run. It is safe to use from multiple Job threads.
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS test_history ("
+        " test_id TEXT NOT NULL,"
+        " suite TEXT,"
+        " fixture_class TEXT,"
+        " variant TEXT,"
+        " status TEXT,"
+        " start_time REAL,"
+        " duration REAL NOT NULL)",
+        # Allows percentile queries to seek directly to the n-th fastest execution of a test in a
+        # suite. The same test may take much longer in one suite than in another, e.g. when it runs
+        # against a sharded cluster rather than a standalone mongod.
+        "DROP INDEX IF EXISTS test_history_by_test",
+        "CREATE INDEX IF NOT EXISTS test_history_by_suite"
+        " ON test_history (suite, test_id, status, duration)",
+    )
+
+    def __init__(self, pathname):
+        """
+        Opens or creates the history database at 'pathname'.
+        """
+
+        dirname = os.path.dirname(pathname)
+        if dirname and not os.path.isdir(dirname):
+            try:
+                os.makedirs(dirname)
+            except os.error:
+                # Directory was created by another process.
+                pass
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(pathname, check_same_thread=False)
+        with self._lock, self._conn:
+            for statement in TestHistoryStore._SCHEMA:
+                self._conn.execute(statement)
+
+    def record(self, test_id, suite, fixture_class, variant, status, start_time, duration):
+        """
+        Appends the execution of a test to the history.
+        """
+
+        with self._lock:
+            if self._conn is None:
+                # A Job thread may still be finishing a test after the user interrupted the suite
+                # and the store was closed.
+                return
+
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO test_history"
+                    " (test_id, suite, fixture_class, variant, status, start_time, duration)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (test_id, suite, fixture_class, variant, status, start_time, duration))
+
+    def percentile(self, test_id, suite, percentile, status="pass"):
+        """
+        Returns the duration of 'test_id' in 'suite' at the given
+        percentile (e.g. 50 or 95) using the nearest-rank method, or None
+        if the test has no recorded executions with the given status.
+        """
+
+        with self._lock:
+            (count, ) = self._conn.execute(
+                "SELECT COUNT(*) FROM test_history WHERE suite = ? AND test_id = ? AND status = ?",
+                (suite, test_id, status)).fetchone()
+            if count == 0:
+                return None
+
+            row = self._conn.execute(
+                "SELECT duration FROM test_history WHERE suite = ? AND test_id = ? AND status = ?"
+                " ORDER BY duration LIMIT 1 OFFSET ?",
+                (suite, test_id, status, _nearest_rank(count, percentile))).fetchone()
+            return row[0]
+
+    def all_percentiles(self, suite, percentile, status="pass"):
+        """
+        Returns a dictionary mapping each test id that was run by 'suite'
+        to its duration in that suite at the given percentile.
+        """
+
+        percentiles = {}
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT test_id, duration FROM test_history WHERE suite = ? AND status = ?"
+                " ORDER BY test_id, duration", (suite, status))
+
+            test_id = None
+            test_durations = []
+            for (row_test_id, duration) in cursor:
+                if row_test_id != test_id:
+                    if test_durations:
+                        percentiles[test_id] = percentile_of_sorted(test_durations, percentile)
+                    test_id = row_test_id
+                    test_durations = []
+                test_durations.append(duration)
+
+            if test_durations:
+                percentiles[test_id] = percentile_of_sorted(test_durations, percentile)
+
+        return percentiles
+
+    def close(self):
+        """
+        Closes the underlying database connection.
+        """
+
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class TestHistoryRecorder(object):
+    """
+    Records the tests run by a TestReport along with the suite and
+    fixture they were run against.
+    """
+
+    def __init__(self, store, suite, fixture_class, variant):
+        """
+        Initializes the TestHistoryRecorder.
+        """
+
+        self._store = store
+        self.suite = suite
+        self.fixture_class = fixture_class
+        self.variant = variant
+
+    def record(self, test_info):
+        """
+        Appends the status and duration of 'test_info' to the history.
+        """
+
+        self._store.record(test_info.test_id, self.suite, self.fixture_class, self.variant,
+                           test_info.status, test_info.start_time,
+                           test_info.end_time - test_info.start_time)
+
+
+def _nearest_rank(count, percentile):
+    """
+    Returns the 0-based index of the given percentile in a sorted list
+    of 'count' elements.
+    """
+
+    rank = int(-(-count * percentile // 100))  # Ceiling division.
+    return min(max(rank, 1), count) - 1
+
+
+def percentile_of_sorted(values, percentile):
+    """
+    Returns the element at the given percentile of the sorted list 'values'.
+    """
+
+    return values[_nearest_rank(len(values), percentile)]
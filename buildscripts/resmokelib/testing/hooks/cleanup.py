@@ -6,18 +6,39 @@ from __future__ import absolute_import
 
 import os
 
+import pymongo.errors
+
+from . import datacheck
 from . import interface
+from ... import errors
+from ...utils import parallel
+
+
+# Every failpoint is also listed as a server parameter with this prefix, whose value holds the
+# failpoint's current mode and data.
+_FAILPOINT_PREFIX = "failpoint."
+
+# The values of the 'mode' field of a failpoint that can be restored.
+_FAILPOINT_MODES = {0: "off", 1: "alwaysOn"}
+
+# Fields of the getParameter response that aren't server parameters.
+_NON_PARAMETER_FIELDS = frozenset(("ok", "operationTime", "$clusterTime", "$gleStats"))
 
 
 class CleanEveryN(interface.Hook):
     """
     Restarts the fixture after it has ran 'n' tests.
     On mongod-related fixtures, this will clear the dbpath.
+
+    If 'soft_clean' is true, then the fixture is cleaned in place
+    instead: the non-internal databases are dropped, and the failpoints
+    and server parameters are reset to what they were when the suite
+    started. The fixture is only restarted if that fails.
     """
 
     DEFAULT_N = 20
 
-    def __init__(self, hook_logger, fixture, n=DEFAULT_N):
+    def __init__(self, hook_logger, fixture, n=DEFAULT_N, soft_clean=False):
         description = "CleanEveryN (restarts the fixture after running `n` tests)"
         interface.Hook.__init__(self, hook_logger, fixture, description)
 
@@ -26,9 +47,31 @@ class CleanEveryN(interface.Hook):
             self.logger.info("ASAN_OPTIONS environment variable set to detect leaks, so restarting"
                              " the fixture after each test instead of after every %d.", n)
             n = 1
+            # Leaks are only reported when the processes exit.
+            soft_clean = False
 
         self.n = n
         self.tests_run = 0
+        self.soft_clean = soft_clean
+
+        self._client_pool = datacheck.ClientPool() if soft_clean else None
+        # Map of host to the server parameters it had when the suite started.
+        self._server_parameters = None
+
+    def before_suite(self, test_report):
+        if not self.soft_clean:
+            return
+
+        try:
+            self._server_parameters = self._get_server_parameters()
+        except pymongo.errors.PyMongoError:
+            self.logger.exception("Failed to get the server parameters of %s, so it will be"
+                                  " restarted instead of cleaned in place.", self.fixture)
+            self._server_parameters = None
+
+    def after_suite(self, test_report):
+        if self._client_pool is not None:
+            self._client_pool.close()
 
     def after_test(self, test, test_report):
         self.tests_run += 1
@@ -40,14 +83,100 @@ class CleanEveryN(interface.Hook):
         hook_test_case.configure(self.fixture)
         hook_test_case.run_dynamic_test(test_report)
 
+    def clean_in_place(self, logger):
+        """
+        Drops the non-internal databases of the fixture and resets the
+        failpoints and server parameters of each of its nodes.
+        """
+
+        if self._server_parameters is None:
+            raise errors.ServerFailure("The server parameters at the start of the suite are"
+                                       " unknown")
+
+        client = self._client_pool.get(datacheck.connection_url(self.fixture))
+        self.fixture.clean(client=client)
+
+        parallel.run_concurrently(
+            [lambda host=host: self._reset_node(host, logger) for host in self._server_parameters],
+            name="CleanEveryN")
+
+    def _get_server_parameters(self):
+        url = datacheck.connection_url(self.fixture)
+        topology = datacheck.discover_topology(self._client_pool, url)
+
+        hosts = []
+        if topology["type"] == datacheck.SHARDED_CLUSTER:
+            # The mongos has server parameters and failpoints too.
+            hosts.append(url)
+            components = [topology["configsvr"]] + topology["shards"].values()
+        else:
+            components = [topology]
+        for component in components:
+            if component["type"] == datacheck.STANDALONE:
+                hosts.append(component["mongod"])
+            else:
+                hosts.extend(component["nodes"])
+
+        parameters = parallel.run_concurrently(
+            [lambda host=host: self._get_node_parameters(host) for host in hosts],
+            name="CleanEveryN")
+        return dict(zip(hosts, parameters))
+
+    def _get_node_parameters(self, host):
+        res = self._client_pool.get(host).admin.command("getParameter", "*")
+        return {name: value for (name, value) in res.iteritems()
+                if name not in _NON_PARAMETER_FIELDS}
+
+    def _reset_node(self, host, logger):
+        admin = self._client_pool.get(host).admin
+
+        current = self._get_node_parameters(host)
+        for (name, value) in self._server_parameters[host].iteritems():
+            if current.get(name) == value:
+                continue
+
+            if name.startswith(_FAILPOINT_PREFIX):
+                self._reset_failpoint(admin, host, name[len(_FAILPOINT_PREFIX):], value, logger)
+                continue
+
+            logger.info("Resetting server parameter %s on %s from %r to %r.", name, host,
+                        current.get(name), value)
+            try:
+                admin.command("setParameter", 1, **{name: value})
+            except pymongo.errors.OperationFailure as err:
+                # Parameters that can only be set at startup can't have been changed by a test.
+                logger.info("Failed to reset server parameter %s on %s: %s", name, host, err)
+
+    @staticmethod
+    def _reset_failpoint(admin, host, failpoint, value, logger):
+        mode = _FAILPOINT_MODES.get(value["mode"])
+        if mode is None:
+            # The number of times or the probability the failpoint was enabled with isn't
+            # reported, so it can't be restored.
+            raise errors.ServerFailure(
+                "Unable to reset failpoint {} on {} to mode {}".format(failpoint, host,
+                                                                       value["mode"]))
+
+        logger.info("Resetting failpoint %s on %s to %s.", failpoint, host, mode)
+        admin.command("configureFailPoint", failpoint, mode=mode, data=value["data"])
+
 
 class CleanEveryNTestCase(interface.DynamicTestCase):
     def run_test(self):
-        try:
-            self.logger.info("%d tests have been run against the fixture, stopping it...",
-                             self._hook.tests_run)
-            self._hook.tests_run = 0
+        self.logger.info("%d tests have been run against the fixture.", self._hook.tests_run)
+        self._hook.tests_run = 0
+
+        if self._hook.soft_clean:
+            try:
+                self.logger.info("Cleaning the fixture in place...")
+                self._hook.clean_in_place(self.logger)
+                return
+            except (errors.ServerFailure, pymongo.errors.PyMongoError):
+                self.logger.exception("Encountered an error while cleaning the fixture in place,"
+                                      " so it will be restarted instead.")
 
+        try:
+            self.logger.info("Stopping the fixture...")
             self.fixture.teardown()
 
             self.logger.info("Starting the fixture back up again...")
@@ -0,0 +1,842 @@
+"""
+PyMongo implementations of the data consistency checks that the
+CheckReplDBHash, CheckReplOplogs, and ValidateCollections hooks
+otherwise run by starting a mongo shell.
+
+The checks connect directly to each node of the fixture with clients
+that are kept open for the whole suite, and query the nodes and their
+databases concurrently. They log differences in the same format as the
+JavaScript implementations in src/mongo/shell/replsettest.js and
+jstests/hooks/validate_collections.js.
+"""
+
+from __future__ import absolute_import
+
+import multiprocessing
+import threading
+import time
+
+import bson
+import bson.codec_options
+import bson.json_util
+import bson.raw_bson
+import pymongo
+import pymongo.errors
+
+from . import interface
+from . import jsfile
+from ... import errors
+from ...utils import parallel
+from ...utils import registry
+
+
+# Hook engines that can be chosen from the suite's YAML configuration.
+JS_ENGINE = "js"
+PYTHON_ENGINE = "python"
+ENGINES = (JS_ENGINE, PYTHON_ENGINE)
+
+# Maximum number of threads that check the databases of the nodes at once. Starting a thread for
+# every database of every node would mostly leave them waiting for a connection from the pool.
+_MAX_CHECK_THREADS = multiprocessing.cpu_count()
+
+STANDALONE = "stand-alone"
+REPLICA_SET = "replica set"
+SHARDED_CLUSTER = "sharded cluster"
+
+# Error code returned when listing the collections of a database with an invalid view definition.
+_INVALID_VIEW_DEFINITION = 182
+
+_OPLOG_NAME = "oplog.rs"
+
+# Documents are compared with their BSON representation, like bsonBinaryEqual() does.
+_RAW_CODEC_OPTIONS = bson.codec_options.CodecOptions(
+    document_class=bson.raw_bson.RawBSONDocument)
+
+_AWAIT_REPLICATION_TIMEOUT_SECS = 5 * 60
+_AWAIT_PRIMARY_TIMEOUT_SECS = 60
+
+
+class DataConsistencyHook(jsfile.JSHook):
+    """
+    A JSHook whose check can also be run with PyMongo by specifying
+    'engine: python' in the hook's configuration.
+    """
+
+    REGISTERED_NAME = registry.LEAVE_UNREGISTERED
+
+    def __init__(self, hook_logger, fixture, js_filename, description, checker_class,
+                 shell_options=None, engine=JS_ENGINE):
+        if engine not in ENGINES:
+            raise ValueError("Unknown engine '{}', expected one of {}".format(engine, ENGINES))
+
+        jsfile.JSHook.__init__(self, hook_logger, fixture, js_filename, description,
+                               shell_options=shell_options)
+
+        self._checker = None
+        if engine == PYTHON_ENGINE:
+            self._checker = checker_class(ClientPool(), _get_test_data(shell_options))
+
+    def after_test(self, test, test_report):
+        if self._checker is None:
+            jsfile.JSHook.after_test(self, test, test_report)
+            return
+
+        if not self._should_run_after_test():
+            return
+
+        hook_test_case = DataConsistencyTestCase.create_after_test(
+            self.logger.test_case_logger, test, self, self._checker)
+        hook_test_case.configure(self.fixture)
+        hook_test_case.run_dynamic_test(test_report)
+
+    def after_suite(self, test_report):
+        if self._checker is not None:
+            self._checker.close()
+
+
+class DataConsistencyTestCase(interface.DynamicTestCase):
+    """A dynamic TestCase that runs a data consistency check with PyMongo."""
+
+    def __init__(self, logger, test_name, description, base_test_name, hook, checker):
+        interface.DynamicTestCase.__init__(self, logger, test_name, description,
+                                           base_test_name, hook)
+        self._checker = checker
+
+    def run_test(self):
+        start_time = time.time()
+        try:
+            self._checker.check(self.fixture, self.logger)
+        except pymongo.errors.PyMongoError as err:
+            # The mongo shell reports errors talking to the server as a failed assertion.
+            raise errors.TestFailure("{} failed: {}".format(self.description, err))
+        self.logger.info("Finished data consistency checks for cluster in %d ms.",
+                         (time.time() - start_time) * 1000)
+
+
+class ClientPool(object):
+    """
+    Direct connections to the nodes of a fixture, which are reused for
+    every test of the suite.
+    """
+
+    def __init__(self, timeout_millis=30000):
+        self._timeout_millis = timeout_millis
+        self._lock = threading.Lock()
+        self._clients = {}
+
+    def get(self, host):
+        """
+        Returns a client that connects directly to 'host'.
+        """
+
+        with self._lock:
+            client = self._clients.get(host)
+            if client is None:
+                # A client for a single host without the replicaSet option doesn't discover the
+                # other members, and can read from a secondary.
+                client = pymongo.MongoClient(host,
+                                             connectTimeoutMS=self._timeout_millis,
+                                             serverSelectionTimeoutMS=self._timeout_millis,
+                                             connect=False)
+                self._clients[host] = client
+            return client
+
+    def close(self):
+        """
+        Closes all of the clients.
+        """
+
+        with self._lock:
+            clients = self._clients.values()
+            self._clients = {}
+
+        for client in clients:
+            client.close()
+
+
+def _get_test_data(shell_options):
+    """
+    Returns the TestData object that would be passed to the mongo
+    shell.
+    """
+
+    shell_options = shell_options if shell_options is not None else {}
+    test_data = shell_options.get("global_vars", {}).get("TestData", {})
+    if test_data.get("auth") or test_data.get("keyFile"):
+        raise ValueError("The {} engine doesn't support fixtures that require authentication"
+                         .format(PYTHON_ENGINE))
+    return test_data
+
+
+def discover_topology(pool, host):
+    """
+    Returns a description of the mongod processes reachable from 'host',
+    in the same format as DiscoverTopology.findConnectedNodes() in
+    jstests/libs/discover_topology.js.
+    """
+
+    client = pool.get(host)
+    is_master = client.admin.command("isMaster")
+    if is_master.get("msg") != "isdbgrid":
+        return _describe_data_members(host, is_master)
+
+    shard_map = client.admin.command("getShardMap")
+    configsvr_host = _first_host(shard_map["map"]["config"])
+    shards = {}
+    for shard_info in client.admin.command("listShards")["shards"]:
+        shard_host = _first_host(shard_info["host"])
+        shards[shard_info["_id"]] = _describe_data_members(
+            shard_host, pool.get(shard_host).admin.command("isMaster"))
+
+    return {
+        "type": SHARDED_CLUSTER,
+        "configsvr": _describe_data_members(
+            configsvr_host, pool.get(configsvr_host).admin.command("isMaster")),
+        "shards": shards,
+    }
+
+
+def _describe_data_members(host, is_master):
+    if "setName" not in is_master:
+        return {"type": STANDALONE, "mongod": host}
+
+    # The "passives" field contains the list of unelectable (priority=0) secondaries and is
+    # omitted from the server's response when there are none.
+    return {"type": REPLICA_SET, "nodes": is_master["hosts"] + is_master.get("passives", [])}
+
+
+def _first_host(connection_string):
+    """
+    Returns the first host of a "<setName>/<host1>,<host2>,..." or
+    "<host>" connection string.
+    """
+
+    return connection_string.split("/")[-1].split(",")[0]
+
+
+def connection_url(fixture):
+    """
+    Returns the driver connection URL of 'fixture' to use with a
+    ClientPool.
+    """
+
+    url = fixture.get_driver_connection_url()
+    return url if url.startswith("mongodb://") else "mongodb://" + url
+
+
+def _to_json(value):
+    return bson.json_util.dumps(value)
+
+
+class _Checker(object):
+    """
+    Base class for the data consistency checks.
+    """
+
+    def __init__(self, pool, test_data):
+        self._pool = pool
+        self._test_data = test_data
+
+    def check(self, fixture, logger):
+        """
+        Runs the check against 'fixture', raising an errors.TestFailure
+        if it fails.
+        """
+        raise NotImplementedError("check must be implemented by _Checker subclasses")
+
+    def close(self):
+        """
+        Closes the connections to the fixture.
+        """
+        self._pool.close()
+
+    def _for_each_replica_set(self, fixture, logger, check_func):
+        """
+        Calls 'check_func' concurrently with the hosts of each replica
+        set of the fixture that has more than one node.
+        """
+
+        topology = discover_topology(self._pool, connection_url(fixture))
+
+        if topology["type"] == STANDALONE:
+            logger.info("Skipping data consistency checks for cluster because we are connected"
+                        " to a stand-alone mongod: %s", _to_json(topology))
+            return
+
+        if topology["type"] == REPLICA_SET:
+            if len(topology["nodes"]) == 1:
+                logger.info("Skipping data consistency checks for cluster because we are"
+                            " connected to a 1-node replica set: %s", _to_json(topology))
+                return
+            check_func(topology["nodes"])
+            return
+
+        replica_sets = []
+        if len(topology["configsvr"]["nodes"]) > 1:
+            replica_sets.append(topology["configsvr"]["nodes"])
+        else:
+            logger.info("Skipping data consistency checks for 1-node CSRS: %s",
+                        _to_json(topology))
+
+        for shard_name in sorted(topology["shards"]):
+            shard = topology["shards"][shard_name]
+            if shard["type"] == STANDALONE:
+                logger.info("Skipping data consistency checks for stand-alone shard: %s",
+                            _to_json(topology))
+            elif len(shard["nodes"]) > 1:
+                replica_sets.append(shard["nodes"])
+            else:
+                logger.info("Skipping data consistency checks for 1-node replica set shard: %s",
+                            _to_json(topology))
+
+        parallel.run_concurrently([_bind(check_func, nodes) for nodes in replica_sets],
+                                  name="DataConsistencyCheck")
+
+    def _lock_replica_set(self, nodes, logger):
+        """
+        Returns a context manager that waits for the secondaries in
+        'nodes' to catch up with the primary, and keeps writes on the
+        primary blocked while the context is active.
+        """
+        return _LockedReplicaSet(self._pool, nodes, logger)
+
+    def _dump_oplog(self, host, logger, query=None, limit=10):
+        oplog = self._pool.get(host).local.get_collection(_OPLOG_NAME,
+                                                          codec_options=_RAW_CODEC_OPTIONS)
+        query = query if query is not None else {}
+        lines = ["Dumping the latest {} documents that match {} from the oplog {} of {}".format(
+            limit, _to_json(query), _OPLOG_NAME, host)]
+        for entry in oplog.find(query).sort("$natural", pymongo.DESCENDING).limit(limit):
+            lines.append(_to_json(entry))
+        logger.info("\n".join(lines))
+
+
+def _bind(func, *args):
+    return lambda: func(*args)
+
+
+class _LockedReplicaSet(object):
+    """
+    Context manager equivalent to ReplSetTest.checkReplicaSet(): it
+    waits for index builds and replication to finish, and fsync-locks
+    the primary so that nothing (e.g. the TTL monitor) writes to it
+    while the nodes are compared.
+
+    The (primary, secondaries) pair of hosts is returned on entry.
+    """
+
+    def __init__(self, pool, nodes, logger):
+        self._pool = pool
+        self._nodes = nodes
+        self._logger = logger
+        self._primary = None
+
+    def __enter__(self):
+        (primary, secondaries) = self._await_primary()
+        primary_client = self._pool.get(primary)
+
+        # Since we cannot determine if there is a background index build in progress
+        # (SERVER-26624), we use the "collMod" command to wait for any index builds that may be in
+        # progress on the primary or on one of the secondaries to complete.
+        collection_filter = {"$or": [{"type": "collection"}, {"type": {"$exists": False}}]}
+        for db_name in primary_client.database_names():
+            if db_name == "local":
+                continue
+            db = primary_client[db_name]
+            for coll_info in db.list_collections(filter=collection_filter):
+                if not coll_info["name"].startswith("system."):
+                    db.command(bson.SON([("collMod", coll_info["name"]),
+                                         ("usePowerOf2Sizes", True)]))
+
+        primary_client.admin.command("fsync", lock=True)
+        self._primary = primary
+        try:
+            self._await_replication(primary, secondaries)
+        except:
+            self._unlock(active_exception=True)
+            raise
+        return (primary, secondaries)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._unlock(active_exception=exc_type is not None)
+
+    def _unlock(self, active_exception):
+        try:
+            self._pool.get(self._primary).admin.command("fsyncUnlock")
+        except pymongo.errors.PyMongoError as err:
+            msg = ("failed to unlock the primary, which may cause this test to hang: {}"
+                   .format(err))
+            if not active_exception:
+                raise errors.ServerFailure(msg)
+            self._logger.error(msg)
+
+    def _await_primary(self):
+        deadline = time.time() + _AWAIT_PRIMARY_TIMEOUT_SECS
+        interval_secs = 0.05
+        while True:
+            responses = parallel.run_concurrently(
+                [_bind(self._is_master, host) for host in self._nodes], name="IsMaster")
+            primaries = [host for (host, res) in zip(self._nodes, responses) if res["ismaster"]]
+            if primaries:
+                secondaries = [host for (host, res) in zip(self._nodes, responses)
+                               if not res["ismaster"] and not res.get("arbiterOnly")]
+                return (primaries[0], secondaries)
+
+            if time.time() > deadline:
+                raise errors.ServerFailure("No primary found among {}".format(self._nodes))
+            time.sleep(interval_secs)
+            interval_secs = min(interval_secs * 2, 1.0)
+
+    def _is_master(self, host):
+        return self._pool.get(host).admin.command("isMaster")
+
+    def _last_applied(self, host):
+        status = self._pool.get(host).admin.command("replSetGetStatus")
+        for member in status["members"]:
+            if member.get("self"):
+                optime = member["optime"]
+                # The optime is a {ts: <Timestamp>, t: <term>} document in protocol version 1.
+                return optime["ts"] if isinstance(optime, dict) else optime
+        raise errors.ServerFailure("{} is missing from its replSetGetStatus response: {}".format(
+            host, _to_json(status)))
+
+    def _await_replication(self, primary, secondaries):
+        target = self._last_applied(primary)
+        deadline = time.time() + _AWAIT_REPLICATION_TIMEOUT_SECS
+        for secondary in secondaries:
+            interval_secs = 0.05
+            while self._last_applied(secondary) < target:
+                if time.time() > deadline:
+                    raise errors.ServerFailure(
+                        "Timed out waiting for {} to replicate up to {} from the primary {}"
+                        .format(secondary, target, primary))
+                time.sleep(interval_secs)
+                interval_secs = min(interval_secs * 2, 1.0)
+
+
+class _NodeDatabaseState(object):
+    """
+    The dbHash, collection options, and collection stats of a database
+    on one node.
+    """
+
+    def __init__(self, host, db_hash, collection_infos, collection_stats):
+        self.host = host
+        self.db_hash = db_hash
+        # Map of collection name to its listCollections document.
+        self.collection_infos = collection_infos
+        # Map of collection name to its collStats response, which is None if the command failed.
+        self.collection_stats = collection_stats
+
+    @property
+    def collections(self):
+        """
+        Returns the names of the collections hashed by dbHash.
+        """
+        return sorted(self.db_hash["collections"])
+
+
+class DBHashChecker(_Checker):
+    """
+    Checks that the dbhashes of all non-local databases and
+    non-replicated system collections match on the primary and
+    secondaries, like ReplSetTest.checkReplicatedDataHashes().
+    """
+
+    MSG_PREFIX = "checkReplicatedDataHashes"
+
+    def check(self, fixture, logger):
+        self._for_each_replica_set(fixture, logger,
+                                   lambda nodes: self._check_replica_set(nodes, logger))
+
+    def _check_replica_set(self, nodes, logger):
+        with self._lock_replica_set(nodes, logger) as (primary, secondaries):
+            hosts = [primary] + secondaries
+
+            db_names = set()
+            for host_db_names in parallel.run_concurrently(
+                    [_bind(self._database_names, host) for host in hosts], name="ListDatabases"):
+                db_names.update(host_db_names)
+            # We don't expect the local database to match because some of its collections are not
+            # replicated.
+            db_names.discard("local")
+            db_names = sorted(db_names)
+
+            # Get the state of every database on every node concurrently.
+            pairs = [(host, db_name) for db_name in db_names for host in hosts]
+            states = dict(zip(pairs, parallel.run_concurrently(
+                [_bind(self._get_state, host, db_name) for (host, db_name) in pairs],
+                name="DBHash", max_workers=_MAX_CHECK_THREADS)))
+
+            success = True
+            for db_name in db_names:
+                primary_state = states[(primary, db_name)]
+                if primary_state is None:
+                    logger.info("Skipping dbhash check on %s because of invalid views in"
+                                " system.views", db_name)
+                    continue
+
+                for secondary in secondaries:
+                    secondary_state = states[(secondary, db_name)]
+                    if not self.compare(db_name, primary_state, secondary_state, logger):
+                        success = False
+
+            if not success:
+                for host in hosts:
+                    self._dump_oplog(host, logger, limit=100)
+                raise errors.TestFailure("dbhash mismatch between primary and secondary")
+
+    def _database_names(self, host):
+        return self._pool.get(host).database_names()
+
+    def _get_state(self, host, db_name):
+        """
+        Returns the _NodeDatabaseState of 'db_name' on 'host', or None
+        if the database has invalid views and TestData says to skip
+        them.
+        """
+
+        db = self._pool.get(host).get_database(db_name, codec_options=_RAW_CODEC_OPTIONS)
+        db_hash = self._pool.get(host)[db_name].command("dbHash")
+        collections = list(db_hash["collections"])
+
+        try:
+            # Filter only collections that were retrieved by the dbhash. listCollections may
+            # include non-replicated collections like system.profile.
+            collection_infos = {
+                info["name"]: info
+                for info in db.list_collections(filter={"name": {"$in": collections}})
+            }
+        except pymongo.errors.OperationFailure as err:
+            if (self._test_data.get("skipValidationOnInvalidViewDefinitions")
+                    and err.code == _INVALID_VIEW_DEFINITION):
+                return None
+            raise
+
+        collection_stats = {}
+        for coll_name in collections:
+            try:
+                collection_stats[coll_name] = self._pool.get(host)[db_name].command(
+                    "collStats", coll_name)
+            except pymongo.errors.OperationFailure:
+                collection_stats[coll_name] = None
+
+        return _NodeDatabaseState(host, db_hash, collection_infos, collection_stats)
+
+    def compare(self, db_name, primary_state, secondary_state, logger):
+        """
+        Logs the differences between the state of 'db_name' on the
+        primary and on a secondary, and returns true if there are none.
+        """
+
+        success = True
+        db_hashes = {"master": primary_state.db_hash, "slave": secondary_state.db_hash}
+        primary_collections = primary_state.collections
+        secondary_collections = secondary_state.collections
+        diff_collections = set()
+
+        if len(primary_collections) != len(secondary_collections):
+            logger.info("%s, the primary and secondary have a different number of collections:"
+                        " %s", self.MSG_PREFIX, _to_json(db_hashes))
+            diff_collections.update(set(primary_collections) ^ set(secondary_collections))
+            success = False
+
+        # Only compare the dbhashes of non-capped collections because capped collections are not
+        # necessarily truncated at the same points across replica set members.
+        non_capped = [name for name in primary_collections
+                      if not _is_capped(primary_state.collection_infos.get(name))]
+        for coll_name in non_capped:
+            if (primary_state.db_hash["collections"][coll_name]
+                    != secondary_state.db_hash["collections"].get(coll_name)):
+                logger.info("%s, the primary and secondary have a different hash for the"
+                            " collection %s.%s: %s", self.MSG_PREFIX, db_name, coll_name,
+                            _to_json(db_hashes))
+                diff_collections.add(coll_name)
+                success = False
+
+        # Check that collection information is consistent on the primary and secondaries.
+        for (coll_name, secondary_info) in sorted(secondary_state.collection_infos.iteritems()):
+            primary_info = primary_state.collection_infos.get(coll_name)
+            if (primary_info is not None and primary_info.get("type") == secondary_info.get("type")
+                    and primary_info.raw != secondary_info.raw):
+                logger.info("%s, the primary and secondary have different attributes for the"
+                            " collection or view %s.%s", self.MSG_PREFIX, db_name, coll_name)
+                diff_collections.add(coll_name)
+                success = False
+
+        # Check that the following collection stats are the same across replica set members:
+        #  capped
+        #  nindexes
+        #  ns
+        for coll_name in primary_collections:
+            primary_stats = primary_state.collection_stats.get(coll_name)
+            secondary_stats = secondary_state.collection_stats.get(coll_name)
+            if primary_stats is None or secondary_stats is None:
+                self._log_collection_info("primary", primary_state, db_name, coll_name, logger)
+                self._log_collection_info("secondary", secondary_state, db_name, coll_name,
+                                          logger)
+                success = False
+            elif any(primary_stats.get(field) != secondary_stats.get(field)
+                     for field in ("capped", "nindexes", "ns")):
+                logger.info("%s, the primary and secondary have different stats for the"
+                            " collection %s.%s", self.MSG_PREFIX, db_name, coll_name)
+                diff_collections.add(coll_name)
+                success = False
+
+        # If the primary and secondary have the same hashes for all the collections in the
+        # database and there aren't any capped collections, then the hashes for the whole
+        # database should match.
+        if (len(non_capped) == len(primary_collections)
+                and primary_state.db_hash["md5"] != secondary_state.db_hash["md5"]):
+            logger.info("%s, the primary and secondary have a different hash for the %s"
+                        " database: %s", self.MSG_PREFIX, db_name, _to_json(db_hashes))
+            success = False
+
+        for coll_name in sorted(diff_collections):
+            self._dump_collection_diff(primary_state, secondary_state, db_name, coll_name, logger)
+
+        return success
+
+    @staticmethod
+    def _log_collection_info(conn_name, state, db_name, coll_name, logger):
+        """
+        Logs the collection info and stats of 'coll_name' on a node.
+        Returns true if the collection exists there.
+        """
+
+        ns = "{}.{}".format(db_name, coll_name)
+        info = state.collection_infos.get(coll_name)
+        stats = state.collection_stats.get(coll_name)
+
+        info_prefix = "{}({}) info for {} : ".format(conn_name, state.host, ns)
+        if info is not None:
+            logger.info("%s%s", info_prefix, _to_json({
+                "ns": ns, "host": state.host, "UUID": info.get("info", {}).get("uuid")}))
+        else:
+            logger.info("%scollection does not exist", info_prefix)
+
+        stats_prefix = "{}({}) collStats for {}: ".format(conn_name, state.host, ns)
+        if stats is not None:
+            logger.info("%s%s", stats_prefix, _to_json(stats))
+        else:
+            logger.info("%s error", stats_prefix)
+
+        return info is not None and stats is not None
+
+    def _dump_collection_diff(self, primary_state, secondary_state, db_name, coll_name, logger):
+        logger.info("Dumping collection: %s.%s", db_name, coll_name)
+
+        primary_exists = self._log_collection_info("primary", primary_state, db_name, coll_name,
+                                                   logger)
+        secondary_exists = self._log_collection_info("secondary", secondary_state, db_name,
+                                                     coll_name, logger)
+        if not primary_exists or not secondary_exists:
+            logger.info("Skipping checking collection differences for %s.%s since it does not"
+                        " exist on primary and secondary", db_name, coll_name)
+            return
+
+        (primary_docs, secondary_docs) = parallel.run_concurrently([
+            _bind(self._documents_by_id, state.host, db_name, coll_name)
+            for state in (primary_state, secondary_state)
+        ], name="DumpCollection")
+
+        missing_on_primary = []
+        missing_on_secondary = []
+        for (doc_id, primary_doc) in primary_docs.iteritems():
+            secondary_doc = secondary_docs.get(doc_id)
+            if secondary_doc is None:
+                missing_on_secondary.append(_to_json(primary_doc))
+            elif primary_doc.raw != secondary_doc.raw:
+                logger.info("Mismatching documents:\n    primary: %s\n    secondary: %s",
+                            _to_json(primary_doc), _to_json(secondary_doc))
+        for (doc_id, secondary_doc) in secondary_docs.iteritems():
+            if doc_id not in primary_docs:
+                missing_on_primary.append(_to_json(secondary_doc))
+
+        if missing_on_primary:
+            logger.info("The following documents are missing on the primary:\n%s",
+                        "\n".join(missing_on_primary))
+        if missing_on_secondary:
+            logger.info("The following documents are missing on the secondary:\n%s",
+                        "\n".join(missing_on_secondary))
+
+    def _documents_by_id(self, host, db_name, coll_name):
+        coll = self._pool.get(host)[db_name].get_collection(coll_name,
+                                                            codec_options=_RAW_CODEC_OPTIONS)
+        docs = bson.SON()
+        for doc in coll.find().sort("_id", pymongo.ASCENDING):
+            docs[bson.BSON.encode({"_id": doc["_id"]})] = doc
+        return docs
+
+
+def _is_capped(collection_info):
+    return (collection_info is not None
+            and bool(collection_info.get("options", {}).get("capped", False)))
+
+
+class OplogChecker(_Checker):
+    """
+    Checks that local.oplog.rs matches on the primary and secondaries,
+    like ReplSetTest.checkOplogs().
+    """
+
+    MSG_PREFIX = "checkOplogs"
+
+    def check(self, fixture, logger):
+        self._for_each_replica_set(fixture, logger,
+                                   lambda nodes: self._check_replica_set(nodes, logger))
+
+    def _check_replica_set(self, nodes, logger):
+        with self._lock_replica_set(nodes, logger) as (primary, secondaries):
+            hosts = [primary] + secondaries
+
+            # Read from the node with the oldest oplog entry, since it should have the most entries.
+            first_timestamps = parallel.run_concurrently(
+                [_bind(self._first_timestamp, host) for host in hosts], name="OplogStart")
+            first_index = min(xrange(len(hosts)), key=lambda i: first_timestamps[i])
+
+            # Read the oplogs backwards, from last to first.
+            cursors = [self._oplog(host).find(no_cursor_timeout=True)
+                       .sort("$natural", pymongo.DESCENDING) for host in hosts]
+            try:
+                self.compare(hosts, cursors, first_index, logger)
+            finally:
+                for cursor in cursors:
+                    cursor.close()
+
+    def compare(self, hosts, cursors, first_index, logger):
+        """
+        Compares the entries of the oplog read by each cursor to the
+        entries read by cursors[first_index], stopping at the end of the
+        shortest oplog.
+        """
+
+        exhausted = set()
+        prev_entry = None
+        for entry in cursors[first_index]:
+            for (i, cursor) in enumerate(cursors):
+                if i == first_index or i in exhausted:
+                    continue
+
+                other_entry = next(cursor, None)
+                if other_entry is None:
+                    exhausted.add(i)
+                    continue
+
+                if entry.raw != other_entry.raw:
+                    query = {"ts": {"$lte": prev_entry["ts"]}} if prev_entry is not None else {}
+                    for host in hosts:
+                        self._dump_oplog(host, logger, query=query, limit=100)
+                    raise errors.TestFailure(
+                        "{}, non-matching oplog entries for the following nodes: \n{}: {}\n{}: {}"
+                        .format(self.MSG_PREFIX, hosts[first_index], _to_json(entry), hosts[i],
+                                _to_json(other_entry)))
+            prev_entry = entry
+
+    def _oplog(self, host):
+        return self._pool.get(host).local.get_collection(_OPLOG_NAME,
+                                                         codec_options=_RAW_CODEC_OPTIONS)
+
+    def _first_timestamp(self, host):
+        first = self._oplog(host).find().sort("$natural", pymongo.ASCENDING).limit(-1)
+        return next(first)["ts"]
+
+
+class ValidateChecker(_Checker):
+    """
+    Runs full validation on all collections in all databases on every
+    node, like CollectionValidator.validateNodes().
+    """
+
+    def check(self, fixture, logger):
+        topology = discover_topology(self._pool, connection_url(fixture))
+
+        hosts = []
+        for component in self._components(topology):
+            if component["type"] == STANDALONE:
+                hosts.append(component["mongod"])
+            else:
+                hosts.extend(component["nodes"])
+
+        # Validate every database of every node concurrently.
+        db_names = parallel.run_concurrently(
+            [_bind(self._database_names, host) for host in hosts], name="ListDatabases")
+        pairs = [(host, db_name)
+                 for (host, host_db_names) in zip(hosts, db_names) for db_name in host_db_names]
+        results = parallel.run_concurrently(
+            [_bind(self.validate_database, host, db_name, logger) for (host, db_name) in pairs],
+            name="Validate", max_workers=_MAX_CHECK_THREADS)
+
+        if not all(results):
+            raise errors.TestFailure("Collection validation failed")
+
+    @staticmethod
+    def _components(topology):
+        if topology["type"] != SHARDED_CLUSTER:
+            return [topology]
+        return [topology["configsvr"]] + [topology["shards"][name]
+                                          for name in sorted(topology["shards"])]
+
+    def _database_names(self, host):
+        return self._pool.get(host).database_names()
+
+    def validate_database(self, host, db_name, logger):
+        """
+        Validates each collection of 'db_name' on 'host', and returns
+        true if all of them are valid.
+        """
+
+        db = self._pool.get(host)[db_name]
+
+        # Don't run validate on view namespaces.
+        collection_filter = {"type": "collection"}
+        if self._test_data.get("skipValidationOnInvalidViewDefinitions"):
+            # If skipValidationOnInvalidViewDefinitions=true, then we avoid resolving the view
+            # catalog on the admin database.
+            collection_filter = {"$or": [collection_filter, {"type": {"$exists": False}}]}
+
+        # Optionally skip collections.
+        skipped = set()
+        prefix = db_name + "."
+        for ns in self._test_data.get("skipValidationNamespaces") or []:
+            if ns.startswith(prefix):
+                skipped.add(ns[len(prefix):])
+
+        success = True
+        for coll_info in db.list_collections(filter=collection_filter):
+            coll_name = coll_info["name"]
+            if coll_name in skipped:
+                continue
+
+            try:
+                res = db.command("validate", coll_name, full=True)
+            except pymongo.errors.OperationFailure as err:
+                res = err.details
+
+            if res.get("ok") and res.get("valid"):
+                continue
+
+            if (self._test_data.get("skipValidationOnNamespaceNotFound", True)
+                    and res.get("errmsg") == "ns not found"):
+                # During a 'stopStart' backup/restore on the secondary node, the actual list of
+                # collections can be out of date if ops are still being applied from the oplog.
+                # In this case we skip the collection if the ns was not found at time of
+                # validation and continue to next.
+                logger.info("Skipping collection validation for %s.%s since collection was not"
+                            " found", db_name, coll_name)
+                continue
+
+            logger.info("Collection validation failed on %s with response: %s", host,
+                        _to_json(res))
+            self._dump_collection(db, coll_name, logger)
+            success = False
+
+        return success
+
+    @staticmethod
+    def _dump_collection(db, coll_name, logger, limit=100):
+        coll = db[coll_name]
+        logger.info("Printing indexes in: %s\n%s", coll.full_name,
+                    _to_json(list(coll.list_indexes())))
+        logger.info("Printing the first %d documents in: %s\n%s", limit, coll.full_name,
+                    "\n".join(_to_json(doc) for doc in coll.find().limit(limit)))
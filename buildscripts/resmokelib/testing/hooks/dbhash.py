@@ -6,20 +6,23 @@ from __future__ import absolute_import
 
 import os.path
 
-from . import jsfile
+from . import datacheck
 
 
-class CheckReplDBHash(jsfile.JSHook):
+class CheckReplDBHash(datacheck.DataConsistencyHook):
     """
     Checks that the dbhashes of all non-local databases and non-replicated system collections
     match on the primary and secondaries.
     """
-    def __init__(self, hook_logger, fixture, shell_options=None):
+    def __init__(self, hook_logger, fixture, shell_options=None,
+                 engine=datacheck.JS_ENGINE):
         description = "Check dbhashes of all replica set or master/slave members"
         js_filename = os.path.join("jstests", "hooks", "run_check_repl_dbhash.js")
-        jsfile.JSHook.__init__(self,
-                               hook_logger,
-                               fixture,
-                               js_filename,
-                               description,
-                               shell_options=shell_options)
+        datacheck.DataConsistencyHook.__init__(self,
+                                               hook_logger,
+                                               fixture,
+                                               js_filename,
+                                               description,
+                                               datacheck.DBHashChecker,
+                                               shell_options=shell_options,
+                                               engine=engine)
@@ -6,7 +6,9 @@ from __future__ import absolute_import
 
 import sys
 
+from . import sampling as _sampling
 from ..testcases import interface as testcase
+from ... import config
 from ... import errors
 from ...logging import loggers
 from ...utils import registry
@@ -18,12 +20,21 @@ _HOOKS = {}
 def make_hook(class_name, *args, **kwargs):
     """
     Factory function for creating Hook instances.
+
+    If a "sampling" option is specified, then it is used as the keyword
+    arguments of a HookSampler that decides after which tests the hook
+    runs. The sampler is seeded from --seed.
     """
 
     if class_name not in _HOOKS:
         raise ValueError("Unknown hook class '%s'" % class_name)
 
-    return _HOOKS[class_name](*args, **kwargs)
+    sampling_options = kwargs.pop("sampling", None)
+    hook = _HOOKS[class_name](*args, **kwargs)
+    if sampling_options is not None:
+        hook.sampler = _sampling.HookSampler(class_name, hook.fixture.job_num, config.RANDOM_SEED,
+                                             **sampling_options)
+    return hook
 
 
 class Hook(object):
@@ -47,6 +58,10 @@ class Hook(object):
         self.fixture = fixture
         self.description = description
 
+        # The HookSampler that decides after which tests after_test() is called, or None if it is
+        # called after every test.
+        self.sampler = None
+
     def before_suite(self, test_report):
         """
         The test runner calls this exactly once before they start
@@ -7,19 +7,22 @@ from __future__ import absolute_import
 
 import os.path
 
-from . import jsfile
+from . import datacheck
 
 
-class CheckReplOplogs(jsfile.JSHook):
+class CheckReplOplogs(datacheck.DataConsistencyHook):
     """
     Checks that local.oplog.rs matches on the primary and secondaries.
     """
-    def __init__(self, hook_logger, fixture, shell_options=None):
+    def __init__(self, hook_logger, fixture, shell_options=None,
+                 engine=datacheck.JS_ENGINE):
         description = "Check oplogs of all replica set members"
         js_filename = os.path.join("jstests", "hooks", "run_check_repl_oplogs.js")
-        jsfile.JSHook.__init__(self,
-                               hook_logger,
-                               fixture,
-                               js_filename,
-                               description,
-                               shell_options=shell_options)
+        datacheck.DataConsistencyHook.__init__(self,
+                                               hook_logger,
+                                               fixture,
+                                               js_filename,
+                                               description,
+                                               datacheck.OplogChecker,
+                                               shell_options=shell_options,
+                                               engine=engine)
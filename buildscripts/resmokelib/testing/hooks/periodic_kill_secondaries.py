@@ -5,6 +5,7 @@ an unclean shutdown.
 
 from __future__ import absolute_import
 
+import functools
 import time
 
 import bson
@@ -17,6 +18,7 @@ from . import validate
 from ..fixtures import interface as fixture
 from ..fixtures import replicaset
 from ... import errors
+from ...utils import parallel
 
 
 class PeriodicKillSecondaries(interface.Hook):
@@ -143,15 +145,20 @@ class PeriodicKillSecondariesTestCase(interface.DynamicTestCase):
         self._restart_and_clear_fixture()
 
     def _kill_secondaries(self):
-        for secondary in self.fixture.get_secondaries():
-            # Disable the "rsSyncApplyStop" failpoint on the secondary to have it resume applying
-            # oplog entries.
-            self._hook._disable_rssyncapplystop(secondary)
+        secondaries = self.fixture.get_secondaries()
+
+        # Disable the "rsSyncApplyStop" failpoint on the secondaries to have them resume applying
+        # oplog entries.
+        parallel.run_concurrently(
+            [functools.partial(self._hook._disable_rssyncapplystop, secondary)
+             for secondary in secondaries],
+            name="DisableRsSyncApplyStop")
 
-            # Wait a little bit for the secondary to start apply oplog entries so that we are more
-            # likely to kill the mongod process while it is partway into applying a batch.
-            time.sleep(0.1)
+        # Wait a little bit for the secondaries to start apply oplog entries so that we are more
+        # likely to kill the mongod processes while they are partway into applying a batch.
+        time.sleep(0.1)
 
+        for secondary in secondaries:
             # Check that the secondary is still running before forcibly terminating it. This ensures
             # we still detect some cases in which the secondary has already crashed.
             if not secondary.is_running():
@@ -175,21 +182,11 @@ class PeriodicKillSecondariesTestCase(interface.DynamicTestCase):
             preserve_dbpaths.append(node.preserve_dbpath)
             node.preserve_dbpath = True
 
-        for secondary in self.fixture.get_secondaries():
-            self._check_invariants_as_standalone(secondary)
-
-            # Start the 'secondary' mongod back up as part of the replica set and wait for it to
-            # reach state SECONDARY.
-            secondary.setup()
-            secondary.await_ready()
-            self._await_secondary_state(secondary)
-
-            try:
-                secondary.teardown()
-            except errors.ServerFailure:
-                raise errors.ServerFailure(
-                    "{} did not exit cleanly after reconciling the end of its oplog".format(
-                        secondary))
+        # Each secondary has its own port and data files, so they are checked concurrently.
+        parallel.run_concurrently(
+            [functools.partial(self._check_and_reconcile_secondary, secondary)
+             for secondary in self.fixture.get_secondaries()],
+            name="CheckSecondary")
 
         self.logger.info("Starting the fixture back up again with its data files intact...")
 
@@ -200,6 +197,21 @@ class PeriodicKillSecondariesTestCase(interface.DynamicTestCase):
             for (i, node) in enumerate(self.fixture.nodes):
                 node.preserve_dbpath = preserve_dbpaths[i]
 
+    def _check_and_reconcile_secondary(self, secondary):
+        self._check_invariants_as_standalone(secondary)
+
+        # Start the 'secondary' mongod back up as part of the replica set and wait for it to
+        # reach state SECONDARY.
+        secondary.setup()
+        secondary.await_ready()
+        self._await_secondary_state(secondary)
+
+        try:
+            secondary.teardown()
+        except errors.ServerFailure:
+            raise errors.ServerFailure(
+                "{} did not exit cleanly after reconciling the end of its oplog".format(secondary))
+
     def _validate_collections(self, test_report):
         validate_test_case = validate.ValidateCollections(self._hook.logger, self.fixture)
         validate_test_case.before_suite(test_report)
@@ -0,0 +1,116 @@
+"""
+Sampling policy for hooks that are too expensive to run after every test.
+"""
+
+from __future__ import absolute_import
+
+import random
+import time
+import zlib
+
+
+class HookSampler(object):
+    """
+    Decides after which tests the after_test() method of a hook is
+    called.
+
+    The decision for each test is made as follows:
+      1. The hook always runs after a test that failed, and after each
+         of the next 'run_after_failures' tests once a test or a call
+         to the hook failed.
+      2. Otherwise, if 'max_time_fraction' is set and the hook has
+         already taken more than that fraction of the time since the
+         job started running tests, then the hook is skipped.
+      3. Otherwise, the hook runs with the specified 'probability'.
+
+    If the hook was skipped after the last test, then the job calls it
+    once more after it runs out of tests, so the final state of the
+    fixture is always checked.
+    """
+
+    def __init__(self, hook_name, job_num, seed, probability=1.0, max_time_fraction=None,
+                 run_after_failures=0, clock=time.time):
+        """
+        Initializes the HookSampler. The random number generator is
+        seeded from 'seed', 'hook_name', and 'job_num' so that the same
+        --seed makes the same decisions.
+        """
+
+        if not 0 < probability <= 1:
+            raise ValueError("probability must be in the range (0, 1], but got %r" % probability)
+        if max_time_fraction is not None and not 0 < max_time_fraction <= 1:
+            raise ValueError("max_time_fraction must be in the range (0, 1], but got %r"
+                             % max_time_fraction)
+        if run_after_failures < 0:
+            raise ValueError("run_after_failures must be nonnegative, but got %r"
+                             % run_after_failures)
+
+        self.probability = probability
+        self.max_time_fraction = max_time_fraction
+        self.run_after_failures = run_after_failures
+
+        self._clock = clock
+        self._random = random.Random(
+            (seed if seed is not None else 0) ^ (zlib.crc32("%s:%d" % (hook_name, job_num)) &
+                                                 0xffffffff))
+
+        self.start()
+
+    def start(self):
+        """
+        Resets the sampler at the start of an execution of the tests.
+        """
+
+        self._start_time = self._clock()
+        self._hook_secs = 0.0
+        self._num_forced_runs = 0
+        self._skipped_test = None
+
+    def should_run_after(self, test, test_failed):
+        """
+        Returns true if the hook should run after 'test'.
+        """
+
+        # Always draw a random number so that the same tests get sampled regardless of which of
+        # the other rules applied to earlier tests.
+        sampled = self._random.random() < self.probability
+
+        if test_failed:
+            self._num_forced_runs = self.run_after_failures
+            should_run = True
+        elif self._num_forced_runs > 0:
+            self._num_forced_runs -= 1
+            should_run = True
+        elif self._over_time_budget():
+            should_run = False
+        else:
+            should_run = sampled
+
+        self._skipped_test = None if should_run else test
+        return should_run
+
+    def _over_time_budget(self):
+        if self.max_time_fraction is None:
+            return False
+        elapsed_secs = self._clock() - self._start_time
+        return self._hook_secs > self.max_time_fraction * elapsed_secs
+
+    def record_call(self, elapsed_secs, success):
+        """
+        Records that a call to the hook took 'elapsed_secs' seconds and
+        whether it succeeded.
+        """
+
+        self._hook_secs += elapsed_secs
+        if not success:
+            self._num_forced_runs = self.run_after_failures
+
+    def pop_skipped_test(self):
+        """
+        Returns the last test if the hook was skipped after it, and None
+        otherwise.
+        """
+
+        test = self._skipped_test
+        self._skipped_test = None
+        return test
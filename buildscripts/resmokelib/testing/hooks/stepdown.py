@@ -4,6 +4,7 @@ Testing hook that periodically makes the primary of a replica set step down.
 from __future__ import absolute_import
 
 import collections
+import functools
 import random
 import time
 import threading
@@ -15,6 +16,7 @@ from buildscripts.resmokelib import errors
 from buildscripts.resmokelib.testing.hooks import interface
 from buildscripts.resmokelib.testing.fixtures import replicaset
 from buildscripts.resmokelib.testing.fixtures import shardedcluster
+from buildscripts.resmokelib.utils import parallel
 
 
 class ContinuousStepdown(interface.Hook):
@@ -97,6 +99,13 @@ class ContinuousStepdown(interface.Hook):
 
 
 class _StepdownThread(threading.Thread):
+    # Number of milliseconds between the heartbeats the driver sends to each node of a replica set
+    # to discover its primary.
+    _HEARTBEAT_FREQUENCY_MS = 500
+
+    # Number of seconds to wait for a replica set to have a primary after the stepdowns.
+    _AWAIT_PRIMARY_TIMEOUT_SECS = 30
+
     def __init__(self, logger, rs_fixtures, stepdown_interval_secs, stepdown_duration_secs):
         threading.Thread.__init__(self, name="StepdownThread")
         self.daemon = True
@@ -115,8 +124,16 @@ class _StepdownThread(threading.Thread):
         self._is_idle_evt = threading.Event()
         self._is_idle_evt.set()
 
+        self._lock = threading.Lock()
         self._step_up_stats = collections.Counter()
 
+        # Clients are reused across stepdowns since the replica sets are stepped down concurrently
+        # and creating a client means opening a connection to each node. The replica set clients
+        # monitor the nodes in the background, so the primary is discovered from their heartbeats
+        # rather than by polling each node with isMaster.
+        self._rs_clients = {}
+        self._node_clients = {}
+
     def run(self):
         if not self._rs_fixtures:
             self.logger.warning("No replica set on which to run stepdowns.")
@@ -145,6 +162,13 @@ class _StepdownThread(threading.Thread):
         self.resume()
         self.join()
 
+        with self._lock:
+            clients = self._rs_clients.values() + self._node_clients.values()
+            self._rs_clients.clear()
+            self._node_clients.clear()
+        for client in clients:
+            client.close()
+
     def _is_stopped(self):
         return self._is_stopped_evt.is_set()
 
@@ -160,9 +184,11 @@ class _StepdownThread(threading.Thread):
         """Resumes the thread."""
         self._is_resumed_evt.set()
 
+        with self._lock:
+            step_up_stats = self._step_up_stats.copy()
         self.logger.info(
             "Current statistics about which nodes have been successfully stepped up: %s",
-            self._step_up_stats)
+            step_up_stats)
 
     def _pause_if_needed(self):
         # Wait until resume or stop.
@@ -173,18 +199,84 @@ class _StepdownThread(threading.Thread):
         self._is_stopped_evt.wait(timeout)
 
     def _await_primaries(self):
-        for fixture in self._rs_fixtures:
-            fixture.get_primary()
+        parallel.run_concurrently(
+            [functools.partial(self._get_primary, rs_fixture, self._AWAIT_PRIMARY_TIMEOUT_SECS)
+             for rs_fixture in self._rs_fixtures],
+            name="AwaitPrimary")
 
     def _step_down_all(self):
         self._is_idle_evt.clear()
-        for rs_fixture in self._rs_fixtures:
-            self._step_down(rs_fixture)
-        self._is_idle_evt.set()
+        try:
+            parallel.run_concurrently(
+                [functools.partial(self._step_down, rs_fixture)
+                 for rs_fixture in self._rs_fixtures],
+                name="Stepdown")
+        finally:
+            self._is_idle_evt.set()
+
+    def _get_rs_client(self, rs_fixture):
+        """
+        Returns a client that monitors all of the nodes of 'rs_fixture'.
+        """
+
+        with self._lock:
+            client = self._rs_clients.get(rs_fixture.replset_name)
+            if client is None:
+                hosts = ",".join(node.get_internal_connection_string()
+                                 for node in rs_fixture.nodes)
+                client = pymongo.MongoClient(
+                    "mongodb://%s/?replicaSet=%s" % (hosts, rs_fixture.replset_name),
+                    heartbeatFrequencyMS=self._HEARTBEAT_FREQUENCY_MS,
+                    serverSelectionTimeoutMS=int(self._stepdown_interval_secs * 1000))
+                self._rs_clients[rs_fixture.replset_name] = client
+            return client
+
+    def _get_node_client(self, node):
+        """
+        Returns a client connected directly to 'node'.
+        """
+
+        with self._lock:
+            client = self._node_clients.get(node.port)
+            if client is None:
+                client = node.mongo_client()
+                self._node_clients[node.port] = client
+            return client
+
+    def _get_primary(self, rs_fixture, timeout_secs):
+        """
+        Returns the primary of 'rs_fixture' once the replica set client
+        has discovered it, or raises a ServerFailure if it doesn't have
+        a primary after 'timeout_secs' seconds.
+        """
+
+        client = self._get_rs_client(rs_fixture)
+        deadline = time.time() + timeout_secs
+        while True:
+            try:
+                # Selecting the primary blocks until the client's monitors have found it. The node
+                # may have stepped down since its last heartbeat, in which case the command fails
+                # or reports it isn't primary and the client checks the nodes again.
+                if client.admin.command("isMaster")["ismaster"]:
+                    address = client.primary
+                    for node in rs_fixture.nodes:
+                        if address is not None and node.port == address[1]:
+                            return node
+            except pymongo.errors.AutoReconnect:
+                pass
+
+            if time.time() >= deadline:
+                msg = "Timed out while waiting for a primary for replica set '{}'.".format(
+                    rs_fixture.replset_name)
+                self.logger.error(msg)
+                raise errors.ServerFailure(msg)
+
+            # Give the client's monitors a chance to notice the new primary.
+            time.sleep(float(self._HEARTBEAT_FREQUENCY_MS) / 1000)
 
     def _step_down(self, rs_fixture):
         try:
-            primary = rs_fixture.get_primary(timeout_secs=self._stepdown_interval_secs)
+            primary = self._get_primary(rs_fixture, timeout_secs=self._stepdown_interval_secs)
         except errors.ServerFailure:
             # We ignore the ServerFailure exception because it means a primary wasn't available.
             # We'll try again after self._stepdown_interval_secs seconds.
@@ -193,10 +285,10 @@ class _StepdownThread(threading.Thread):
         self.logger.info("Stepping down the primary on port %d of replica set '%s'.",
                          primary.port, rs_fixture.replset_name)
 
-        secondaries = rs_fixture.get_secondaries()
+        secondaries = [node for node in rs_fixture.nodes if node.port != primary.port]
 
         try:
-            client = primary.mongo_client()
+            client = self._get_node_client(primary)
             client.admin.command(bson.SON([
                 ("replSetStepDown", self._stepdown_duration_secs),
                 ("force", True),
@@ -222,7 +314,7 @@ class _StepdownThread(threading.Thread):
                              chosen.port, rs_fixture.replset_name)
 
             try:
-                client = chosen.mongo_client()
+                client = self._get_node_client(chosen)
                 client.admin.command("replSetStepUp")
                 break
             except pymongo.errors.OperationFailure:
@@ -238,4 +330,5 @@ class _StepdownThread(threading.Thread):
         # executed successfully.
         key = "{}/{}".format(rs_fixture.replset_name,
                              chosen.get_internal_connection_string() if secondaries else "none")
-        self._step_up_stats[key] += 1
+        with self._lock:
+            self._step_up_stats[key] += 1
@@ -7,20 +7,23 @@ from __future__ import absolute_import
 
 import os.path
 
-from . import jsfile
+from . import datacheck
 
 
-class ValidateCollections(jsfile.JSHook):
+class ValidateCollections(datacheck.DataConsistencyHook):
     """
     Runs full validation on all collections in all databases on every stand-alone
     node, primary replica-set node, or primary shard node.
     """
-    def __init__(self, hook_logger, fixture, shell_options=None):
+    def __init__(self, hook_logger, fixture, shell_options=None,
+                 engine=datacheck.JS_ENGINE):
         description = "Full collection validation"
         js_filename = os.path.join("jstests", "hooks", "run_validate_collections.js")
-        jsfile.JSHook.__init__(self,
-                               hook_logger,
-                               fixture,
-                               js_filename,
-                               description,
-                               shell_options=shell_options)
+        datacheck.DataConsistencyHook.__init__(self,
+                                               hook_logger,
+                                               fixture,
+                                               js_filename,
+                                               description,
+                                               datacheck.ValidateChecker,
+                                               shell_options=shell_options,
+                                               engine=engine)
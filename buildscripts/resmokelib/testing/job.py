@@ -5,8 +5,11 @@ from a multi-consumer queue.
 
 from __future__ import absolute_import
 
+import contextlib
 import sys
+import time
 
+from . import progress
 from .. import config
 from .. import errors
 from ..utils import queue as _queue
@@ -60,7 +63,8 @@ class Job(object):
 
         if teardown_flag is not None:
             try:
-                self.fixture.teardown(finished=True)
+                with progress.TRACKER.timing_fixture(self.fixture.job_num, "teardown"):
+                    self.fixture.teardown(finished=True)
             except errors.ServerFailure as err:
                 self.logger.warn("Teardown of %s was not successful: %s", self.fixture, err)
                 teardown_flag.set()
@@ -75,7 +79,10 @@ class Job(object):
         """
 
         for hook in self.hooks:
-            hook.before_suite(self.report)
+            if hook.sampler is not None:
+                hook.sampler.start()
+            with self._timing_hook(hook, hook.before_suite):
+                hook.before_suite(self.report)
 
         while not interrupt_flag.is_set():
             test = queue.get_nowait()
@@ -87,8 +94,12 @@ class Job(object):
             finally:
                 queue.task_done()
 
+        if not interrupt_flag.is_set():
+            self._run_skipped_hooks()
+
         for hook in self.hooks:
-            hook.after_suite(self.report)
+            with self._timing_hook(hook, hook.after_suite):
+                hook.after_suite(self.report)
 
     def _execute_test(self, test):
         """
@@ -98,7 +109,12 @@ class Job(object):
         test.configure(self.fixture, config.NUM_CLIENTS_PER_FIXTURE)
         self._run_hooks_before_tests(test)
 
-        test(self.report)
+        progress.TRACKER.test_started(self.fixture.job_num, test.short_name())
+        try:
+            test(self.report)
+        finally:
+            progress.TRACKER.test_finished(self.fixture.job_num, test.short_name())
+
         try:
             if self.suite_options.fail_fast and not self.report.wasSuccessful():
                 self.logger.info("%s failed, so stopping..." % (test.shortDescription()))
@@ -119,16 +135,74 @@ class Job(object):
 
         self._run_hooks_after_tests(test)
 
-    def _run_hook(self, hook, hook_function, test):
+    def _run_hook(self, hook, hook_function, test, before=False):
         """ Helper to run hook and archival. """
         try:
             success = False
-            hook_function(test, self.report)
+            with self._timing_hook(hook, hook_function, test=test, before=before):
+                hook_function(test, self.report)
             success = True
         finally:
             if self.archival:
                 self.archival.archive(self.logger, test, success, hook=hook)
 
+    @contextlib.contextmanager
+    def _timing_hook(self, hook, hook_function, test=None, before=False):
+        """
+        Returns a context manager that records the time spent running
+        'hook_function' of 'hook' in the report, attributing it to
+        'test' if specified. 'before' is true if the hook runs before
+        'test' does.
+        """
+
+        hook_name = hook.__class__.__name__
+        start_time = time.time()
+        success = False
+        try:
+            with progress.TRACKER.timing_hook(self.fixture.job_num, hook_name,
+                                              hook_function.__name__):
+                yield
+            success = True
+        finally:
+            elapsed_secs = time.time() - start_time
+            self.report.record_hook(hook_name, elapsed_secs, test=test, before=before)
+            if hook.sampler is not None:
+                hook.sampler.record_call(elapsed_secs, success)
+
+    def _should_run_after(self, hook, test):
+        """
+        Returns true if the after_test method of 'hook' should be called
+        for 'test' according to its sampling policy.
+        """
+
+        if hook.sampler is None:
+            return True
+
+        test_failed = self.report._find_test_info(test).status != "pass"
+        if hook.sampler.should_run_after(test, test_failed):
+            return True
+
+        self.logger.debug("Skipping %s after %s because of its sampling policy.",
+                          hook.description, test.shortDescription())
+        return False
+
+    def _run_skipped_hooks(self):
+        """
+        Calls the after_test method of each hook that its sampling
+        policy skipped after the last test, so the final state of the
+        fixture is always checked.
+        """
+
+        for hook in self.hooks:
+            if hook.sampler is None:
+                continue
+
+            test = hook.sampler.pop_skipped_test()
+            if test is not None:
+                self.logger.info("Running %s after %s since it was the last test.",
+                                 hook.description, test.shortDescription())
+                self._run_hooks_after_tests(test, hooks=[hook])
+
     def _run_hooks_before_tests(self, test):
         """
         Runs the before_test method on each of the hooks.
@@ -138,7 +212,7 @@ class Job(object):
         """
         try:
             for hook in self.hooks:
-                self._run_hook(hook, hook.before_test, test)
+                self._run_hook(hook, hook.before_test, test, before=True)
 
         except errors.StopExecution:
             raise
@@ -163,15 +237,19 @@ class Job(object):
             self.report.stopTest(test)
             raise
 
-    def _run_hooks_after_tests(self, test):
+    def _run_hooks_after_tests(self, test, hooks=None):
         """
-        Runs the after_test method on each of the hooks.
+        Runs the after_test method on each of the hooks whose sampling
+        policy selects 'test', or on each of 'hooks' if specified.
 
         Swallows any TestFailure exceptions if set to continue on
         failure, and reraises any other exceptions.
         """
+        if hooks is None:
+            hooks = [hook for hook in self.hooks if self._should_run_after(hook, test)]
+
         try:
-            for hook in self.hooks:
+            for hook in hooks:
                 self._run_hook(hook, hook.after_test, test)
 
         except errors.StopExecution:
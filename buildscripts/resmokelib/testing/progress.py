@@ -0,0 +1,340 @@
+"""
+Tracks the progress of the tests, hooks, and fixtures of a resmoke.py
+invocation so that it can be inspected while the tests are running.
+"""
+
+from __future__ import absolute_import
+
+import contextlib
+import json
+import os
+import os.path
+import tempfile
+import threading
+import time
+
+from ..core import pipe as _pipe
+
+
+# Number of tests with the longest durations that are included in a snapshot.
+_NUM_SLOWEST_TESTS = 10
+
+
+class _Timings(object):
+    """
+    The number, total duration, and longest duration of a kind of
+    operation.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_secs = 0.0
+        self.max_secs = 0.0
+
+    def add(self, elapsed_secs):
+        self.count += 1
+        self.total_secs += elapsed_secs
+        self.max_secs = max(self.max_secs, elapsed_secs)
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_secs": self.total_secs,
+            "max_secs": self.max_secs,
+        }
+
+
+class _JobProgress(object):
+    """
+    The progress of a single job.
+    """
+
+    def __init__(self):
+        self.tests_started = 0
+        self.tests_finished = 0
+        self.test_timings = _Timings()
+        self.hook_timings = _Timings()
+        self.fixture_timings = _Timings()
+
+        # A (kind, name, start time) tuple describing what the job is currently doing.
+        self.activity = None
+
+        # A (test name, duration) pair for the test that most recently finished.
+        self.last_test = None
+
+
+class ProgressTracker(object):
+    """
+    Thread-safe counters describing what each job is doing and where
+    the time of the invocation is being spent.
+    """
+
+    def __init__(self, clock=time.time):
+        """
+        Initializes the ProgressTracker. 'clock' returns the current
+        time in seconds.
+        """
+
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._start_time = clock()
+
+        # Map of job number to _JobProgress instance.
+        self._jobs = {}
+
+        # Maps of hook class and fixture action to _Timings instance.
+        self._hooks = {}
+        self._fixtures = {}
+
+        # List of (duration, test name) pairs for the slowest tests.
+        self._slowest_tests = []
+
+        # The queue of tests that are waiting to run and the number of sentinels at its end.
+        self._test_queue = None
+        self._num_sentinels = 0
+
+        # The number of lines read from the subprocesses before the tracker was created.
+        self._start_num_lines = _pipe.num_lines_read()
+
+    def _get_job(self, job_num):
+        job = self._jobs.get(job_num)
+        if job is None:
+            job = self._jobs[job_num] = _JobProgress()
+        return job
+
+    def set_test_queue(self, test_queue, num_sentinels=0):
+        """
+        Sets the queue of tests that are waiting to run, or clears it
+        if 'test_queue' is None. The last 'num_sentinels' items of the
+        queue don't count as tests.
+        """
+
+        with self._lock:
+            self._test_queue = test_queue
+            self._num_sentinels = num_sentinels
+
+    def test_started(self, job_num, test_name):
+        """
+        Records that 'job_num' started running 'test_name'.
+        """
+
+        with self._lock:
+            job = self._get_job(job_num)
+            job.tests_started += 1
+            job.activity = ("test", test_name, self._clock())
+
+    def test_finished(self, job_num, test_name):
+        """
+        Records that 'job_num' finished running 'test_name'.
+        """
+
+        with self._lock:
+            job = self._get_job(job_num)
+            elapsed_secs = self._finish_activity(job)
+            job.tests_finished += 1
+            job.test_timings.add(elapsed_secs)
+            job.last_test = (test_name, elapsed_secs)
+
+            self._slowest_tests.append((elapsed_secs, test_name))
+            if len(self._slowest_tests) > _NUM_SLOWEST_TESTS:
+                self._slowest_tests.sort(reverse=True)
+                del self._slowest_tests[_NUM_SLOWEST_TESTS:]
+
+    @contextlib.contextmanager
+    def timing_hook(self, job_num, hook_class, hook_function):
+        """
+        Returns a context manager that records the time 'job_num'
+        spends running 'hook_function' of a 'hook_class' hook.
+        """
+
+        with self._timing(job_num, "hook", "%s.%s" % (hook_class, hook_function),
+                          lambda job: (job.hook_timings, self._hooks, hook_class)):
+            yield
+
+    @contextlib.contextmanager
+    def timing_fixture(self, job_num, action):
+        """
+        Returns a context manager that records the time 'job_num'
+        spends on 'action' (e.g. "setup" or "teardown") of its fixture.
+        """
+
+        with self._timing(job_num, "fixture", action,
+                          lambda job: (job.fixture_timings, self._fixtures, action)):
+            yield
+
+    @contextlib.contextmanager
+    def _timing(self, job_num, kind, name, get_timings):
+        with self._lock:
+            job = self._get_job(job_num)
+            previous = job.activity
+            job.activity = (kind, name, self._clock())
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                elapsed_secs = self._finish_activity(job)
+                (job_timings, all_timings, key) = get_timings(job)
+                job_timings.add(elapsed_secs)
+                all_timings.setdefault(key, _Timings()).add(elapsed_secs)
+
+                # A fixture may be restarted by a hook, so resume timing the outer activity.
+                job.activity = previous
+
+    def _finish_activity(self, job):
+        """
+        Clears the activity of 'job' and returns how long it took.
+        """
+
+        elapsed_secs = 0.0
+        if job.activity is not None:
+            elapsed_secs = self._clock() - job.activity[2]
+            job.activity = None
+        return elapsed_secs
+
+    def snapshot(self):
+        """
+        Returns a JSON-serializable dict describing the progress so far.
+        The pipe throughput is averaged over the whole invocation.
+        """
+
+        with self._lock:
+            now = self._clock()
+
+            jobs = {}
+            for (job_num, job) in self._jobs.iteritems():
+                activity = None
+                if job.activity is not None:
+                    (kind, name, start_time) = job.activity
+                    activity = {"kind": kind, "name": name, "elapsed_secs": now - start_time}
+
+                last_test = None
+                if job.last_test is not None:
+                    last_test = {"name": job.last_test[0], "elapsed_secs": job.last_test[1]}
+
+                jobs[str(job_num)] = {
+                    "tests_started": job.tests_started,
+                    "tests_finished": job.tests_finished,
+                    "activity": activity,
+                    "last_test": last_test,
+                    "tests": job.test_timings.as_dict(),
+                    "hooks": job.hook_timings.as_dict(),
+                    "fixtures": job.fixture_timings.as_dict(),
+                }
+
+            queue_depth = None
+            if self._test_queue is not None:
+                queue_depth = max(self._test_queue.qsize() - self._num_sentinels, 0)
+
+            num_lines = _pipe.num_lines_read()
+            lines_per_sec = _rate(num_lines - self._start_num_lines, now - self._start_time)
+
+            return {
+                "start_time": self._start_time,
+                "elapsed_secs": now - self._start_time,
+                "jobs": jobs,
+                "hooks": {name: timings.as_dict() for (name, timings) in self._hooks.iteritems()},
+                "fixtures": {name: timings.as_dict()
+                             for (name, timings) in self._fixtures.iteritems()},
+                "slowest_tests": [{"name": name, "elapsed_secs": elapsed_secs}
+                                  for (elapsed_secs, name) in sorted(self._slowest_tests,
+                                                                     reverse=True)],
+                "queue_depth": queue_depth,
+                "pipe": {"lines": num_lines, "lines_per_sec": lines_per_sec},
+            }
+
+
+def _rate(count, elapsed_secs):
+    """
+    Returns 'count' divided by 'elapsed_secs', or 0 if no time has
+    elapsed.
+    """
+
+    if elapsed_secs <= 0:
+        return 0.0
+    return count / float(elapsed_secs)
+
+
+class StatusFileWriter(threading.Thread):
+    """
+    Periodically rewrites a JSON file with a snapshot of a
+    ProgressTracker. The pipe throughput in the file is computed over
+    the interval since the previous snapshot was written.
+    """
+
+    def __init__(self, tracker, pathname, interval_secs):
+        """
+        Initializes the StatusFileWriter to write a snapshot of
+        'tracker' to 'pathname' every 'interval_secs' seconds.
+        """
+
+        threading.Thread.__init__(self, name="StatusFileWriter")
+        self.daemon = True
+
+        self.tracker = tracker
+        self.pathname = pathname
+        self.interval_secs = interval_secs
+        self._shutdown_event = threading.Event()
+
+        # The (time, number of lines) pair of the previous snapshot that was written.
+        self._last_pipe_sample = None
+
+    def run(self):
+        while not self._shutdown_event.wait(self.interval_secs):
+            self._try_write()
+
+    def stop(self):
+        """
+        Stops the thread and writes a final snapshot.
+        """
+
+        self._shutdown_event.set()
+        self.join()
+        self._try_write()
+
+    def _try_write(self):
+        try:
+            self.write()
+        except (IOError, OSError):
+            # The file only reports on the progress of the tests, so failing to write it shouldn't
+            # stop them.
+            pass
+
+    def write(self):
+        """
+        Writes a snapshot to 'pathname'. The file is replaced atomically
+        so that readers never see a partially written snapshot.
+        """
+
+        dirname = os.path.dirname(self.pathname)
+        (fd, temp_pathname) = tempfile.mkstemp(dir=dirname or os.curdir,
+                                               prefix=os.path.basename(self.pathname))
+        try:
+            with os.fdopen(fd, "w") as fp:
+                json.dump(self._snapshot(), fp, indent=2, sort_keys=True)
+            if os.name == "nt" and os.path.exists(self.pathname):
+                os.remove(self.pathname)
+            os.rename(temp_pathname, self.pathname)
+        except:
+            os.remove(temp_pathname)
+            raise
+
+    def _snapshot(self):
+        """
+        Returns a snapshot of 'tracker' whose pipe throughput is
+        computed since the previous snapshot instead of since the start
+        of the invocation.
+        """
+
+        snapshot = self.tracker.snapshot()
+        now = snapshot["start_time"] + snapshot["elapsed_secs"]
+        pipe = snapshot["pipe"]
+        if self._last_pipe_sample is not None:
+            (last_sample_time, last_num_lines) = self._last_pipe_sample
+            pipe["lines_per_sec"] = _rate(pipe["lines"] - last_num_lines, now - last_sample_time)
+        self._last_pipe_sample = (now, pipe["lines"])
+        return snapshot
+
+
+# The ProgressTracker for the resmoke.py invocation.
+TRACKER = ProgressTracker()
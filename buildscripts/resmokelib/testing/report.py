@@ -5,11 +5,12 @@ and timing information for the report.json file.
 
 from __future__ import absolute_import
 
-import copy
+import json
 import threading
 import time
 import unittest
 
+from . import history as _history
 from .. import config as _config
 from .. import logging
 
@@ -19,15 +20,30 @@ class TestReport(unittest.TestResult):
     Records test status and timing information.
     """
 
-    def __init__(self, job_logger, suite_options):
+    # Percentiles of the time taken by each hook that are included in the report.
+    _HOOK_PERCENTILES = (50, 90, 99)
+
+    # Map of test status to the counter of the tests with that status.
+    _STATUS_COUNTERS = {
+        "pass": "num_succeeded",
+        "fail": "num_failed",
+        "error": "num_errored",
+        "timeout": "num_interrupted",
+    }
+
+    def __init__(self, job_logger, suite_options, history_recorder=None):
         """
         Initializes the TestReport with the buildlogger configuration.
+
+        If 'history_recorder' is specified, then the status and duration
+        of each test is also appended to the local test history.
         """
 
         unittest.TestResult.__init__(self)
 
         self.job_logger = job_logger
         self.suite_options = suite_options
+        self.history_recorder = history_recorder
 
         self._lock = threading.Lock()
 
@@ -60,7 +76,7 @@ class TestReport(unittest.TestResult):
                     # then it is possible for 'test_info' to be modified by a job thread later on.
                     # We make a shallow copy in order to ensure 'num_interrupted' is consistent with
                     # the actual number of tests that have status equal to "timeout".
-                    test_info = copy.copy(test_info)
+                    test_info = test_info.copy()
 
                     # TestReport.addXX() may not have been called.
                     if test_info.status is None or test_info.return_code is None:
@@ -81,15 +97,13 @@ class TestReport(unittest.TestResult):
                         # Use the current time as the time that the test finished running.
                         test_info.end_time = combining_time
 
-                    combined_report.test_infos.append(test_info)
-
-                combined_report.num_dynamic += report.num_dynamic
+                    combined_report._add_test_info(test_info)
 
-        # Recompute number of success, failures, and errors.
-        combined_report.num_succeeded = len(combined_report.get_successful())
-        combined_report.num_failed = len(combined_report.get_failed())
-        combined_report.num_errored = len(combined_report.get_errored())
-        combined_report.num_interrupted = len(combined_report.get_interrupted())
+                for (hook_name, hook_durations) in report.hook_durations.iteritems():
+                    combined_report.hook_durations.setdefault(hook_name, []).extend(hook_durations)
+                for (hook_name, hook_summaries) in report._hook_summaries.iteritems():
+                    combined_report._hook_summaries.setdefault(hook_name, []).extend(
+                        hook_summaries)
 
         return combined_report
 
@@ -108,9 +122,8 @@ class TestReport(unittest.TestResult):
         self.job_logger.info("Running %s...\n%s", basename, command)
 
         with self._lock:
-            self.test_infos.append(test_info)
-            if dynamic:
-                self.num_dynamic += 1
+            test_info.hook_elapsed = self._pending_hook_elapsed.pop(test_info.test_id, 0.0)
+            self._add_test_info(test_info)
 
         # Set up the test-specific logger.
         test_logger = self.job_logger.new_test_logger(test.short_name(), test.basename(),
@@ -133,6 +146,9 @@ class TestReport(unittest.TestResult):
         time_taken = test_info.end_time - test_info.start_time
         self.job_logger.info("%s ran in %0.2f seconds.", test.basename(), time_taken)
 
+        if self.history_recorder is not None:
+            self.history_recorder.record(test_info)
+
         # Asynchronously closes the buildlogger test handler to avoid having too many threads open
         # on 32-bit systems.
         for handler in test.logger.handlers:
@@ -152,13 +168,9 @@ class TestReport(unittest.TestResult):
         unittest.TestResult.addError(self, test, err)
 
         with self._lock:
-            self.num_errored += 1
-
             # We don't distinguish between test failures and Python errors in Evergreen.
             test_info = self._find_test_info(test)
-            test_info.status = "error"
-            test_info.evergreen_status = "fail"
-            test_info.return_code = test.return_code
+            self._set_status(test_info, "error", "fail", test.return_code)
 
     def setError(self, test):
         """
@@ -171,15 +183,7 @@ class TestReport(unittest.TestResult):
                 raise ValueError("stopTest was not called on %s" % (test.basename()))
 
             # We don't distinguish between test failures and Python errors in Evergreen.
-            test_info.status = "error"
-            test_info.evergreen_status = "fail"
-            test_info.return_code = 2
-
-        # Recompute number of success, failures, and errors.
-        self.num_succeeded = len(self.get_successful())
-        self.num_failed = len(self.get_failed())
-        self.num_errored = len(self.get_errored())
-        self.num_interrupted = len(self.get_interrupted())
+            self._set_status(test_info, "error", "fail", 2)
 
     def addFailure(self, test, err):
         """
@@ -190,17 +194,9 @@ class TestReport(unittest.TestResult):
         unittest.TestResult.addFailure(self, test, err)
 
         with self._lock:
-            self.num_failed += 1
-
             test_info = self._find_test_info(test)
-            test_info.status = "fail"
-            if test_info.dynamic:
-                # Dynamic tests are used for data consistency checks, so the failures are never
-                # silenced.
-                test_info.evergreen_status = "fail"
-            else:
-                test_info.evergreen_status = self.suite_options.report_failure_status
-            test_info.return_code = test.return_code
+            self._set_status(test_info, "fail", self._get_failure_status(test_info),
+                             test.return_code)
 
     def setFailure(self, test, return_code=1):
         """
@@ -212,20 +208,7 @@ class TestReport(unittest.TestResult):
             if test_info.end_time is None:
                 raise ValueError("stopTest was not called on %s" % (test.basename()))
 
-            test_info.status = "fail"
-            if test_info.dynamic:
-                # Dynamic tests are used for data consistency checks, so the failures are never
-                # silenced.
-                test_info.evergreen_status = "fail"
-            else:
-                test_info.evergreen_status = self.suite_options.report_failure_status
-            test_info.return_code = return_code
-
-        # Recompute number of success, failures, and errors.
-        self.num_succeeded = len(self.get_successful())
-        self.num_failed = len(self.get_failed())
-        self.num_errored = len(self.get_errored())
-        self.num_interrupted = len(self.get_interrupted())
+            self._set_status(test_info, "fail", self._get_failure_status(test_info), return_code)
 
     def addSuccess(self, test):
         """
@@ -235,12 +218,74 @@ class TestReport(unittest.TestResult):
         unittest.TestResult.addSuccess(self, test)
 
         with self._lock:
-            self.num_succeeded += 1
-
             test_info = self._find_test_info(test)
-            test_info.status = "pass"
-            test_info.evergreen_status = "pass"
-            test_info.return_code = test.return_code
+            self._set_status(test_info, "pass", "pass", test.return_code)
+
+    def record_hook(self, hook_name, elapsed_secs, test=None, before=False):
+        """
+        Records that a call to a 'hook_name' hook took 'elapsed_secs'
+        seconds.
+
+        If 'test' is specified, then the time is also attributed to it
+        as overhead. If 'before' is true, then the hook ran before 'test'
+        and its overhead is attributed once 'test' is started, rather
+        than to an earlier run of the same test.
+        """
+
+        with self._lock:
+            self.hook_durations.setdefault(hook_name, []).append(elapsed_secs)
+            if test is None:
+                return
+
+            test_id = test.id()
+            test_info = None if before else self._test_infos_by_id.get(test_id)
+            if test_info is not None:
+                test_info.hook_elapsed += elapsed_secs
+                return
+
+            self._pending_hook_elapsed[test_id] = (
+                self._pending_hook_elapsed.get(test_id, 0.0) + elapsed_secs)
+
+    def get_hook_timings(self):
+        """
+        Returns a list of (hook name, timing information) pairs ordered
+        from the hook with the largest to the smallest total time.
+
+        The timing information is a dict with the number of calls, the
+        total and longest time taken, and the 50th, 90th and 99th
+        percentiles of the time taken.
+
+        The percentiles of a hook whose timings were merged from other
+        report files are only estimated, since those files don't include
+        the duration of each call. The number of calls, and the total and
+        longest time taken are exact.
+        """
+
+        with self._lock:
+            hook_durations = {hook_name: sorted(durations)
+                              for (hook_name, durations) in self.hook_durations.iteritems()
+                              if durations}
+            hook_summaries = {hook_name: list(summaries)
+                              for (hook_name, summaries) in self._hook_summaries.iteritems()}
+
+        hook_timings = []
+        for hook_name in set(hook_durations) | set(hook_summaries):
+            summaries = hook_summaries.get(hook_name, [])
+            durations = hook_durations.get(hook_name)
+            if durations is not None:
+                timings = {
+                    "count": len(durations),
+                    "total_secs": sum(durations),
+                    "max_secs": durations[-1],
+                }
+                for percentile in TestReport._HOOK_PERCENTILES:
+                    timings["p%d_secs" % percentile] = _history.percentile_of_sorted(durations,
+                                                                                     percentile)
+                summaries.append(timings)
+            hook_timings.append((hook_name, _merge_hook_timings(summaries)))
+
+        hook_timings.sort(key=lambda hook_timing: (-hook_timing[1]["total_secs"], hook_timing[0]))
+        return hook_timings
 
     def wasSuccessful(self):
         """
@@ -293,35 +338,71 @@ class TestReport(unittest.TestResult):
         Used to create the report.json file.
         """
 
-        results = []
         with self._lock:
-            for test_info in self.test_infos:
-                result = {
-                    "test_file": test_info.test_id,
-                    "status": test_info.evergreen_status,
-                    "exit_code": test_info.return_code,
-                    "start": test_info.start_time,
-                    "end": test_info.end_time,
-                    "elapsed": test_info.end_time - test_info.start_time,
-                }
+            results = [self._result_as_dict(test_info) for test_info in self.test_infos]
+            failures = self.num_failed + self.num_errored + self.num_interrupted
+
+        return {
+            "results": results,
+            "failures": failures,
+            "hooks": dict(self.get_hook_timings()),
+        }
+
+    def write_json(self, fp, extra_fields=None):
+        """
+        Writes the test result information returned by as_dict() to the
+        file object 'fp' as JSON, along with the fields of the dict
+        'extra_fields'.
+
+        The results are encoded and written one at a time rather than
+        building the whole report in memory first.
+        """
 
-                if test_info.url_endpoint is not None:
-                    result["url"] = test_info.url_endpoint
-                    result["url_raw"] = test_info.url_endpoint + "?raw=1"
+        hook_timings = dict(self.get_hook_timings())
 
-                results.append(result)
+        fp.write('{"results": [')
+        with self._lock:
+            for (i, test_info) in enumerate(self.test_infos):
+                if i > 0:
+                    fp.write(", ")
+                fp.write(json.dumps(self._result_as_dict(test_info)))
+            failures = self.num_failed + self.num_errored + self.num_interrupted
+        fp.write('], "failures": %d, "hooks": %s' % (failures, json.dumps(hook_timings)))
+
+        for (key, value) in (extra_fields or {}).iteritems():
+            fp.write(", %s: %s" % (json.dumps(key), json.dumps(value)))
+        fp.write("}")
+
+    @staticmethod
+    def _result_as_dict(test_info):
+        """
+        Returns the entry of the report.json file for 'test_info'.
+        """
+
+        result = {
+            "test_file": test_info.test_id,
+            "status": test_info.evergreen_status,
+            "exit_code": test_info.return_code,
+            "start": test_info.start_time,
+            "end": test_info.end_time,
+            "elapsed": test_info.end_time - test_info.start_time,
+            "hook_elapsed": test_info.hook_elapsed,
+        }
 
-            return {
-                "results": results,
-                "failures": self.num_failed + self.num_errored + self.num_interrupted,
-            }
+        if test_info.url_endpoint is not None:
+            result["url"] = test_info.url_endpoint
+            result["url_raw"] = test_info.url_endpoint + "?raw=1"
+
+        return result
 
     @classmethod
     def from_dict(cls, report_dict):
         """
         Returns the test report instance copied from a dict (generated in as_dict).
 
-        Used when combining reports instances.
+        Used when combining reports instances. The report.json file
+        doesn't include the duration of each hook call, so only the
+        timing information of each hook is restored.
         """
 
         report = cls(logging.loggers.EXECUTOR_LOGGER, _config.SuiteOptions.ALL_INHERITED.resolve())
@@ -335,16 +416,11 @@ class TestReport(unittest.TestResult):
             test_info.return_code = result["exit_code"]
             test_info.start_time = result["start"]
             test_info.end_time = result["end"]
-            report.test_infos.append(test_info)
-
-            if is_dynamic:
-                report.num_dynamic += 1
+            test_info.hook_elapsed = result.get("hook_elapsed", 0.0)
+            report._add_test_info(test_info)
 
-        # Update cached values for number of successful and failed tests.
-        report.num_failed = len(report.get_failed())
-        report.num_errored = len(report.get_errored())
-        report.num_interrupted = len(report.get_interrupted())
-        report.num_succeeded = len(report.get_successful())
+        for (hook_name, timings) in report_dict.get("hooks", {}).iteritems():
+            report._hook_summaries[hook_name] = [timings]
 
         return report
 
@@ -355,6 +431,17 @@ class TestReport(unittest.TestResult):
 
         with self._lock:
             self.test_infos = []
+            # Map of test id to the status and timing information of the most recent run of the
+            # test.
+            self._test_infos_by_id = {}
+
+            # Map of hook name to a list of the time taken by each call to the hook.
+            self.hook_durations = {}
+            # Map of hook name to a list of the timing information of the hook read from report
+            # files, whose durations of each call are unknown.
+            self._hook_summaries = {}
+            # Map of test id to the time spent in hooks before the test was started.
+            self._pending_hook_elapsed = {}
 
             self.num_dynamic = 0
             self.num_succeeded = 0
@@ -368,15 +455,74 @@ class TestReport(unittest.TestResult):
         'test'.
         """
 
-        test_id = test.id()
+        test_info = self._test_infos_by_id.get(test.id())
+        if test_info is None:
+            raise ValueError("Details for %s not found in the report" % (test.basename()))
+        return test_info
+
+    def _add_test_info(self, test_info):
+        """
+        Adds 'test_info' to the report and updates the counters for its
+        status.
+        """
+
+        self.test_infos.append(test_info)
+        self._test_infos_by_id[test_info.test_id] = test_info
+        if test_info.dynamic:
+            self.num_dynamic += 1
+        self._update_counter(test_info.status, 1)
+
+    def _set_status(self, test_info, status, evergreen_status, return_code):
+        """
+        Changes the outcome of 'test_info' and updates the counters for
+        its previous and new statuses.
+        """
+
+        self._update_counter(test_info.status, -1)
+        test_info.status = status
+        test_info.evergreen_status = evergreen_status
+        test_info.return_code = return_code
+        self._update_counter(status, 1)
 
-        # Search the list backwards to efficiently find the status and timing information of a test
-        # that was recently started.
-        for test_info in reversed(self.test_infos):
-            if test_info.test_id == test_id:
-                return test_info
+    def _update_counter(self, status, delta):
+        counter = TestReport._STATUS_COUNTERS.get(status)
+        if counter is not None:
+            setattr(self, counter, getattr(self, counter) + delta)
 
-        raise ValueError("Details for %s not found in the report" % (test.basename()))
+    def _get_failure_status(self, test_info):
+        """
+        Returns the Evergreen status of 'test_info' when it fails.
+        """
+
+        if test_info.dynamic:
+            # Dynamic tests are used for data consistency checks, so the failures are never
+            # silenced.
+            return "fail"
+        return self.suite_options.report_failure_status
+
+
+def _merge_hook_timings(summaries):
+    """
+    Returns the timing information of a hook that combines each of the
+    timing information dicts in 'summaries'.
+
+    The percentiles are estimated by weighting the percentiles of each
+    summary by its number of calls.
+    """
+
+    if len(summaries) == 1:
+        return summaries[0]
+
+    count = sum(summary["count"] for summary in summaries)
+    timings = {
+        "count": count,
+        "total_secs": sum(summary["total_secs"] for summary in summaries),
+        "max_secs": max(summary["max_secs"] for summary in summaries),
+    }
+    for percentile in TestReport._HOOK_PERCENTILES:
+        key = "p%d_secs" % percentile
+        timings[key] = sum(summary[key] * summary["count"] for summary in summaries) / float(count)
+    return timings
 
 
 class _TestInfo(object):
@@ -384,6 +530,11 @@ class _TestInfo(object):
     Holder for the test status and timing information.
     """
 
+    # A report can contain hundreds of thousands of tests when they are repeated, so _TestInfo
+    # instances don't have a __dict__.
+    __slots__ = ("test_id", "dynamic", "start_time", "end_time", "status", "evergreen_status",
+                 "return_code", "url_endpoint", "hook_elapsed")
+
     def __init__(self, test_id, dynamic):
         """
         Initializes the _TestInfo instance.
@@ -398,3 +549,16 @@ class _TestInfo(object):
         self.evergreen_status = None
         self.return_code = None
         self.url_endpoint = None
+
+        # Time spent in hooks before and after the test ran.
+        self.hook_elapsed = 0.0
+
+    def copy(self):
+        """
+        Returns a shallow copy of the _TestInfo instance.
+        """
+
+        test_info = _TestInfo(self.test_id, self.dynamic)
+        for attr in _TestInfo.__slots__:
+            setattr(test_info, attr, getattr(self, attr))
+        return test_info
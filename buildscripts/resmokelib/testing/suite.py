@@ -312,6 +312,7 @@ class Suite(object):
 
         if report.num_succeeded == num_run and num_skipped == 0:
             sb.append("All %d test(s) passed in %0.2f seconds." % (num_run, time_taken))
+            Suite._summarize_hooks(report, sb)
             return _summary.Summary(num_run, time_taken, num_run, 0, 0, 0)
 
         summary = _summary.Summary(num_run, time_taken, report.num_succeeded, num_skipped,
@@ -330,8 +331,28 @@ class Suite(object):
             for test_info in report.get_errored():
                 sb.append("    %s" % (test_info.test_id))
 
+        Suite._summarize_hooks(report, sb)
         return summary
 
+    @staticmethod
+    def _summarize_hooks(report, sb):
+        """
+        Appends the time spent in each hook of 'report', from the
+        largest to the smallest total, onto the string builder 'sb'.
+        """
+
+        hook_timings = report.get_hook_timings()
+        if not hook_timings:
+            return
+
+        sb.append("Time spent in hooks (%0.2f seconds):"
+                  % (sum(timings["total_secs"] for (_, timings) in hook_timings)))
+        for (hook_name, timings) in hook_timings:
+            sb.append("    %s: %0.2f seconds in %d call(s) (p50 %0.2f, p90 %0.2f, p99 %0.2f,"
+                      " max %0.2f seconds)"
+                      % (hook_name, timings["total_secs"], timings["count"], timings["p50_secs"],
+                         timings["p90_secs"], timings["p99_secs"], timings["max_secs"]))
+
     @staticmethod
     def log_summaries(logger, suites, time_taken):
         sb = []
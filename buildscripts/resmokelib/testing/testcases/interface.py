@@ -153,16 +153,33 @@ class ProcessTestCase(TestCase):  # pylint: disable=abstract-method
         """
         Runs the specified process.
         """
+        self._start_process(process)
+        if not self._wait_process(process):
+            raise self.failureException("%s failed" % (self.shortDescription()))
+
+    def _start_process(self, process):
+        """
+        Starts the specified process without waiting for it to exit.
+        """
         self.logger.info("Starting %s...\n%s", self.shortDescription(), process.as_command())
 
         process.start()
         self.logger.info("%s started with pid %s.", self.shortDescription(), process.pid)
 
+    def _wait_process(self, process):
+        """
+        Waits for the specified process to exit and records its exit
+        status in 'return_code'.
+
+        Returns true if the process exited successfully, and false
+        otherwise.
+        """
         self.return_code = process.wait()
         if self.return_code != 0:
-            raise self.failureException("%s failed" % (self.shortDescription()))
+            return False
 
         self.logger.info("%s finished.", self.shortDescription())
+        return True
 
     def _make_process(self):
         """
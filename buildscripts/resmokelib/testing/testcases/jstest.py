@@ -4,11 +4,11 @@ unittest.TestCase for JavaScript tests.
 
 from __future__ import absolute_import
 
+import collections
 import os
 import os.path
 import shutil
-import sys
-import threading
+import time
 
 from . import interface
 from ... import config
@@ -134,36 +134,33 @@ class JSTestCase(interface.ProcessTestCase):
 
     REGISTERED_NAME = "js_test"
 
-    class ThreadWithException(threading.Thread):
-        """
-        A wrapper for the thread class that lets us propagate exceptions.
-        """
-
-        def __init__(self, *args, **kwargs):
-            threading.Thread.__init__(self, *args, **kwargs)
-            self.exc_info = None
-
-        def run(self):
-            try:
-                threading.Thread.run(self)
-            except:
-                self.exc_info = sys.exc_info()
-
     DEFAULT_CLIENT_NUM = 1
 
+    # Number of seconds between checks of whether the clients have exited.
+    _POLL_INTERVAL_SECS = 0.05
+
     def __init__(self,
                  logger,
                  js_filename,
                  shell_executable=None,
-                 shell_options=None):
+                 shell_options=None,
+                 client_start_interval_ms=0,
+                 fail_fast=False):
         """
         Initializes the JSTestCase with the JS file to run.
+
+        When the test is run by multiple clients, they are started
+        'client_start_interval_ms' milliseconds apart. If 'fail_fast' is
+        true, then the remaining clients are stopped as soon as one of
+        them fails. Otherwise, every client runs to completion.
         """
 
         interface.ProcessTestCase.__init__(self, logger, "JSTest", js_filename)
         self.num_clients = JSTestCase.DEFAULT_CLIENT_NUM
         self.test_case_template = _SingleJSTestCase(logger, js_filename, shell_executable,
                                                     shell_options)
+        self.client_start_interval_secs = client_start_interval_ms / 1000.0
+        self.fail_fast = fail_fast
 
     def configure(self, fixture, num_clients=DEFAULT_CLIENT_NUM, *args, **kwargs):
         interface.ProcessTestCase.configure(self, fixture, *args, **kwargs)
@@ -221,45 +218,108 @@ class JSTestCase(interface.ProcessTestCase):
             self.return_code = test_case.return_code
 
     def _run_multiple_copies(self):
-        threads = []
-        test_cases = []
+        """
+        Runs a mongo shell for each client from the current thread.
+
+        The exit status of each client is logged as soon as it exits,
+        rather than once all of them have. The output of all of the
+        clients is only read by the shared PipeMultiplexer with
+        --multiplexProcessOutput. Without it, each client still gets two
+        threads reading its stdout and stderr.
+        """
+
+        clients = []
+        for thread_id in xrange(self.num_clients):
+            logger = self.logger.new_test_thread_logger(self.test_kind, str(thread_id))
+            test_case = self._create_test_case_for_thread(logger, thread_id)
+            clients.append(_Client(thread_id, test_case, test_case._make_process()))
+
+        self.return_code = 0
+        failed_client = None
+        not_started = collections.deque(clients)
+        running = []
+        next_start_time = time.time()
         try:
-            # If there are multiple clients, make a new thread for each client.
-            for thread_id in xrange(self.num_clients):
-                logger = self.logger.new_test_thread_logger(self.test_kind, str(thread_id))
-                test_case = self._create_test_case_for_thread(logger, thread_id)
-                test_cases.append(test_case)
-
-                thread = self.ThreadWithException(target=test_case.run_test)
-                threads.append(thread)
-                thread.start()
+            while not_started or running:
+                if not_started and time.time() >= next_start_time:
+                    client = not_started.popleft()
+                    client.start()
+                    running.append(client)
+                    next_start_time = time.time() + self.client_start_interval_secs
+
+                for client in [client for client in running if client.poll() is not None]:
+                    running.remove(client)
+                    return_code = client.wait()
+                    if return_code == 0 or failed_client is not None:
+                        continue
+
+                    failed_client = client
+                    self.return_code = return_code
+                    if self.fail_fast:
+                        self.logger.info(
+                            "Stopping the remaining clients of jstest %s because client %d"
+                            " failed.", self.basename(), client.thread_id)
+                        not_started.clear()
+                        for other in running:
+                            other.stop()
+
+                if not_started or running:
+                    wait_secs = self._POLL_INTERVAL_SECS
+                    if not_started:
+                        wait_secs = min(wait_secs, max(0, next_start_time - time.time()))
+                    time.sleep(wait_secs)
         except:
-            self.logger.exception("Encountered an error starting threads for jstest %s.",
+            self.logger.exception("Encountered an error running the clients of jstest %s.",
                                   self.basename())
+            for client in running:
+                client.stop()
+            for client in running:
+                client.wait()
             raise
-        finally:
-            for thread in threads:
-                thread.join()
-
-            # Go through each test's return code and store the first nonzero one if it exists.
-            return_code = 0
-            for test_case in test_cases:
-                if test_case.return_code != 0:
-                    return_code = test_case.return_code
-                    break
-            self.return_code = return_code
-
-            for (thread_id, thread) in enumerate(threads):
-                if thread.exc_info is not None:
-                    if not isinstance(thread.exc_info[1], self.failureException):
-                        self.logger.error(
-                            "Encountered an error inside thread %d running jstest %s.",
-                            thread_id, self.basename(),
-                            exc_info=thread.exc_info)
-                    raise thread.exc_info
+
+        if failed_client is not None:
+            raise self.failureException("%s failed" % (failed_client.test_case.shortDescription()))
 
     def run_test(self):
         if self.num_clients == 1:
             self._run_single_copy()
         else:
             self._run_multiple_copies()
+
+
+class _Client(object):
+    """
+    A mongo shell running one of the copies of a jstest.
+    """
+
+    def __init__(self, thread_id, test_case, process):
+        self.thread_id = thread_id
+        self.test_case = test_case
+        self.process = process
+        self._stopped = False
+
+    def start(self):
+        self.test_case._start_process(self.process)
+
+    def poll(self):
+        return self.process.poll()
+
+    def stop(self):
+        self._stopped = True
+        self.process.stop()
+
+    def wait(self):
+        """
+        Waits for the client to exit and returns its exit status.
+        """
+
+        if self._stopped:
+            return_code = self.process.wait()
+            self.test_case.return_code = return_code
+            self.test_case.logger.info("%s was stopped with exit code %d.",
+                                       self.test_case.shortDescription(), return_code)
+        elif not self.test_case._wait_process(self.process):
+            self.test_case.logger.error("%s failed with exit code %d.",
+                                        self.test_case.shortDescription(),
+                                        self.test_case.return_code)
+        return self.test_case.return_code
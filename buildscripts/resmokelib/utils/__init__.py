@@ -14,6 +14,10 @@ import yaml
 from . import archival
 
 
+# Use the LibYAML bindings when they are available since they parse the suite files much faster.
+_YAML_SAFE_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
 @contextlib.contextmanager
 def open_or_use_stdout(filename):
     """
@@ -76,7 +80,7 @@ def load_yaml_file(filename):
     """
     try:
         with open(filename, "r") as fp:
-            return yaml.safe_load(fp)
+            return yaml.load(fp, Loader=_YAML_SAFE_LOADER)
     except yaml.YAMLError as err:
         raise ValueError("File '%s' contained invalid YAML: %s" % (filename, err))
 
@@ -94,6 +98,6 @@ def load_yaml(value):
     Attempts to parse 'value' as YAML.
     """
     try:
-        return yaml.safe_load(value)
+        return yaml.load(value, Loader=_YAML_SAFE_LOADER)
     except yaml.YAMLError as err:
         raise ValueError("Attempted to parse invalid YAML value '%s': %s" % (value, err))
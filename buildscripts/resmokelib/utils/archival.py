@@ -6,9 +6,14 @@ from __future__ import absolute_import
 
 import Queue
 import collections
+import distutils.spawn  # pylint: disable=no-name-in-module
+import gzip
 import json
 import math
+import multiprocessing
+import multiprocessing.pool
 import os
+import subprocess
 import sys
 import tarfile
 import tempfile
@@ -20,6 +25,21 @@ _IS_WINDOWS = sys.platform == "win32" or sys.platform == "cygwin"
 if _IS_WINDOWS:
     import ctypes
 
+# Archives are split so that each part holds at most this many bytes of uncompressed files. The
+# parts are compressed concurrently.
+CHUNK_SIZE_BYTES = 512 * 1024 * 1024
+
+# Compression level used when falling back to the gzip module. The tarfile module always uses the
+# slowest level, 9, which isn't worth it for data files that are only downloaded to debug a failure.
+_GZIP_COMPRESSION_LEVEL = 1
+
+# Command that compresses stdin to stdout with the parallel gzip implementation, used instead of the
+# gzip module when it is installed. Its output is in the gzip format like the gzip module's.
+_PIGZ_ARGS = ["pigz", "-c", "-{:d}".format(_GZIP_COMPRESSION_LEVEL)]
+
+_ARCHIVE_SUFFIX = ".tgz"
+_ARCHIVE_CONTENT_TYPE = "application/x-gzip"
+
 UploadArgs = collections.namedtuple(
     "UploadArgs",
     ["archival_file",
@@ -27,8 +47,7 @@ UploadArgs = collections.namedtuple(
      "local_file",
      "content_type",
      "s3_bucket",
-     "s3_path",
-     "delete_file"])
+     "s3_path"])
 
 ArchiveArgs = collections.namedtuple(
     "ArchiveArgs", ["archival_file", "display_name", "remote_file"])
@@ -79,6 +98,100 @@ def free_space(path):
         return stat.f_bavail * stat.f_bsize
 
 
+def find_compressor():
+    """
+    Returns the command used for compressing archives, or None if the
+    gzip module should be used instead.
+    """
+
+    if distutils.spawn.find_executable(_PIGZ_ARGS[0]) is not None:
+        return _PIGZ_ARGS
+    return None
+
+
+def _compressor_name(compressor):
+    """ Returns the name of 'compressor' for logging. """
+    return compressor[0] if compressor is not None else "gzip"
+
+
+def list_archive_members(input_files):
+    """
+    Returns a list of (path, size) pairs for the files in 'input_files'
+    and their subdirectories.
+
+    Directories are listed with a size of 0 so that empty directories
+    are preserved in the archive. Raises an OSError if any of
+    'input_files' doesn't exist.
+    """
+
+    members = []
+    for input_file in input_files:
+        os.lstat(input_file)
+        if not os.path.isdir(input_file) or os.path.islink(input_file):
+            members.append((input_file, os.path.getsize(input_file)))
+            continue
+
+        for root_dir, dirs, files in os.walk(input_file):
+            dirs.sort()
+            members.append((root_dir, 0))
+            for name in sorted(files):
+                full_name = os.path.join(root_dir, name)
+                try:
+                    members.append((full_name, os.lstat(full_name).st_size))
+                except OSError:
+                    # The file was removed while listing the directory.
+                    pass
+    return members
+
+
+def split_into_chunks(members, chunk_size_bytes):
+    """
+    Splits the (path, size) pairs in 'members' into consecutive lists
+    whose sizes add up to at most 'chunk_size_bytes', unless a single
+    file is larger than that.
+    """
+
+    chunks = []
+    curr_chunk = []
+    curr_chunk_size = 0
+    for (path, size) in members:
+        if curr_chunk and curr_chunk_size + size > chunk_size_bytes:
+            chunks.append(curr_chunk)
+            curr_chunk = []
+            curr_chunk_size = 0
+        curr_chunk.append(path)
+        curr_chunk_size += size
+    chunks.append(curr_chunk)
+    return chunks
+
+
+def get_part_s3_path(s3_path, part_num):
+    """
+    Returns the S3 path of part 'part_num' of an archive which was
+    split into several parts. The first part keeps 's3_path'.
+    """
+
+    if part_num == 1:
+        return s3_path
+    (base, ext) = os.path.splitext(s3_path)
+    return "{}.part{:d}{}".format(base, part_num, ext)
+
+
+# The archives of all Archival instances are uploaded by a single pool of worker threads, which is
+# created the first time an archive is uploaded.
+_UPLOAD_POOL = None
+_UPLOAD_POOL_LOCK = threading.Lock()
+
+
+def _get_upload_pool():
+    """ Returns the pool of threads which upload archives to S3. """
+    global _UPLOAD_POOL  # pylint: disable=global-statement
+    with _UPLOAD_POOL_LOCK:
+        if _UPLOAD_POOL is None:
+            _UPLOAD_POOL = multiprocessing.pool.ThreadPool(multiprocessing.cpu_count())
+        return _UPLOAD_POOL
+
+
 def remove_file(file_name):
     """ Attempts to remove file. Returns status and message. """
     try:
@@ -129,14 +242,10 @@ class Archival(object):
         else:
             self.s3_client = s3_client
 
-        # Start the worker thread which uploads the archive.
-        self._upload_queue = Queue.Queue()
-        self._upload_worker = threading.Thread(
-            target=self._upload_to_s3_wkr,
-            args=(self._upload_queue, self._archive_file_queue, logger, self.s3_client),
-            name="upload_worker")
-        self._upload_worker.setDaemon(True)
-        self._upload_worker.start()
+        self.compressor = find_compressor()
+
+        # The results of the uploads which were started by this instance and may not have finished.
+        self._pending_uploads = []
 
     @staticmethod
     def _get_s3_client():
@@ -158,23 +267,28 @@ class Archival(object):
         start_time = time.time()
         with self._lock:
             if not input_files:
-                status = 1
-                message = "No input_files specified"
+                return 1, "No input_files specified"
             elif self.limit_size_mb and self.size_mb >= self.limit_size_mb:
-                status = 1
-                message = "Files not archived, {}MB size limit reached".format(self.limit_size_mb)
+                return 1, "Files not archived, {}MB size limit reached".format(self.limit_size_mb)
             elif self.limit_files and self.num_files >= self.limit_files:
-                status = 1
-                message = "Files not archived, {} file limit reached".format(self.limit_files)
-            else:
-                status, message, file_size_mb = self._archive_files(
-                    display_name,
-                    input_files,
-                    s3_bucket,
-                    s3_path)
-
-                if status == 0:
-                    self.num_files += 1
+                return 1, "Files not archived, {} file limit reached".format(self.limit_files)
+
+            # Reserve the file so that archives from other jobs, which are created without holding
+            # the lock, respect the file limit.
+            self.num_files += 1
+
+        status = 1
+        file_size_mb = 0
+        try:
+            status, message, file_size_mb = self._archive_files(
+                display_name,
+                input_files,
+                s3_bucket,
+                s3_path)
+        finally:
+            with self._lock:
+                if status != 0:
+                    self.num_files -= 1
                 self.size_mb += file_size_mb
                 self.archive_time += time.time() - start_time
 
@@ -202,102 +316,140 @@ class Archival(object):
                 json.dump(archival_json, archival_fh)
             queue.task_done()
 
-    @staticmethod
-    def _upload_to_s3_wkr(queue, archive_file_queue, logger, s3_client):
-        """" Worker thread: Upload to S3 from 'queue', dispatch to 'archive_file_queue'. """
-        while True:
-            upload_args = queue.get()
-            # Exit worker thread when sentinel is received.
-            if upload_args is None:
-                queue.task_done()
-                archive_file_queue.put(None)
-                break
-            extra_args = {"ContentType": upload_args.content_type, "ACL": "public-read"}
-            logger.debug("Uploading to S3 %s to bucket %s path %s",
-                         upload_args.local_file,
-                         upload_args.s3_bucket,
-                         upload_args.s3_path)
-            upload_completed = False
-            try:
-                s3_client.upload_file(upload_args.local_file,
-                                      upload_args.s3_bucket,
-                                      upload_args.s3_path,
-                                      ExtraArgs=extra_args)
-                upload_completed = True
-                logger.debug("Upload to S3 completed for %s to bucket %s path %s",
-                             upload_args.local_file,
-                             upload_args.s3_bucket,
-                             upload_args.s3_path)
-            except Exception as err:
-                logger.exception("Upload to S3 error %s", err)
-
-            if upload_args.delete_file:
-                status, message = remove_file(upload_args.local_file)
-                if status:
-                    logger.error("Upload to S3 delete file error %s", message)
-
-            remote_file = "https://s3.amazonaws.com/{}/{}".format(
-                upload_args.s3_bucket, upload_args.s3_path)
-            if upload_completed:
-                archive_file_queue.put(ArchiveArgs(
-                    upload_args.archival_file, upload_args.display_name, remote_file))
-
-            queue.task_done()
-
     def _archive_files(self, display_name, input_files, s3_bucket, s3_path):
         """
-        Gather 'input_files' into a single tar/gzip and archive to 's3_path'.
+        Gather 'input_files' into tar archives and upload them to
+        's3_path'.
 
-        The caller waits until the list of files has been tar/gzipped to a temporary file.
-        The S3 upload and subsequent update to 'archival_json_file' will be done asynchronosly.
+        Files totaling more than CHUNK_SIZE_BYTES are split into several
+        archives, which are compressed concurrently. The caller waits
+        until the files have been compressed to temporary files, since
+        the input files may be modified once it continues. The S3 upload
+        and subsequent update to 'archival_json_file' will be done
+        asynchronously.
 
-        Returns status, message and size_mb of archive.
+        Returns status, message and size_mb of the archives.
         """
 
         # Parameter 'input_files' can either be a string or list of strings.
         if isinstance(input_files, str):
             input_files = [input_files]
 
-        message = "Tar/gzip {} files: {}".format(display_name, input_files)
-        status = 0
-        size_mb = 0
-
-        # Tar/gzip to a temporary file.
-        _, temp_file = tempfile.mkstemp(suffix=".tgz")
+        members = list_archive_members(input_files)
+        compressor = self.compressor
+        message = "Tar/{} {} files: {}".format(_compressor_name(compressor), display_name,
+                                               input_files)
 
-        # Check if there is sufficient space for the temporary tgz file.
-        if file_list_size(input_files) > free_space(temp_file):
-            status, message = remove_file(temp_file)
-            if status:
-                self.logger.warning("Removing tarfile due to insufficient space - %s", message)
+        # Check if there is sufficient space for the temporary archives.
+        if sum(size for (_, size) in members) > free_space(tempfile.gettempdir()):
             return 1, "Insufficient space for {}".format(message), 0
 
+        chunks = split_into_chunks(members, CHUNK_SIZE_BYTES)
+        max_concurrent_chunks = multiprocessing.cpu_count()
+        tar_writers = []
         try:
-            with tarfile.open(temp_file, "w:gz") as tar_handle:
-                for input_file in input_files:
-                    try:
-                        tar_handle.add(input_file)
-                    except (IOError, OSError, tarfile.TarError) as err:
-                        message = "{}; Unable to add {} to archive file: {}".format(
-                            message, input_file, err)
-        except (IOError, OSError, tarfile.TarError) as err:
-            status, message = remove_file(temp_file)
-            if status:
-                self.logger.warning("Removing tarfile due to creation failure - %s", message)
-            return 1, str(err), 0
-
-        # Round up the size of the archive.
-        size_mb = int(math.ceil(float(file_list_size(temp_file)) / (1024 * 1024)))
-        self._upload_queue.put(UploadArgs(
-            self.archival_json_file,
-            display_name,
-            temp_file,
-            "application/x-gzip",
-            s3_bucket,
-            s3_path,
-            True))
-
-        return status, message, size_mb
+            for start in xrange(0, len(chunks), max_concurrent_chunks):
+                batch = []
+                for chunk in chunks[start:start + max_concurrent_chunks]:
+                    # Track each writer as soon as it is started so that it is cleaned up if
+                    # starting the next one fails.
+                    tar_writer = _TarWriter(chunk, compressor)
+                    tar_writers.append(tar_writer)
+                    batch.append(tar_writer)
+                for tar_writer in batch:
+                    tar_writer.join()
+        except:
+            for tar_writer in tar_writers:
+                tar_writer.join()
+                self._remove_temp_file(tar_writer.temp_file)
+            raise
+
+        errors = [tar_writer.error for tar_writer in tar_writers if tar_writer.error is not None]
+        if errors:
+            for tar_writer in tar_writers:
+                self._remove_temp_file(tar_writer.temp_file)
+            return 1, "Unable to create archive {}: {}".format(s3_path, errors[0]), 0
+
+        size_bytes = 0
+        for (i, tar_writer) in enumerate(tar_writers):
+            size_bytes += os.path.getsize(tar_writer.temp_file)
+            for warning in tar_writer.warnings:
+                message = "{}; {}".format(message, warning)
+
+            chunk_display_name = display_name
+            if len(tar_writers) > 1:
+                chunk_display_name = "{} (part {:d} of {:d})".format(display_name, i + 1,
+                                                                     len(tar_writers))
+            upload_args = UploadArgs(self.archival_json_file, chunk_display_name,
+                                     tar_writer.temp_file, _ARCHIVE_CONTENT_TYPE, s3_bucket,
+                                     get_part_s3_path(s3_path, i + 1))
+            self._start_upload(upload_args)
+
+        # Round up the size of the archives.
+        size_mb = int(math.ceil(float(size_bytes) / (1024 * 1024)))
+        return 0, message, size_mb
+
+    def _remove_temp_file(self, temp_file):
+        status, message = remove_file(temp_file)
+        if status:
+            self.logger.warning("Removing tarfile due to creation failure - %s", message)
+
+    def _start_upload(self, upload_args):
+        """ Uploads the archive described by 'upload_args' in the background. """
+        result = _get_upload_pool().apply_async(self._upload_to_s3, (upload_args, ))
+        with self._lock:
+            self._pending_uploads = [pending for pending in self._pending_uploads
+                                     if not pending.ready()]
+            self._pending_uploads.append(result)
+
+    def _upload_to_s3(self, upload_args):
+        """
+        Worker thread: Upload 'upload_args.local_file' to S3, remove it,
+        and dispatch to the 'archival_json_file' worker thread.
+        """
+
+        extra_args = {"ContentType": upload_args.content_type, "ACL": "public-read"}
+        self.logger.debug("Uploading to S3 %s to bucket %s path %s", upload_args.local_file,
+                          upload_args.s3_bucket, upload_args.s3_path)
+        upload_completed = False
+        try:
+            self.s3_client.upload_file(upload_args.local_file, upload_args.s3_bucket,
+                                       upload_args.s3_path, ExtraArgs=extra_args)
+            upload_completed = True
+            self.logger.debug("Upload to S3 completed for %s to bucket %s path %s",
+                              upload_args.local_file, upload_args.s3_bucket, upload_args.s3_path)
+        except Exception as err:
+            self.logger.exception("Upload to S3 error %s", err)
+
+        status, message = remove_file(upload_args.local_file)
+        if status:
+            self.logger.error("Upload to S3 delete file error %s", message)
+
+        if upload_completed:
+            remote_file = "https://s3.amazonaws.com/{}/{}".format(upload_args.s3_bucket,
+                                                                  upload_args.s3_path)
+            self._archive_file_queue.put(ArchiveArgs(upload_args.archival_file,
+                                                     upload_args.display_name, remote_file))
+
+    def wait_for_uploads(self, timeout=None):
+        """
+        Waits for the uploads started by this instance to finish.
+
+        Returns true if they all finished within 'timeout' seconds.
+        """
+
+        with self._lock:
+            pending_uploads = list(self._pending_uploads)
+
+        deadline = None if timeout is None else time.time() + timeout
+        for result in pending_uploads:
+            if deadline is None:
+                result.wait()
+            else:
+                result.wait(max(0, deadline - time.time()))
+            if not result.ready():
+                return False
+        return True
 
     def check_thread(self, thread, expected_alive):
         if thread.isAlive() and not expected_alive:
@@ -311,19 +463,19 @@ class Archival(object):
 
     def exit(self, timeout=30):
         """ Waits for worker threads to finish. """
-        # Put sentinel on upload queue to trigger worker thread exit.
-        self._upload_queue.put(None)
-        self.check_thread(self._upload_worker, True)
-        self.check_thread(self._archive_file_worker, True)
-        self._upload_worker.join(timeout=timeout)
-        self.check_thread(self._upload_worker, False)
+        if not self.wait_for_uploads(timeout=timeout):
+            self.logger.warning(
+                "The uploads did not complete, some files might not have been uploaded"
+                " to S3 or archived to %s.", self.archival_json_file)
 
-        # Archive file worker thread exit should be triggered by upload thread worker.
+        # Put sentinel on archive file queue to trigger worker thread exit.
+        self.check_thread(self._archive_file_worker, True)
+        self._archive_file_queue.put(None)
         self._archive_file_worker.join(timeout=timeout)
         self.check_thread(self._archive_file_worker, False)
 
-        self.logger.info("Total tar/gzip archive time is %0.2f seconds, for %d file(s) %d MB",
-                         self.archive_time, self.num_files, self.size_mb)
+        self.logger.info("Total tar/%s archive time is %0.2f seconds, for %d file(s) %d MB",
+                         _compressor_name(self.compressor), self.archive_time, self.num_files, self.size_mb)
 
     def files_archived_num(self):
         """ Returns the number of the archived files. """
@@ -332,3 +484,75 @@ class Archival(object):
     def files_archived_size_mb(self):
         """ Returns the size of the archived files. """
         return self.size_mb
+
+
+class _Compressor(object):
+    """
+    Compresses the data written to 'input' into 'output_file', with the
+    'compressor' command or with the gzip module if it is None.
+    """
+
+    def __init__(self, compressor, output_file):
+        if compressor is not None:
+            self._process = subprocess.Popen(compressor, stdin=subprocess.PIPE,
+                                             stdout=output_file, close_fds=not _IS_WINDOWS)
+            self.input = self._process.stdin
+        else:
+            self._process = None
+            self.input = gzip.GzipFile(fileobj=output_file, mode="wb",
+                                       compresslevel=_GZIP_COMPRESSION_LEVEL)
+
+    def close_input(self):
+        """ Signals that all of the data to compress has been written. """
+        self.input.close()
+
+    def wait(self):
+        """ Waits for the compression to finish and returns its exit code. """
+        if self._process is None:
+            return 0
+        return self._process.wait()
+
+
+class _TarWriter(threading.Thread):
+    """
+    Writes a tar archive of 'input_files', compressed with 'compressor',
+    to the temporary file 'temp_file'.
+    """
+
+    def __init__(self, input_files, compressor):
+        threading.Thread.__init__(self, name="tar_writer")
+        self.daemon = True
+        self._input_files = input_files
+        self._compressor = compressor
+        (temp_fd, self.temp_file) = tempfile.mkstemp(suffix=_ARCHIVE_SUFFIX)
+        self._output_file = os.fdopen(temp_fd, "wb")
+        self.warnings = []
+        self.error = None
+        self.start()
+
+    def run(self):
+        try:
+            try:
+                self._write_archive()
+            finally:
+                self._output_file.close()
+        except (IOError, OSError, tarfile.TarError) as err:
+            self.error = err
+
+    def _write_archive(self):
+        compressor = _Compressor(self._compressor, self._output_file)
+        try:
+            # Use the streaming mode since the output may be a pipe.
+            with tarfile.open(fileobj=compressor.input, mode="w|") as tar_handle:
+                for input_file in self._input_files:
+                    try:
+                        tar_handle.add(input_file, recursive=False)
+                    except (IOError, OSError) as err:
+                        self.warnings.append("Unable to add {} to archive file: {}".format(
+                            input_file, err))
+        finally:
+            compressor.close_input()
+            exit_code = compressor.wait()
+
+        if exit_code != 0:
+            self.error = "{} exited with code {:d}".format(_compressor_name(self._compressor), exit_code)
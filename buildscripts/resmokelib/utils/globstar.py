@@ -145,11 +145,19 @@ def _list_dir(pathname):
     """
 
     try:
-        (_root, dirs, files) = os.walk(pathname).next()
-        return (dirs, files)
-    except StopIteration:
+        names = os.listdir(pathname)
+    except os.error:
         return None  # 'pathname' directory does not exist
 
+    dirs = []
+    files = []
+    for name in names:
+        if os.path.isdir(os.path.join(pathname, name)):
+            dirs.append(name)
+        else:
+            files.append(name)
+    return (dirs, files)
+
 
 def _expand(pathname):
     """
@@ -10,7 +10,7 @@ import yaml
 
 
 # TODO: use a more robust regular expression for matching tags
-_JSTEST_TAGS_RE = re.compile(r".*@tags\s*:\s*(\[[^\]]*\])", re.DOTALL)
+_JSTEST_TAGS_RE = re.compile(r"@tags\s*:\s*(\[[^\]]*\])")
 
 
 def get_tags(pathname):
@@ -33,7 +33,7 @@ def get_tags(pathname):
     """
 
     with open(pathname) as fp:
-        match = _JSTEST_TAGS_RE.match(fp.read())
+        match = _find_tags(fp.read())
         if match:
             try:
                 # TODO: it might be worth supporting the block (indented) style of YAML lists in
@@ -49,6 +49,25 @@ def get_tags(pathname):
     return []
 
 
+def _find_tags(contents):
+    """
+    Returns the match for the last "@tags:" definition in 'contents', or
+    None if there isn't one.
+
+    Only the positions where "@tags" occurs are tried, since anchoring
+    the regular expression with a leading ".*" would backtrack over the
+    whole file.
+    """
+
+    pos = contents.rfind("@tags")
+    while pos != -1:
+        match = _JSTEST_TAGS_RE.match(contents, pos)
+        if match:
+            return match
+        pos = contents.rfind("@tags", 0, pos)
+    return None
+
+
 def _strip_jscomments(s):
     """
     Given a string 's' that represents the contents after the "@tags:"
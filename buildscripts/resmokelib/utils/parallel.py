@@ -0,0 +1,108 @@
+"""
+Helper for calling several functions concurrently from separate threads.
+"""
+
+from __future__ import absolute_import
+
+import sys
+import threading
+
+
+class _CallThread(threading.Thread):
+    """
+    A thread that stores the return value of its target, or the
+    exception it raised.
+    """
+
+    def __init__(self, func, name):
+        threading.Thread.__init__(self, name=name)
+        # Do not wait for the call to finish if interrupted by the user.
+        self.daemon = True
+
+        self._func = func
+        self.result = None
+        self.exc_info = None
+
+    def run(self):
+        try:
+            self.result = self._func()
+        except:
+            self.exc_info = sys.exc_info()
+
+
+def run_concurrently(funcs, name="ParallelCall", max_workers=None):
+    """
+    Calls each of the no-argument functions in 'funcs' on its own thread
+    and waits for all of them to return.
+
+    If 'max_workers' is specified, then the functions are instead called
+    by at most that many threads, each of which calls the next function
+    that hasn't been called yet once its previous one returns.
+
+    Returns the list of their return values in the same order as 'funcs'.
+    If any of the functions raised an exception, then the exception of
+    the first such function is re-raised once all of them have returned.
+    """
+
+    # Avoid the overhead of starting a thread when there is nothing to run concurrently.
+    if len(funcs) == 1:
+        return [funcs[0]()]
+
+    if max_workers is not None and max_workers < len(funcs):
+        return _run_with_workers(funcs, name, max_workers)
+
+    threads = [_CallThread(func, "%s-%d" % (name, i)) for (i, func) in enumerate(funcs)]
+    _start_and_join(threads)
+
+    for thread in threads:
+        if thread.exc_info is not None:
+            raise thread.exc_info[0], thread.exc_info[1], thread.exc_info[2]
+
+    return [thread.result for thread in threads]
+
+
+def _run_with_workers(funcs, name, max_workers):
+    """
+    Calls each of the no-argument functions in 'funcs' from 'max_workers'
+    threads and returns their return values like run_concurrently().
+    """
+
+    lock = threading.Lock()
+    pending = iter(enumerate(funcs))
+    results = [None] * len(funcs)
+    exc_infos = [None] * len(funcs)
+
+    def call_pending():
+        while True:
+            with lock:
+                try:
+                    (i, func) = next(pending)
+                except StopIteration:
+                    return
+
+            try:
+                results[i] = func()
+            except:
+                exc_infos[i] = sys.exc_info()
+
+    _start_and_join([_CallThread(call_pending, "%s-%d" % (name, i)) for i in xrange(max_workers)])
+
+    for exc_info in exc_infos:
+        if exc_info is not None:
+            raise exc_info[0], exc_info[1], exc_info[2]
+
+    return results
+
+
+def _start_and_join(threads):
+    """
+    Starts each of 'threads' and waits for all of them to finish.
+    """
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        # Need to pass a timeout to join() so that KeyboardInterrupt exceptions are propagated.
+        while thread.is_alive():
+            thread.join(1.0)
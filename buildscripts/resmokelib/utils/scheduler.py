@@ -1,66 +1,224 @@
 """
-A thread-safe version of sched.scheduler since the class wasn't made
-thread-safe until Python 3.3.
+A thread-safe event scheduler for the threads that flush and close
+logging handlers.
+
+Unlike sched.scheduler, canceled events are marked as such rather than
+removed from the queue, waiting threads are only woken up when their
+next deadline changes, and events scheduled with the same key are
+coalesced.
 """
 
 from __future__ import absolute_import
 
 import heapq
-import sched
+import itertools
 import threading
 
 
-class Scheduler(sched.scheduler):
+# The queue is compacted once it holds more than this many canceled events and they make up more
+# than half of it.
+_MIN_CANCELED_TO_COMPACT = 1024
+
+
+class Event(object):
+    """
+    An action scheduled to run at a particular time.
+    """
+
+    __slots__ = ("time", "action", "argument", "key", "_state")
+
+    _PENDING = 0
+    _STARTED = 1
+    _CANCELED = 2
+
+    def __init__(self, time, action, argument, key):
+        self.time = time
+        self.action = action
+        self.argument = argument
+        self.key = key
+        self._state = Event._PENDING
+
+    def is_pending(self):
+        """
+        Returns true if the event has neither started nor been canceled.
+        """
+        return self._state == Event._PENDING
+
+
+class Scheduler(object):
     """
     A thread-safe, general purpose event scheduler.
     """
 
-    def __init__(self, timefunc, delayfunc):
-        sched.scheduler.__init__(self, timefunc, delayfunc)
+    def __init__(self, timefunc):
+        self.timefunc = timefunc
+
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+
+        # Heap of (time, sequence number, Event) tuples. The sequence number runs events scheduled
+        # for the same time in the order they were scheduled.
+        self._queue = []
+        self._sequence = itertools.count()
+        self._num_canceled = 0
+
+        # Map of key to the pending event scheduled with that key.
+        self._keyed_events = {}
 
-        # We use a recursive lock because sched.scheduler.enter() calls sched.scheduler.enterabs().
-        self._queue_lock = threading.RLock()
+        self._interrupted = False
 
-    def enterabs(self, time, priority, action, argument):
-        with self._queue_lock:
-            return sched.scheduler.enterabs(self, time, priority, action, argument)
+    def enter(self, delay, action, argument=(), key=None):
+        """
+        Schedules 'action' to be called with 'argument' after 'delay'
+        seconds and returns the scheduled event.
 
-    def enter(self, delay, priority, action, argument):
-        with self._queue_lock:
-            return sched.scheduler.enter(self, delay, priority, action, argument)
+        If 'key' isn't None and an event with the same key is already
+        pending, then the two are coalesced: the pending event is
+        returned instead if it is scheduled to run no later than the new
+        one would be.
+        """
+        return self.enterabs(self.timefunc() + delay, action, argument, key)
+
+    def enterabs(self, time, action, argument=(), key=None):
+        """
+        Schedules 'action' to be called with 'argument' at 'time' and
+        returns the scheduled event.
+
+        See enter() for how events with the same 'key' are coalesced.
+        """
+
+        with self._lock:
+            if key is not None:
+                pending = self._keyed_events.get(key)
+                if pending is not None:
+                    if pending.time <= time:
+                        return pending
+                    self._cancel(pending)
+
+            event = Event(time, action, argument, key)
+            heapq.heappush(self._queue, (time, next(self._sequence), event))
+            if key is not None:
+                self._keyed_events[key] = event
+
+            # Only the thread waiting for the next event needs to be woken up, and only when the new
+            # event is due before the one it is waiting for.
+            if self._queue[0][2] is event:
+                self._condition.notify()
+
+            return event
 
     def cancel(self, event):
-        with self._queue_lock:
-            return sched.scheduler.cancel(self, event)
+        """
+        Cancels 'event' if it hasn't started yet.
+
+        Returns true if the event was canceled, and false otherwise.
+        """
+
+        with self._lock:
+            if not event.is_pending():
+                return False
+            self._cancel(event)
+            return True
+
+    def _cancel(self, event):
+        """
+        Marks 'event' as canceled. Must be called while holding the
+        lock.
+        """
+
+        event._state = Event._CANCELED
+        if event.key is not None and self._keyed_events.get(event.key) is event:
+            del self._keyed_events[event.key]
+
+        # The event is left in the queue and discarded once it reaches the front, unless canceled
+        # events make up most of the queue.
+        self._num_canceled += 1
+        if (self._num_canceled > _MIN_CANCELED_TO_COMPACT
+                and self._num_canceled * 2 > len(self._queue)):
+            self._queue = [entry for entry in self._queue if entry[2].is_pending()]
+            heapq.heapify(self._queue)
+            self._num_canceled = 0
+
+    def _discard_canceled(self):
+        """
+        Removes the canceled events from the front of the queue. Must be
+        called while holding the lock.
+        """
+
+        while self._queue and not self._queue[0][2].is_pending():
+            heapq.heappop(self._queue)
+            self._num_canceled -= 1
 
     def empty(self):
-        with self._queue_lock:
-            return sched.scheduler.empty(self)
+        """
+        Returns true if there are no pending events.
+        """
+
+        with self._lock:
+            self._discard_canceled()
+            return not self._queue
+
+    def run_pending(self):
+        """
+        Runs all of the events that are due, in order.
+
+        Returns the number of events that were run.
+        """
+
+        with self._lock:
+            now = self.timefunc()
+            due = []
+            while True:
+                self._discard_canceled()
+                if not self._queue or self._queue[0][0] > now:
+                    break
 
-    # The implementation for the run() method was adapted from sched.scheduler.run() in Python 3.6.
-    def run(self):
-        while True:
-            with self._queue_lock:
+                event = heapq.heappop(self._queue)[2]
+                event._state = Event._STARTED
+                if event.key is not None and self._keyed_events.get(event.key) is event:
+                    del self._keyed_events[event.key]
+                due.append(event)
+
+        # The events are run without holding the lock so that they can schedule other events.
+        for event in due:
+            event.action(*event.argument)
+
+        return len(due)
+
+    def wait(self):
+        """
+        Waits until the next event is due or interrupt() is called.
+        """
+
+        with self._lock:
+            while not self._interrupted:
+                self._discard_canceled()
                 if not self._queue:
-                    break
+                    self._condition.wait()
+                    continue
 
-                now = self.timefunc()
-                event = self._queue[0]
+                remaining = self._queue[0][0] - self.timefunc()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
 
-                should_execute = event.time <= now
-                if should_execute:
-                    heapq.heappop(self._queue)
+            self._interrupted = False
 
-            if should_execute:
-                event.action(*event.argument)
+    def interrupt(self):
+        """
+        Causes the current or next call to wait() to return
+        immediately.
+        """
 
-                # sched.scheduler calls delayfunc(0) in order to yield the CPU and let other threads
-                # run, so we do the same here.
-                self.delayfunc(0)
-            else:
-                self.delayfunc(event.time - now)
+        with self._lock:
+            self._interrupted = True
+            self._condition.notify_all()
 
     @property
     def queue(self):
-        with self._queue_lock:
-            return sched.scheduler.queue.fget(self)
+        """
+        Returns the pending events in the order they will run.
+        """
+
+        with self._lock:
+            return [event for (_, _, event) in sorted(self._queue) if event.is_pending()]
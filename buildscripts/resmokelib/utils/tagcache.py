@@ -0,0 +1,127 @@
+"""
+Persistent cache of the tags found in the comments of JavaScript tests.
+"""
+
+from __future__ import absolute_import
+
+import json
+import multiprocessing.pool
+import os
+import os.path
+import tempfile
+
+from . import jscomment
+
+
+class TagCache(object):
+    """
+    A cache of the tags of each JS test file, keyed on its path and
+    invalidated when the file's mtime or size changes.
+
+    The cache is loaded from 'pathname' on first use and written back
+    whenever new tags were extracted, so that later invocations of
+    resmoke.py only need to stat() the test files.
+    """
+
+    _VERSION = 1
+
+    def __init__(self, pathname):
+        """
+        Initializes the TagCache to be stored at 'pathname'.
+        """
+
+        self.pathname = pathname
+
+        # Map of test file path to a [mtime, size, tags] list.
+        self._entries = None
+
+    def get_tags(self, test_path):
+        """
+        Returns the list of tags of 'test_path'.
+        """
+
+        self.update([test_path])
+        return list(self._entries[test_path][2])
+
+    def update(self, test_paths):
+        """
+        Extracts the tags of each file in 'test_paths' that isn't cached
+        or was modified since it was cached. The files are read in
+        parallel.
+        """
+
+        if self._entries is None:
+            self._entries = self._load()
+
+        stale = []
+        for test_path in set(test_paths):
+            stat = os.stat(test_path)
+            key = [stat.st_mtime, stat.st_size]
+            entry = self._entries.get(test_path)
+            if entry is None or entry[:2] != key:
+                stale.append((test_path, key))
+
+        if not stale:
+            return
+
+        if len(stale) == 1:
+            all_tags = [jscomment.get_tags(stale[0][0])]
+        else:
+            pool = multiprocessing.pool.ThreadPool(min(len(stale), multiprocessing.cpu_count()))
+            try:
+                all_tags = pool.map(jscomment.get_tags, [test_path for (test_path, _) in stale])
+            finally:
+                pool.close()
+                pool.join()
+
+        for ((test_path, key), tags) in zip(stale, all_tags):
+            self._entries[test_path] = key + [tags]
+
+        self._save()
+
+    def _load(self):
+        """
+        Returns the entries stored at 'pathname', or an empty dict if
+        the file doesn't exist or can't be read.
+        """
+
+        try:
+            with open(self.pathname) as fp:
+                contents = json.load(fp)
+        except (IOError, OSError, ValueError):
+            return {}
+
+        if not isinstance(contents, dict) or contents.get("version") != TagCache._VERSION:
+            return {}
+        return contents.get("files", {})
+
+    def _save(self):
+        """
+        Writes the entries to 'pathname'. Errors are ignored since the
+        cache can always be rebuilt.
+        """
+
+        dirname = os.path.dirname(self.pathname)
+        try:
+            if dirname and not os.path.isdir(dirname):
+                try:
+                    os.makedirs(dirname)
+                except os.error:
+                    # Directory was created by another process.
+                    pass
+
+            # Write to a temporary file and rename it so that another resmoke.py process never
+            # reads a partially written cache.
+            (fd, temp_pathname) = tempfile.mkstemp(dir=dirname or os.curdir,
+                                                   prefix=os.path.basename(self.pathname))
+            try:
+                with os.fdopen(fd, "w") as fp:
+                    json.dump({"version": TagCache._VERSION, "files": self._entries}, fp)
+                if os.name == "nt" and os.path.exists(self.pathname):
+                    os.remove(self.pathname)
+                os.rename(temp_pathname, self.pathname)
+            except:
+                os.remove(temp_pathname)
+                raise
+        except (IOError, OSError):
+            pass
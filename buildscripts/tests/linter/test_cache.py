@@ -0,0 +1,97 @@
+"""Unit tests for the buildscripts.linter.cache module."""
+
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from buildscripts.linter import cache
+
+
+class TestLintCache(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base_dir)
+        self.cache_dir = os.path.join(self.base_dir, "build")
+        self.linted = []
+        self.errors = set()
+
+        # Lint all of the files in one batch so the files that are linted don't depend on which
+        # batch fails first.
+        patcher = mock.patch.object(cache.parallel, "get_cpu_count", return_value=1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _write(self, name, contents):
+        path = os.path.join(self.base_dir, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, "w") as file_handle:
+            file_handle.write(contents)
+        return path
+
+    def _lint(self, file_names):
+        self.linted.extend(os.path.relpath(file_name, self.base_dir) for file_name in file_names)
+        return [file_name for file_name in file_names
+                if os.path.basename(file_name) not in self.errors]
+
+    def _run(self, file_names, version="1.0", dependency_file_names=None):
+        self.linted = []
+        lint_cache = cache.LintCache(self.cache_dir, "linter", version, [".linterrc"],
+                                     self.base_dir)
+        result = cache.lint_file_batches(lint_cache, file_names, self._lint,
+                                          dependency_file_names=dependency_file_names)
+        return (result, sorted(self.linted))
+
+    def test_unchanged_files_are_skipped(self):
+        files = [self._write("a.py", "a"), self._write("dir/b.py", "b")]
+        self.assertEqual((True, ["a.py", "dir/b.py"]), self._run(files))
+        self.assertEqual((True, []), self._run(files))
+
+        self._write("dir/b.py", "changed")
+        self.assertEqual((True, ["dir/b.py"]), self._run(files))
+
+    def test_files_with_errors_are_linted_again(self):
+        files = [self._write("a.py", "a"), self._write("b.py", "b")]
+        self.errors.add("a.py")
+        self.assertEqual((False, ["a.py", "b.py"]), self._run(files))
+        self.assertEqual((False, ["a.py"]), self._run(files))
+
+    def test_version_change(self):
+        files = [self._write("a.py", "a")]
+        self._run(files)
+        self.assertEqual((True, ["a.py"]), self._run(files, version="2.0"))
+
+    def test_config_change(self):
+        files = [self._write("a.py", "a"), self._write("dir/b.py", "b")]
+        self._run(files)
+
+        self._write("dir/.linterrc", "option")
+        self.assertEqual((True, ["dir/b.py"]), self._run(files))
+
+        self._write(".linterrc", "option")
+        self.assertEqual((True, ["a.py", "dir/b.py"]), self._run(files))
+
+    def test_dependencies(self):
+        files = [self._write("a.py", "a"), self._write("b.py", "b")]
+        dependencies = files + [self._write("c.py", "c")]
+        self._run(files, dependency_file_names=dependencies)
+        self.assertEqual((True, []), self._run(files, dependency_file_names=dependencies))
+
+        self._write("b.py", "changed")
+        self.assertEqual((True, ["a.py", "b.py"]),
+                         self._run(files, dependency_file_names=dependencies))
+
+        # A change to a file that isn't linted can still affect the files that import it.
+        self._write("c.py", "changed")
+        self.assertEqual((True, ["a.py", "b.py"]),
+                         self._run(files, dependency_file_names=dependencies))
+
+    def test_unreadable_file_is_linted(self):
+        missing = os.path.join(self.base_dir, "missing.py")
+        self.assertEqual((True, ["missing.py"]), self._run([missing]))
+        self.assertEqual((True, ["missing.py"]), self._run([missing]))
@@ -0,0 +1,95 @@
+"""Unit tests for the buildscripts.linter.runner module."""
+
+from __future__ import absolute_import
+
+import subprocess
+import unittest
+
+import mock
+
+from buildscripts.linter import base
+from buildscripts.linter import pylint
+from buildscripts.linter import runner
+from buildscripts.linter import yapf
+
+
+class TestMakeBatches(unittest.TestCase):
+    def test_empty(self):
+        self.assertEqual([], runner.make_batches([], 4))
+
+    def test_spread_across_cpus(self):
+        file_names = ["f%d.py" % (i) for i in range(10)]
+        batches = runner.make_batches(file_names, 4)
+        self.assertEqual([3, 3, 3, 1], [len(batch) for batch in batches])
+        self.assertEqual(file_names, sum(batches, []))
+
+    def test_max_files(self):
+        file_names = ["f%d.py" % (i) for i in range(250)]
+        batches = runner.make_batches(file_names, 1)
+        self.assertEqual([100, 100, 50], [len(batch) for batch in batches])
+
+    def test_max_chars(self):
+        file_names = ["x" * 9999 for _ in range(7)]
+        batches = runner.make_batches(file_names, 1)
+        self.assertEqual([3, 3, 1], [len(batch) for batch in batches])
+
+
+class TestRunLintBatch(unittest.TestCase):
+    def setUp(self):
+        self.lint_runner = runner.LintRunner()
+        patcher = mock.patch.object(runner.subprocess, "check_output")
+        self.check_output = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _make_linter(self, linter):
+        with mock.patch.object(pylint.git, "get_base_dir", return_value="/repo"):
+            return base.LinterInstance(linter(), ["linter"])
+
+    def test_batch_passes(self):
+        linter = self._make_linter(pylint.PyLintLinter)
+        self.check_output.return_value = ""
+        self.assertEqual(["a.py", "b.py"], self.lint_runner.run_lint_batch(linter,
+                                                                           ["a.py", "b.py"]))
+        self.assertEqual(1, self.check_output.call_count)
+        self.assertEqual(["a.py", "b.py"], self.check_output.call_args[0][0][-2:])
+
+    def test_batch_fails(self):
+        linter = self._make_linter(pylint.PyLintLinter)
+
+        def check_output(cmd):
+            if "b.py" in cmd:
+                raise subprocess.CalledProcessError(1, cmd, "b.py(1): [C0111] error")
+            return ""
+
+        self.check_output.side_effect = check_output
+        self.assertEqual(["a.py", "c.py"],
+                         self.lint_runner.run_lint_batch(linter, ["a.py", "b.py", "c.py"]))
+        # The batch and then each of its files.
+        self.assertEqual(4, self.check_output.call_count)
+
+    def test_batch_diff(self):
+        linter = self._make_linter(yapf.YapfLinter)
+        self.check_output.return_value = "--- a.py (original)"
+        with mock.patch.object(self.lint_runner, "run_lint", return_value=True) as run_lint:
+            self.assertEqual(["a.py", "b.py"],
+                             self.lint_runner.run_lint_batch(linter, ["a.py", "b.py"]))
+        self.assertEqual(2, run_lint.call_count)
+        self.assertEqual("--diff", self.check_output.call_args[0][0][1])
+
+
+class TestFindLinters(unittest.TestCase):
+    def test_installed_version(self):
+        process = mock.Mock(returncode=0)
+        process.communicate.return_value = ("pylint 1.6.5,\nastroid 1.4.9\n", "")
+        with mock.patch.object(runner.subprocess, "Popen", return_value=process):
+            with mock.patch.object(pylint.git, "get_base_dir", return_value="/repo"):
+                linters = runner.find_linters([pylint.PyLintLinter()], {"pylint": "pylint"})
+        self.assertEqual("pylint 1.6.5,\nastroid 1.4.9", linters[0].version)
+
+    def test_wrong_version(self):
+        process = mock.Mock(returncode=0)
+        process.communicate.return_value = ("pylint 1.8.0\n", "")
+        with mock.patch.object(runner.subprocess, "Popen", return_value=process):
+            with mock.patch.object(pylint.git, "get_base_dir", return_value="/repo"):
+                self.assertIsNone(
+                    runner.find_linters([pylint.PyLintLinter()], {"pylint": "pylint"}))
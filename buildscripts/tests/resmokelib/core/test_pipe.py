@@ -0,0 +1,201 @@
+"""Unit tests for the resmokelib.core.pipe module."""
+
+from __future__ import absolute_import
+
+import logging
+import os
+import select
+import unittest
+
+import mock
+
+from buildscripts.resmokelib.core import pipe
+
+
+class TestLoggerPipeWatches(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger("pipe_unittests")
+        (read_fd, self.write_fd) = os.pipe()
+        self.pipe_out = os.fdopen(read_fd, "rb")
+
+    def _write(self, data):
+        os.write(self.write_fd, data)
+
+    def _finish(self, logger_pipe):
+        os.close(self.write_fd)
+        logger_pipe.wait_until_finished()
+
+    def test_watch_matches(self):
+        watch = pipe.OutputWatch("waiting for connections")
+        logger_pipe = pipe.LoggerPipe(self.logger, logging.INFO, self.pipe_out, watches=[watch])
+        self._write(b"starting up\n")
+        self._write(b"waiting for connections on port 20000\n")
+        self.assertTrue(watch.wait(10))
+        self._finish(logger_pipe)
+
+    def test_watch_not_matched(self):
+        watch = pipe.OutputWatch("waiting for connections")
+        logger_pipe = pipe.LoggerPipe(self.logger, logging.INFO, self.pipe_out, watches=[watch])
+        self._write(b"starting up\n")
+        self._finish(logger_pipe)
+        self.assertFalse(watch.wait(0))
+
+    def test_add_watch(self):
+        logger_pipe = pipe.LoggerPipe(self.logger, logging.INFO, self.pipe_out)
+        primary = pipe.OutputWatch("transition to PRIMARY")
+        secondary = pipe.OutputWatch("transition to SECONDARY")
+        logger_pipe.add_watch(primary)
+        logger_pipe.add_watch(secondary)
+        self._write(b"transition to SECONDARY\n")
+        self.assertTrue(secondary.wait(10))
+        self._finish(logger_pipe)
+        self.assertFalse(primary.is_set())
+
+    def test_remove_watch(self):
+        watch = pipe.OutputWatch("transition to PRIMARY")
+        logger_pipe = pipe.LoggerPipe(self.logger, logging.INFO, self.pipe_out, watches=[watch])
+        logger_pipe.remove_watch(watch)
+        self._write(b"transition to PRIMARY\n")
+        self._finish(logger_pipe)
+        self.assertFalse(watch.is_set())
+
+
+class TestLoggerPipeOutput(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.Logger("pipe_unittests")
+        self.handler = RecordingHandler()
+        self.logger.addHandler(self.handler)
+
+    def _read(self, data, level=logging.INFO):
+        (read_fd, write_fd) = os.pipe()
+        logger_pipe = pipe.LoggerPipe(self.logger, level, os.fdopen(read_fd, "rb"))
+        os.write(write_fd, data)
+        os.close(write_fd)
+        logger_pipe.wait_until_finished()
+        return logger_pipe
+
+    def test_lines(self):
+        logger_pipe = self._read(b"first\nsecond \r\n\nlast without newline")
+        self.assertEqual([u"first", u"second", u"", u"last without newline"], self.handler.messages)
+        self.assertEqual(4, logger_pipe.num_lines)
+
+    def test_many_lines(self):
+        lines = [b"line %d" % (i) for i in xrange(100000)]
+        logger_pipe = self._read(b"\n".join(lines) + b"\n")
+        self.assertEqual([line.decode("utf-8") for line in lines], self.handler.messages)
+        self.assertEqual(len(lines), logger_pipe.num_lines)
+
+    def test_invalid_utf8(self):
+        self._read(b"bad \xff byte\n")
+        self.assertEqual([u"bad \ufffd byte"], self.handler.messages)
+
+    def test_level(self):
+        self.handler.setLevel(logging.ERROR)
+        self._read(b"ignored\n", level=logging.INFO)
+        self._read(b"logged\n", level=logging.ERROR)
+        self.assertEqual([u"logged"], self.handler.messages)
+
+    def test_disabled_logger(self):
+        self.logger.disabled = True
+        self._read(b"ignored\n")
+        self.assertEqual([], self.handler.messages)
+
+    def test_logger_filter(self):
+        log_filter = logging.Filter()
+        log_filter.filter = lambda record: record.getMessage() != u"ignored"
+        self.logger.addFilter(log_filter)
+        self._read(b"ignored\nlogged\n")
+        self.assertEqual([u"logged"], self.handler.messages)
+
+    def test_batches(self):
+        batch_handler = mock.Mock(level=logging.NOTSET)
+        self.logger.addHandler(batch_handler)
+        log_filter = logging.Filter()
+        log_filter.filter = lambda record: record.getMessage() != u"ignored"
+        self.logger.addFilter(log_filter)
+
+        with mock.patch.object(self.handler, "acquire", wraps=self.handler.acquire) as acquire:
+            pipe._log_batch(self.logger, logging.INFO, [u"first", u"ignored", u"second"])
+        self.assertEqual(1, acquire.call_count)
+        self.assertEqual([u"first", u"second"], self.handler.messages)
+        [(records, ), _] = batch_handler.handle_batch.call_args
+        self.assertEqual([u"first", u"second"], [record.getMessage() for record in records])
+
+    def test_long_line_in_many_chunks(self):
+        (read_fd, write_fd) = os.pipe()
+        logger_pipe = pipe.LoggerPipe(self.logger, logging.INFO, os.fdopen(read_fd, "rb"))
+        for _ in xrange(100):
+            os.write(write_fd, b"x" * 1000)
+        os.write(write_fd, b"\nlast")
+        os.close(write_fd)
+        logger_pipe.wait_until_finished()
+        self.assertEqual([u"x" * 100000, u"last"], self.handler.messages)
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@unittest.skipUnless(os.name == "posix" and hasattr(select, "poll"), "requires select.poll()")
+class TestPipeMultiplexer(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.Logger("pipe_unittests")
+        self.handler = RecordingHandler()
+        self.logger.addHandler(self.handler)
+        self.multiplexer = pipe.PipeMultiplexer()
+
+    def tearDown(self):
+        self.multiplexer.stop()
+
+    def _new_pipe(self, watches=None):
+        (read_fd, write_fd) = os.pipe()
+        logger_pipe = pipe.LoggerPipe(self.logger, logging.INFO, os.fdopen(read_fd, "rb"),
+                                      watches=watches, multiplexer=self.multiplexer)
+        logger_pipe.wait_until_started()
+        return (logger_pipe, write_fd)
+
+    def test_many_pipes(self):
+        pipes = [self._new_pipe() for _ in xrange(50)]
+        for (i, (_, write_fd)) in enumerate(pipes):
+            os.write(write_fd, b"pipe %d line 1\npipe %d " % (i, i))
+        for (i, (_, write_fd)) in enumerate(pipes):
+            os.write(write_fd, b"line 2")
+            os.close(write_fd)
+        for (logger_pipe, _) in pipes:
+            logger_pipe.wait_until_finished()
+            self.assertEqual(2, logger_pipe.num_lines)
+
+        expected = []
+        for i in xrange(len(pipes)):
+            expected.extend([u"pipe %d line 1" % (i), u"pipe %d line 2" % (i)])
+        self.assertEqual(sorted(expected), sorted(self.handler.messages))
+
+    def test_watch(self):
+        watch = pipe.OutputWatch("waiting for connections")
+        (logger_pipe, write_fd) = self._new_pipe(watches=[watch])
+        os.write(write_fd, b"waiting for connections on port 20000\n")
+        self.assertTrue(watch.wait(10))
+        os.close(write_fd)
+        logger_pipe.wait_until_finished()
+
+    def test_stop_finishes_registered_pipes(self):
+        (logger_pipe, write_fd) = self._new_pipe()
+        self.multiplexer.stop()
+        logger_pipe.wait_until_finished()
+        os.close(write_fd)
+        with self.assertRaises(ValueError):
+            self._new_pipe()
+
+    def test_read_error_is_logged(self):
+        (logger_pipe, write_fd) = self._new_pipe()
+        with mock.patch.object(logger_pipe, "_read_available", side_effect=OSError("read failed")):
+            os.write(write_fd, b"line\n")
+            logger_pipe.wait_until_finished()
+        os.close(write_fd)
+        self.assertTrue(any("Encountered an error while reading" in message
+                            for message in self.handler.messages))
@@ -2,8 +2,15 @@
 
 from __future__ import absolute_import
 
+import BaseHTTPServer
+import SocketServer
 import json
+import threading
+import time
 import unittest
+import zlib
+
+import mock
 
 from buildscripts.resmokelib.logging import buildlogger
 
@@ -65,3 +72,191 @@ class TestLogsSplitter(unittest.TestCase):
     def size(logs):
         """Returns the size of the log lines when represented in JSON."""
         return len(json.dumps(logs, encoding="utf-8"))
+
+
+class TestJsonSize(unittest.TestCase):
+    """Unit tests for the _json_size() function."""
+
+    def test_matches_json_dumps(self):
+        values = ["", "x", u"caf\xe9", "tab\tand \"quotes\"", (1507824000.123456, u"msg"),
+                  [1, "two", [3.0]], None, True]
+        for value in values:
+            self.assertEqual(len(json.dumps(value, encoding="utf-8")),
+                             buildlogger._json_size(value))
+
+
+class TestBuildloggerHandler(unittest.TestCase):
+    """Unit tests for sending logs through the _BaseBuildloggerHandler class."""
+
+    def setUp(self):
+        self.server = _BuildloggerStandIn()
+        self.addCleanup(self.server.shutdown)
+
+        patchers = [
+            mock.patch.object(buildlogger._config, "BUILDLOGGER_URL", self.server.url),
+            mock.patch.object(buildlogger, "BUILDLOGGER_FALLBACK", mock.Mock()),
+            mock.patch.object(buildlogger, "_RETRY_INITIAL_DELAY_SECS", 0.01),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        build_config = {"username": "user", "password": "password"}
+        self.handler = buildlogger.BuildloggerGlobalHandler(build_config, "build_id")
+        self.addCleanup(self.handler.http_handler.close)
+        # Stop any retries that are still scheduled.
+        self.addCleanup(self._flush, [], close_called=True)
+
+    def _flush(self, lines, close_called=False):
+        self.handler._flush_buffer_with_lock([(1.0, line) for line in lines], close_called)
+
+    def test_compressed_requests(self):
+        lines = ["line %d" % (i) for i in xrange(1000)]
+        self._flush(lines)
+        self._flush(["last line"])
+
+        self.assertEqual(2, len(self.server.requests))
+        (headers, body) = self.server.requests[0]
+        self.assertEqual("gzip", headers.get("Content-Encoding"))
+        self.assertEqual(lines, [line for (_, line) in json.loads(body)])
+        # Small requests are sent uncompressed.
+        self.assertIsNone(self.server.requests[1][0].get("Content-Encoding"))
+        # Both requests are sent over the same connection.
+        self.assertEqual(1, len(self.server.client_addresses))
+
+    def test_compression_unsupported(self):
+        for status in (415, 400):
+            self.server.gzip_status = status
+            self.handler.http_handler.compress = True
+            lines = ["line %d" % (i) for i in xrange(1000)]
+            self._flush(lines)
+
+            (headers, body) = self.server.requests[-1]
+            self.assertIsNone(headers.get("Content-Encoding"))
+            self.assertEqual(lines, [line for (_, line) in json.loads(body)])
+            self.assertFalse(self.handler.http_handler.compress)
+            self.assertEqual([], self.handler.retry_buffer)
+
+    def test_compression_kept_when_server_fails(self):
+        self.server.num_failures = 2
+        self._flush(["line %d" % (i) for i in xrange(1000)])
+        # Both the compressed and the uncompressed request failed, so the server may still accept
+        # compressed request bodies.
+        self.assertTrue(self.handler.http_handler.compress)
+
+    def test_compression_kept_after_other_errors(self):
+        self.server.gzip_status = 503
+        lines = ["line %d" % (i) for i in xrange(1000)]
+        self._flush(lines)
+        # The request isn't sent again uncompressed, but retried later.
+        self.assertEqual([], self.server.requests)
+        self.assertTrue(self.handler.http_handler.compress)
+        self.assertEqual(lines, [line for (_, line) in self.handler.retry_buffer])
+
+        self.server.gzip_status = None
+        self.server.wait_for_lines(len(lines))
+        self.assertEqual(lines, self.server.lines)
+        self.assertEqual("gzip", self.server.requests[-1][0].get("Content-Encoding"))
+
+    def test_retry_in_background(self):
+        self.server.num_failures = 2
+        self._flush(["first"])
+        self._flush(["second"])
+        self.assertEqual(["first", "second"],
+                         [line for (_, line) in self.handler.retry_buffer])
+
+        self.server.wait_for_lines(2)
+        self.assertEqual(["first", "second"], self.server.lines)
+
+        # The retry buffer is updated once the response is received.
+        deadline = time.time() + 10
+        while self.handler.retry_buffer and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual([], self.handler.retry_buffer)
+
+    def test_retry_buffer_is_bounded(self):
+        self.server.num_failures = 1000
+        with mock.patch.object(buildlogger, "_MAX_RETRY_LINES", 3):
+            self._flush(["a", "b"])
+            self._flush(["c", "d", "e"])
+        self.assertEqual(["a", "b"], self._fallback_messages())
+        self.assertEqual(["c", "d", "e"], [line for (_, line) in self.handler.retry_buffer])
+
+    def test_close_logs_to_fallback(self):
+        self.server.num_failures = 1000
+        self._flush(["a"])
+        self._flush(["b"], close_called=True)
+        self.assertEqual(["a", "b"], self._fallback_messages())
+        self.assertEqual([], self.handler.retry_buffer)
+
+    @staticmethod
+    def _fallback_messages():
+        return [call[0][0] for call in buildlogger.BUILDLOGGER_FALLBACK.info.call_args_list]
+
+
+class _BuildloggerStandIn(object):
+    """A local HTTP server that accepts log lines like a buildlogger server."""
+
+    def __init__(self):
+        self.requests = []
+        self.lines = []
+        self.client_addresses = set()
+        self.num_failures = 0
+        # The status of the response to a compressed request body, or None to accept it.
+        self.gzip_status = None
+        self.condition = threading.Condition()
+
+        stand_in = self
+
+        class RequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):  # pylint: disable=invalid-name
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                status = stand_in.handle(dict(self.headers), body, self.client_address)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write("{}")
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = _ThreadingHTTPServer(("localhost", 0), RequestHandler)
+        self.url = "http://localhost:%d" % (self.httpd.server_address[1])
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def handle(self, headers, body, client_address):
+        headers = {key.title(): value for (key, value) in headers.items()}
+        with self.condition:
+            self.client_addresses.add(client_address)
+            if headers.get("Content-Encoding") == "gzip":
+                if self.gzip_status is not None:
+                    return self.gzip_status
+                body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+            self.requests.append((headers, body))
+
+            if self.num_failures > 0:
+                self.num_failures -= 1
+                return 500
+
+            self.lines.extend(line for (_, line) in json.loads(body))
+            self.condition.notify_all()
+            return 200
+
+    def wait_for_lines(self, num_lines):
+        with self.condition:
+            deadline = time.time() + 10
+            while len(self.lines) < num_lines and time.time() < deadline:
+                self.condition.wait(deadline - time.time())
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _ThreadingHTTPServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
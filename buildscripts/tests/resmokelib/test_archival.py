@@ -4,12 +4,18 @@
 
 from __future__ import absolute_import
 
+import io
 import logging
 import os
 import random
 import shutil
+import tarfile
 import tempfile
+import threading
 import unittest
+import zlib
+
+import mock
 
 from buildscripts.resmokelib.utils import archival
 
@@ -246,5 +252,133 @@ class ArchivalLimitTests(ArchivalTestCase):
         self.assertEqual(1, status, message)
 
 
+class CapturingS3Client(object):
+    """ Class to mock the S3 client which keeps the uploaded data. """
+
+    def __init__(self):
+        self.uploads = {}
+
+    def upload_file(self, file_name, bucket, key, **kwargs):
+        with open(file_name, "rb") as fileh:
+            self.uploads[key] = fileh.read()
+
+
+class ArchivalChunkTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.s3_client = CapturingS3Client()
+        self.archive = archival.Archival(
+            logging.getLogger("archival_unittests"),
+            archival_json_file=os.path.join(self.temp_dir, "archive.json"),
+            s3_client=self.s3_client)
+
+    def tearDown(self):
+        self.archive.exit()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _create_files(self, num_files, size):
+        data_dir = os.path.join(self.temp_dir, "data")
+        os.makedirs(os.path.join(data_dir, "empty"))
+        for i in xrange(num_files):
+            with open(os.path.join(data_dir, "file{}".format(i)), "wb") as fileh:
+                fileh.write(chr(ord("a") + i) * size)
+        return data_dir
+
+    def _untar(self, key):
+        data = self.s3_client.uploads[key]
+        if key.endswith(".tgz"):
+            data = zlib.decompress(data, 16 + zlib.MAX_WBITS)
+        with tarfile.open(fileobj=io.BytesIO(data), mode="r:") as tar_handle:
+            return sorted(os.path.basename(name) for name in tar_handle.getnames())
+
+    def test_split_into_chunks(self):
+        members = [("a", 4), ("b", 4), ("c", 12), ("d", 0), ("e", 1)]
+        self.assertEqual([["a", "b"], ["c"], ["d", "e"]], archival.split_into_chunks(members, 10))
+        self.assertEqual([[]], archival.split_into_chunks([], 10))
+
+    def test_list_archive_members(self):
+        data_dir = self._create_files(2, 3)
+        members = archival.list_archive_members([data_dir])
+        self.assertEqual([data_dir, os.path.join(data_dir, "empty")],
+                         [path for (path, size) in members if size == 0])
+        self.assertEqual(6, sum(size for (_, size) in members))
+        self.assertRaises(OSError, archival.list_archive_members,
+                          [os.path.join(self.temp_dir, "no_file")])
+
+    def test_gzip_archive(self):
+        self.archive.compressor = None
+        data_dir = self._create_files(3, 1024)
+        status, message = self.archive.archive_files_to_s3("Data files", data_dir, "bucket",
+                                                           "datafiles/test.tgz")
+        self.assertEqual(0, status, message)
+        self.assertTrue(self.archive.wait_for_uploads())
+        self.assertEqual(["datafiles/test.tgz"], self.s3_client.uploads.keys())
+        self.assertEqual(["data", "empty", "file0", "file1", "file2"],
+                         self._untar("datafiles/test.tgz"))
+
+    def test_chunked_archive(self):
+        self.archive.compressor = None
+        data_dir = self._create_files(3, 1024)
+        with mock.patch.object(archival, "CHUNK_SIZE_BYTES", 2048):
+            status, message = self.archive.archive_files_to_s3("Data files", data_dir, "bucket",
+                                                               "datafiles/test.tgz")
+        self.assertEqual(0, status, message)
+        self.assertTrue(self.archive.wait_for_uploads())
+        self.assertEqual(1, self.archive.files_archived_num())
+        # The first part keeps the requested path.
+        self.assertEqual(["data", "file0", "file1"], self._untar("datafiles/test.tgz"))
+        self.assertEqual(["empty", "file2"], self._untar("datafiles/test.part2.tgz"))
+
+    def test_upload_in_background(self):
+        self.archive.compressor = None
+        upload_started = threading.Event()
+        finish_upload = threading.Event()
+        temp_files = []
+
+        def upload_file(file_name, *args, **kwargs):
+            temp_files.append(file_name)
+            upload_started.set()
+            finish_upload.wait()
+            raise IOError("connection reset")
+
+        self.s3_client.upload_file = upload_file
+        data_dir = self._create_files(3, 1024)
+        status, message = self.archive.archive_files_to_s3("Data files", data_dir, "bucket",
+                                                           "datafiles/test.tgz")
+        # The archive is created before returning, but the upload doesn't need to finish.
+        self.assertEqual(0, status, message)
+        upload_started.wait()
+        self.assertFalse(self.archive.wait_for_uploads(timeout=0))
+
+        finish_upload.set()
+        self.assertTrue(self.archive.wait_for_uploads())
+        self.assertFalse(os.path.exists(temp_files[0]))
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir, "archive.json")))
+
+    def test_writer_start_fails(self):
+        self.archive.compressor = None
+        mkstemp = tempfile.mkstemp
+        temp_files = []
+
+        def fail_second_mkstemp(*args, **kwargs):
+            if temp_files:
+                raise OSError("no space left")
+            (temp_fd, temp_file) = mkstemp(*args, **kwargs)
+            temp_files.append(temp_file)
+            return (temp_fd, temp_file)
+
+        data_dir = self._create_files(3, 1024)
+        with mock.patch.object(archival, "CHUNK_SIZE_BYTES", 2048), \
+             mock.patch.object(archival.tempfile, "mkstemp", side_effect=fail_second_mkstemp):
+            self.assertRaises(OSError, self.archive.archive_files_to_s3, "Data files",
+                              data_dir, "bucket", "datafiles/test.tgz")
+        # The archive that was already being written is removed.
+        self.assertFalse(os.path.exists(temp_files[0]))
+
+    def test_get_part_s3_path(self):
+        self.assertEqual("a/b.tgz", archival.get_part_s3_path("a/b.tgz", 1))
+        self.assertEqual("a/b.part2.tgz", archival.get_part_s3_path("a/b.tgz", 2))
+
+
 if __name__ == "__main__":
     unittest.main()
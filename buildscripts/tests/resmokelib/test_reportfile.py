@@ -0,0 +1,52 @@
+"""Unit tests for the resmokelib.reportfile module."""
+
+from __future__ import absolute_import
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from buildscripts.resmokelib import reportfile
+
+
+class TestCombineFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write_report(self, name, statuses):
+        results = [{"test_file": test_file, "status": status, "exit_code": 0, "start": 0,
+                    "end": 1, "elapsed": 1}
+                   for (test_file, status) in statuses]
+        report_file = os.path.join(self.tmp_dir, name)
+        with open(report_file, "w") as fp:
+            json.dump({"results": results, "failures": 0}, fp)
+        return report_file
+
+    def test_combine_shards(self):
+        shard0 = self._write_report("shard0.json", [("a.js", "pass"), ("b.js", "pass")])
+        shard1 = self._write_report("shard1.json", [("c.js", "pass")])
+        (test_report, num_read) = reportfile.combine_files([shard0, shard1])
+        self.assertEqual(2, num_read)
+        self.assertEqual(["a.js", "b.js", "c.js"],
+                         sorted(test_info.test_id for test_info in test_report.test_infos))
+        self.assertEqual(0, reportfile.exit_code(test_report))
+
+    def test_failures(self):
+        shard0 = self._write_report("shard0.json", [("a.js", "pass")])
+        shard1 = self._write_report("shard1.json", [("b.js", "fail")])
+        (test_report, _) = reportfile.combine_files([shard0, shard1])
+        self.assertEqual(31, reportfile.exit_code(test_report))
+
+    def test_missing_file(self):
+        shard0 = self._write_report("shard0.json", [("a.js", "pass")])
+        missing = os.path.join(self.tmp_dir, "shard1.json")
+        with self.assertRaises(IOError):
+            reportfile.combine_files([shard0, missing])
+        (test_report, num_read) = reportfile.combine_files([shard0, missing], ignore_missing=True)
+        self.assertEqual(1, num_read)
+        self.assertEqual(1, len(test_report.test_infos))
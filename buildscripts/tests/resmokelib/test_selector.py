@@ -141,6 +141,9 @@ class MockTestFileExplorer(object):
     def jstest_tags(self, file_path):
         return self.tags.get(file_path, [])
 
+    def load_jstest_tags(self, file_paths):
+        pass
+
     def read_root_file(self, root_file_path):
         return ["build/testA", "build/testB"]
 
@@ -2,6 +2,9 @@
 import logging
 import unittest
 
+import mock
+import pymongo.errors
+
 from buildscripts.resmokelib import errors
 from buildscripts.resmokelib.testing.fixtures import interface
 
@@ -16,6 +19,34 @@ class TestFixture(unittest.TestCase):
         with self.assertRaises(errors.ServerFailure):
             raising_fixture.teardown()
 
+    def test_clean_closes_own_client(self):
+        fixture = UnitTestFixture()
+        client = mock.MagicMock()
+        client.database_names.return_value = ["admin", "test"]
+        client.__getitem__.return_value.command.side_effect = (
+            pymongo.errors.OperationFailure("drop failed"))
+        with mock.patch.object(fixture, "mongo_client", return_value=client):
+            with self.assertRaises(errors.ServerFailure):
+                fixture.clean()
+        client.close.assert_called_once_with()
+
+    def test_clean_keeps_given_client(self):
+        fixture = UnitTestFixture()
+        client = mock.MagicMock()
+        client.database_names.return_value = ["test"]
+        fixture.clean(client)
+        client.__getitem__.assert_called_once_with("test")
+        self.assertFalse(client.close.called)
+
+    def test_clean_write_concern(self):
+        fixture = UnitTestFixture()
+        client = mock.MagicMock()
+        client.database_names.return_value = ["test"]
+        with mock.patch.object(fixture, "get_clean_write_concern", return_value={"w": 3}):
+            fixture.clean(client)
+        client["test"].command.assert_called_once_with(
+            {"dropDatabase": 1, "writeConcern": {"w": 3}})
+
 
 class TestFixtureTeardownHandler(unittest.TestCase):
 
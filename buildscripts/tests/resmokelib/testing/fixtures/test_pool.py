@@ -0,0 +1,101 @@
+"""Unit tests for the resmokelib.testing.fixtures.pool module."""
+
+from __future__ import absolute_import
+
+import logging
+import unittest
+
+import mock
+
+from buildscripts.resmokelib import errors
+from buildscripts.resmokelib.logging import loggers
+from buildscripts.resmokelib.testing.fixtures import interface
+from buildscripts.resmokelib.testing.fixtures import pool
+
+
+class TestFixturePool(unittest.TestCase):
+    def setUp(self):
+        self.pool = pool.FixturePool(logging.getLogger("pool_unittests"))
+        self.key = pool.FixturePool.make_key({"class": "MongoDFixture", "mongod_options": {}})
+        patcher = mock.patch.object(interface.Fixture, "clean", autospec=True)
+        self.clean_fixture = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_make_key_is_normalized(self):
+        self.assertEqual(pool.FixturePool.make_key({"a": 1, "b": {"c": 2, "d": 3}}),
+                         pool.FixturePool.make_key({"b": {"d": 3, "c": 2}, "a": 1}))
+
+    def test_acquire_empty(self):
+        self.assertIsNone(self.pool.acquire(self.key, 0))
+
+    def test_release_and_acquire(self):
+        fixture = PoolUnitTestFixture(job_num=0)
+        self.assertTrue(self.pool.release(self.key, fixture))
+        self.assertFalse(fixture.torn_down)
+
+        self.assertIsNone(self.pool.acquire(self.key, 1))
+        self.assertIs(fixture, self.pool.acquire(self.key, 0, build_id="build1"))
+        self.clean_fixture.assert_called_once_with(fixture)
+        fixture.logger.set_build_id.assert_called_once_with("build1")
+        # The fixture is no longer in the pool once it has been acquired.
+        self.assertIsNone(self.pool.acquire(self.key, 0))
+
+    def test_acquire_different_key(self):
+        fixture = PoolUnitTestFixture(job_num=0)
+        self.pool.release(self.key, fixture)
+        self.assertIsNone(self.pool.acquire(pool.FixturePool.make_key({"class": "Other"}), 0))
+        self.assertTrue(fixture.torn_down)
+
+    def test_acquire_not_running(self):
+        fixture = PoolUnitTestFixture(job_num=0)
+        self.pool.release(self.key, fixture)
+        fixture.running = False
+        self.assertIsNone(self.pool.acquire(self.key, 0))
+        self.assertTrue(fixture.torn_down)
+
+    def test_acquire_clean_fails(self):
+        fixture = PoolUnitTestFixture(job_num=0)
+        self.pool.release(self.key, fixture)
+        self.clean_fixture.side_effect = errors.ServerFailure("drop failed")
+        self.assertIsNone(self.pool.acquire(self.key, 0))
+        self.assertTrue(fixture.torn_down)
+
+    def test_release_noop_fixture(self):
+        fixture = interface.NoOpFixture(logging.getLogger("fixture_unittests"), 0)
+        self.assertTrue(self.pool.release(self.key, fixture))
+        self.assertIsNone(self.pool.acquire(self.key, 0))
+
+    def test_discard(self):
+        fixture = PoolUnitTestFixture(job_num=0)
+        self.pool.release(self.key, fixture)
+        self.assertTrue(self.pool.discard(fixture))
+        self.assertTrue(fixture.torn_down)
+        self.assertIsNone(self.pool.acquire(self.key, 0))
+
+    def test_teardown_all(self):
+        fixtures = [PoolUnitTestFixture(job_num=0),
+                    PoolUnitTestFixture(job_num=1, should_raise=True)]
+        for fixture in fixtures:
+            self.pool.release(self.key, fixture)
+        self.assertFalse(self.pool.teardown_all())
+        self.assertTrue(all(fixture.torn_down for fixture in fixtures))
+        self.assertIsNone(self.pool.acquire(self.key, 0))
+
+
+class PoolUnitTestFixture(interface.Fixture):
+    def __init__(self, job_num, should_raise=False):
+        logger = mock.Mock(spec=loggers.FixtureLogger)
+        logger.handlers = []
+        interface.Fixture.__init__(self, logger, job_num)
+        self.running = True
+        self.torn_down = False
+        self._should_raise = should_raise
+
+    def is_running(self):
+        return self.running
+
+    def _do_teardown(self):
+        self.torn_down = True
+        self.running = False
+        if self._should_raise:
+            raise errors.ServerFailure("Failed")
@@ -0,0 +1,120 @@
+"""Unit tests for the resmokelib.testing.hooks.cleanup module."""
+
+from __future__ import absolute_import
+
+import logging
+import os
+import unittest
+
+import mock
+import pymongo.errors
+
+from buildscripts.resmokelib import errors
+from buildscripts.resmokelib.logging import loggers
+from buildscripts.resmokelib.testing.hooks import cleanup
+
+
+class TestCleanEveryN(unittest.TestCase):
+    def setUp(self):
+        self.hook_logger = mock.Mock(spec=loggers.HookLogger)
+        self.hook_logger.test_case_logger = logging.getLogger("cleanup_unittests")
+        self.fixture = mock.Mock()
+        self.test = mock.Mock()
+        self.test.short_name.return_value = "test.js"
+        self.report = mock.Mock()
+
+        patcher = mock.patch.dict(os.environ, {"ASAN_OPTIONS": ""})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _make_hook(self, soft_clean):
+        hook = cleanup.CleanEveryN(self.hook_logger, self.fixture, n=2, soft_clean=soft_clean)
+        hook._client_pool = mock.Mock()
+        return hook
+
+    def _run_tests(self, hook, num_tests):
+        for _ in xrange(num_tests):
+            hook.after_test(self.test, self.report)
+
+    def _assert_restarted(self, num_times):
+        self.assertEqual(num_times, self.fixture.teardown.call_count)
+        self.assertEqual(num_times, self.fixture.setup.call_count)
+
+    def test_restart(self):
+        hook = self._make_hook(soft_clean=False)
+        self._run_tests(hook, 1)
+        self._assert_restarted(0)
+        self._run_tests(hook, 3)
+        self._assert_restarted(2)
+        self.assertFalse(self.fixture.clean.called)
+
+    def test_soft_clean(self):
+        hook = self._make_hook(soft_clean=True)
+        hook._server_parameters = {"a:1": {}, "b:1": {}}
+        with mock.patch.object(hook, "_reset_node") as reset_node:
+            self._run_tests(hook, 2)
+        self._assert_restarted(0)
+        self.assertEqual(1, self.fixture.clean.call_count)
+        self.assertEqual(["a:1", "b:1"],
+                         sorted(args[0] for (args, _) in reset_node.call_args_list))
+
+    def test_soft_clean_failure_restarts(self):
+        hook = self._make_hook(soft_clean=True)
+        hook._server_parameters = {"a:1": {}}
+        self.fixture.clean.side_effect = errors.ServerFailure("drop failed")
+        self._run_tests(hook, 2)
+        self._assert_restarted(1)
+
+    def test_soft_clean_without_parameters_restarts(self):
+        hook = self._make_hook(soft_clean=True)
+        hook._client_pool.get.return_value.admin.command.side_effect = (
+            pymongo.errors.AutoReconnect("down"))
+        hook.before_suite(self.report)
+        self._run_tests(hook, 2)
+        self._assert_restarted(1)
+        self.assertFalse(self.fixture.clean.called)
+
+    def test_detect_leaks_disables_soft_clean(self):
+        with mock.patch.dict(os.environ, {"ASAN_OPTIONS": "detect_leaks=1"}):
+            hook = cleanup.CleanEveryN(self.hook_logger, self.fixture, soft_clean=True)
+        self.assertEqual(1, hook.n)
+        self.assertFalse(hook.soft_clean)
+
+    def test_reset_node(self):
+        hook = self._make_hook(soft_clean=True)
+        hook._server_parameters = {"a:1": {
+            "logLevel": 0,
+            "notablescan": False,
+            "failpoint.rsSyncApplyStop": {"mode": 0, "data": {}},
+            "failpoint.dummy": {"mode": 1, "data": {"x": 1}},
+            "failpoint.unchanged": {"mode": 0, "data": {}},
+        }}
+        admin = hook._client_pool.get.return_value.admin
+
+        def command(cmd, value, **kwargs):
+            if cmd == "getParameter":
+                return {"ok": 1, "logLevel": 0, "notablescan": True,
+                        "failpoint.rsSyncApplyStop": {"mode": 1, "data": {}},
+                        "failpoint.dummy": {"mode": 0, "data": {}},
+                        "failpoint.unchanged": {"mode": 0, "data": {}}}
+            return {"ok": 1}
+
+        admin.command.side_effect = command
+        hook._reset_node("a:1", logging.getLogger("cleanup_unittests"))
+
+        admin.command.assert_any_call("configureFailPoint", "rsSyncApplyStop", mode="off",
+                                      data={})
+        admin.command.assert_any_call("configureFailPoint", "dummy", mode="alwaysOn",
+                                      data={"x": 1})
+        admin.command.assert_any_call("setParameter", 1, notablescan=False)
+        set_calls = [args for (args, _) in admin.command.call_args_list
+                     if args[0] in ("setParameter", "configureFailPoint")]
+        self.assertEqual(3, len(set_calls))
+
+    def test_reset_node_unknown_failpoint_mode(self):
+        hook = self._make_hook(soft_clean=True)
+        hook._server_parameters = {"a:1": {"failpoint.dummy": {"mode": 3, "data": {}}}}
+        admin = hook._client_pool.get.return_value.admin
+        admin.command.return_value = {"ok": 1, "failpoint.dummy": {"mode": 0, "data": {}}}
+        with self.assertRaises(errors.ServerFailure):
+            hook._reset_node("a:1", logging.getLogger("cleanup_unittests"))
@@ -0,0 +1,219 @@
+"""Unit tests for the resmokelib.testing.hooks.datacheck module."""
+
+from __future__ import absolute_import
+
+import logging
+import unittest
+
+import bson
+import bson.raw_bson
+import mock
+import pymongo.errors
+
+from buildscripts.resmokelib import errors
+from buildscripts.resmokelib.testing.hooks import datacheck
+
+
+def _raw(doc):
+    return bson.raw_bson.RawBSONDocument(bson.BSON.encode(bson.SON(doc)))
+
+
+def _state(host, collections, md5="db-md5", capped=(), stats=None):
+    infos = {}
+    for (name, _) in collections:
+        options = [("capped", True)] if name in capped else []
+        infos[name] = _raw([("name", name), ("type", "collection"), ("options", bson.SON(options))])
+    if stats is None:
+        stats = {name: {"ok": 1, "capped": name in capped, "nindexes": 1, "ns": "test." + name}
+                 for (name, _) in collections}
+    db_hash = {"collections": dict(collections), "md5": md5}
+    return datacheck._NodeDatabaseState(host, db_hash, infos, stats)
+
+
+class TestDBHashCompare(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger("datacheck_unittests")
+        self.checker = datacheck.DBHashChecker(mock.Mock(), {})
+        patcher = mock.patch.object(self.checker, "_dump_collection_diff")
+        self.dump_collection_diff = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _dumped(self):
+        return [args[3] for (args, _) in self.dump_collection_diff.call_args_list]
+
+    def test_same(self):
+        primary = _state("a", [("c1", "h1"), ("c2", "h2")])
+        secondary = _state("b", [("c1", "h1"), ("c2", "h2")])
+        self.assertTrue(self.checker.compare("test", primary, secondary, self.logger))
+        self.assertEqual([], self._dumped())
+
+    def test_different_collection_hash(self):
+        primary = _state("a", [("c1", "h1"), ("c2", "h2")])
+        secondary = _state("b", [("c1", "h1"), ("c2", "other")])
+        self.assertFalse(self.checker.compare("test", primary, secondary, self.logger))
+        self.assertEqual(["c2"], self._dumped())
+
+    def test_capped_collection_hash_is_ignored(self):
+        primary = _state("a", [("c1", "h1"), ("capped", "h2")], capped=["capped"])
+        secondary = _state("b", [("c1", "h1"), ("capped", "other")], md5="other",
+                           capped=["capped"])
+        self.assertTrue(self.checker.compare("test", primary, secondary, self.logger))
+
+    def test_different_database_hash(self):
+        primary = _state("a", [("c1", "h1")])
+        secondary = _state("b", [("c1", "h1")], md5="other")
+        self.assertFalse(self.checker.compare("test", primary, secondary, self.logger))
+        self.assertEqual([], self._dumped())
+
+    def test_missing_collection(self):
+        primary = _state("a", [("c1", "h1"), ("c2", "h2")])
+        secondary = _state("b", [("c1", "h1")], md5="other")
+        self.assertFalse(self.checker.compare("test", primary, secondary, self.logger))
+        self.assertEqual(["c2"], self._dumped())
+
+    def test_different_options(self):
+        primary = _state("a", [("c1", "h1")])
+        secondary = _state("b", [("c1", "h1")])
+        secondary.collection_infos["c1"] = _raw([("name", "c1"), ("type", "collection"),
+                                                 ("options", {"validator": {"a": 1}})])
+        self.assertFalse(self.checker.compare("test", primary, secondary, self.logger))
+        self.assertEqual(["c1"], self._dumped())
+
+    def test_different_stats(self):
+        primary = _state("a", [("c1", "h1")])
+        secondary = _state("b", [("c1", "h1")],
+                           stats={"c1": {"ok": 1, "capped": False, "nindexes": 2, "ns": "test.c1"}})
+        self.assertFalse(self.checker.compare("test", primary, secondary, self.logger))
+        self.assertEqual(["c1"], self._dumped())
+
+
+class TestOplogCompare(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger("datacheck_unittests")
+        self.checker = datacheck.OplogChecker(mock.Mock(), {})
+        patcher = mock.patch.object(self.checker, "_dump_oplog")
+        self.dump_oplog = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _entries(*timestamps):
+        return iter([_raw([("ts", bson.Timestamp(ts, 0)), ("op", "n")])
+                     for ts in reversed(timestamps)])
+
+    def test_matching_oplogs(self):
+        # The second node's oplog was truncated, so only its newest entries can be compared.
+        cursors = [self._entries(1, 2, 3), self._entries(2, 3)]
+        self.checker.compare(["a", "b"], cursors, 0, self.logger)
+        self.assertFalse(self.dump_oplog.called)
+
+    def test_mismatched_oplogs(self):
+        cursors = [self._entries(1, 2, 3), self._entries(1, 3)]
+        with self.assertRaises(errors.TestFailure) as ctx:
+            self.checker.compare(["a", "b"], cursors, 0, self.logger)
+        self.assertIn("non-matching oplog entries", str(ctx.exception))
+        self.assertEqual(2, self.dump_oplog.call_count)
+        self.assertEqual({"ts": {"$lte": bson.Timestamp(3, 0)}},
+                         self.dump_oplog.call_args[1]["query"])
+
+
+class TestValidateDatabase(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger("datacheck_unittests")
+        self.pool = mock.MagicMock()
+        self.db = self.pool.get.return_value.__getitem__.return_value
+        self.db.list_collections.return_value = [{"name": "c1"}, {"name": "c2"}]
+        self.responses = {"c1": {"ok": 1, "valid": True}, "c2": {"ok": 1, "valid": True}}
+        self.db.command.side_effect = lambda cmd, name, full: self.responses[name]
+
+    def _checker(self, test_data=None):
+        checker = datacheck.ValidateChecker(self.pool, test_data or {})
+        patcher = mock.patch.object(checker, "_dump_collection")
+        self.dump_collection = patcher.start()
+        self.addCleanup(patcher.stop)
+        return checker
+
+    def test_valid(self):
+        self.assertTrue(self._checker().validate_database("a", "test", self.logger))
+        self.assertEqual(2, self.db.command.call_count)
+
+    def test_invalid(self):
+        self.responses["c2"] = {"ok": 1, "valid": False}
+        self.assertFalse(self._checker().validate_database("a", "test", self.logger))
+        self.assertEqual("c2", self.dump_collection.call_args[0][1])
+
+    def test_command_failure(self):
+        def command(cmd, name, full):
+            if name == "c1":
+                raise pymongo.errors.OperationFailure("failed", details={"ok": 0})
+            return self.responses[name]
+
+        self.db.command.side_effect = command
+        self.assertFalse(self._checker().validate_database("a", "test", self.logger))
+
+    def test_namespace_not_found(self):
+        self.responses["c1"] = {"ok": 0, "errmsg": "ns not found"}
+        self.assertTrue(self._checker().validate_database("a", "test", self.logger))
+        checker = self._checker({"skipValidationOnNamespaceNotFound": False})
+        self.assertFalse(checker.validate_database("a", "test", self.logger))
+
+    def test_skip_namespaces(self):
+        self.responses["c2"] = {"ok": 1, "valid": False}
+        checker = self._checker({"skipValidationNamespaces": ["test.c2", "other.c1"]})
+        self.assertTrue(checker.validate_database("a", "test", self.logger))
+        self.assertEqual(1, self.db.command.call_count)
+
+
+class TestDiscoverTopology(unittest.TestCase):
+    def setUp(self):
+        self.responses = {}
+        self.pool = mock.Mock()
+        self.pool.get.side_effect = self._client
+
+    def _client(self, host):
+        client = mock.Mock()
+        client.admin.command.side_effect = lambda cmd: self.responses[host][cmd]
+        return client
+
+    def test_standalone(self):
+        self.responses["a:1"] = {"isMaster": {"ismaster": True}}
+        self.assertEqual({"type": datacheck.STANDALONE, "mongod": "a:1"},
+                         datacheck.discover_topology(self.pool, "a:1"))
+
+    def test_replica_set(self):
+        self.responses["a:1"] = {"isMaster": {"setName": "rs", "hosts": ["a:1", "b:1"],
+                                              "passives": ["c:1"]}}
+        self.assertEqual({"type": datacheck.REPLICA_SET, "nodes": ["a:1", "b:1", "c:1"]},
+                         datacheck.discover_topology(self.pool, "a:1"))
+
+    def test_sharded_cluster(self):
+        self.responses["s:1"] = {
+            "isMaster": {"msg": "isdbgrid"},
+            "getShardMap": {"map": {"config": "csrs/c:1,c:2"}},
+            "listShards": {"shards": [{"_id": "shard0", "host": "d:1"},
+                                      {"_id": "shard1", "host": "rs1/e:1,e:2"}]},
+        }
+        self.responses["c:1"] = {"isMaster": {"setName": "csrs", "hosts": ["c:1", "c:2"]}}
+        self.responses["d:1"] = {"isMaster": {"ismaster": True}}
+        self.responses["e:1"] = {"isMaster": {"setName": "rs1", "hosts": ["e:1", "e:2"]}}
+        self.assertEqual({
+            "type": datacheck.SHARDED_CLUSTER,
+            "configsvr": {"type": datacheck.REPLICA_SET, "nodes": ["c:1", "c:2"]},
+            "shards": {
+                "shard0": {"type": datacheck.STANDALONE, "mongod": "d:1"},
+                "shard1": {"type": datacheck.REPLICA_SET, "nodes": ["e:1", "e:2"]},
+            },
+        }, datacheck.discover_topology(self.pool, "s:1"))
+
+
+class TestGetTestData(unittest.TestCase):
+    def test_no_shell_options(self):
+        self.assertEqual({}, datacheck._get_test_data(None))
+
+    def test_test_data(self):
+        shell_options = {"global_vars": {"TestData": {"skipValidationOnNamespaceNotFound": False}}}
+        self.assertEqual({"skipValidationOnNamespaceNotFound": False},
+                         datacheck._get_test_data(shell_options))
+
+    def test_auth_is_unsupported(self):
+        with self.assertRaises(ValueError):
+            datacheck._get_test_data({"global_vars": {"TestData": {"auth": True}}})
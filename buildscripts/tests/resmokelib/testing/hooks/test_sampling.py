@@ -0,0 +1,89 @@
+"""Unit tests for the resmokelib.testing.hooks.sampling module."""
+
+from __future__ import absolute_import
+
+import unittest
+
+import mock
+
+from buildscripts.resmokelib.logging import loggers
+from buildscripts.resmokelib.testing.hooks import interface
+from buildscripts.resmokelib.testing.hooks import sampling
+
+
+class _Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestHookSampler(unittest.TestCase):
+    def _decisions(self, sampler, num_tests, failed=()):
+        return [sampler.should_run_after("test%d" % i, i in failed) for i in xrange(num_tests)]
+
+    def test_always_runs_by_default(self):
+        sampler = sampling.HookSampler("CheckReplDBHash", 0, seed=1)
+        self.assertEqual([True] * 20, self._decisions(sampler, 20))
+        self.assertIsNone(sampler.pop_skipped_test())
+
+    def test_probability_is_reproducible(self):
+        decisions = self._decisions(
+            sampling.HookSampler("CheckReplDBHash", 0, seed=1, probability=0.5), 100)
+        self.assertEqual(decisions, self._decisions(
+            sampling.HookSampler("CheckReplDBHash", 0, seed=1, probability=0.5), 100))
+        self.assertNotEqual(decisions, self._decisions(
+            sampling.HookSampler("CheckReplDBHash", 1, seed=1, probability=0.5), 100))
+        self.assertTrue(30 < sum(decisions) < 70)
+
+    def test_skipped_last_test(self):
+        sampler = sampling.HookSampler("CheckReplDBHash", 0, seed=1, probability=0.5)
+        decisions = self._decisions(sampler, 100)
+        last_skipped = max(i for (i, decision) in enumerate(decisions) if not decision)
+        if decisions[-1]:
+            self.assertIsNone(sampler.pop_skipped_test())
+        else:
+            self.assertEqual("test%d" % last_skipped, sampler.pop_skipped_test())
+            self.assertIsNone(sampler.pop_skipped_test())
+
+    def test_runs_after_failures(self):
+        sampler = sampling.HookSampler("CheckReplDBHash", 0, seed=1, probability=0.01,
+                                       run_after_failures=3)
+        decisions = self._decisions(sampler, 10, failed=[2])
+        self.assertEqual([True, True, True, True], decisions[2:6])
+
+        sampler.record_call(1.0, success=False)
+        self.assertEqual([True, True, True], self._decisions(sampler, 3))
+
+    def test_time_budget(self):
+        clock = _Clock()
+        sampler = sampling.HookSampler("ValidateCollections", 0, seed=1, max_time_fraction=0.5,
+                                       clock=clock)
+        clock.now = 10
+        self.assertTrue(sampler.should_run_after("test0", False))
+        sampler.record_call(6, success=True)
+        self.assertFalse(sampler.should_run_after("test1", False))
+        self.assertTrue(sampler.should_run_after("test2", True))
+        clock.now = 12
+        self.assertTrue(sampler.should_run_after("test3", False))
+
+    def test_invalid_options(self):
+        with self.assertRaises(ValueError):
+            sampling.HookSampler("CheckReplDBHash", 0, seed=1, probability=0)
+        with self.assertRaises(ValueError):
+            sampling.HookSampler("CheckReplDBHash", 0, seed=1, max_time_fraction=2)
+        with self.assertRaises(ValueError):
+            sampling.HookSampler("CheckReplDBHash", 0, seed=1, run_after_failures=-1)
+
+
+class TestMakeHook(unittest.TestCase):
+    def test_sampling_option(self):
+        hook_logger = mock.Mock(spec=loggers.HookLogger)
+        fixture = mock.Mock(job_num=2)
+        hook = interface.make_hook("CleanEveryN", hook_logger, fixture,
+                                   sampling={"probability": 0.5})
+        self.assertEqual(0.5, hook.sampler.probability)
+
+        hook = interface.make_hook("CleanEveryN", hook_logger, fixture)
+        self.assertIsNone(hook.sampler)
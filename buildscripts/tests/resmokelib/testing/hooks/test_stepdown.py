@@ -0,0 +1,100 @@
+"""Unit tests for the resmokelib.testing.hooks.stepdown module."""
+
+from __future__ import absolute_import
+
+import logging
+import unittest
+
+import mock
+import pymongo.errors
+
+from buildscripts.resmokelib import errors
+from buildscripts.resmokelib.testing.hooks import stepdown
+
+
+def _node(port):
+    node = mock.Mock()
+    node.port = port
+    node.get_internal_connection_string.return_value = "localhost:%d" % port
+    return node
+
+
+def _rs_fixture(name, ports):
+    rs_fixture = mock.Mock()
+    rs_fixture.replset_name = name
+    rs_fixture.nodes = [_node(port) for port in ports]
+    return rs_fixture
+
+
+class TestStepdownThread(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger("stepdown_unittests")
+        self.rs_fixtures = [_rs_fixture("rs0", [20000, 20001]), _rs_fixture("rs1", [20010, 20011])]
+        self.thread = stepdown._StepdownThread(self.logger, self.rs_fixtures,
+                                               stepdown_interval_secs=1, stepdown_duration_secs=10)
+
+        patcher = mock.patch.object(stepdown.time, "sleep")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _set_rs_client(self, rs_fixture, primary_port):
+        client = mock.Mock()
+        client.admin.command.return_value = {"ismaster": True}
+        client.primary = ("localhost", primary_port)
+        self.thread._rs_clients[rs_fixture.replset_name] = client
+        return client
+
+    def test_get_primary(self):
+        rs_fixture = self.rs_fixtures[0]
+        self._set_rs_client(rs_fixture, 20001)
+        self.assertIs(rs_fixture.nodes[1], self.thread._get_primary(rs_fixture, timeout_secs=1))
+
+    def test_get_primary_retries_after_stepdown(self):
+        rs_fixture = self.rs_fixtures[0]
+        client = self._set_rs_client(rs_fixture, 20000)
+        client.admin.command.side_effect = [pymongo.errors.AutoReconnect("stepped down"),
+                                            {"ismaster": False}, {"ismaster": True}]
+        self.assertIs(rs_fixture.nodes[0], self.thread._get_primary(rs_fixture, timeout_secs=60))
+        self.assertEqual(3, client.admin.command.call_count)
+
+    def test_get_primary_timeout(self):
+        rs_fixture = self.rs_fixtures[0]
+        client = self._set_rs_client(rs_fixture, 20000)
+        client.admin.command.return_value = {"ismaster": False}
+        with self.assertRaises(errors.ServerFailure):
+            self.thread._get_primary(rs_fixture, timeout_secs=0)
+
+    def test_step_down_all(self):
+        for rs_fixture in self.rs_fixtures:
+            self._set_rs_client(rs_fixture, rs_fixture.nodes[0].port)
+
+        self.thread._step_down_all()
+
+        for rs_fixture in self.rs_fixtures:
+            (primary, secondary) = rs_fixture.nodes
+            primary.mongo_client.return_value.admin.command.assert_called_once_with(
+                stepdown.bson.SON([("replSetStepDown", 10), ("force", True)]))
+            secondary.mongo_client.return_value.admin.command.assert_called_once_with(
+                "replSetStepUp")
+        self.assertEqual({"rs0/localhost:20001": 1, "rs1/localhost:20011": 1},
+                         dict(self.thread._step_up_stats))
+        self.assertTrue(self.thread._is_idle_evt.is_set())
+
+    def test_step_down_all_error_sets_idle(self):
+        for rs_fixture in self.rs_fixtures:
+            self._set_rs_client(rs_fixture, rs_fixture.nodes[0].port)
+        primary = self.rs_fixtures[1].nodes[0]
+        primary.mongo_client.return_value.admin.command.side_effect = (
+            pymongo.errors.OperationFailure("not authorized"))
+
+        with self.assertRaises(pymongo.errors.OperationFailure):
+            self.thread._step_down_all()
+        self.assertTrue(self.thread._is_idle_evt.is_set())
+
+    def test_stop_closes_clients(self):
+        rs_client = self._set_rs_client(self.rs_fixtures[0], 20000)
+        node_client = self.thread._get_node_client(self.rs_fixtures[0].nodes[0])
+        self.thread.start()
+        self.thread.stop()
+        rs_client.close.assert_called_once_with()
+        node_client.close.assert_called_once_with()
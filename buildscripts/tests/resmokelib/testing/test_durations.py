@@ -0,0 +1,96 @@
+"""Unit tests for the resmokelib.testing.durations module."""
+
+from __future__ import absolute_import
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from buildscripts.resmokelib.testing import durations
+
+
+class _MockTestCase(object):
+    def __init__(self, test_name):
+        self.test_name = test_name
+
+    def id(self):
+        return self.test_name
+
+
+class TestTestDurations(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write_report(self, results):
+        report_file = os.path.join(self.tmp_dir, "report%d.json" % len(os.listdir(self.tmp_dir)))
+        with open(report_file, "w") as fp:
+            json.dump({"results": results, "failures": 0}, fp)
+        return report_file
+
+    @staticmethod
+    def _result(test_file, elapsed, status="pass"):
+        return {"test_file": test_file, "status": status, "elapsed": elapsed}
+
+    def test_estimate_default(self):
+        test_durations = durations.TestDurations(default_duration_secs=7)
+        self.assertEqual(7, test_durations.estimate("jstests/core/unknown.js"))
+
+    def test_estimate_average(self):
+        report1 = self._write_report([self._result("a.js", 10)])
+        report2 = self._write_report([self._result("a.js", 20)])
+        test_durations = durations.TestDurations.from_report_files([report1, report2], 0)
+        self.assertEqual(15, test_durations.estimate("a.js"))
+
+    def test_ignores_failed_and_dynamic_tests(self):
+        report = self._write_report([
+            self._result("a.js", 100, status="fail"),
+            self._result("a:CheckReplDBHash", 100),
+        ])
+        test_durations = durations.TestDurations.from_report_files([report], 1)
+        self.assertEqual(1, test_durations.estimate("a.js"))
+        self.assertEqual(1, test_durations.estimate("a:CheckReplDBHash"))
+
+    def test_sort_longest_first(self):
+        report = self._write_report([
+            self._result("short.js", 1),
+            self._result("long.js", 600),
+            self._result("medium.js", 30),
+        ])
+        test_durations = durations.TestDurations.from_report_files([report], 10)
+        test_cases = [_MockTestCase(name)
+                      for name in ("short.js", "new1.js", "medium.js", "long.js", "new2.js")]
+        ordered = [test_case.id() for test_case in test_durations.sort_longest_first(test_cases)]
+        # Tests without history use the default estimate and keep their relative order.
+        self.assertEqual(["long.js", "medium.js", "new1.js", "new2.js", "short.js"], ordered)
+
+    def test_partition_balances_durations(self):
+        test_durations = durations.TestDurations(default_duration_secs=1)
+        for (test_id, elapsed) in [("a.js", 8), ("b.js", 7), ("c.js", 6), ("d.js", 5),
+                                   ("e.js", 4)]:
+            test_durations.add(test_id, elapsed)
+        test_ids = ["a.js", "b.js", "c.js", "d.js", "e.js", "f.js", "g.js"]
+        partitions = test_durations.partition(test_ids, 3)
+        totals = [sum(test_durations.estimate(test_id) for test_id in partition)
+                  for partition in partitions]
+        self.assertEqual([10, 11, 11], totals)
+        self.assertEqual(sorted(test_ids), sorted(sum(partitions, [])))
+
+    def test_partition_is_deterministic(self):
+        test_durations = durations.TestDurations(default_duration_secs=5)
+        test_ids = ["%d.js" % i for i in xrange(20)]
+        partitions = test_durations.partition(test_ids, 4)
+        reversed_partitions = test_durations.partition(list(reversed(test_ids)), 4)
+        self.assertEqual([sorted(partition) for partition in partitions],
+                         [sorted(partition) for partition in reversed_partitions])
+        # Each partition keeps the original order of the tests.
+        for partition in partitions:
+            self.assertEqual(sorted(partition, key=test_ids.index), partition)
+
+    def test_partition_more_partitions_than_tests(self):
+        test_durations = durations.TestDurations(default_duration_secs=5)
+        self.assertEqual([["a.js"], [], []], test_durations.partition(["a.js"], 3))
@@ -0,0 +1,67 @@
+"""Unit tests for the resmokelib.testing.history module."""
+
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from buildscripts.resmokelib.testing import history
+
+
+class TestTestHistoryStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = history.TestHistoryStore(os.path.join(self.tmp_dir, "build", "history.db"))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def _record(self, test_id, duration, status="pass", suite="core"):
+        self.store.record(test_id, suite, "MongoDFixture", "linux-64", status, 0.0, duration)
+
+    def test_percentile_no_history(self):
+        self.assertIsNone(self.store.percentile("a.js", "core", 50))
+
+    def test_percentile(self):
+        for duration in xrange(1, 21):
+            self._record("a.js", float(duration))
+        self._record("a.js", 1000.0, status="fail")
+        self._record("b.js", 500.0)
+
+        self.assertEqual(1.0, self.store.percentile("a.js", "core", 0))
+        self.assertEqual(10.0, self.store.percentile("a.js", "core", 50))
+        self.assertEqual(19.0, self.store.percentile("a.js", "core", 95))
+        self.assertEqual(20.0, self.store.percentile("a.js", "core", 100))
+        self.assertEqual(1000.0, self.store.percentile("a.js", "core", 50, status="fail"))
+
+    def test_all_percentiles(self):
+        for duration in (3.0, 1.0, 2.0):
+            self._record("a.js", duration)
+        self._record("b.js", 5.0)
+        self.assertEqual({"a.js": 2.0, "b.js": 5.0}, self.store.all_percentiles("core", 50))
+
+    def test_percentiles_by_suite(self):
+        self._record("a.js", 1.0)
+        for duration in (30.0, 10.0, 20.0):
+            self._record("a.js", duration, suite="sharding_jscore_passthrough")
+        self._record("b.js", 5.0, suite="sharding_jscore_passthrough")
+
+        self.assertEqual(1.0, self.store.percentile("a.js", "core", 50))
+        self.assertEqual(20.0, self.store.percentile("a.js", "sharding_jscore_passthrough", 50))
+        self.assertEqual({"a.js": 1.0}, self.store.all_percentiles("core", 50))
+        self.assertEqual({"a.js": 20.0, "b.js": 5.0},
+                         self.store.all_percentiles("sharding_jscore_passthrough", 50))
+        self.assertEqual({}, self.store.all_percentiles("other", 50))
+
+    def test_persists_across_instances(self):
+        self._record("a.js", 4.0)
+        self.store.close()
+        self.store = history.TestHistoryStore(os.path.join(self.tmp_dir, "build", "history.db"))
+        self.assertEqual(4.0, self.store.percentile("a.js", "core", 50))
+
+    def test_record_after_close(self):
+        self.store.close()
+        self._record("a.js", 4.0)
@@ -0,0 +1,149 @@
+"""Unit tests for the resmokelib.testing.progress module."""
+
+from __future__ import absolute_import
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from buildscripts.resmokelib.testing import progress
+from buildscripts.resmokelib.utils import queue as _queue
+
+
+class _Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestProgressTracker(unittest.TestCase):
+    def setUp(self):
+        self.clock = _Clock()
+        self.tracker = progress.ProgressTracker(clock=self.clock)
+
+    def test_tests(self):
+        self.tracker.test_started(0, "a.js")
+        self.clock.now += 3
+        snapshot = self.tracker.snapshot()
+        self.assertEqual({"kind": "test", "name": "a.js", "elapsed_secs": 3},
+                         snapshot["jobs"]["0"]["activity"])
+
+        self.tracker.test_finished(0, "a.js")
+        self.tracker.test_started(1, "b.js")
+        self.clock.now += 5
+        self.tracker.test_finished(1, "b.js")
+
+        snapshot = self.tracker.snapshot()
+        self.assertEqual(1, snapshot["jobs"]["0"]["tests_finished"])
+        self.assertIsNone(snapshot["jobs"]["0"]["activity"])
+        self.assertEqual({"name": "a.js", "elapsed_secs": 3}, snapshot["jobs"]["0"]["last_test"])
+        self.assertEqual([{"name": "b.js", "elapsed_secs": 5}, {"name": "a.js", "elapsed_secs": 3}],
+                         snapshot["slowest_tests"])
+        self.assertEqual(8, snapshot["elapsed_secs"])
+
+    def test_slowest_tests_are_bounded(self):
+        for i in xrange(progress._NUM_SLOWEST_TESTS * 2):
+            self.tracker.test_started(0, "%d.js" % i)
+            self.clock.now += i
+            self.tracker.test_finished(0, "%d.js" % i)
+
+        slowest = self.tracker.snapshot()["slowest_tests"]
+        self.assertEqual(progress._NUM_SLOWEST_TESTS, len(slowest))
+        self.assertEqual("%d.js" % (progress._NUM_SLOWEST_TESTS * 2 - 1), slowest[0]["name"])
+
+    def test_hooks_and_fixtures(self):
+        with self.tracker.timing_fixture(0, "setup"):
+            self.clock.now += 10
+        with self.tracker.timing_hook(0, "CleanEveryN", "after_test"):
+            self.clock.now += 2
+            with self.tracker.timing_fixture(0, "teardown"):
+                self.clock.now += 1
+                snapshot = self.tracker.snapshot()
+                self.assertEqual("teardown", snapshot["jobs"]["0"]["activity"]["name"])
+            snapshot = self.tracker.snapshot()
+            self.assertEqual("CleanEveryN.after_test", snapshot["jobs"]["0"]["activity"]["name"])
+        with self.tracker.timing_hook(1, "ValidateCollections", "after_test"):
+            self.clock.now += 4
+
+        snapshot = self.tracker.snapshot()
+        self.assertEqual({"count": 1, "total_secs": 3, "max_secs": 3},
+                         snapshot["hooks"]["CleanEveryN"])
+        self.assertEqual({"count": 1, "total_secs": 4, "max_secs": 4},
+                         snapshot["hooks"]["ValidateCollections"])
+        self.assertEqual({"count": 1, "total_secs": 10, "max_secs": 10},
+                         snapshot["fixtures"]["setup"])
+        self.assertEqual({"count": 1, "total_secs": 1, "max_secs": 1},
+                         snapshot["fixtures"]["teardown"])
+        self.assertEqual(11, snapshot["jobs"]["0"]["fixtures"]["total_secs"])
+        self.assertIsNone(snapshot["jobs"]["0"]["activity"])
+
+    def test_queue_depth(self):
+        self.assertIsNone(self.tracker.snapshot()["queue_depth"])
+        test_queue = _queue.Queue()
+        for item in ["a.js", "b.js", None, None]:
+            test_queue.put(item)
+        self.tracker.set_test_queue(test_queue, num_sentinels=2)
+        self.assertEqual(2, self.tracker.snapshot()["queue_depth"])
+        for _ in xrange(3):
+            test_queue.get_nowait()
+        self.assertEqual(0, self.tracker.snapshot()["queue_depth"])
+
+
+    def test_pipe_throughput(self):
+        with mock.patch.object(progress._pipe, "num_lines_read", return_value=100):
+            tracker = progress.ProgressTracker(clock=self.clock)
+            self.clock.now += 10
+        with mock.patch.object(progress._pipe, "num_lines_read", return_value=300):
+            # Taking a snapshot doesn't change the throughput reported by the next one.
+            for _ in xrange(2):
+                self.assertEqual({"lines": 300, "lines_per_sec": 20.0},
+                                 tracker.snapshot()["pipe"])
+
+
+class TestStatusFileWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_write(self):
+        tracker = progress.ProgressTracker()
+        tracker.test_started(0, "a.js")
+        pathname = os.path.join(self.tmp_dir, "progress.json")
+        writer = progress.StatusFileWriter(tracker, pathname, interval_secs=0.01)
+        writer.start()
+        writer.stop()
+
+        with open(pathname) as fp:
+            snapshot = json.load(fp)
+        self.assertEqual("a.js", snapshot["jobs"]["0"]["activity"]["name"])
+        self.assertEqual(["progress.json"], os.listdir(self.tmp_dir))
+
+    def test_pipe_throughput_since_previous_write(self):
+        clock = _Clock()
+        pathname = os.path.join(self.tmp_dir, "progress.json")
+        with mock.patch.object(progress._pipe, "num_lines_read") as num_lines_read:
+            num_lines_read.return_value = 0
+            tracker = progress.ProgressTracker(clock=clock)
+            writer = progress.StatusFileWriter(tracker, pathname, interval_secs=1)
+
+            clock.now += 10
+            num_lines_read.return_value = 100
+            writer.write()
+            clock.now += 10
+            num_lines_read.return_value = 400
+            writer.write()
+
+            # The tracker's own snapshots still average over the whole invocation.
+            self.assertEqual(20.0, tracker.snapshot()["pipe"]["lines_per_sec"])
+
+        with open(pathname) as fp:
+            snapshot = json.load(fp)
+        self.assertEqual({"lines": 400, "lines_per_sec": 30.0}, snapshot["pipe"])
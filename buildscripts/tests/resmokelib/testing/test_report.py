@@ -0,0 +1,218 @@
+"""Unit tests for the resmokelib.testing.report module."""
+
+from __future__ import absolute_import
+
+import json
+import logging
+import StringIO
+import sys
+import unittest
+
+import mock
+
+from buildscripts.resmokelib import config
+from buildscripts.resmokelib.testing import report
+
+
+def _make_test(test_id):
+    test = mock.Mock()
+    test.id.return_value = test_id
+    test.basename.return_value = test_id
+    test.short_name.return_value = test_id
+    test.as_command.return_value = test_id
+    test.logger = logging.getLogger("report_unittests")
+    test.return_code = 0
+    return test
+
+
+class TestHookTimings(unittest.TestCase):
+    def setUp(self):
+        job_logger = mock.Mock()
+        job_logger.new_test_logger.return_value.url_endpoint = None
+        self.report = report.TestReport(job_logger, config.SuiteOptions.ALL_INHERITED.resolve())
+
+    def _run_test(self, test):
+        self.report.startTest(test)
+        self.report.addSuccess(test)
+        self.report.stopTest(test)
+
+    def test_hook_timings(self):
+        for elapsed_secs in xrange(1, 101):
+            self.report.record_hook("CheckReplDBHash", elapsed_secs)
+        self.report.record_hook("ValidateCollections", 10000)
+        self.report.record_hook("CleanEveryN", 1)
+
+        hook_timings = self.report.get_hook_timings()
+        self.assertEqual(["ValidateCollections", "CheckReplDBHash", "CleanEveryN"],
+                         [hook_name for (hook_name, _) in hook_timings])
+        self.assertEqual({
+            "count": 100,
+            "total_secs": 5050,
+            "max_secs": 100,
+            "p50_secs": 50,
+            "p90_secs": 90,
+            "p99_secs": 99,
+        }, hook_timings[1][1])
+        self.assertEqual(dict(hook_timings), self.report.as_dict()["hooks"])
+
+    def test_hook_overhead_is_attributed_to_test(self):
+        test = _make_test("a.js")
+        self.report.record_hook("CleanEveryN", 1, test=test, before=True)
+        self._run_test(test)
+        self.report.record_hook("CheckReplDBHash", 2, test=test)
+        self.report.record_hook("CleanEveryN", 3)
+
+        [result] = self.report.as_dict()["results"]
+        self.assertEqual(3, result["hook_elapsed"])
+
+        restored = report.TestReport.from_dict(self.report.as_dict())
+        self.assertEqual(3, restored.test_infos[0].hook_elapsed)
+
+    def test_repeated_test_overhead(self):
+        test = _make_test("a.js")
+        for _ in xrange(2):
+            self.report.record_hook("CleanEveryN", 5, test=test, before=True)
+            self._run_test(test)
+        self.assertEqual([5, 5], [test_info.hook_elapsed for test_info in self.report.test_infos])
+
+    def test_combine(self):
+        other = report.TestReport(mock.Mock(), config.SuiteOptions.ALL_INHERITED.resolve())
+        self.report.record_hook("CheckReplDBHash", 1)
+        other.record_hook("CheckReplDBHash", 2)
+        other.record_hook("ValidateCollections", 4)
+
+        combined = report.TestReport.combine(self.report, other)
+        self.assertEqual({"CheckReplDBHash": [1, 2], "ValidateCollections": [4]},
+                         combined.hook_durations)
+
+    def test_from_dict_restores_hooks(self):
+        for elapsed_secs in xrange(1, 101):
+            self.report.record_hook("CheckReplDBHash", elapsed_secs)
+
+        restored = report.TestReport.from_dict(self.report.as_dict())
+        self.assertEqual(self.report.get_hook_timings(), restored.get_hook_timings())
+
+    def test_combine_restored_hooks(self):
+        for elapsed_secs in xrange(1, 101):
+            self.report.record_hook("CheckReplDBHash", elapsed_secs)
+        restored = report.TestReport.from_dict(self.report.as_dict())
+
+        other = report.TestReport(mock.Mock(), config.SuiteOptions.ALL_INHERITED.resolve())
+        other.record_hook("CheckReplDBHash", 200)
+        other.record_hook("CheckReplDBHash", 400)
+        other.record_hook("ValidateCollections", 4)
+
+        combined = report.TestReport.combine(restored, other)
+        hook_timings = dict(combined.get_hook_timings())
+        timings = hook_timings["CheckReplDBHash"]
+        self.assertEqual((102, 5650, 400),
+                         (timings["count"], timings["total_secs"], timings["max_secs"]))
+        # The percentiles are weighted by the number of calls of each report.
+        self.assertAlmostEqual((50 * 100 + 200 * 2) / 102.0, timings["p50_secs"])
+        self.assertEqual(1, hook_timings["ValidateCollections"]["count"])
+
+    def test_reset(self):
+        test = _make_test("a.js")
+        self.report.record_hook("CheckReplDBHash", 1)
+        self.report.record_hook("CleanEveryN", 1, test=test, before=True)
+        self.report.reset()
+        self.assertEqual([], self.report.get_hook_timings())
+        self._run_test(test)
+        self.assertEqual(0, self.report.test_infos[0].hook_elapsed)
+
+
+class TestStatusCounters(unittest.TestCase):
+    def setUp(self):
+        job_logger = mock.Mock()
+        job_logger.new_test_logger.return_value.url_endpoint = None
+        self.report = report.TestReport(job_logger, config.SuiteOptions.ALL_INHERITED.resolve())
+
+    def _run_test(self, test, outcome):
+        self.report.startTest(test)
+        if outcome == "pass":
+            self.report.addSuccess(test)
+        else:
+            try:
+                raise AssertionError("%s failed" % (test.id()))
+            except AssertionError:
+                exc_info = sys.exc_info()
+            if outcome == "fail":
+                self.report.addFailure(test, exc_info)
+            else:
+                self.report.addError(test, exc_info)
+        self.report.stopTest(test)
+
+    def _assert_counters(self, report_to_check, succeeded, failed, errored, interrupted):
+        self.assertEqual((succeeded, failed, errored, interrupted),
+                         (report_to_check.num_succeeded, report_to_check.num_failed,
+                          report_to_check.num_errored, report_to_check.num_interrupted))
+        self.assertEqual((succeeded, failed, errored, interrupted),
+                         (len(report_to_check.get_successful()), len(report_to_check.get_failed()),
+                          len(report_to_check.get_errored()),
+                          len(report_to_check.get_interrupted())))
+
+    def test_counters(self):
+        self._run_test(_make_test("a.js"), "pass")
+        self._run_test(_make_test("b.js"), "fail")
+        self._run_test(_make_test("c.js"), "error")
+        self._assert_counters(self.report, 1, 1, 1, 0)
+
+        self.report.setFailure(_make_test("a.js"))
+        self._assert_counters(self.report, 0, 2, 1, 0)
+        self.report.setError(_make_test("b.js"))
+        self._assert_counters(self.report, 0, 1, 2, 0)
+
+    def test_repeated_test_uses_latest_run(self):
+        test = _make_test("a.js")
+        self._run_test(test, "fail")
+        self._run_test(test, "pass")
+        self.report.record_hook("CheckReplDBHash", 2, test=test)
+
+        (first, second) = self.report.test_infos
+        self.assertEqual(("fail", 0), (first.status, first.hook_elapsed))
+        self.assertEqual(("pass", 2), (second.status, second.hook_elapsed))
+        self._assert_counters(self.report, 1, 1, 0, 0)
+
+    def test_unknown_test(self):
+        with self.assertRaises(ValueError):
+            self.report.setFailure(_make_test("a.js"))
+
+    def test_combine_interrupted(self):
+        self._run_test(_make_test("a.js"), "pass")
+        self.report.startTest(_make_test("b.js"))
+
+        combined = report.TestReport.combine(self.report)
+        self._assert_counters(combined, 1, 0, 0, 1)
+        # The running test isn't modified by combining the reports.
+        self.assertIsNone(self.report.test_infos[1].status)
+        self.assertEqual("timeout", combined.test_infos[1].status)
+
+        restored = report.TestReport.from_dict(combined.as_dict())
+        self.assertEqual(2, len(restored.test_infos))
+        self.assertEqual(1, restored.num_succeeded)
+
+    def test_write_json(self):
+        self._run_test(_make_test("a.js"), "pass")
+        self._run_test(_make_test("b.js"), "fail")
+        self.report.record_hook("CheckReplDBHash", 1)
+
+        fp = StringIO.StringIO()
+        self.report.write_json(fp, extra_fields={"progress": {"jobs": {}}})
+        report_dict = self.report.as_dict()
+        report_dict["progress"] = {"jobs": {}}
+        self.assertEqual(report_dict, json.loads(fp.getvalue()))
+
+    def test_write_json_empty(self):
+        fp = StringIO.StringIO()
+        self.report.write_json(fp)
+        self.assertEqual(self.report.as_dict(), json.loads(fp.getvalue()))
+
+    def test_test_info_copy(self):
+        test_info = report._TestInfo("a.js", dynamic=False)
+        test_info.status = "pass"
+        test_info.hook_elapsed = 1.5
+        copied = test_info.copy()
+        self.assertEqual(("a.js", "pass", 1.5),
+                         (copied.test_id, copied.status, copied.hook_elapsed))
+        with self.assertRaises(AttributeError):
+            test_info.unknown = 1
@@ -0,0 +1,93 @@
+"""Unit tests for the resmokelib.testing.testcases.jstest module."""
+
+from __future__ import absolute_import
+
+import logging
+import unittest
+
+import mock
+
+from buildscripts.resmokelib.testing.testcases import jstest
+
+
+class _FakeProcess(object):
+    def __init__(self, return_code, num_polls):
+        self.pid = None
+        self.return_code = return_code
+        self.num_polls = num_polls
+        self.started = False
+        self.stopped = False
+
+    def as_command(self):
+        return "mongo test.js"
+
+    def start(self):
+        self.started = True
+        self.pid = 1
+
+    def poll(self):
+        if self.stopped:
+            return -15
+        self.num_polls -= 1
+        return self.return_code if self.num_polls <= 0 else None
+
+    def stop(self):
+        self.stopped = True
+
+    def wait(self):
+        return self.poll()
+
+
+class TestJSTestCaseMultipleClients(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.Logger("jstest_unittests")
+        self.logger.new_test_thread_logger = (
+            lambda test_kind, thread_id: logging.Logger("jstest_unittests." + thread_id))
+
+        self.processes = []
+        patcher = mock.patch.object(jstest._SingleJSTestCase, "_make_process",
+                                    side_effect=lambda: self.processes.pop(0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = mock.patch.object(jstest.time, "sleep")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _make_test_case(self, processes, **kwargs):
+        self.processes = list(processes)
+        test_case = jstest.JSTestCase(self.logger, "test.js", **kwargs)
+        test_case.fixture = mock.Mock()
+        test_case.num_clients = len(processes)
+        test_case.test_case_template.shell_options = {"global_vars": {"TestData": {}}}
+        return test_case
+
+    def test_all_succeed(self):
+        processes = [_FakeProcess(0, 3), _FakeProcess(0, 1), _FakeProcess(0, 2)]
+        test_case = self._make_test_case(processes)
+        test_case.run_test()
+        self.assertEqual(0, test_case.return_code)
+        for process in processes:
+            self.assertTrue(process.started)
+
+    def test_fail_fast(self):
+        processes = [_FakeProcess(0, 10), _FakeProcess(3, 1), _FakeProcess(0, 10)]
+        test_case = self._make_test_case(processes, client_start_interval_ms=1000, fail_fast=True)
+        with mock.patch.object(jstest.time, "time", side_effect=range(100)):
+            with self.assertRaises(test_case.failureException):
+                test_case.run_test()
+        self.assertEqual(3, test_case.return_code)
+        self.assertTrue(processes[0].stopped)
+        self.assertFalse(processes[1].stopped)
+        # The last client hadn't been started yet when the second one failed.
+        self.assertFalse(processes[2].started)
+
+    def test_without_fail_fast(self):
+        processes = [_FakeProcess(0, 10), _FakeProcess(3, 1), _FakeProcess(4, 2)]
+        test_case = self._make_test_case(processes)
+        with self.assertRaises(test_case.failureException):
+            test_case.run_test()
+        self.assertEqual(3, test_case.return_code)
+        for process in processes:
+            self.assertTrue(process.started)
+            self.assertFalse(process.stopped)
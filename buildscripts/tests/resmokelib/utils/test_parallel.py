@@ -0,0 +1,73 @@
+"""Unit tests for the resmokelib.utils.parallel module."""
+
+from __future__ import absolute_import
+
+import threading
+import time
+import unittest
+
+from buildscripts.resmokelib.utils import parallel
+
+
+class TestRunConcurrently(unittest.TestCase):
+    def test_no_funcs(self):
+        self.assertEqual([], parallel.run_concurrently([]))
+
+    def test_results_in_order(self):
+        funcs = [lambda i=i: i * i for i in xrange(5)]
+        self.assertEqual([0, 1, 4, 9, 16], parallel.run_concurrently(funcs))
+
+    def test_runs_concurrently(self):
+        # Each function waits for all of the others to have started, which would deadlock if they
+        # were called one after another.
+        barrier_count = [0]
+        lock = threading.Condition()
+
+        def wait_for_others():
+            with lock:
+                barrier_count[0] += 1
+                lock.notify_all()
+                while barrier_count[0] < 3:
+                    lock.wait(10)
+                return barrier_count[0]
+
+        self.assertEqual([3, 3, 3], parallel.run_concurrently([wait_for_others] * 3))
+
+    def test_reraises_first_exception(self):
+        called = []
+
+        def succeed():
+            called.append(True)
+
+        def fail(msg):
+            raise ValueError(msg)
+
+        with self.assertRaisesRegexp(ValueError, "first"):
+            parallel.run_concurrently([succeed, lambda: fail("first"), lambda: fail("second")])
+        self.assertEqual([True], called)
+
+    def test_max_workers(self):
+        lock = threading.Lock()
+        running = [0]
+        max_running = [0]
+
+        def func(i):
+            with lock:
+                running[0] += 1
+                max_running[0] = max(max_running[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            return i
+
+        funcs = [lambda i=i: func(i) for i in xrange(10)]
+        self.assertEqual(range(10), parallel.run_concurrently(funcs, max_workers=3))
+        self.assertLessEqual(max_running[0], 3)
+
+    def test_max_workers_reraises_first_exception(self):
+        def fail(msg):
+            raise ValueError(msg)
+
+        funcs = [lambda: None, lambda: fail("first"), lambda: fail("second"), lambda: None]
+        with self.assertRaisesRegexp(ValueError, "first"):
+            parallel.run_concurrently(funcs, max_workers=2)
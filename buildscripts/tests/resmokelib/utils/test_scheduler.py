@@ -0,0 +1,119 @@
+"""Unit tests for the resmokelib.utils.scheduler module."""
+
+from __future__ import absolute_import
+
+import threading
+import time
+import unittest
+
+from buildscripts.resmokelib.utils import scheduler
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.scheduler = scheduler.Scheduler(lambda: self.now)
+        self.calls = []
+
+    def _enter(self, delay, name, key=None):
+        return self.scheduler.enter(delay, self.calls.append, (name, ), key=key)
+
+    def test_run_pending_in_order(self):
+        self._enter(2, "c")
+        self._enter(1, "a")
+        self._enter(1, "b")
+        self._enter(5, "later")
+
+        self.now = 2.0
+        self.assertEqual(3, self.scheduler.run_pending())
+        self.assertEqual(["a", "b", "c"], self.calls)
+        self.assertFalse(self.scheduler.empty())
+
+        self.now = 5.0
+        self.scheduler.run_pending()
+        self.assertEqual(["a", "b", "c", "later"], self.calls)
+        self.assertTrue(self.scheduler.empty())
+
+    def test_cancel(self):
+        event = self._enter(1, "canceled")
+        self._enter(2, "b")
+        self.assertTrue(self.scheduler.cancel(event))
+        self.assertFalse(self.scheduler.cancel(event))
+        self.assertEqual(1, len(self.scheduler.queue))
+
+        self.now = 2.0
+        self.scheduler.run_pending()
+        self.assertEqual(["b"], self.calls)
+        self.assertTrue(self.scheduler.empty())
+
+    def test_cancel_after_run(self):
+        event = self._enter(0, "a")
+        self.scheduler.run_pending()
+        self.assertFalse(self.scheduler.cancel(event))
+
+    def test_cancel_compacts_queue(self):
+        events = [self._enter(1, i) for i in xrange(scheduler._MIN_CANCELED_TO_COMPACT * 2)]
+        for event in events[1:]:
+            self.scheduler.cancel(event)
+        self.assertLess(len(self.scheduler._queue), scheduler._MIN_CANCELED_TO_COMPACT)
+
+        self.now = 1.0
+        self.scheduler.run_pending()
+        self.assertEqual([0], self.calls)
+
+    def test_coalesce_same_key(self):
+        first = self._enter(1, "first", key="handler")
+        self.assertIs(first, self._enter(5, "second", key="handler"))
+        sooner = self._enter(0, "sooner", key="handler")
+        self.assertIsNot(first, sooner)
+        self.assertFalse(first.is_pending())
+        self._enter(0, "other", key="other handler")
+
+        self.now = 10.0
+        self.scheduler.run_pending()
+        self.assertEqual(["sooner", "other"], self.calls)
+
+        # A new event can be scheduled once the previous one ran.
+        self._enter(0, "again", key="handler")
+        self.scheduler.run_pending()
+        self.assertEqual(["sooner", "other", "again"], self.calls)
+
+    def test_action_can_schedule(self):
+        self.scheduler.enter(0, lambda: self._enter(0, "nested"))
+        self.scheduler.run_pending()
+        self.scheduler.run_pending()
+        self.assertEqual(["nested"], self.calls)
+
+
+class TestSchedulerWait(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = scheduler.Scheduler(time.time)
+
+    def _wait_in_thread(self):
+        thread = threading.Thread(target=self.scheduler.wait)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def test_wait_until_due(self):
+        self.scheduler.enter(0.05, lambda: None)
+        start = time.time()
+        self.scheduler.wait()
+        self.assertGreaterEqual(time.time() - start, 0.04)
+
+    def test_earlier_event_ends_wait(self):
+        self.scheduler.enter(60, lambda: None)
+        thread = self._wait_in_thread()
+        self.scheduler.enter(0, lambda: None)
+        thread.join(10)
+        self.assertFalse(thread.is_alive())
+
+    def test_interrupt(self):
+        thread = self._wait_in_thread()
+        self.scheduler.interrupt()
+        thread.join(10)
+        self.assertFalse(thread.is_alive())
+
+    def test_interrupt_before_wait(self):
+        self.scheduler.interrupt()
+        self.scheduler.wait()
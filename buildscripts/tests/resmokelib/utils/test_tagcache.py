@@ -0,0 +1,76 @@
+"""Unit tests for the resmokelib.utils.tagcache module."""
+
+from __future__ import absolute_import
+
+import os
+import os.path
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from buildscripts.resmokelib.utils import jscomment
+from buildscripts.resmokelib.utils import tagcache
+
+
+class TestTagCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.tmp_dir, "build", "tags.json")
+        self.cache = tagcache.TagCache(self.cache_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write_test(self, name, contents):
+        pathname = os.path.join(self.tmp_dir, name)
+        with open(pathname, "w") as fp:
+            fp.write(contents)
+        return pathname
+
+    def test_get_tags(self):
+        test_a = self._write_test("a.js", "/**\n * @tags: [tag1,\n *   'tag2']\n */\n")
+        test_b = self._write_test("b.js", "// No tags here.\n")
+        self.assertEqual(["tag1", "tag2"], self.cache.get_tags(test_a))
+        self.assertEqual([], self.cache.get_tags(test_b))
+        self.assertTrue(os.path.isfile(self.cache_file))
+
+    def test_last_definition_is_used(self):
+        test_a = self._write_test("a.js", "// @tags: [tag1]\n// @tags: [tag2]\n// @tags: none\n")
+        self.assertEqual(["tag2"], self.cache.get_tags(test_a))
+
+    def test_persists_across_instances(self):
+        test_a = self._write_test("a.js", "// @tags: [tag1]\n")
+        self.cache.update([test_a])
+
+        cache = tagcache.TagCache(self.cache_file)
+        with mock.patch.object(jscomment, "get_tags") as get_tags:
+            self.assertEqual(["tag1"], cache.get_tags(test_a))
+        self.assertFalse(get_tags.called)
+
+    def test_modified_file(self):
+        test_a = self._write_test("a.js", "// @tags: [tag1]\n")
+        self.assertEqual(["tag1"], self.cache.get_tags(test_a))
+        self._write_test("a.js", "// @tags: [tag1, tag2]\n")
+        self.assertEqual(["tag1", "tag2"], self.cache.get_tags(test_a))
+
+    def test_update_many(self):
+        tests = [self._write_test("%d.js" % i, "// @tags: [tag%d]\n" % i) for i in xrange(10)]
+        self.cache.update(tests)
+        with mock.patch.object(jscomment, "get_tags") as get_tags:
+            for (i, test) in enumerate(tests):
+                self.assertEqual(["tag%d" % i], self.cache.get_tags(test))
+        self.assertFalse(get_tags.called)
+
+    def test_corrupt_cache_file(self):
+        os.makedirs(os.path.dirname(self.cache_file))
+        with open(self.cache_file, "w") as fp:
+            fp.write("{not json")
+        test_a = self._write_test("a.js", "// @tags: [tag1]\n")
+        self.assertEqual(["tag1"], self.cache.get_tags(test_a))
+
+    def test_invalid_tags(self):
+        test_a = self._write_test("a.js", "// @tags: [tag1, {]\n")
+        with self.assertRaises(ValueError):
+            self.cache.get_tags(test_a)
@@ -0,0 +1,104 @@
+"""Unit tests for the buildscripts.hang_analyzer module."""
+
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import mock
+
+from buildscripts import hang_analyzer
+
+
+class TestGetMaxConcurrentDumps(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(hang_analyzer.multiprocessing, "cpu_count", return_value=8)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unknown_sizes(self):
+        self.assertEqual(8, hang_analyzer.get_max_concurrent_dumps([None, None], 100))
+        self.assertEqual(8, hang_analyzer.get_max_concurrent_dumps([10, 20], None))
+
+    def test_free_space(self):
+        self.assertEqual(3, hang_analyzer.get_max_concurrent_dumps([10, None, 30], 100))
+        self.assertEqual(8, hang_analyzer.get_max_concurrent_dumps([10], 1000))
+
+    def test_at_least_one(self):
+        self.assertEqual(1, hang_analyzer.get_max_concurrent_dumps([1000], 10))
+
+
+class TestDumpQuota(unittest.TestCase):
+    def setUp(self):
+        self.dump_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dump_dir)
+
+        patcher = mock.patch.object(hang_analyzer, "get_free_disk_space", return_value=None)
+        self.get_free_disk_space = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _write_dump(self, file_name, size):
+        with open(os.path.join(self.dump_dir, file_name), "wb") as dump_file:
+            dump_file.write("x" * size)
+
+    def test_existing_dumps(self):
+        quota = hang_analyzer.DumpQuota(100, "core", self.dump_dir)
+        self._write_dump("dump_mongod.1.core", 100)
+        self._write_dump("other.txt", 1000)
+        self.assertTrue(quota.reserve("dump_mongod.2.core", 50))
+
+        quota = hang_analyzer.DumpQuota(99, "core", self.dump_dir)
+        self.assertFalse(quota.reserve("dump_mongod.3.core", 50))
+
+    def test_dumps_in_progress(self):
+        quota = hang_analyzer.DumpQuota(100, "core", self.dump_dir)
+        self.assertTrue(quota.reserve("dump_mongod.1.core", 60))
+        self.assertTrue(quota.reserve("dump_mongod.2.core", 60))
+        self.assertFalse(quota.reserve("dump_mongod.3.core", 60))
+
+        # A dump in progress counts its reservation rather than the partially written file.
+        self._write_dump("dump_mongod.1.core", 10)
+        quota.release("dump_mongod.2.core")
+        self.assertTrue(quota.reserve("dump_mongod.3.core", 60))
+
+        # A complete dump counts its actual size.
+        quota.release("dump_mongod.1.core")
+        quota.release("dump_mongod.3.core")
+        self._write_dump("dump_mongod.1.core", 101)
+        self.assertFalse(quota.reserve("dump_mongod.4.core", 60))
+
+    def test_free_disk_space(self):
+        self.get_free_disk_space.return_value = 100
+        quota = hang_analyzer.DumpQuota(1000, "core", self.dump_dir)
+        self.assertTrue(quota.reserve("dump_mongod.1.core", 60))
+        self.assertFalse(quota.reserve("dump_mongod.2.core", 60))
+
+        # The part of a dump in progress that was already written is no longer free.
+        self._write_dump("dump_mongod.1.core", 20)
+        self.get_free_disk_space.return_value = 80
+        self.assertFalse(quota.reserve("dump_mongod.2.core", 60))
+        self.assertTrue(quota.reserve("dump_mongod.2.core", 40))
+
+    def test_unknown_size(self):
+        self.get_free_disk_space.return_value = 0
+        quota = hang_analyzer.DumpQuota(0, "core", self.dump_dir)
+        self.assertTrue(quota.reserve("dump_mongod.1.core", None))
+
+
+class TestRunConcurrently(unittest.TestCase):
+    def test_runs_all_items(self):
+        lock = threading.Lock()
+        results = []
+
+        def func(item):
+            with lock:
+                results.append(item * 2)
+
+        hang_analyzer.run_concurrently(func, range(10), 3)
+        self.assertEqual([item * 2 for item in range(10)], sorted(results))
+
+    def test_no_items(self):
+        hang_analyzer.run_concurrently(None, [], 3)
@@ -0,0 +1,274 @@
+"""Unit tests for the buildscripts.mongosymb module."""
+
+from __future__ import absolute_import
+
+import gzip
+import os
+import shutil
+import stat
+import struct
+import sys
+import tempfile
+import unittest
+
+import mock
+
+from buildscripts import mongosymb
+
+# A stand-in for llvm-symbolizer that appends each request to a log file and makes up a symbol for
+# it. An address ending in "ff" maps to two inlined functions, one ending in "eeee" can't be
+# symbolized, and a request for the file "crash" makes the process exit.
+_FAKE_SYMBOLIZER = """#!%(python)s
+import sys
+while True:
+    line = sys.stdin.readline()
+    if not line:
+        break
+    with open(%(log)r, "a") as log:
+        log.write(line)
+    (_, path, addr) = line.split()
+    if path == "crash":
+        sys.exit(1)
+    if addr.endswith("EEEE"):
+        sys.stdout.write("??\\n??:0:0\\n\\n")
+        sys.stdout.flush()
+        continue
+    if addr.endswith("FF"):
+        sys.stdout.write("inlined_%%s\\ninlined.h:1:2\\n" %% (addr))
+    sys.stdout.write("fn_%%s\\n%%s.cpp:%%d:3\\n\\n" %% (addr, path, int(addr, 16)))
+    sys.stdout.flush()
+"""
+
+
+def _trace_doc(*offsets):
+    return {
+        "backtrace": [{"b": "400000", "o": offset} for offset in offsets],
+        "processInfo": {"somap": [{"b": "400000", "elfType": 2, "buildId": "ABCD"}]},
+    }
+
+
+class TestSymbolizeTraces(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+        self.log_path = os.path.join(self.temp_dir, "requests.log")
+        self.symbolizer_path = os.path.join(self.temp_dir, "llvm-symbolizer")
+        with open(self.symbolizer_path, "w") as symbolizer_file:
+            symbolizer_file.write(_FAKE_SYMBOLIZER % {"python": sys.executable,
+                                                      "log": self.log_path})
+        os.chmod(self.symbolizer_path, stat.S_IRWXU)
+
+        self.resolver = mongosymb.path_dbg_file_resolver("mongod")
+
+    def _requests(self):
+        if not os.path.exists(self.log_path):
+            return []
+        with open(self.log_path) as log:
+            return sorted(line.strip() for line in log)
+
+    def test_symbolize_frames(self):
+        frames = mongosymb.symbolize_frames(_trace_doc("11", "100"), self.resolver,
+                                            symbolizer_path=self.symbolizer_path)
+        self.assertEqual([{"fn": "fn_0x400010", "file": "mongod.cpp", "line": 0x400010,
+                           "column": 3}], frames[0]["symbinfo"])
+        self.assertEqual(0x4000ff, frames[1]["addr"])
+        self.assertEqual(["inlined_0x4000FF", "fn_0x4000FF"],
+                         [sframe["fn"] for sframe in frames[1]["symbinfo"]])
+
+    def test_duplicates_are_symbolized_once(self):
+        pool = mongosymb.symbolizer_pool(self.symbolizer_path, num_processes=2)
+        self.addCleanup(pool.close)
+        traces = mongosymb.symbolize_traces(
+            [_trace_doc("11", "21"), _trace_doc("21", "31")], self.resolver, pool=pool)
+        self.assertEqual(["fn_0x400010", "fn_0x400020"],
+                         [frame["symbinfo"][0]["fn"] for frame in traces[0]])
+        self.assertEqual(["fn_0x400020", "fn_0x400030"],
+                         [frame["symbinfo"][0]["fn"] for frame in traces[1]])
+        self.assertEqual(["CODE mongod 0x400010", "CODE mongod 0x400020", "CODE mongod 0x400030"],
+                         self._requests())
+
+    def test_pool(self):
+        pool = mongosymb.symbolizer_pool(self.symbolizer_path, num_processes=3)
+        self.addCleanup(pool.close)
+        requests = [("mongod", addr) for addr in xrange(1, 501)]
+        results = pool.symbolize(requests)
+        self.assertEqual(["fn_0x%X" % addr for addr in xrange(1, 501)],
+                         [symbinfo[-1]["fn"] for symbinfo in results])
+        # The processes are reused for the next batch.
+        self.assertEqual([[{"fn": "fn_0x7", "file": "mongod.cpp", "line": 7, "column": 3}]],
+                         pool.symbolize([("mongod", 7)]))
+
+    def test_pool_replaces_exited_process(self):
+        pool = mongosymb.symbolizer_pool(self.symbolizer_path, num_processes=1)
+        self.addCleanup(pool.close)
+        self.assertRaises(RuntimeError, pool.symbolize, [("crash", 7)])
+        self.assertEqual([[{"fn": "fn_0x7", "file": "mongod.cpp", "line": 7, "column": 3}]],
+                         pool.symbolize([("mongod", 7)]))
+
+    def test_cache(self):
+        cache_dir = os.path.join(self.temp_dir, "cache")
+        dbg_path = os.path.join(self.temp_dir, "mongod")
+        open(dbg_path, "w").close()
+        resolver = mongosymb.path_dbg_file_resolver(dbg_path)
+        first = mongosymb.symbolize_traces([_trace_doc("11")], resolver,
+                                           symbolizer_path=self.symbolizer_path,
+                                           cache_dir=cache_dir)
+        self.assertTrue(os.path.exists(os.path.join(cache_dir, "abcd.symbols.json")))
+
+        second = mongosymb.symbolize_traces([_trace_doc("11", "21")], resolver,
+                                            symbolizer_path=self.symbolizer_path,
+                                            cache_dir=cache_dir)
+        self.assertEqual(first[0][0]["symbinfo"], second[0][0]["symbinfo"])
+        self.assertEqual(["CODE %s 0x400010" % dbg_path, "CODE %s 0x400020" % dbg_path],
+                         self._requests())
+
+    def test_failed_lookups_are_not_cached(self):
+        cache_dir = os.path.join(self.temp_dir, "cache")
+        dbg_path = os.path.join(self.temp_dir, "mongod")
+        open(dbg_path, "w").close()
+        for _ in xrange(2):
+            # The file doesn't exist, or the address can't be symbolized.
+            mongosymb.symbolize_traces([_trace_doc("11")], self.resolver,
+                                       symbolizer_path=self.symbolizer_path,
+                                       cache_dir=cache_dir)
+            mongosymb.symbolize_traces([_trace_doc("eeef")], mongosymb.path_dbg_file_resolver(
+                dbg_path), symbolizer_path=self.symbolizer_path, cache_dir=cache_dir)
+        self.assertFalse(os.path.exists(os.path.join(cache_dir, "abcd.symbols.json")))
+        self.assertEqual(4, len(self._requests()))
+
+
+class TestFindTraceDocs(unittest.TestCase):
+    def test_find_trace_docs(self):
+        text = "\n".join([
+            "2018-01-01T00:00:00.000+0000 I - ----- BEGIN BACKTRACE -----",
+            '2018-01-01T00:00:00.000+0000 I - {"backtrace":[{"b":"1","o":"2"}],'
+            '"processInfo":{"somap":[]}}',
+            '{"backtrace":[{"b":"1",',
+            '{ "backtrace" : [], "processInfo": {"somap": []}} trailing',
+        ])
+        trace_docs = mongosymb.find_trace_docs(text)
+        self.assertEqual([[{"b": "1", "o": "2"}], []],
+                         [trace_doc["backtrace"] for trace_doc in trace_docs])
+
+
+def _make_elf(build_id_hex, debug_info=False):
+    """Returns a minimal 64-bit little-endian ELF file with a .note.gnu.build-id section, and a
+    .debug_info section if 'debug_info' is true.
+    """
+    desc = build_id_hex.decode("hex")
+    note = struct.pack("<III", 4, len(desc), 3) + "GNU\0" + desc
+    names = "\0.note.gnu.build-id\0.shstrtab\0.debug_info\0"
+    num_sections = 4 if debug_info else 3
+    header_size = struct.calcsize("<16sHHIQQQIHHHHHH")
+    section_size = struct.calcsize("<IIQQQQIIQQ")
+    note_offset = header_size + num_sections * section_size
+    names_offset = note_offset + len(note)
+    header = struct.pack("<16sHHIQQQIHHHHHH", "\x7fELF\x02\x01\x01" + "\0" * 9, 2, 62, 1, 0, 0,
+                         header_size, 0, header_size, 0, 0, section_size, num_sections, 2)
+    sections = [
+        struct.pack("<IIQQQQIIQQ", 0, 0, 0, 0, 0, 0, 0, 0, 0, 0),
+        struct.pack("<IIQQQQIIQQ", names.index(".note"), 7, 2, 0, note_offset, len(note), 0, 0, 4,
+                    0),
+        struct.pack("<IIQQQQIIQQ", names.index(".shstrtab"), 3, 0, 0, names_offset, len(names), 0,
+                    0, 1, 0),
+    ]
+    if debug_info:
+        sections.append(struct.pack("<IIQQQQIIQQ", names.index(".debug_info"), 1, 0, 0,
+                                    names_offset, 0, 0, 0, 1, 0))
+    return header + "".join(sections) + note + names
+
+
+class TestDebugFiles(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+    def _write(self, name, contents):
+        path = os.path.join(self.temp_dir, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as out_file:
+            out_file.write(contents)
+        return path
+
+    def test_read_elf_build_id(self):
+        path = self._write("mongod", _make_elf("0123456789abcdef"))
+        self.assertEqual("0123456789abcdef", mongosymb.read_elf_build_id(path))
+        self.assertIsNone(mongosymb.read_elf_build_id(self._write("script.sh", "#!/bin/sh\n")))
+        self.assertEqual(("0123456789abcdef", False), mongosymb.read_elf_info(path))
+        path = self._write("mongod.debug", _make_elf("0123456789abcdef", debug_info=True))
+        self.assertEqual(("0123456789abcdef", True), mongosymb.read_elf_info(path))
+
+    def test_buildid_index_prefers_debug_info(self):
+        for (i, names) in enumerate([("mongod", "mongod.debug"), ("mongod.debug", "mongod")]):
+            build_dir = os.path.join(self.temp_dir, str(i))
+            self._write(os.path.join(build_dir, names[0]), _make_elf("aa11"))
+            debug_path = self._write(os.path.join(build_dir, names[1]),
+                                     _make_elf("aa11", debug_info=True))
+            index = mongosymb.buildid_index()
+            index.add_dir(build_dir)
+            self.assertEqual(debug_path, index.get_path("aa11"))
+
+        # Without debug info, the file named *.debug is preferred.
+        build_dir = os.path.join(self.temp_dir, "stripped")
+        self._write(os.path.join(build_dir, "a"), _make_elf("bb22"))
+        debug_path = self._write(os.path.join(build_dir, "z.debug"), _make_elf("bb22"))
+        index = mongosymb.buildid_index()
+        index.add_dir(build_dir)
+        self.assertEqual(debug_path, index.get_path("bb22"))
+
+    def test_buildid_index(self):
+        mongod = self._write("builds/1/mongod", _make_elf("aa11"))
+        self._write("builds/2/bin/mongos", _make_elf("bb22"))
+        self._write("builds/2/README", "not an ELF file")
+        index_path = os.path.join(self.temp_dir, "index.json")
+
+        index = mongosymb.buildid_index(index_path)
+        index.add_dir(os.path.join(self.temp_dir, "builds"))
+        index.save()
+        self.assertEqual(mongod, index.get_path("AA11"))
+
+        # The saved index is used without reading the unchanged files again.
+        with mock.patch.object(mongosymb, "read_elf_info") as read_elf_info:
+            index = mongosymb.buildid_index(index_path)
+            index.add_dir(os.path.join(self.temp_dir, "builds"))
+        self.assertFalse(read_elf_info.called)
+        self.assertEqual(os.path.join(self.temp_dir, "builds", "2", "bin", "mongos"),
+                         index.get_path("bb22"))
+
+        os.remove(mongod)
+        index.add_dir(os.path.join(self.temp_dir, "builds"))
+        self.assertIsNone(index.get_path("aa11"))
+
+        resolver = mongosymb.path_dbg_file_resolver("guess", index=index)
+        self.assertEqual("guess", resolver.get_dbg_file({"buildId": "AA11"}))
+        self.assertEqual(index.get_path("bb22"), resolver.get_dbg_file({"buildId": "BB22"}))
+
+    def test_debug_file_cache(self):
+        store_dir = os.path.join(self.temp_dir, "store")
+        self._write("store/aa.debug", "a" * 100)
+        with gzip.open(self._write("store/bb.debug.gz", ""), "wb") as gz_file:
+            gz_file.write("b" * 100)
+        self._write("store/cc.debug", "c" * 100)
+        cache_dir = os.path.join(self.temp_dir, "cache")
+
+        resolver = mongosymb.cache_dbg_file_resolver(cache_dir, store_dir,
+                                                     max_size_mb=250.0 / 1024 / 1024)
+        aa_path = resolver.get_dbg_file({"buildId": "AA"})
+        with open(aa_path) as aa_file:
+            self.assertEqual("a" * 100, aa_file.read())
+        os.utime(aa_path, (1, 1))
+        bb_path = resolver.get_dbg_file({"buildId": "BB"})
+        with open(bb_path) as bb_file:
+            self.assertEqual("b" * 100, bb_file.read())
+        os.utime(bb_path, (2, 2))
+
+        # Using 'aa' makes 'bb' the least recently used file, so it is evicted.
+        resolver.get_dbg_file({"buildId": "aa"})
+        resolver.get_dbg_file({"buildId": "cc"})
+        self.assertEqual(["aa.debug", "cc.debug"], sorted(os.listdir(cache_dir)))
+
+        self.assertIsNone(resolver.get_dbg_file({"buildId": "dd"}))
+        self.assertIsNone(resolver.get_dbg_file({}))
+        self.assertEqual(["aa.debug", "cc.debug"], sorted(os.listdir(cache_dir)))